@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-16 21:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitors', '0003_update_is_manual_default'),
+        ('project', '0008_add_backlinks_lockdown'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompetitorStats',
+            fields=[
+                ('target', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='competitors.target')),
+                ('keywords_total', models.IntegerField(default=0, help_text='Keywords tracked for the target')),
+                ('ranked_count', models.IntegerField(default=0, help_text='Keywords where the target ranks in the top 100')),
+                ('rank_sum', models.BigIntegerField(default=0, help_text='Sum of top 100 ranks (average = rank_sum / ranked_count)')),
+                ('top3_count', models.IntegerField(default=0)),
+                ('top10_count', models.IntegerField(default=0)),
+                ('top30_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='competitor_stats', to='project.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project'], name='competitors_project_adc027_idx')],
+            },
+        ),
+    ]
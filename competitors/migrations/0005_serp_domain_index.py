@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-16 21:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitors', '0004_competitor_stats'),
+        ('keywords', '0015_backfill_keyword_rank_url_path'),
+        ('project', '0008_add_backlinks_lockdown'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SerpDomain',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SerpDomainRank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scraped_date', models.DateField()),
+                ('position', models.PositiveSmallIntegerField()),
+                ('domain', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='ranks', to='competitors.serpdomain')),
+                ('keyword', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='serp_domain_ranks', to='keywords.keyword')),
+                ('project', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='serp_domain_ranks', to='project.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'scraped_date', 'domain', 'position'], name='serp_domain_rank_project_idx'), models.Index(fields=['scraped_date'], name='serp_domain_rank_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('keyword', 'scraped_date', 'domain'), name='unique_serp_domain_rank')],
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from project.models import Project
 from keywords.models import Keyword
 
@@ -45,7 +46,11 @@ class Target(models.Model):
     
     def save(self, *args, **kwargs):
         self.clean()
+        adding = self._state.adding
         super().save(*args, **kwargs)
+        if adding:
+            # Start the rollup so rank tracking only ever updates it
+            CompetitorStats.objects.get_or_create(target=self, defaults={'project_id': self.project_id})
     
     def __str__(self):
         return f"{self.name or self.domain} (Target for {self.project.domain})"
@@ -70,4 +75,329 @@ class TargetKeywordRank(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.target.domain} - {self.keyword.keyword}: Rank {self.rank}"
\ No newline at end of file
+        return f"{self.target.domain} - {self.keyword.keyword}: Rank {self.rank}"
+
+class CompetitorStats(models.Model):
+    """
+    Ranking rollup of one competitor target, read by the top competitors report.
+    
+    Kept current as target ranks are tracked: every TargetKeywordRank write
+    adds the difference between the old and new rank's contribution to the
+    target's row with one UPDATE. Targets without a row are built from their
+    ranks with one aggregate query, and reconcile_project_daily_stats rebuilds
+    all rows nightly to correct drift (e.g. from deleted keywords).
+    """
+    COUNTER_FIELDS = ('keywords_total', 'ranked_count', 'rank_sum', 'top3_count', 'top10_count', 'top30_count')
+    
+    target = models.OneToOneField(Target, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='competitor_stats')
+    
+    keywords_total = models.IntegerField(default=0, help_text='Keywords tracked for the target')
+    ranked_count = models.IntegerField(default=0, help_text='Keywords where the target ranks in the top 100')
+    rank_sum = models.BigIntegerField(default=0, help_text='Sum of top 100 ranks (average = rank_sum / ranked_count)')
+    top3_count = models.IntegerField(default=0)
+    top10_count = models.IntegerField(default=0)
+    top30_count = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['project']),
+        ]
+    
+    def __str__(self):
+        return f"Stats for {self.target.domain}"
+    
+    @property
+    def avg_rank(self):
+        """Average position over the keywords the target ranks for (0 if none)"""
+        return round(self.rank_sum / self.ranked_count, 1) if self.ranked_count else 0
+    
+    @property
+    def visibility_score(self):
+        """Simple visibility scoring: top 3 rankings count three times, top 10 twice"""
+        return self.top3_count * 3 + self.top10_count * 2 + self.top30_count
+    
+    @classmethod
+    def contribution(cls, rank):
+        """
+        What one TargetKeywordRank adds to its target's counters
+        
+        Args:
+            rank: TargetKeywordRank.rank (0 means not ranking)
+        
+        Returns:
+            Dict of counter field to value
+        """
+        in_top_100 = 0 < rank <= 100
+        return {
+            'keywords_total': 1,
+            'ranked_count': int(in_top_100),
+            'rank_sum': rank if in_top_100 else 0,
+            'top3_count': int(in_top_100 and rank <= 3),
+            'top10_count': int(in_top_100 and rank <= 10),
+            'top30_count': int(in_top_100 and rank <= 30),
+        }
+    
+    @classmethod
+    def rank_delta(cls, old_rank, new_rank):
+        """
+        Counter changes of a TargetKeywordRank write
+        
+        Args:
+            old_rank: Previous rank, or None if the row is new
+            new_rank: Written rank
+        
+        Returns:
+            Dict of non-zero counter deltas
+        """
+        after = cls.contribution(new_rank)
+        before = cls.contribution(old_rank) if old_rank is not None else {}
+        delta = {field: after[field] - before.get(field, 0) for field in cls.COUNTER_FIELDS}
+        return {field: value for field, value in delta.items() if value}
+    
+    @staticmethod
+    def merge_delta(deltas, target_id, delta):
+        """Add a delta to the per-target deltas being collected for apply_deltas"""
+        target_delta = deltas.setdefault(target_id, {})
+        for field, value in delta.items():
+            target_delta[field] = target_delta.get(field, 0) + value
+    
+    @classmethod
+    def apply_deltas(cls, deltas):
+        """
+        Add counter changes to the targets' rows
+        
+        Rows that don't exist yet are built from the targets' ranks, which
+        already include the change.
+        
+        Args:
+            deltas: Dict of target ID to a dict of counter field to change
+        """
+        missing = []
+        now = timezone.now()
+        for target_id, delta in deltas.items():
+            changes = {field: models.F(field) + value for field, value in delta.items() if value}
+            if changes and not cls.objects.filter(target_id=target_id).update(updated_at=now, **changes):
+                missing.append(target_id)
+        if missing:
+            cls.rebuild(missing)
+    
+    @classmethod
+    def aggregate(cls, target_ids):
+        """
+        Counters of the targets computed from their ranks with one conditional aggregation
+        
+        Args:
+            target_ids: Target IDs
+        
+        Returns:
+            Dict of target ID to a dict of counter field to value
+        """
+        from django.db.models import Count, Q, Sum
+        
+        in_top_100 = Q(rank__gt=0, rank__lte=100)
+        rows = TargetKeywordRank.objects.filter(target_id__in=target_ids).values('target_id').annotate(
+            keywords_total=Count('id'),
+            ranked_count=Count('id', filter=in_top_100),
+            rank_sum=Sum('rank', filter=in_top_100),
+            top3_count=Count('id', filter=Q(rank__gt=0, rank__lte=3)),
+            top10_count=Count('id', filter=Q(rank__gt=0, rank__lte=10)),
+            top30_count=Count('id', filter=Q(rank__gt=0, rank__lte=30)),
+        ).order_by()
+        return {row.pop('target_id'): row for row in rows}
+    
+    @classmethod
+    def rebuild(cls, target_ids):
+        """
+        Recompute the targets' rows from their ranks
+        
+        Args:
+            target_ids: Target IDs
+        
+        Returns:
+            List of the written CompetitorStats
+        """
+        target_ids = list(target_ids)
+        counters = cls.aggregate(target_ids)
+        projects = dict(Target.objects.filter(id__in=target_ids).values_list('id', 'project_id'))
+        
+        stats = []
+        for target_id, project_id in projects.items():
+            values = counters.get(target_id, {})
+            stats.append(cls(
+                target_id=target_id,
+                project_id=project_id,
+                **{field: values.get(field) or 0 for field in cls.COUNTER_FIELDS}
+            ))
+        
+        if stats:
+            cls.objects.bulk_create(
+                stats,
+                update_conflicts=True,
+                unique_fields=['target'],
+                update_fields=list(cls.COUNTER_FIELDS) + ['updated_at']
+            )
+        return stats
+    
+    @classmethod
+    def for_project(cls, project_id):
+        """
+        Stats of all of a project's targets, building the missing rows
+        
+        Args:
+            project_id: Project ID
+        
+        Returns:
+            Dict of target ID to CompetitorStats
+        """
+        target_ids = list(Target.objects.filter(project_id=project_id).values_list('id', flat=True))
+        stats = {row.target_id: row for row in cls.objects.filter(target_id__in=target_ids)}
+        missing = [target_id for target_id in target_ids if target_id not in stats]
+        if missing:
+            stats.update({row.target_id: row for row in cls.rebuild(missing)})
+        return stats
+
+
+class SerpDomain(models.Model):
+    """
+    Dictionary of the domains seen in tracked SERPs.
+    
+    SerpDomainRank rows reference a domain by its integer id instead of
+    repeating the name on every one of the top 100 rows of every crawl.
+    Names are never renamed or deleted, so resolved ids are cached per process
+    (once committed, so a rolled back insert never leaves a stale id behind).
+    """
+    CACHE_SIZE = 100000
+    _id_cache = {}
+    
+    name = models.CharField(max_length=255, unique=True)
+    
+    def __str__(self):
+        return self.name
+    
+    @classmethod
+    def ids_for(cls, names):
+        """
+        Ids of the domain names, creating the missing ones
+        
+        Args:
+            names: Normalized domain names
+        
+        Returns:
+            Dict of domain name to SerpDomain id
+        """
+        names = set(names)
+        ids = {name: cls._id_cache[name] for name in names if name in cls._id_cache}
+        missing = names - ids.keys()
+        if missing:
+            found = dict(cls.objects.filter(name__in=missing).values_list('name', 'id'))
+            new = missing - found.keys()
+            if new:
+                # Concurrent crawls may insert the same domains, so ignore conflicts and read back.
+                # Sorted, so overlapping inserts take the unique index locks in the same order
+                # and can't deadlock each other
+                cls.objects.bulk_create([cls(name=name) for name in sorted(new)], ignore_conflicts=True)
+                found.update(cls.objects.filter(name__in=new).values_list('name', 'id'))
+            transaction.on_commit(lambda: cls._remember(found))
+            ids.update(found)
+        return ids
+    
+    @classmethod
+    def _remember(cls, ids):
+        """Add committed ids to the process cache, starting over once it is full"""
+        if len(cls._id_cache) + len(ids) > cls.CACHE_SIZE:
+            cls._id_cache.clear()
+        cls._id_cache.update(ids)
+
+
+class SerpDomainRank(models.Model):
+    """
+    Best position of one domain on one keyword's SERP on one day.
+    
+    Written for the whole top 100 during rank extraction, so share of voice,
+    keyword overlap and position changes of any domain can be computed for a
+    project in the database (see competitors.serp_index) without downloading
+    the stored SERP results from R2. Rows older than
+    SERP_DOMAIN_INDEX_RETENTION_DAYS are pruned nightly.
+    
+    That is up to 100 rows per keyword per crawl (about 10M rows a day and
+    900M retained at 100k daily keywords and 90 days), so the index is off
+    unless SERP_DOMAIN_INDEX_ENABLED is set.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='serp_domain_ranks', db_index=False)
+    keyword = models.ForeignKey(Keyword, on_delete=models.CASCADE, related_name='serp_domain_ranks', db_index=False)
+    domain = models.ForeignKey(SerpDomain, on_delete=models.CASCADE, related_name='ranks', db_index=False)
+    scraped_date = models.DateField()
+    position = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['keyword', 'scraped_date', 'domain'], name='unique_serp_domain_rank'),
+        ]
+        indexes = [
+            models.Index(fields=['project', 'scraped_date', 'domain', 'position'], name='serp_domain_rank_project_idx'),
+            models.Index(fields=['scraped_date'], name='serp_domain_rank_date_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.domain_id} #{self.position} for keyword {self.keyword_id} on {self.scraped_date}"
+    
+    @staticmethod
+    def domain_positions(domains):
+        """
+        Best position of every domain in a list of organic result domains
+        
+        Args:
+            domains: Normalized domain of each organic result, position 1 first
+        
+        Returns:
+            Dict of domain name to its first position in the top 100
+        """
+        positions = {}
+        for position, domain in enumerate(domains[:100], 1):
+            if domain and domain not in positions:
+                positions[domain] = position
+        return positions
+    
+    @classmethod
+    def replace(cls, serps):
+        """
+        Write the domain positions of crawled SERPs
+        
+        Rows a keyword already has for the same day (force crawls) are
+        replaced, so domains that dropped out of the top 100 don't linger.
+        
+        Args:
+            serps: Iterable of (project ID, keyword ID, scraped date, dict of
+                domain name to position) tuples
+        
+        Returns:
+            Number of rows written
+        """
+        serps = list(serps)
+        if not serps:
+            return 0
+        
+        domain_ids = SerpDomain.ids_for(name for serp in serps for name in serp[3])
+        rows = []
+        keywords_by_date = {}
+        for project_id, keyword_id, scraped_date, positions in serps:
+            keywords_by_date.setdefault(scraped_date, set()).add(keyword_id)
+            rows.extend(
+                cls(
+                    project_id=project_id,
+                    keyword_id=keyword_id,
+                    domain_id=domain_ids[name],
+                    scraped_date=scraped_date,
+                    position=position
+                )
+                for name, position in positions.items()
+            )
+        
+        with transaction.atomic():
+            for scraped_date, keyword_ids in keywords_by_date.items():
+                cls.objects.filter(scraped_date=scraped_date, keyword_id__in=keyword_ids).delete()
+            cls.objects.bulk_create(rows, batch_size=2000)
+        return len(rows)
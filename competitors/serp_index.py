@@ -0,0 +1,144 @@
+"""
+SERP domain index queries
+Competitor intelligence over every domain in the top 100 of a project's
+keywords (competitors.SerpDomainRank), computed in the database.
+
+Visibility weights each position by an estimated click-through rate, so a
+domain's share of voice is the part of the project's estimated organic
+clicks it takes on a day.
+"""
+
+from typing import List, Optional
+
+from django.db.models import Avg, Case, Count, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Round
+
+from keywords.models import ProjectDailyStats
+
+from .models import SerpDomain, SerpDomainRank
+
+
+def visibility(position_field: str = 'position') -> Case:
+    """
+    Estimated click-through rate (%) of a position, as a database expression
+
+    Same curve as ProjectDailyStats visibility, positions after 10 count as 0.
+
+    Args:
+        position_field: Name of the position field
+
+    Returns:
+        Case expression
+    """
+    return Case(
+        *[
+            When(**{position_field: position}, then=Value(ctr * 100))
+            for position, ctr in enumerate(ProjectDailyStats.POSITION_CTR, 1)
+        ],
+        default=Value(0.0),
+        output_field=FloatField()
+    )
+
+
+def share_of_voice(project_id: int, scraped_date, limit: int = 50) -> List[dict]:
+    """
+    Domains taking the largest part of a project's estimated clicks on a day
+
+    Args:
+        project_id: Project ID
+        scraped_date: Crawl day
+        limit: Domains returned
+
+    Returns:
+        List of dicts with domain, keywords, avg_position, top_3, top_10,
+        visibility and share (% of the visibility of all domains), best first
+    """
+    rows = SerpDomainRank.objects.filter(project_id=project_id, scraped_date=scraped_date)
+    total = rows.aggregate(total=Sum(visibility()))['total'] or 0
+
+    domains = rows.values('domain_id').annotate(
+        domain=F('domain__name'),
+        keywords=Count('keyword_id'),
+        avg_position=Round(Avg('position'), 1),
+        top_3=Count('keyword_id', filter=Q(position__lte=3)),
+        top_10=Count('keyword_id', filter=Q(position__lte=10)),
+        visibility=Sum(visibility()),
+    ).order_by('-visibility', 'avg_position', 'domain')[:limit]
+
+    results = []
+    for row in domains:
+        row['visibility'] = round(row['visibility'] or 0, 1)
+        row['share'] = round(row['visibility'] / total * 100, 2) if total else 0
+        results.append(row)
+    return results
+
+
+def keyword_overlap(project_id: int, scraped_date, domain: str, limit: int = 50) -> List[dict]:
+    """
+    Domains ranking for the same keywords as a domain on a day
+
+    Args:
+        project_id: Project ID
+        scraped_date: Crawl day
+        domain: Normalized domain the others are compared to (usually the project's)
+        limit: Domains returned
+
+    Returns:
+        List of dicts with domain, shared_keywords and outranking (shared
+        keywords where the domain ranks above the compared one), most shared first
+    """
+    domain_id = SerpDomain.objects.filter(name=domain).values_list('id', flat=True).first()
+    if domain_id is None:
+        return []
+
+    rows = SerpDomainRank.objects.filter(project_id=project_id, scraped_date=scraped_date)
+    compared = rows.filter(domain_id=domain_id)
+    compared_position = compared.filter(keyword_id=OuterRef('keyword_id')).values('position')[:1]
+
+    return list(
+        rows.filter(keyword_id__in=compared.values('keyword_id')).exclude(domain_id=domain_id).values('domain_id').annotate(
+            domain=F('domain__name'),
+            shared_keywords=Count('keyword_id'),
+            outranking=Count('keyword_id', filter=Q(position__lt=Subquery(compared_position))),
+        ).order_by('-shared_keywords', '-outranking', 'domain')[:limit]
+    )
+
+
+def domain_movers(project_id: int, start_date, end_date, limit: int = 50, gaining: bool = True,
+                  domains: Optional[List[str]] = None) -> List[dict]:
+    """
+    Domains whose visibility changed the most between two days
+
+    Args:
+        project_id: Project ID
+        start_date: Earlier crawl day
+        end_date: Later crawl day
+        limit: Domains returned
+        gaining: Largest gains first when True, largest losses first otherwise
+        domains: Only compare these domain names
+
+    Returns:
+        List of dicts with domain, start_keywords, end_keywords,
+        start_visibility, end_visibility and change
+    """
+    rows = SerpDomainRank.objects.filter(project_id=project_id, scraped_date__in=[start_date, end_date])
+    if domains is not None:
+        rows = rows.filter(domain__name__in=domains)
+
+    on_start, on_end = Q(scraped_date=start_date), Q(scraped_date=end_date)
+    movers = rows.values('domain_id').annotate(
+        domain=F('domain__name'),
+        start_keywords=Count('keyword_id', filter=on_start),
+        end_keywords=Count('keyword_id', filter=on_end),
+        start_visibility=Coalesce(Sum(visibility(), filter=on_start), 0.0),
+        end_visibility=Coalesce(Sum(visibility(), filter=on_end), 0.0),
+    ).annotate(
+        change=F('end_visibility') - F('start_visibility')
+    ).order_by('-change' if gaining else 'change', 'domain')[:limit]
+
+    results = []
+    for row in movers:
+        for field in ('start_visibility', 'end_visibility', 'change'):
+            row[field] = round(row[field], 1)
+        results.append(row)
+    return results
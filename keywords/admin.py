@@ -6,7 +6,7 @@ from django.db.models import Count
 from django.contrib.auth import get_user_model
 from unfold.admin import ModelAdmin, TabularInline
 from unfold.decorators import action, display
-from .models import Keyword, Rank, Tag, KeywordTag
+from .models import Keyword, ProjectDailyStats, Rank, Tag, KeywordTag
 
 User = get_user_model()
 
@@ -346,12 +346,16 @@ class KeywordAdmin(ModelAdmin):
     # Custom actions
     @action(description="Archive selected keywords")
     def mark_as_archived(self, request, queryset):
+        project_ids = list(queryset.values_list('project_id', flat=True).distinct())
         count = queryset.update(archive=True, processing=False)
+        ProjectDailyStats.rebuild(project_ids)
         self.message_user(request, f"{count} keywords archived.")
     
     @action(description="Activate selected keywords")
     def mark_as_active(self, request, queryset):
+        project_ids = list(queryset.values_list('project_id', flat=True).distinct())
         count = queryset.update(archive=False)
+        ProjectDailyStats.rebuild(project_ids)
         self.message_user(request, f"{count} keywords activated.")
     
     @action(description="Force re-scrape")
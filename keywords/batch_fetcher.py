@@ -0,0 +1,118 @@
+"""
+Concurrent SERP fetching for batched keyword crawls
+"""
+
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class BatchSerpFetcher:
+    """
+    Fetch SERP HTML for many keywords concurrently.
+
+    Network calls are scheduled on an asyncio event loop running in a background
+    thread and bounded by a semaphore. Finished fetches are handed back to the
+    calling thread one at a time through a bounded queue, so all database work
+    stays on the caller's connection and only a handful of HTML documents are
+    held in memory at once.
+
+    Usage:
+        fetcher = BatchSerpFetcher(lambda kw: _fetch_serp_html(scraper, kw), concurrency=20)
+        for keyword, html_content, error_message in fetcher.fetch(keywords):
+            ...
+    """
+
+    def __init__(self, fetch_fn: Callable[[Any], Tuple[Optional[str], Optional[str]]], concurrency: int = 20):
+        """
+        Args:
+            fetch_fn: Blocking callable returning (html_content, error_message) for one keyword
+            concurrency: Maximum number of requests in flight
+        """
+        self.fetch_fn = fetch_fn
+        self.concurrency = max(1, int(concurrency))
+
+    def fetch(self, keywords: Iterable[Any]) -> Iterator[Tuple[Any, Optional[str], Optional[str]]]:
+        """
+        Fetch all keywords, yielding results in completion order
+
+        Args:
+            keywords: Keyword instances to fetch
+
+        Yields:
+            Tuple of (keyword, html_content, error_message)
+        """
+        keywords = list(keywords)
+        if not keywords:
+            return
+
+        results = queue.Queue(maxsize=self.concurrency)
+        stop = threading.Event()
+
+        loop_thread = threading.Thread(
+            target=self._run_loop,
+            args=(keywords, results, stop),
+            name='serp-batch-fetch',
+            daemon=True
+        )
+        loop_thread.start()
+
+        try:
+            for _ in range(len(keywords)):
+                yield results.get()
+        finally:
+            # Consumer finished or bailed out - stop scheduling new requests
+            # and drain anything still queued so fetch threads can exit
+            stop.set()
+            while loop_thread.is_alive():
+                try:
+                    results.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            loop_thread.join()
+
+    def _run_loop(self, keywords: list, results: queue.Queue, stop: threading.Event) -> None:
+        """Run the fetch coroutine on a private event loop"""
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='serp-fetch') as executor:
+            asyncio.run(self._fetch_all(keywords, results, stop, executor))
+
+    async def _fetch_all(
+        self,
+        keywords: list,
+        results: queue.Queue,
+        stop: threading.Event,
+        executor: ThreadPoolExecutor
+    ) -> None:
+        """Fetch every keyword with at most `concurrency` requests in flight"""
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch_one(keyword):
+            async with semaphore:
+                if stop.is_set():
+                    return
+                # The blocking put happens in the fetch thread while the
+                # semaphore is held, which gives the consumer backpressure
+                await loop.run_in_executor(executor, self._fetch_and_publish, keyword, results, stop)
+
+        await asyncio.gather(*(fetch_one(keyword) for keyword in keywords))
+
+    def _fetch_and_publish(self, keyword: Any, results: queue.Queue, stop: threading.Event) -> None:
+        """Fetch one keyword and hand the result to the consumer"""
+        try:
+            html_content, error_message = self.fetch_fn(keyword)
+        except Exception as e:
+            logger.error(f"Batch fetch error for keyword {getattr(keyword, 'id', keyword)}: {e}")
+            html_content, error_message = None, str(e)[:100]
+
+        while not stop.is_set():
+            try:
+                results.put((keyword, html_content, error_message), timeout=0.5)
+                return
+            except queue.Full:
+                continue
@@ -0,0 +1,59 @@
+"""
+Management command to show the outbound provider circuit breakers
+"""
+
+from datetime import datetime
+
+import redis
+from django.core.management.base import BaseCommand, CommandError
+
+from services.circuit_breaker import PROVIDERS, get_breaker_status, get_circuit_breaker
+
+
+class Command(BaseCommand):
+    help = 'Show state and recent transitions of the Scrape.do, DataForSEO, PageSpeed and R2 circuit breakers'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            choices=PROVIDERS,
+            help='Force the circuit of a provider closed',
+        )
+        parser.add_argument(
+            '--transitions',
+            type=int,
+            default=5,
+            help='Recent transitions shown per provider (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            if options['reset']:
+                breaker = get_circuit_breaker(options['reset'])
+                if breaker is None:
+                    raise CommandError('Circuit breakers are disabled (CIRCUIT_BREAKER_ENABLED)')
+                breaker.reset()
+                self.stdout.write(self.style.SUCCESS(f"Closed the {options['reset']} circuit"))
+
+            statuses = get_breaker_status()
+        except redis.RedisError as e:
+            raise CommandError(f'Redis unavailable: {e}')
+
+        if not statuses:
+            self.stdout.write('Circuit breakers are disabled (CIRCUIT_BREAKER_ENABLED)')
+            return
+
+        for status in statuses:
+            line = (
+                f"{status['name']:<10} {status['state']:<9} failures={status['failures']} "
+                f"trips={status['trips']} ok={status['successes']} failed={status['total_failures']}"
+            )
+            if status['open_until']:
+                line += f" open until {datetime.fromtimestamp(status['open_until']):%Y-%m-%d %H:%M:%S}"
+            self.stdout.write(line)
+
+            for transition in status['transitions'][:options['transitions']]:
+                self.stdout.write(
+                    f"    {datetime.fromtimestamp(transition['at']):%Y-%m-%d %H:%M:%S} "
+                    f"{transition['from']} -> {transition['to']}"
+                )
@@ -4,10 +4,9 @@ Management command to reprocess SERP results and fix special results issue
 
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from pathlib import Path
-from django.conf import settings
 
 from keywords.models import Keyword, Rank
+from keywords.serp_archive import read_serp_key
 from services.google_search_parser import GoogleSearchParser
 from services.r2_storage import get_r2_service
 
@@ -80,12 +79,10 @@ class Command(BaseCommand):
                 
                 # Extract the HTML if available (for reparsing)
                 if keyword.scrape_do_file_path:
-                    storage_root = Path(settings.SCRAPE_DO_STORAGE_ROOT)
-                    html_path = storage_root / keyword.scrape_do_file_path
+                    html_content = read_serp_key(keyword.scrape_do_file_path)
                     
-                    if html_path.exists():
-                        self.stdout.write("  Found HTML file, reparsing...")
-                        html_content = html_path.read_text(encoding='utf-8')
+                    if html_content is not None:
+                        self.stdout.write("  Found archived SERP, reparsing...")
                         
                         # Reparse with updated parser
                         new_results = parser.parse(html_content)
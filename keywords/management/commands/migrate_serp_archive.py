@@ -0,0 +1,96 @@
+"""
+Management command to move raw SERP HTML files into the compressed SERP archive
+"""
+
+import random
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from keywords import serp_archive
+from keywords.models import Keyword
+
+
+class Command(BaseCommand):
+    help = 'Archive the raw {project}/{keyword}/{date}.html files under SCRAPE_DO_STORAGE_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--delete-source',
+            action='store_true',
+            help='Delete each raw file once it is archived (and expired or orphaned ones)',
+        )
+        parser.add_argument(
+            '--include-expired',
+            action='store_true',
+            help='Also archive files older than SERP_HISTORY_DAYS (pruned on the next prune_serp_archive run otherwise)',
+        )
+        parser.add_argument(
+            '--train-samples',
+            type=int,
+            default=0,
+            help='Train a zstd dictionary on this many random files before archiving (default: 0, keep the current one)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the files that would be archived',
+        )
+
+    def handle(self, *args, **options):
+        storage_root = Path(settings.SCRAPE_DO_STORAGE_ROOT)
+        cutoff = timezone.localdate() - timedelta(days=settings.SERP_HISTORY_DAYS)
+
+        files = []
+        for html_file in sorted(storage_root.glob('*/*/*.html')):
+            try:
+                keyword_id, scraped_date = serp_archive.parse_serp_key(str(html_file.relative_to(storage_root)))
+            except ValueError:
+                continue
+            files.append((html_file, keyword_id, scraped_date))
+        self.stdout.write(f'Found {len(files)} raw SERP files under {storage_root}')
+
+        if options['train_samples'] and files and not options['dry_run']:
+            sample = random.sample(files, min(options['train_samples'], len(files)))
+            dict_id = serp_archive.train_dictionary(html_file.read_bytes() for html_file, _, _ in sample)
+            self.stdout.write(f'Trained dictionary {dict_id} on {len(sample)} files')
+
+        keywords = Keyword.objects.only('id', 'project_id').in_bulk({keyword_id for _, keyword_id, _ in files})
+        counts = {'archived': 0, 'existing': 0, 'expired': 0, 'orphaned': 0, 'deleted': 0}
+        raw_bytes = 0
+
+        for html_file, keyword_id, scraped_date in files:
+            keyword = keywords.get(keyword_id)
+            if keyword is None:
+                counts['orphaned'] += 1
+            elif scraped_date < cutoff and not options['include_expired']:
+                counts['expired'] += 1
+            elif options['dry_run']:
+                counts['archived'] += 1
+                raw_bytes += html_file.stat().st_size
+                continue
+            else:
+                size = html_file.stat().st_size
+                _, stored = serp_archive.store_serp(keyword, html_file.read_bytes(), scraped_date)
+                counts['archived' if stored else 'existing'] += 1
+                raw_bytes += size if stored else 0
+
+            if options['delete_source'] and not options['dry_run']:
+                html_file.unlink()
+                counts['deleted'] += 1
+
+            done = sum(counts[key] for key in ('archived', 'existing', 'expired', 'orphaned'))
+            if done % 1000 == 0:
+                self.stdout.write(f'Processed {done}/{len(files)} files')
+
+        self.stdout.write(
+            f"Archived {counts['archived']} files ({raw_bytes / 1024 / 1024:.1f} MB raw), "
+            f"{counts['existing']} already archived, skipped {counts['expired']} expired "
+            f"and {counts['orphaned']} of deleted keywords"
+        )
+        if options['delete_source']:
+            self.stdout.write(f"Deleted {counts['deleted']} raw files")
+        self.stdout.write(self.style.SUCCESS('SERP archive migration finished'))
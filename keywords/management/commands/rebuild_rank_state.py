@@ -0,0 +1,113 @@
+"""
+Management command to rebuild the denormalized rank state on keywords
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Case, F, IntegerField, Min, Q, When, Window
+from django.db.models.functions import RowNumber
+
+from keywords.models import Keyword, Rank
+
+
+class Command(BaseCommand):
+    help = 'Rebuild Keyword last/previous rank state from the Rank history in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Keywords rebuilt per query batch (default: 2000)',
+        )
+        parser.add_argument(
+            '--keyword-ids',
+            type=int,
+            nargs='+',
+            help='Only rebuild these keywords',
+        )
+        parser.add_argument(
+            '--highest-rank',
+            action='store_true',
+            help='Also recompute highest_rank from organic history',
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options['chunk_size'])
+        fields = list(Keyword.RANK_STATE_FIELDS)
+        if options['highest_rank']:
+            fields.append('highest_rank')
+
+        keyword_ids = Keyword.objects.order_by('id').values_list('id', flat=True)
+        if options['keyword_ids']:
+            keyword_ids = keyword_ids.filter(id__in=options['keyword_ids'])
+        keyword_ids = list(keyword_ids)
+
+        rebuilt = 0
+        for start in range(0, len(keyword_ids), chunk_size):
+            chunk = keyword_ids[start:start + chunk_size]
+            keywords = list(Keyword.objects.filter(id__in=chunk).only('id', *fields))
+            states = self._latest_ranks(chunk)
+            highest = self._highest_ranks(chunk) if options['highest_rank'] else {}
+
+            for keyword in keywords:
+                latest = states.get(keyword.id, [])
+                keyword.last_rank, keyword.last_rank_date = latest[0] if latest else (0, None)
+                keyword.previous_rank, keyword.previous_rank_date = latest[1] if len(latest) > 1 else (0, None)
+                if options['highest_rank']:
+                    keyword.highest_rank = highest.get(keyword.id, 0)
+
+            Keyword.objects.bulk_update(keywords, fields)
+            rebuilt += len(keywords)
+            self.stdout.write(f'Rebuilt rank state for {rebuilt}/{len(keyword_ids)} keywords')
+
+        self.stdout.write(self.style.SUCCESS(f'Rank state rebuilt for {rebuilt} keywords'))
+
+    def _latest_ranks(self, keyword_ids):
+        """
+        The two most recent (rank, scraped_date) pairs per keyword in one query
+
+        Args:
+            keyword_ids: Keyword IDs of the chunk
+
+        Returns:
+            Dict of keyword ID to a newest-first list of (rank, scraped_date)
+        """
+        rows = Rank.objects.filter(
+            keyword_id__in=keyword_ids,
+            scraped_date__isnull=False
+        ).annotate(
+            row_number=Window(
+                expression=RowNumber(),
+                partition_by=[F('keyword_id')],
+                order_by=[F('scraped_date').desc(), F('id').desc()]
+            )
+        ).filter(row_number__lte=2).order_by('keyword_id', 'row_number').values_list(
+            'keyword_id', 'rank', 'scraped_date'
+        )
+
+        states = {}
+        for keyword_id, rank, scraped_date in rows:
+            states.setdefault(keyword_id, []).append((rank, scraped_date))
+        return states
+
+    def _highest_ranks(self, keyword_ids):
+        """
+        Best organic rank per keyword, using 101 for "not in top 100" like update_rank
+
+        Args:
+            keyword_ids: Keyword IDs of the chunk
+
+        Returns:
+            Dict of keyword ID to highest rank (keywords without organic history omitted)
+        """
+        rows = Rank.objects.filter(
+            keyword_id__in=keyword_ids,
+            is_organic=True
+        ).values('keyword_id').annotate(
+            best=Min(Case(
+                When(Q(rank__gt=0) & Q(rank__lte=100), then=F('rank')),
+                default=101,
+                output_field=IntegerField()
+            ))
+        ).values_list('keyword_id', 'best')
+        return dict(rows)
@@ -0,0 +1,61 @@
+"""
+Management command to show queue depth per SERP pipeline stage
+and the shared Scrape.do rate limiter
+"""
+
+import time
+
+import redis
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from keywords.tasks import get_serp_pipeline_queue_depths
+from services.rate_limiter import get_rate_limiter
+
+
+class Command(BaseCommand):
+    help = 'Show waiting messages per SERP pipeline stage (fetch and parse) and Scrape.do limiter metrics'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--watch',
+            type=int,
+            default=0,
+            metavar='SECONDS',
+            help='Refresh every SECONDS seconds until interrupted',
+        )
+
+    def handle(self, *args, **options):
+        mode = 'fetch -> serp_parse' if settings.SERP_PARSE_QUEUE_ENABLED else 'inline (fetch and parse in one task)'
+        self.stdout.write(f'SERP pipeline mode: {mode}')
+        limiter = get_rate_limiter('scrape_do')
+
+        while True:
+            depths = get_serp_pipeline_queue_depths()
+            for stage, stage_depths in depths.items():
+                queues = ', '.join(
+                    f"{name}={'?' if depth is None else depth}"
+                    for name, depth in stage_depths['queues'].items()
+                )
+                self.stdout.write(f"  {stage:<6} {stage_depths['total']:>8}  ({queues})")
+
+            if limiter is not None:
+                try:
+                    metrics = limiter.metrics()
+                    latency = '-' if metrics['latency_ewma'] is None else f"{metrics['latency_ewma']}s"
+                    self.stdout.write(
+                        f"  scrape.do limiter: tokens={metrics['tokens']}/{metrics['burst']} "
+                        f"window={metrics['window']} in_flight={metrics['in_flight']} "
+                        f"latency={latency} error_rate={metrics['error_rate']} "
+                        f"throttled={metrics['throttled']} ({metrics['throttled_seconds']}s)"
+                    )
+                except redis.RedisError as e:
+                    self.stdout.write(f"  scrape.do limiter: unavailable ({e})")
+
+            if not options['watch']:
+                break
+            try:
+                time.sleep(options['watch'])
+            except KeyboardInterrupt:
+                break
+            self.stdout.write('')
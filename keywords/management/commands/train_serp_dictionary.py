@@ -0,0 +1,43 @@
+"""
+Management command to train the zstd dictionary of the SERP archive
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from keywords import serp_archive
+from keywords.models import SerpBlob
+
+
+class Command(BaseCommand):
+    help = 'Train a zstd dictionary on recently archived SERPs and use it for new blobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=500,
+            help='Most recent archived SERPs to train on (default: 500)',
+        )
+        parser.add_argument(
+            '--dict-size',
+            type=int,
+            default=112640,
+            help='Maximum dictionary size in bytes (default: 112640)',
+        )
+
+    def handle(self, *args, **options):
+        if not serp_archive.ZSTD_AVAILABLE:
+            raise CommandError('The zstandard package is not installed')
+
+        blobs = SerpBlob.objects.order_by('-created_at')[:options['samples']]
+        samples = []
+        for blob in blobs:
+            try:
+                samples.append(serp_archive.read_blob(blob))
+            except FileNotFoundError:
+                continue
+        if len(samples) < 10:
+            raise CommandError(f'Need at least 10 archived SERPs to train a dictionary, found {len(samples)}')
+
+        dict_id = serp_archive.train_dictionary(samples, dict_size=options['dict_size'])
+        self.stdout.write(self.style.SUCCESS(f'Trained dictionary {dict_id} on {len(samples)} SERPs'))
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.5 on 2026-10-16 19:48
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keywords', '0005_keyword_daily_queue_task_id_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SerpSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('query', models.CharField(help_text='Normalized search query', max_length=255)),
+                ('country_code', models.CharField(max_length=10)),
+                ('location', models.CharField(blank=True, default='', help_text='Normalized location ("" for country-wide)', max_length=255)),
+                ('scraped_date', models.DateField(db_index=True)),
+                ('results_file', models.CharField(help_text='R2 path to parsed JSON results', max_length=500)),
+                ('html_file_path', models.CharField(blank=True, default='', help_text='HTML file path relative to SCRAPE_DO_STORAGE_ROOT', max_length=500)),
+                ('reuse_count', models.IntegerField(default=0, help_text='Number of keywords served from this snapshot')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('source_keyword', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='keywords.keyword')),
+            ],
+            options={
+                'ordering': ['-scraped_date'],
+                'unique_together': {('query', 'country_code', 'location', 'scraped_date')},
+            },
+        ),
+    ]
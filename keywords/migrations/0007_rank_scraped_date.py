@@ -0,0 +1,20 @@
+# Generated by Django 5.2.5 on 2026-10-16 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keywords', '0006_serp_snapshot'),
+    ]
+
+    operations = [
+        # Nullable without a default - a catalog-only change on PostgreSQL,
+        # no table rewrite. Filled in by 0008 in chunks.
+        migrations.AddField(
+            model_name='rank',
+            name='scraped_date',
+            field=models.DateField(blank=True, help_text='Crawl date - one rank per keyword per day', null=True),
+        ),
+    ]
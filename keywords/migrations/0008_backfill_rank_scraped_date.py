@@ -0,0 +1,69 @@
+"""
+Backfill Rank.scraped_date from created_at and drop same-day duplicates.
+
+Runs outside a single transaction: every chunk of ids commits on its own so
+no long-lived row locks are held on the ranks table while it runs.
+"""
+
+from django.db import migrations, transaction
+from django.db.models import Count, Max, Min
+from django.db.models.functions import TruncDate
+
+BATCH_SIZE = 10000
+
+
+def backfill_scraped_date(apps, schema_editor):
+    Rank = apps.get_model('keywords', 'Rank')
+    db_alias = schema_editor.connection.alias
+    ranks = Rank.objects.using(db_alias)
+
+    bounds = ranks.filter(scraped_date__isnull=True).aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return
+
+    # TruncDate uses the current time zone, i.e. the same day as created_at__date
+    for start in range(bounds['low'], bounds['high'] + 1, BATCH_SIZE):
+        with transaction.atomic(using=db_alias):
+            ranks.filter(
+                id__gte=start,
+                id__lt=start + BATCH_SIZE,
+                scraped_date__isnull=True
+            ).update(scraped_date=TruncDate('created_at'))
+
+
+def remove_duplicate_ranks(apps, schema_editor):
+    """Keep the most recently written rank (highest id) per keyword and day"""
+    Rank = apps.get_model('keywords', 'Rank')
+    db_alias = schema_editor.connection.alias
+    ranks = Rank.objects.using(db_alias)
+
+    duplicates = ranks.filter(scraped_date__isnull=False).values(
+        'keyword_id', 'scraped_date'
+    ).annotate(total=Count('id'), keep_id=Max('id')).filter(total__gt=1).order_by()
+
+    stale_ids = []
+    for group in duplicates.iterator():
+        stale_ids.extend(
+            ranks.filter(
+                keyword_id=group['keyword_id'],
+                scraped_date=group['scraped_date']
+            ).exclude(id=group['keep_id']).values_list('id', flat=True)
+        )
+
+    for start in range(0, len(stale_ids), BATCH_SIZE):
+        with transaction.atomic(using=db_alias):
+            ranks.filter(id__in=stale_ids[start:start + BATCH_SIZE]).delete()
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('keywords', '0007_rank_scraped_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_scraped_date, migrations.RunPython.noop),
+        migrations.RunPython(remove_duplicate_ranks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,93 @@
+"""
+Unique (keyword, scraped_date) constraint on Rank.
+
+On PostgreSQL the unique index is built with CREATE INDEX CONCURRENTLY and
+then attached as a constraint, so writes to the ranks table are not blocked
+while the index is built. Other databases get a plain unique index.
+
+A concurrent build that fails (duplicate rows, a cancelled statement) leaves
+an invalid index behind. Running the migration again drops that index and
+builds it anew instead of attaching it.
+"""
+
+from django.db import migrations, models
+
+CONSTRAINT_NAME = 'keywords_rank_keyword_scraped_date_uniq'
+
+
+def _index_is_valid(schema_editor, name):
+    """pg_index.indisvalid of the index, or None when it doesn't exist"""
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+            'WHERE c.relname = %s AND pg_table_is_visible(c.oid)',
+            [name]
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _constraint_exists(schema_editor, name):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_constraint WHERE conname = %s AND connamespace = current_schema()::regnamespace',
+            [name]
+        )
+        return cursor.fetchone() is not None
+
+
+def add_constraint(apps, schema_editor):
+    Rank = apps.get_model('keywords', 'Rank')
+    table = schema_editor.quote_name(Rank._meta.db_table)
+    name = schema_editor.quote_name(CONSTRAINT_NAME)
+
+    if schema_editor.connection.vendor != 'postgresql':
+        # A unique index is what ON CONFLICT (keyword_id, scraped_date) needs
+        schema_editor.execute(f'CREATE UNIQUE INDEX {name} ON {table} (keyword_id, scraped_date)')
+        return
+
+    valid = _index_is_valid(schema_editor, CONSTRAINT_NAME)
+    if valid is False:
+        # Left behind by a failed concurrent build; it enforces nothing
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY {name}')
+        valid = None
+    if valid is None:
+        schema_editor.execute(f'CREATE UNIQUE INDEX CONCURRENTLY {name} ON {table} (keyword_id, scraped_date)')
+
+    if not _constraint_exists(schema_editor, CONSTRAINT_NAME):
+        schema_editor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}')
+
+
+def remove_constraint(apps, schema_editor):
+    Rank = apps.get_model('keywords', 'Rank')
+    table = schema_editor.quote_name(Rank._meta.db_table)
+    name = schema_editor.quote_name(CONSTRAINT_NAME)
+
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.execute(f'DROP INDEX {name}')
+        return
+
+    schema_editor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('keywords', '0008_backfill_rank_scraped_date'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='rank',
+                    constraint=models.UniqueConstraint(fields=('keyword', 'scraped_date'), name=CONSTRAINT_NAME),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(add_constraint, remove_constraint),
+            ],
+        ),
+    ]
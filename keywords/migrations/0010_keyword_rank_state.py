@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-16 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keywords', '0009_rank_unique_keyword_scraped_date'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='keyword',
+            name='last_rank',
+            field=models.IntegerField(default=0, help_text='Rank of the latest Rank row'),
+        ),
+        migrations.AddField(
+            model_name='keyword',
+            name='last_rank_date',
+            field=models.DateField(blank=True, help_text='scraped_date of the latest Rank row', null=True),
+        ),
+        migrations.AddField(
+            model_name='keyword',
+            name='previous_rank',
+            field=models.IntegerField(default=0, help_text='Rank from the latest day before last_rank_date'),
+        ),
+        migrations.AddField(
+            model_name='keyword',
+            name='previous_rank_date',
+            field=models.DateField(blank=True, help_text='scraped_date of previous_rank', null=True),
+        ),
+    ]
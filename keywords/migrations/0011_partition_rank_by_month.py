@@ -0,0 +1,162 @@
+"""
+Partition the Rank table by month on scraped_date (PostgreSQL only).
+
+keywords_rank is rebuilt as a table partitioned BY RANGE (scraped_date) with
+one partition per month (keywords_rank_pYYYY_MM) from the oldest rank up to
+three months ahead, plus a default partition. Rows are copied month by month,
+then the primary key becomes (id, scraped_date) - PostgreSQL requires the
+partition key in every unique constraint - and the existing unique constraint,
+foreign key and indexes are recreated on the partitioned table.
+
+Future partitions are created by the maintain_rank_partitions task.
+
+The copy rewrites the whole table under an exclusive lock: run it in a
+maintenance window. Other databases keep a plain table.
+"""
+
+from datetime import date
+
+from django.db import migrations, models
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+        [table]
+    )
+    return cursor.fetchone() is not None
+
+
+def _detach_definitions(cursor, table):
+    """
+    Capture the table's primary key name, constraints and indexes, then drop
+    them so their names can be reused on the rebuilt table.
+    """
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+        [table]
+    )
+    pk_name = cursor.fetchone()[0]
+
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype IN ('u', 'f') ORDER BY contype DESC, conname",
+        [table]
+    )
+    constraints = cursor.fetchall()
+
+    cursor.execute(
+        "SELECT indexrelid::regclass::text, pg_get_indexdef(indexrelid) FROM pg_index i "
+        "WHERE indrelid = %s::regclass "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)",
+        [table]
+    )
+    indexes = cursor.fetchall()
+
+    for name, _ in constraints:
+        cursor.execute(f'ALTER TABLE "{table}" DROP CONSTRAINT "{name}"')
+    for name, _ in indexes:
+        cursor.execute(f'DROP INDEX {name}')
+    cursor.execute(f'ALTER TABLE "{table}" DROP CONSTRAINT "{pk_name}"')
+
+    return pk_name, constraints, [definition for _, definition in indexes]
+
+
+def _rebuild(schema_editor, table, partitioned):
+    """Copy `table` into a new partitioned (or plain) table of the same name"""
+    old_table = f'{table}_rebuild_old'
+
+    with schema_editor.connection.cursor() as cursor:
+        if _is_partitioned(cursor, table) == partitioned:
+            return
+
+        cursor.execute(
+            'SELECT column_name FROM information_schema.columns '
+            'WHERE table_name = %s AND table_schema = current_schema() ORDER BY ordinal_position',
+            [table]
+        )
+        columns = ', '.join(f'"{row[0]}"' for row in cursor.fetchall())
+        cursor.execute(f'SELECT MIN(scraped_date), MAX(id) FROM "{table}"')
+        first_date, max_id = cursor.fetchone()
+
+        pk_name, constraints, indexes = _detach_definitions(cursor, table)
+        cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{old_table}"')
+
+        if partitioned:
+            cursor.execute(
+                f'CREATE TABLE "{table}" (LIKE "{old_table}" INCLUDING DEFAULTS) PARTITION BY RANGE (scraped_date)'
+            )
+            today = date.today()
+            month = (first_date or today).replace(day=1)
+            last_month = _add_months(today, MONTHS_AHEAD)
+            while month <= last_month:
+                cursor.execute(
+                    f'CREATE TABLE "{table}_p{month.year:04d}_{month.month:02d}" PARTITION OF "{table}" '
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+                )
+                cursor.execute(
+                    f'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "{old_table}" '
+                    f'WHERE scraped_date >= %s AND scraped_date < %s',
+                    [month, _add_months(month, 1)]
+                )
+                month = _add_months(month, 1)
+            cursor.execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+            cursor.execute(
+                f'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "{old_table}" WHERE scraped_date >= %s',
+                [month]
+            )
+            cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{pk_name}" PRIMARY KEY (id, scraped_date)')
+        else:
+            cursor.execute(f'CREATE TABLE "{table}" (LIKE "{old_table}" INCLUDING DEFAULTS)')
+            cursor.execute(f'INSERT INTO "{table}" ({columns}) SELECT {columns} FROM "{old_table}"')
+            cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{pk_name}" PRIMARY KEY (id)')
+
+        for name, definition in constraints:
+            cursor.execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{name}" {definition}')
+        for definition in indexes:
+            cursor.execute(definition)
+
+        # Dropping the old table drops its id sequence; the new one continues the ids
+        cursor.execute(f'DROP TABLE "{old_table}"')
+        cursor.execute(f'CREATE SEQUENCE "{table}_id_seq" START WITH {(max_id or 0) + 1} OWNED BY "{table}".id')
+        cursor.execute(f'ALTER TABLE "{table}" ALTER COLUMN id SET DEFAULT nextval(\'"{table}_id_seq"\')')
+        cursor.execute(f'ANALYZE "{table}"')
+
+
+def partition_rank_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Rank = apps.get_model('keywords', 'Rank')
+    _rebuild(schema_editor, Rank._meta.db_table, partitioned=True)
+
+
+def unpartition_rank_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    Rank = apps.get_model('keywords', 'Rank')
+    _rebuild(schema_editor, Rank._meta.db_table, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keywords', '0010_keyword_rank_state'),
+    ]
+
+    operations = [
+        # The partition key is part of the primary key, so it can't be NULL
+        migrations.AlterField(
+            model_name='rank',
+            name='scraped_date',
+            field=models.DateField(help_text='Crawl date - one rank per keyword per day (partition key)'),
+        ),
+        migrations.RunPython(partition_rank_table, unpartition_rank_table),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-16 20:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keywords', '0011_partition_rank_by_month'),
+        ('project', '0008_add_backlinks_lockdown'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(db_index=True)),
+                ('keywords_total', models.IntegerField(default=0, help_text='Non-archived keywords')),
+                ('ranked_count', models.IntegerField(default=0, help_text='Keywords with a rank (rank > 0)')),
+                ('rank_sum', models.BigIntegerField(default=0, help_text='Sum of keyword ranks (average = rank_sum / keywords_total)')),
+                ('top3_count', models.IntegerField(default=0)),
+                ('top10_count', models.IntegerField(default=0)),
+                ('top30_count', models.IntegerField(default=0)),
+                ('not_ranking_count', models.IntegerField(default=0, help_text='Keywords not in the top 100')),
+                ('improved_count', models.IntegerField(default=0, help_text="Keywords with rank_status 'up'")),
+                ('declined_count', models.IntegerField(default=0, help_text="Keywords with rank_status 'down'")),
+                ('visibility_points', models.FloatField(default=0, help_text='Sum of estimated CTR of ranking positions')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='project.project')),
+            ],
+            options={
+                'ordering': ['-date'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'date'), name='keywords_projectdailystats_project_date_uniq')],
+            },
+        ),
+    ]
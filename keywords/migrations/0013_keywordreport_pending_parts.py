@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-16 20:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keywords', '0012_project_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='keywordreport',
+            name='pending_parts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Report files still being generated by separate tasks (CSV and queued PDF)'),
+        ),
+    ]
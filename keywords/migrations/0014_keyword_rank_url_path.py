@@ -0,0 +1,23 @@
+# Generated by Django 5.2.5 on 2026-10-16 20:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keywords', '0013_keywordreport_pending_parts'),
+        ('project', '0008_add_backlinks_lockdown'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='keyword',
+            name='rank_url_path',
+            field=models.CharField(blank=True, default='', help_text='rank_url without query string or fragment, used to group keywords by page', max_length=500),
+        ),
+        migrations.AddIndex(
+            model_name='keyword',
+            index=models.Index(fields=['project', 'rank_url_path'], name='keywords_ke_project_4b288f_idx'),
+        ),
+    ]
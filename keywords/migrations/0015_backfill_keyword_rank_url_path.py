@@ -0,0 +1,53 @@
+"""
+Backfill Keyword.rank_url_path from rank_url.
+
+Runs outside a single transaction: every chunk of ids commits on its own so
+no long-lived row locks are held on the keywords table while it runs.
+"""
+
+from urllib.parse import urlsplit
+
+from django.db import migrations, transaction
+from django.db.models import Max, Min
+
+BATCH_SIZE = 5000
+
+
+def normalize_rank_url(url):
+    """Same normalization as Keyword.normalize_rank_url at the time of this migration"""
+    if not url:
+        return ''
+    parts = urlsplit(url.strip())
+    if not parts.netloc:
+        return url.strip()[:500]
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"[:500]
+
+
+def backfill_rank_url_path(apps, schema_editor):
+    Keyword = apps.get_model('keywords', 'Keyword')
+    db_alias = schema_editor.connection.alias
+    keywords = Keyword.objects.using(db_alias).exclude(rank_url__isnull=True).exclude(rank_url='')
+
+    bounds = keywords.aggregate(low=Min('id'), high=Max('id'))
+    if bounds['low'] is None:
+        return
+
+    for start in range(bounds['low'], bounds['high'] + 1, BATCH_SIZE):
+        with transaction.atomic(using=db_alias):
+            batch = list(keywords.filter(id__gte=start, id__lt=start + BATCH_SIZE).only('id', 'rank_url'))
+            for keyword in batch:
+                keyword.rank_url_path = normalize_rank_url(keyword.rank_url)
+            Keyword.objects.using(db_alias).bulk_update(batch, ['rank_url_path'])
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('keywords', '0014_keyword_rank_url_path'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rank_url_path, migrations.RunPython.noop),
+    ]
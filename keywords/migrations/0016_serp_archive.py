@@ -0,0 +1,55 @@
+# Generated by Django 5.2.5 on 2026-10-16 21:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keywords', '0015_backfill_keyword_rank_url_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SerpBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_hash', models.CharField(help_text='SHA-256 of the HTML', max_length=64, unique=True)),
+                ('codec', models.CharField(help_text='e.g. "zstd", "zstd:<dict id>" or "zlib"', max_length=32)),
+                ('size', models.IntegerField(help_text='HTML size in bytes')),
+                ('stored_size', models.IntegerField(help_text='Compressed size in bytes')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SerpArchiveEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scraped_date', models.DateField(db_index=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('blob', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='entries', to='keywords.serpblob')),
+                ('keyword', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='serp_archive_entries', to='keywords.keyword')),
+            ],
+            options={
+                'ordering': ['-scraped_date'],
+                'unique_together': {('keyword', 'scraped_date')},
+            },
+        ),
+        migrations.AlterField(
+            model_name='keyword',
+            name='scrape_do_file_path',
+            field=models.CharField(blank=True, help_text='Key of the latest archived SERP ({project}/{keyword}/{date}.html)', max_length=500, null=True),
+        ),
+        migrations.AlterField(
+            model_name='keyword',
+            name='scrape_do_files',
+            field=models.JSONField(blank=True, default=list, help_text='Legacy list of raw HTML files, no longer maintained (see SerpArchiveEntry)'),
+        ),
+        migrations.AlterField(
+            model_name='serpsnapshot',
+            name='html_file_path',
+            field=models.CharField(blank=True, default='', help_text="Source keyword's SERP archive key ({project}/{keyword}/{date}.html)", max_length=500),
+        ),
+    ]
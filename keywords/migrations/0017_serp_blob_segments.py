@@ -0,0 +1,37 @@
+# Generated by Django 5.2.5 on 2026-10-16 22:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keywords', '0016_serp_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='serpblob',
+            name='offset',
+            field=models.BigIntegerField(blank=True, help_text='Byte offset of the compressed data in the segment', null=True),
+        ),
+        migrations.AddField(
+            model_name='serpblob',
+            name='segment',
+            field=models.CharField(blank=True, default='', help_text='Segment file relative to SERP_ARCHIVE_ROOT', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='serpblob',
+            name='segment_date',
+            field=models.DateField(blank=True, db_index=True, help_text='Day of the segment holding the blob (null for loose blobs)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='serpblob',
+            name='content_hash',
+            field=models.CharField(db_index=True, help_text='SHA-256 of the HTML', max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name='serpblob',
+            constraint=models.UniqueConstraint(fields=('content_hash', 'segment_date'), name='keywords_serpblob_hash_day_uniq'),
+        ),
+    ]
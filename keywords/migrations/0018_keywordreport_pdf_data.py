@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-16 23:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('keywords', '0017_serp_blob_segments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='keywordreport',
+            name='pdf_data',
+            field=models.JSONField(blank=True, help_text='Precomputed PDF content waiting for the reports_pdf queue, cleared once rendered', null=True),
+        ),
+    ]
@@ -1,7 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.conf import settings
 from datetime import timedelta
+from urllib.parse import urlsplit
 from project.models import Project
 
 
@@ -27,6 +28,9 @@ class Keyword(models.Model):
         ('critical', 'Critical'),
     ]
     
+    # Fields written by advance_rank_state
+    RANK_STATE_FIELDS = ['last_rank', 'last_rank_date', 'previous_rank', 'previous_rank_date']
+    
     # Core fields
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='keywords')
     keyword = models.CharField(max_length=255, db_index=True)
@@ -41,10 +45,17 @@ class Keyword(models.Model):
     rank_status = models.CharField(max_length=20, choices=RANK_STATUS_CHOICES, default='no_change')
     rank_diff_from_last_time = models.IntegerField(default=0)
     rank_url = models.URLField(max_length=500, blank=True, null=True)
+    rank_url_path = models.CharField(max_length=500, blank=True, default='', help_text='rank_url without query string or fragment, used to group keywords by page')
     number_of_results = models.BigIntegerField(default=0)
     initial_rank = models.IntegerField(default=0, null=True, blank=True)
     highest_rank = models.IntegerField(default=0)
     
+    # Rolling rank history state, maintained by every Rank write (raw Rank.rank values)
+    last_rank = models.IntegerField(default=0, help_text='Rank of the latest Rank row')
+    last_rank_date = models.DateField(null=True, blank=True, help_text='scraped_date of the latest Rank row')
+    previous_rank = models.IntegerField(default=0, help_text='Rank from the latest day before last_rank_date')
+    previous_rank_date = models.DateField(null=True, blank=True, help_text='scraped_date of previous_rank')
+    
     # Scraping fields
     scraped_at = models.DateTimeField(null=True, blank=True, db_index=True)
     next_crawl_at = models.DateTimeField(null=True, blank=True, db_index=True, help_text='Next scheduled crawl time')
@@ -52,8 +63,8 @@ class Keyword(models.Model):
     crawl_priority = models.CharField(max_length=20, choices=PRIORITY_CHOICES, default='normal', db_index=True)
     crawl_interval_hours = models.IntegerField(default=24, help_text='Hours between automatic crawls')
     force_crawl_count = models.IntegerField(default=0, help_text='Number of times force crawl was used')
-    scrape_do_file_path = models.CharField(max_length=500, blank=True, null=True, help_text='Latest HTML file path')
-    scrape_do_files = models.JSONField(default=list, blank=True, help_text='Ordered list of HTML files, latest first')
+    scrape_do_file_path = models.CharField(max_length=500, blank=True, null=True, help_text='Key of the latest archived SERP ({project}/{keyword}/{date}.html)')
+    scrape_do_files = models.JSONField(default=list, blank=True, help_text='Legacy list of raw HTML files, no longer maintained (see SerpArchiveEntry)')
     scrape_do_at = models.DateTimeField(null=True, blank=True)
     error = models.TextField(blank=True, default='')
     last_error_message = models.CharField(max_length=255, blank=True, null=True, help_text='Minimal error message')
@@ -98,44 +109,187 @@ class Keyword(models.Model):
             models.Index(fields=['processing', 'archive']),
             models.Index(fields=['crawl_priority', 'next_crawl_at']),
             models.Index(fields=['next_crawl_at', 'processing']),
+            models.Index(fields=['project', 'rank_url_path']),
         ]
         ordering = ['-created_at']
     
     def __str__(self):
         return f"{self.keyword} - {self.project.domain} ({self.country})"
     
-    def update_rank(self, new_rank, url=None, from_rank_save=False):
+    # Fields that decide a keyword's contribution to ProjectDailyStats
+    STATS_FIELDS = ('rank', 'rank_status', 'archive')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_stats_contribution()
+        return instance
+    
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._remember_stats_contribution()
+    
+    def _remember_stats_contribution(self):
+        """Remember what the keyword currently adds to its project's daily stats"""
+        if set(self.STATS_FIELDS) & self.get_deferred_fields():
+            self._stats_contribution = None
+        else:
+            self._stats_contribution = ProjectDailyStats.contribution(self.rank, self.rank_status, self.archive)
+    
+    def stats_delta(self):
+        """Change of this keyword's ProjectDailyStats contribution since it was loaded or saved
+        
+        Returns:
+            Dict of non-zero counter deltas, or None if the previous contribution is unknown
+        """
+        if self._state.adding:
+            before = {}
+        else:
+            before = getattr(self, '_stats_contribution', None)
+            if before is None:
+                return None
+        after = ProjectDailyStats.contribution(self.rank, self.rank_status, self.archive)
+        delta = {field: after.get(field, 0) - before.get(field, 0) for field in ProjectDailyStats.COUNTER_FIELDS}
+        return {field: value for field, value in delta.items() if value}
+    
+    @staticmethod
+    def normalize_rank_url(url):
+        """Page a ranking URL belongs to: scheme, host and path, without query string or fragment"""
+        if not url:
+            return ''
+        parts = urlsplit(url.strip())
+        if not parts.netloc:
+            return url.strip()[:500]
+        return f"{parts.scheme}://{parts.netloc}{parts.path}"[:500]
+    
+    def save(self, *args, **kwargs):
+        """Save and apply the change to today's project stats in the same transaction"""
+        # Keep the page grouping column in step with rank_url
+        self.rank_url_path = self.normalize_rank_url(self.rank_url)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'rank_url' in update_fields and 'rank_url_path' not in update_fields:
+            update_fields = kwargs['update_fields'] = list(update_fields) + ['rank_url_path']
+        if update_fields is not None and not set(update_fields) & set(self.STATS_FIELDS):
+            return super().save(*args, **kwargs)
+        
+        delta = self.stats_delta()
+        if not delta:
+            super().save(*args, **kwargs)
+        else:
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                ProjectDailyStats.apply_delta(self.project_id, delta)
+        self._remember_stats_contribution()
+    
+    def delete(self, *args, **kwargs):
+        """Delete and remove the keyword from today's project stats"""
+        before = None if self._state.adding else getattr(self, '_stats_contribution', None)
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            if before:
+                ProjectDailyStats.apply_delta(self.project_id, {field: -value for field, value in before.items()})
+        return result
+    
+    def update_rank(self, new_rank, url=None, from_rank_save=False, scraped_date=None):
         """Update rank and calculate differences
         
         Args:
             new_rank: The new rank position
             url: Optional URL where the site was found
             from_rank_save: Internal flag - when True, skip updating scraped_at as it's managed by the task
+            scraped_date: Day the new rank is for (defaults to today)
         """
-        # Get the previous rank from history (not current rank)
-        # This ensures we compare against the actual previous rank
-        from .models import Rank  # Import here to avoid circular import
+        scraped_date = scraped_date or timezone.localdate()
         
-        # Get the latest rank that's not from today to compare against
-        current_ranks = Rank.objects.filter(
-            keyword=self,
-            created_at__date=timezone.now().date()
-        ).values_list('id', flat=True)
+        # Compare against the actual previous rank, not the current one
+        old_rank = self.previous_rank_for(scraped_date)
+        
+        # Rank writes keep the rolling history state in step with the Rank table
+        if from_rank_save:
+            self.advance_rank_state(new_rank, scraped_date)
+        
+        self.apply_rank_change(new_rank, old_rank, url=url, from_rank_save=from_rank_save)
+        
+        self.save()
+    
+    def record_rank(self, rank, url=None):
+        """Apply a newly written Rank to the keyword and save it
+        
+        Args:
+            rank: Saved Rank instance of this keyword
+            url: Optional URL where the site was found
+        """
+        if rank.is_organic:
+            self.update_rank(rank.rank, url=url, from_rank_save=True, scraped_date=rank.scraped_date)
+        else:
+            # Sponsored/ad rankings don't update the main keyword rank, but
+            # they are part of the history the next rank is compared with
+            self.advance_rank_state(rank.rank, rank.scraped_date)
+            self.save(update_fields=self.RANK_STATE_FIELDS)
+    
+    def has_rank_state_for(self, scraped_date):
+        """Whether the rolling state answers previous_rank_for(scraped_date)
+        
+        Args:
+            scraped_date: Day of the rank being written
+        """
+        if self.last_rank_date is None:
+            return False
+        if scraped_date > self.last_rank_date:
+            return True
+        if self.previous_rank_date is None:
+            return scraped_date == self.last_rank_date
+        return self.previous_rank_date < scraped_date <= self.last_rank_date
+    
+    def previous_rank_for(self, scraped_date):
+        """Rank of the latest day before scraped_date (0 if none)
+        
+        Answered from the rolling state; only keywords without state (never
+        ranked, or not yet rebuilt) and writes for days older than the state
+        covers fall back to a history query.
         
-        previous_rank = Rank.objects.filter(
-            keyword=self
-        ).exclude(
-            id__in=current_ranks  # Exclude today's ranks
-        ).order_by('-created_at').first()
+        Args:
+            scraped_date: Day of the rank being written
+        """
+        if self.has_rank_state_for(scraped_date):
+            if scraped_date > self.last_rank_date:
+                return self.last_rank
+            return self.previous_rank if self.previous_rank_date is not None else 0
         
-        # If no previous rank excluding today, just get the previous one
-        if not previous_rank:
-            previous_rank = Rank.objects.filter(
-                keyword=self
-            ).order_by('-created_at')[1:2].first()  # Skip the most recent, get the second
+        previous = Rank.objects.filter(
+            keyword=self,
+            scraped_date__lt=scraped_date
+        ).order_by('-scraped_date').values_list('rank', flat=True).first()
+        return previous or 0
+    
+    def advance_rank_state(self, rank_value, scraped_date):
+        """Fold a newly written rank into the rolling state without saving
         
-        old_rank = previous_rank.rank if previous_rank else 0
+        Args:
+            rank_value: Raw Rank.rank value (0 when not found)
+            scraped_date: Day of the rank
+        """
+        if self.last_rank_date is None or scraped_date > self.last_rank_date:
+            if self.last_rank_date is not None:
+                self.previous_rank = self.last_rank
+                self.previous_rank_date = self.last_rank_date
+            self.last_rank = rank_value
+            self.last_rank_date = scraped_date
+        elif scraped_date == self.last_rank_date:
+            self.last_rank = rank_value  # Same day re-crawl replaces the rank
+        elif self.previous_rank_date is None or scraped_date >= self.previous_rank_date:
+            self.previous_rank = rank_value
+            self.previous_rank_date = scraped_date
+    
+    def apply_rank_change(self, new_rank, old_rank, url=None, from_rank_save=False):
+        """Set rank, status, diff and crawl schedule fields without saving
         
+        Args:
+            new_rank: The new rank position
+            old_rank: Previous rank position (0 if the keyword was never ranked)
+            url: Optional URL where the site was found
+            from_rank_save: When True, keep scraped_at as it's managed by the task
+        """
         # Handle not found in top 100 case
         if new_rank == 0 or new_rank > 100:
             new_rank = 101  # Use 101 to indicate not in top 100
@@ -164,6 +318,7 @@ class Keyword(models.Model):
         # Update rank URL if provided
         if url:
             self.rank_url = url
+            self.rank_url_path = self.normalize_rank_url(url)
         
         # Update highest rank (lowest number is best)
         if self.highest_rank == 0 or (new_rank > 0 and new_rank < self.highest_rank):
@@ -191,8 +346,6 @@ class Keyword(models.Model):
         
         # Mark as not processing
         self.processing = False
-        
-        self.save()
     
     def should_crawl(self):
         """Check if keyword should be crawled based on schedule"""
@@ -320,6 +473,13 @@ class Rank(models.Model):
     
     # Timestamp
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
+    scraped_date = models.DateField(help_text='Crawl date - one rank per keyword per day (partition key)')
+    
+    # Fields replaced when a rank for the same keyword and day is written again
+    UPSERT_FIELDS = [
+        'rank', 'is_organic', 'has_map_result', 'has_video_result', 'has_image_result',
+        'search_results_file', 'created_at',
+    ]
     
     class Meta:
         indexes = [
@@ -327,6 +487,9 @@ class Rank(models.Model):
             models.Index(fields=['keyword', 'rank']),
             models.Index(fields=['keyword', 'is_organic']),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=['keyword', 'scraped_date'], name='keywords_rank_keyword_scraped_date_uniq'),
+        ]
         ordering = ['-created_at']
     
     def __str__(self):
@@ -336,18 +499,159 @@ class Rank(models.Model):
     def save(self, *args, **kwargs):
         """Update parent keyword's rank on save"""
         is_new = self.pk is None
-        super().save(*args, **kwargs)
+        if self.scraped_date is None:
+            self.scraped_date = self.date_for(self.created_at)
+        
+        # The rank and the keyword's rank state are written together
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            
+            if is_new and self.keyword:
+                # Only organic rankings update the main keyword rank (record_rank
+                # keeps the history state for sponsored ones too)
+                self.keyword.record_rank(self, url=getattr(self, '_rank_url', None))
+    
+    @staticmethod
+    def date_for(created_at):
+        """Local calendar date of a rank timestamp (same day as created_at__date)"""
+        if timezone.is_aware(created_at):
+            return timezone.localdate(created_at)
+        return created_at.date()
+    
+    @classmethod
+    def upsert(cls, ranks):
+        """
+        Insert ranks with a single INSERT ... ON CONFLICT statement
         
-        if is_new and self.keyword:
-            # Only update keyword rank if this is an organic ranking
-            # Sponsored/ad rankings should not update the main keyword rank
-            if self.is_organic:
-                # Get URL from the rank record if available
-                url = None
-                if hasattr(self, '_rank_url'):
-                    url = self._rank_url
-                # Pass from_rank_save=True to prevent circular calls
-                self.keyword.update_rank(self.rank, url=url, from_rank_save=True)
+        A rank for a keyword/scraped_date that already exists is replaced in
+        place (keeping its id). Keyword.update_rank is not called.
+        
+        Args:
+            ranks: Unsaved Rank instances, at most one per keyword and day
+        
+        Returns:
+            The ranks with primary keys set
+        """
+        for rank in ranks:
+            if rank.scraped_date is None:
+                rank.scraped_date = cls.date_for(rank.created_at)
+        return cls.objects.bulk_create(
+            ranks,
+            update_conflicts=True,
+            unique_fields=['keyword', 'scraped_date'],
+            update_fields=cls.UPSERT_FIELDS
+        )
+
+
+class SerpSnapshot(models.Model):
+    """
+    Parsed SERP shared by every keyword with the same query, country and location on a given day.
+    
+    The first crawl of the day records where its parsed results live in R2; later
+    keywords with the same key reuse them instead of calling Scrape.do again.
+    """
+    query = models.CharField(max_length=255, help_text='Normalized search query')
+    country_code = models.CharField(max_length=10)
+    location = models.CharField(max_length=255, blank=True, default='', help_text='Normalized location ("" for country-wide)')
+    scraped_date = models.DateField(db_index=True)
+    
+    results_file = models.CharField(max_length=500, help_text='R2 path to parsed JSON results')
+    html_file_path = models.CharField(max_length=500, blank=True, default='', help_text="Source keyword's SERP archive key ({project}/{keyword}/{date}.html)")
+    source_keyword = models.ForeignKey(Keyword, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    reuse_count = models.IntegerField(default=0, help_text='Number of keywords served from this snapshot')
+    
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        unique_together = ['query', 'country_code', 'location', 'scraped_date']
+        ordering = ['-scraped_date']
+    
+    def __str__(self):
+        where = f"{self.country_code}/{self.location}" if self.location else self.country_code
+        return f"{self.query} ({where}) on {self.scraped_date}"
+    
+    @staticmethod
+    def key_for_keyword(keyword):
+        """Build the normalized snapshot key fields for a keyword"""
+        return {
+            'query': ' '.join(keyword.keyword.lower().split())[:255],
+            'country_code': (keyword.country_code or keyword.country or 'US').upper(),
+            'location': ' '.join((keyword.location or '').lower().split())[:255],
+        }
+    
+    @classmethod
+    def find_for_keyword(cls, keyword, scraped_date):
+        """Return the snapshot matching the keyword on scraped_date, if any"""
+        return cls.objects.filter(
+            scraped_date=scraped_date,
+            **cls.key_for_keyword(keyword)
+        ).first()
+    
+    @classmethod
+    def record(cls, keyword, scraped_date, results_file, html_file_path=''):
+        """Record (or refresh) the snapshot produced by crawling keyword on scraped_date"""
+        snapshot, _ = cls.objects.update_or_create(
+            scraped_date=scraped_date,
+            **cls.key_for_keyword(keyword),
+            defaults={
+                'results_file': results_file,
+                'html_file_path': html_file_path or '',
+                'source_keyword': keyword,
+            }
+        )
+        return snapshot
+
+
+class SerpBlob(models.Model):
+    """
+    One stored SERP HTML document of the compressed archive (keywords.serp_archive).
+    
+    Blobs are appended to the segment file of their day and addressed by
+    (segment, offset, stored_size), so a read is a single seek. Within a day a
+    SERP shared by several keywords (e.g. through a snapshot) is stored once,
+    keyed by the SHA-256 of its HTML. The codec records how the stored bytes
+    were compressed, including the zstd dictionary id, so old blobs stay
+    readable after a new dictionary is trained.
+    
+    Blobs without a segment are loose files written before segments existed.
+    """
+    content_hash = models.CharField(max_length=64, db_index=True, help_text='SHA-256 of the HTML')
+    codec = models.CharField(max_length=32, help_text='e.g. "zstd", "zstd:<dict id>" or "zlib"')
+    size = models.IntegerField(help_text='HTML size in bytes')
+    stored_size = models.IntegerField(help_text='Compressed size in bytes')
+    segment_date = models.DateField(null=True, blank=True, db_index=True, help_text='Day of the segment holding the blob (null for loose blobs)')
+    segment = models.CharField(max_length=255, blank=True, default='', help_text='Segment file relative to SERP_ARCHIVE_ROOT')
+    offset = models.BigIntegerField(null=True, blank=True, help_text='Byte offset of the compressed data in the segment')
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['content_hash', 'segment_date'], name='keywords_serpblob_hash_day_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"{self.content_hash[:12]} ({self.codec}, {self.stored_size}/{self.size} bytes)"
+
+
+class SerpArchiveEntry(models.Model):
+    """
+    Index of the archived SERP HTML: which blob holds a keyword's SERP of a day.
+    
+    Replaces the per-keyword Keyword.scrape_do_files list. Retention is date
+    based (prune_serp_archive drops every expired day with its segment
+    directory), so the fetch path never deletes files.
+    """
+    keyword = models.ForeignKey(Keyword, on_delete=models.CASCADE, related_name='serp_archive_entries')
+    scraped_date = models.DateField(db_index=True)
+    blob = models.ForeignKey(SerpBlob, on_delete=models.PROTECT, related_name='entries')
+    created_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        unique_together = ['keyword', 'scraped_date']
+        ordering = ['-scraped_date']
+    
+    def __str__(self):
+        return f"SERP of keyword {self.keyword_id} on {self.scraped_date}"
 
 
 class Tag(models.Model):
@@ -417,5 +721,196 @@ class KeywordTag(models.Model):
         return f"{self.keyword.keyword} - {self.tag.name}"
 
 
+class ProjectDailyStats(models.Model):
+    """
+    Keyword rollup of a project for one day, read by dashboards, project cards and reports.
+    
+    Today's row is kept current incrementally: a Keyword save (or a result sink
+    flush) that changes a keyword's rank, rank status or archive flag adds the
+    difference to the row with one UPDATE. The first change of a day builds the
+    row from the project's keywords, and reconcile_project_daily_stats rebuilds
+    every project nightly to correct drift from bulk updates that bypass
+    Keyword.save(). Rows of earlier days stay as daily history.
+    
+    Counters cover non-archived keywords, with the same rules as the keyword views.
+    """
+    COUNTER_FIELDS = (
+        'keywords_total', 'ranked_count', 'rank_sum', 'top3_count', 'top10_count', 'top30_count',
+        'not_ranking_count', 'improved_count', 'declined_count', 'visibility_points',
+    )
+    
+    # Estimated click-through rate of organic positions 1-10, summed into visibility_points
+    POSITION_CTR = (0.317, 0.247, 0.187, 0.136, 0.095, 0.062, 0.042, 0.031, 0.030, 0.025)
+    
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField(db_index=True)
+    
+    keywords_total = models.IntegerField(default=0, help_text='Non-archived keywords')
+    ranked_count = models.IntegerField(default=0, help_text='Keywords with a rank (rank > 0)')
+    rank_sum = models.BigIntegerField(default=0, help_text='Sum of keyword ranks (average = rank_sum / keywords_total)')
+    top3_count = models.IntegerField(default=0)
+    top10_count = models.IntegerField(default=0)
+    top30_count = models.IntegerField(default=0)
+    not_ranking_count = models.IntegerField(default=0, help_text='Keywords not in the top 100')
+    improved_count = models.IntegerField(default=0, help_text="Keywords with rank_status 'up'")
+    declined_count = models.IntegerField(default=0, help_text="Keywords with rank_status 'down'")
+    visibility_points = models.FloatField(default=0, help_text='Sum of estimated CTR of ranking positions')
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'date'], name='keywords_projectdailystats_project_date_uniq'),
+        ]
+        ordering = ['-date']
+    
+    def __str__(self):
+        return f"{self.project.domain} on {self.date}"
+    
+    @property
+    def avg_rank(self):
+        """Average keyword rank, as Avg('rank') over the project's keywords (None without keywords)"""
+        return self.rank_sum / self.keywords_total if self.keywords_total else None
+    
+    @property
+    def visibility_score(self):
+        """Share of the maximum possible clicks (every keyword at #1), in percent"""
+        if not self.keywords_total:
+            return 0.0
+        return round(self.visibility_points / (self.keywords_total * self.POSITION_CTR[0]) * 100, 2)
+    
+    def as_keyword_stats(self):
+        """Stats in the shape of the keyword views' aggregate() results"""
+        return {
+            'total_keywords': self.keywords_total,
+            'avg_rank': self.avg_rank,
+            'top10_count': self.top10_count,
+            'improved_count': self.improved_count,
+            'declined_count': self.declined_count,
+            'not_ranking_count': self.not_ranking_count,
+        }
+    
+    @classmethod
+    def contribution(cls, rank, rank_status, archive):
+        """
+        What one keyword adds to its project's counters
+        
+        Args:
+            rank: Keyword.rank
+            rank_status: Keyword.rank_status
+            archive: Keyword.archive
+        
+        Returns:
+            Dict of counter field to value (empty for archived keywords)
+        """
+        if archive:
+            return {}
+        in_top_100 = 0 < rank <= 100
+        return {
+            'keywords_total': 1,
+            'ranked_count': int(rank > 0),
+            'rank_sum': rank,
+            'top3_count': int(in_top_100 and rank <= 3),
+            'top10_count': int(in_top_100 and rank <= 10),
+            'top30_count': int(in_top_100 and rank <= 30),
+            'not_ranking_count': int(not in_top_100),
+            'improved_count': int(rank_status == 'up'),
+            'declined_count': int(rank_status == 'down'),
+            'visibility_points': cls.POSITION_CTR[rank - 1] if 0 < rank <= len(cls.POSITION_CTR) else 0.0,
+        }
+    
+    @classmethod
+    def apply_delta(cls, project_id, delta, day=None):
+        """
+        Add counter changes to a project's row for the day
+        
+        If the row doesn't exist yet it is built from the project's keywords,
+        which already include the change.
+        
+        Args:
+            project_id: Project ID
+            delta: Dict of counter field to change
+            day: Stats day (defaults to today)
+        """
+        changes = {field: models.F(field) + value for field, value in delta.items() if value}
+        if not changes:
+            return
+        day = day or timezone.localdate()
+        updated = cls.objects.filter(project_id=project_id, date=day).update(updated_at=timezone.now(), **changes)
+        if not updated:
+            cls.rebuild([project_id], day)
+    
+    @classmethod
+    def rebuild(cls, project_ids, day=None):
+        """
+        Recompute rows from the projects' keywords with one aggregate query
+        
+        Args:
+            project_ids: Project IDs
+            day: Stats day (defaults to today)
+        
+        Returns:
+            List of the written ProjectDailyStats
+        """
+        from django.db.models import Case, Count, FloatField, Q, Sum, Value, When
+        
+        day = day or timezone.localdate()
+        visibility = Case(
+            *[When(rank=position, then=Value(ctr)) for position, ctr in enumerate(cls.POSITION_CTR, start=1)],
+            default=Value(0.0),
+            output_field=FloatField()
+        )
+        rows = Keyword.objects.filter(project_id__in=project_ids, archive=False).values('project_id').annotate(
+            keywords_total=Count('id'),
+            ranked_count=Count('id', filter=Q(rank__gt=0)),
+            rank_sum=Sum('rank'),
+            top3_count=Count('id', filter=Q(rank__gt=0, rank__lte=3)),
+            top10_count=Count('id', filter=Q(rank__gt=0, rank__lte=10)),
+            top30_count=Count('id', filter=Q(rank__gt=0, rank__lte=30)),
+            not_ranking_count=Count('id', filter=Q(rank=0) | Q(rank__gt=100)),
+            improved_count=Count('id', filter=Q(rank_status='up')),
+            declined_count=Count('id', filter=Q(rank_status='down')),
+            visibility_points=Sum(visibility),
+        ).order_by()
+        counters = {row.pop('project_id'): row for row in rows}
+        
+        stats = []
+        for project_id in project_ids:
+            values = counters.get(project_id, {})
+            stats.append(cls(
+                project_id=project_id,
+                date=day,
+                **{field: values.get(field) or 0 for field in cls.COUNTER_FIELDS}
+            ))
+        
+        if stats:
+            cls.objects.bulk_create(
+                stats,
+                update_conflicts=True,
+                unique_fields=['project', 'date'],
+                update_fields=list(cls.COUNTER_FIELDS) + ['updated_at']
+            )
+        return stats
+    
+    @classmethod
+    def current_for(cls, project_ids):
+        """
+        Today's stats for several projects, building the missing rows
+        
+        Args:
+            project_ids: Project IDs
+        
+        Returns:
+            Dict of project ID to ProjectDailyStats
+        """
+        day = timezone.localdate()
+        project_ids = list(project_ids)
+        stats = {row.project_id: row for row in cls.objects.filter(project_id__in=project_ids, date=day)}
+        missing = [project_id for project_id in project_ids if project_id not in stats]
+        if missing:
+            stats.update({row.project_id: row for row in cls.rebuild(missing, day)})
+        return stats
+
+
 # Import report models
 from .models_reports import KeywordReport, ReportSchedule
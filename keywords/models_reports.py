@@ -3,7 +3,7 @@ Keyword Reporting Models
 Handles report generation, scheduling, and storage
 """
 
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
@@ -160,6 +160,17 @@ class KeywordReport(models.Model):
         default=0
     )
     
+    pending_parts = models.PositiveSmallIntegerField(
+        default=0,
+        help_text="Report files still being generated by separate tasks (CSV and queued PDF)"
+    )
+    
+    pdf_data = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Precomputed PDF content waiting for the reports_pdf queue, cleared once rendered"
+    )
+    
     # User tracking
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -266,6 +277,47 @@ class KeywordReport(models.Model):
             'processing_duration_seconds', 'updated_at'
         ])
     
+    @classmethod
+    def finish_part(cls, report_id, pdf_task_id=None, **fields):
+        """
+        Record one finished part of a report whose files are generated by separate tasks
+        
+        The row is locked while the counter is decremented, so exactly one of the
+        tasks sees the last part finish.
+        
+        Args:
+            report_id: ID of the report
+            pdf_task_id: ID of the finishing PDF task; the part is ignored when
+                it no longer matches the staged PDF data (the attempt was cancelled)
+            **fields: File fields set by the finished part (e.g. pdf_file_path)
+        
+        Returns:
+            The report if this was the last pending part, otherwise None
+        """
+        with transaction.atomic():
+            report = cls.objects.select_for_update().get(id=report_id)
+            if pdf_task_id is not None and (report.pdf_data or {}).get('task_id') != pdf_task_id:
+                return None
+            for name, value in fields.items():
+                setattr(report, name, value)
+            report.pending_parts = max(report.pending_parts - 1, 0)
+            report.save(update_fields=[*fields, 'pending_parts', 'updated_at'])
+        
+        return report if report.pending_parts == 0 else None
+    
+    @classmethod
+    def cancel_parts(cls, report_id):
+        """
+        Forget the parts of a failed generation attempt before it is retried
+        
+        Clears the counter and the staged PDF data, so a PDF task still queued
+        for the failed attempt renders nothing and can't finish a part of the retry.
+        
+        Args:
+            report_id: ID of the report
+        """
+        cls.objects.filter(id=report_id).update(pending_parts=0, pdf_data=None, updated_at=timezone.now())
+    
     def mark_as_failed(self, error_message):
         """Mark report as failed"""
         self.status = 'failed'
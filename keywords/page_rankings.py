@@ -0,0 +1,84 @@
+"""
+Page rankings aggregation
+Groups ranked keywords by the page they rank with (Keyword.rank_url_path)
+in the database, for the page rankings view and report.
+
+Only one row per page is returned, already sorted, so callers can paginate
+with LIMIT/OFFSET and load the keywords of the pages they show on demand.
+"""
+
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from django.db.models import Avg, Count, F, Min, Q, QuerySet, Window
+from django.db.models.functions import Round, RowNumber
+
+
+def ranked_keywords(keywords: QuerySet) -> QuerySet:
+    """
+    Restrict keywords to those ranking in the top 100 with a known page
+
+    Args:
+        keywords: Keyword queryset
+
+    Returns:
+        Filtered queryset
+    """
+    return keywords.filter(
+        archive=False,
+        rank__gt=0,
+        rank__lte=100
+    ).exclude(rank_url_path='')
+
+
+def page_groups(keywords: QuerySet) -> QuerySet:
+    """
+    One row per (project, page) with keyword counts and positions
+
+    Rows are dicts with project_id, project__domain, rank_url_path,
+    total_keywords, avg_position, best_position, top_3, top_10 and top_30,
+    sorted by total_keywords (descending).
+
+    Args:
+        keywords: Keyword queryset (not yet restricted to ranked keywords)
+
+    Returns:
+        Grouped values queryset, ready to be sliced
+    """
+    return ranked_keywords(keywords).values('project_id', 'project__domain', 'rank_url_path').annotate(
+        total_keywords=Count('id'),
+        avg_position=Round(Avg('rank'), 1),
+        best_position=Min('rank'),
+        top_3=Count('id', filter=Q(rank__lte=3)),
+        top_10=Count('id', filter=Q(rank__lte=10)),
+        top_30=Count('id', filter=Q(rank__lte=30)),
+    ).order_by('-total_keywords', 'rank_url_path', 'project_id')
+
+
+def top_keywords_by_page(keywords: QuerySet, limit: int = 10) -> Dict[Tuple[int, str], List[dict]]:
+    """
+    Best ranked keywords of every page, in a single windowed query
+
+    Args:
+        keywords: Keyword queryset (not yet restricted to ranked keywords);
+            filter it on rank_url_path to only load some pages
+        limit: Keywords kept per page
+
+    Returns:
+        Dict of (project_id, rank_url_path) to keyword dicts (keyword,
+        country, rank), best rank first
+    """
+    rows = ranked_keywords(keywords).annotate(
+        page_position=Window(
+            RowNumber(),
+            partition_by=[F('project_id'), F('rank_url_path')],
+            order_by=[F('rank').asc(), F('keyword').asc()]
+        )
+    ).filter(page_position__lte=limit).order_by('project_id', 'rank_url_path', 'page_position').values_list(
+        'project_id', 'rank_url_path', 'keyword', 'country', 'rank'
+    )
+
+    pages = defaultdict(list)
+    for project_id, url, keyword, country, rank in rows.iterator(chunk_size=2000):
+        pages[(project_id, url)].append({'keyword': keyword, 'country': country, 'rank': rank})
+    return pages
@@ -0,0 +1,259 @@
+"""
+Monthly range partitions of the Rank table (PostgreSQL)
+
+keywords_rank is partitioned by RANGE (scraped_date) with one partition per
+month, named keywords_rank_pYYYY_MM, plus keywords_rank_default for rows outside
+every monthly range. Queries filtering on scraped_date only touch the
+partitions of the months they cover.
+
+On other databases (SQLite in development and tests) the table is a plain table
+and every function here is a no-op.
+"""
+
+import logging
+import tempfile
+from datetime import date
+from typing import List, Optional, Tuple
+
+from django.db import connection
+from django.utils import timezone
+
+from .models import Rank
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+RANK_TABLE = Rank._meta.db_table
+DEFAULT_PARTITION = f'{RANK_TABLE}_default'
+
+# Columns written to Parquet archives, with their Arrow types
+ARCHIVE_COLUMNS = (
+    ('id', 'int64'),
+    ('keyword_id', 'int64'),
+    ('rank', 'int32'),
+    ('is_organic', 'bool_'),
+    ('has_map_result', 'bool_'),
+    ('has_video_result', 'bool_'),
+    ('has_image_result', 'bool_'),
+    ('search_results_file', 'string'),
+    ('created_at', 'timestamp'),
+    ('scraped_date', 'date32'),
+)
+
+
+def month_start(day: date) -> date:
+    """First day of the month containing day"""
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    """First day of the month `months` after the month containing day"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Partition table name for a month, e.g. keywords_rank_p2025_09"""
+    return f'{RANK_TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def partition_month(name: str) -> Optional[date]:
+    """
+    Month covered by a monthly partition
+
+    Args:
+        name: Partition table name
+
+    Returns:
+        First day of the month, or None for names that aren't monthly partitions
+    """
+    prefix = f'{RANK_TABLE}_p'
+    if not name.startswith(prefix):
+        return None
+    try:
+        year, month = name[len(prefix):].split('_')
+        return date(int(year), int(month), 1)
+    except ValueError:
+        return None
+
+
+def create_partition_sql(month: date) -> str:
+    """CREATE TABLE statement for a month's partition (idempotent)"""
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(month)}" PARTITION OF "{RANK_TABLE}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def is_partitioned() -> bool:
+    """Whether keywords_rank is a partitioned table in this database"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [RANK_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions() -> List[Tuple[str, date]]:
+    """
+    Monthly partitions currently attached to keywords_rank
+
+    Returns:
+        List of (partition name, month) sorted by month
+    """
+    if not is_partitioned():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)",
+            [RANK_TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = [(name, partition_month(name)) for name in names]
+    return sorted([(name, month) for name, month in partitions if month], key=lambda item: item[1])
+
+
+def ensure_partitions(months_ahead: int = 3, today: Optional[date] = None) -> List[str]:
+    """
+    Create the partitions for the current month and the next `months_ahead` months
+
+    Args:
+        months_ahead: Number of future months to create ahead of time
+        today: Reference day (defaults to today)
+
+    Returns:
+        Names of the partitions that were missing and have been created
+    """
+    if not is_partitioned():
+        return []
+
+    current = month_start(today or timezone.localdate())
+    existing = {name for name, _ in list_partitions()}
+
+    created = []
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month = add_months(current, offset)
+            name = partition_name(month)
+            if name in existing:
+                continue
+            cursor.execute(create_partition_sql(month))
+            created.append(name)
+            logger.info(f"[RANK PARTITIONS] Created partition {name}")
+    return created
+
+
+def detach_partition(name: str) -> None:
+    """
+    Detach a monthly partition, keeping it as a standalone table
+
+    Its rows stop being visible through Rank but the table stays in the
+    database until it is archived or dropped.
+
+    Args:
+        name: Partition table name
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'ALTER TABLE "{RANK_TABLE}" DETACH PARTITION "{name}"')
+    logger.info(f"[RANK PARTITIONS] Detached partition {name}")
+
+
+def archive_partition(name: str, r2_service, prefix: str = 'rank-archive', batch_size: int = 50000) -> Optional[str]:
+    """
+    Export a (detached or attached) partition table to Parquet in R2
+
+    Rows are streamed with a server-side cursor and written in row groups of
+    batch_size, so memory stays flat regardless of partition size.
+
+    Args:
+        name: Partition table name
+        r2_service: R2StorageService used for the upload
+        prefix: R2 key prefix for archives
+        batch_size: Rows per fetch and Parquet row group
+
+    Returns:
+        R2 key of the archive, or None if archiving failed
+    """
+    if not PYARROW_AVAILABLE:
+        logger.error(f"[RANK PARTITIONS] pyarrow is not installed, cannot archive {name}")
+        return None
+
+    schema = pyarrow.schema([
+        (column, pyarrow.timestamp('us', tz='UTC') if kind == 'timestamp' else getattr(pyarrow, kind)())
+        for column, kind in ARCHIVE_COLUMNS
+    ])
+    columns = ', '.join(f'"{column}"' for column, _ in ARCHIVE_COLUMNS)
+    key = f'{prefix}/{name}.parquet'
+
+    try:
+        rows_written = 0
+        with tempfile.NamedTemporaryFile(suffix='.parquet') as archive:
+            with pyarrow.parquet.ParquetWriter(archive.name, schema, compression='zstd') as writer:
+                with connection.chunked_cursor() as cursor:
+                    cursor.execute(f'SELECT {columns} FROM "{name}" ORDER BY "id"')
+                    while True:
+                        rows = cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        batch = {column: [row[i] for row in rows] for i, (column, _) in enumerate(ARCHIVE_COLUMNS)}
+                        writer.write_table(pyarrow.Table.from_pydict(batch, schema=schema))
+                        rows_written += len(rows)
+
+            archive.seek(0)
+            result = r2_service.upload_file(
+                archive,
+                key,
+                metadata={'table': name, 'rows': str(rows_written)},
+                content_type='application/vnd.apache.parquet'
+            )
+
+        if not result.get('success'):
+            logger.error(f"[RANK PARTITIONS] Upload of {key} failed: {result.get('error')}")
+            return None
+
+        logger.info(f"[RANK PARTITIONS] Archived {rows_written} rows of {name} to {key}")
+        return key
+    except Exception as e:
+        logger.error(f"[RANK PARTITIONS] Failed to archive {name}: {e}")
+        return None
+
+
+def drop_partition_table(name: str) -> None:
+    """
+    Drop a detached partition table
+
+    Args:
+        name: Partition table name
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS "{name}"')
+    logger.info(f"[RANK PARTITIONS] Dropped table {name}")
+
+
+def expired_partitions(retention_months: int, today: Optional[date] = None) -> List[str]:
+    """
+    Monthly partitions entirely older than the retention window
+
+    Args:
+        retention_months: Months of history to keep attached, including the current month
+        today: Reference day (defaults to today)
+
+    Returns:
+        Partition names, oldest first
+    """
+    cutoff = add_months(month_start(today or timezone.localdate()), -(retention_months - 1))
+    return [name for name, month in list_partitions() if month < cutoff]
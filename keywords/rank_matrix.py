@@ -0,0 +1,222 @@
+"""
+Keyword x date rank matrix for keyword ranking reports
+
+Ranks of a report period are held in one dense int16 array with a row per
+keyword and a column per day. Summary statistics, CSV cells and chart series
+are computed with array operations on it instead of per-keyword dicts, so a
+2,000 keyword x 365 day report is ~1.4 MB and a handful of NumPy calls.
+
+Cell values:
+    1-100        best organic rank of the day
+    NOT_RANKING  rank stored as 0 (not found) or beyond the top 100
+    NO_DATA      no rank stored for that day
+"""
+
+from datetime import date
+from itertools import islice
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+NOT_RANKING = 101
+NO_DATA = np.iinfo(np.int16).max
+
+# CSV cell for every clipped cell value (0-101): only 1-100 are shown as ranks
+CELL_LABELS = np.array(['NR'] + [str(rank) for rank in range(1, 101)] + ['NR'], dtype=object)
+
+
+class RankMatrix:
+    """Dense keyword x day matrix of best daily ranks"""
+
+    def __init__(self, keyword_ids: Sequence[int], start_date: date, days: int):
+        """
+        Initialize an empty matrix
+
+        Args:
+            keyword_ids: Keyword IDs in row order
+            start_date: Date of the first column
+            days: Number of columns (days in the period)
+        """
+        self.keyword_ids = np.asarray(keyword_ids, dtype=np.int64)
+        self.start_date = start_date
+        self.days = days
+        self.values = np.full((len(self.keyword_ids), days), NO_DATA, dtype=np.int16)
+
+        # Row lookup by keyword ID via binary search on the sorted IDs
+        self._order = np.argsort(self.keyword_ids, kind='stable')
+        self._sorted_ids = self.keyword_ids[self._order]
+
+    @classmethod
+    def from_rows(cls, keyword_ids: Sequence[int], start_date: date, days: int,
+                  rows: Iterable[Tuple[int, date, int]], chunk_size: int = 100000) -> 'RankMatrix':
+        """
+        Build a matrix from (keyword_id, date, rank) rows
+
+        Rows are consumed in chunks, so a values_list() iterator never has to be
+        materialized as a whole.
+
+        Args:
+            keyword_ids: Keyword IDs in row order
+            start_date: Date of the first column
+            days: Number of columns
+            rows: Iterable of (keyword_id, date, rank) tuples
+            chunk_size: Rows converted to arrays at a time
+
+        Returns:
+            RankMatrix instance
+        """
+        matrix = cls(keyword_ids, start_date, days)
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            count = len(chunk)
+            matrix.add_ordinals(
+                np.fromiter((row[0] for row in chunk), dtype=np.int64, count=count),
+                np.fromiter((row[1].toordinal() for row in chunk), dtype=np.int64, count=count),
+                np.fromiter((row[2] for row in chunk), dtype=np.int64, count=count)
+            )
+        return matrix
+
+    def add_ordinals(self, keyword_ids: Sequence[int], ordinals: Sequence[int], ranks: Sequence[int]):
+        """
+        Merge ranks into the matrix, keeping the best (lowest) rank per keyword and day
+
+        Dates are passed as date.toordinal() values: converting date objects to
+        datetime64 costs ~10x more than the rest of the load. Ranks of unknown
+        keywords or outside the period are ignored.
+
+        Args:
+            keyword_ids: Keyword ID of each rank
+            ordinals: Scraped date of each rank, as date.toordinal()
+            ranks: Rank values (0 or >100 mean not ranking)
+        """
+        if len(self._sorted_ids) == 0 or self.days == 0 or len(keyword_ids) == 0:
+            return
+
+        keyword_ids = np.asarray(keyword_ids, dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self._sorted_ids, keyword_ids), len(self._sorted_ids) - 1)
+        rows = self._order[positions]
+        columns = np.asarray(ordinals, dtype=np.int64) - self.start_date.toordinal()
+
+        ranks = np.asarray(ranks, dtype=np.int64)
+        ranks = np.where((ranks <= 0) | (ranks > 100), NOT_RANKING, ranks).astype(np.int16)
+
+        valid = (self._sorted_ids[positions] == keyword_ids) & (columns >= 0) & (columns < self.days)
+        np.minimum.at(self.values, (rows[valid], columns[valid]), ranks[valid])
+
+    def take_rows(self, rows: Sequence[int]) -> 'RankMatrix':
+        """
+        Matrix of a subset of the keywords, in the given row order
+
+        Args:
+            rows: Row indexes to keep
+
+        Returns:
+            New RankMatrix with copied values
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        subset = RankMatrix(self.keyword_ids[rows], self.start_date, self.days)
+        subset.values = self.values[rows]
+        return subset
+
+    @property
+    def has_data(self) -> np.ndarray:
+        """Boolean matrix of the cells with a stored rank"""
+        return self.values != NO_DATA
+
+    def data_points(self) -> np.ndarray:
+        """Number of days with a stored rank, per keyword"""
+        return self.has_data.sum(axis=1)
+
+    def first_last(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rank on the first and on the last day with data, per keyword
+
+        Returns:
+            Tuple of (first ranks, last ranks); NO_DATA for keywords without data
+        """
+        if self.days == 0:
+            empty = np.full(len(self.keyword_ids), NO_DATA, dtype=np.int16)
+            return empty, empty.copy()
+
+        has_data = self.has_data
+        rows = np.arange(len(self.keyword_ids))
+        first_columns = has_data.argmax(axis=1)
+        last_columns = self.days - 1 - has_data[:, ::-1].argmax(axis=1)
+        return self.values[rows, first_columns], self.values[rows, last_columns]
+
+    def changes(self) -> np.ndarray:
+        """
+        Direction of the rank change over the period, per keyword
+
+        Keywords with fewer than two days of data count as unchanged.
+
+        Returns:
+            int8 array: 1 improved, -1 declined, 0 no change
+        """
+        first, last = self.first_last()
+        comparable = self.data_points() >= 2
+        return (np.sign(first.astype(np.int32) - last) * comparable).astype(np.int8)
+
+    def change_counts(self) -> Dict[str, int]:
+        """
+        Improved, declined and unchanged keywords among those with two or more days of data
+
+        Returns:
+            Dict with improvements, declines and no_change counts
+        """
+        changes = self.changes()
+        comparable = self.data_points() >= 2
+        return {
+            'improvements': int((changes > 0).sum()),
+            'declines': int((changes < 0).sum()),
+            'no_change': int((comparable & (changes == 0)).sum()),
+        }
+
+    def impacts(self) -> np.ndarray:
+        """CSV impact label per keyword: up, down or no_change"""
+        return np.array(['down', 'no_change', 'up'], dtype=object)[self.changes() + 1]
+
+    def cell_labels(self, rows: slice = slice(None)) -> np.ndarray:
+        """
+        Matrix of CSV cells: the rank, or NR for not ranking and missing days
+
+        Args:
+            rows: Rows to label (all by default); labelling a block of rows at a
+                time keeps the object array small for large reports
+
+        Returns:
+            Object array of strings, one row per keyword
+        """
+        return CELL_LABELS[np.minimum(self.values[rows], NOT_RANKING)]
+
+    def chart_series(self, rows: Sequence[int], step: int = 1) -> np.ndarray:
+        """
+        Inverted ranks for a line chart, so rank 1 plots highest
+
+        Args:
+            rows: Row indexes of the keywords to plot
+            step: Plot every step-th day
+
+        Returns:
+            Matrix of 101 - rank (1 when not ranking, 0 for missing days)
+        """
+        sampled = self.values[np.asarray(rows, dtype=np.int64)][:, ::step]
+        return np.where(sampled == NO_DATA, 0, 101 - np.minimum(sampled, 100))
+
+    def top_rows_by_data(self, candidates: int, limit: int) -> List[int]:
+        """
+        Rows with the most days of data among the first `candidates` rows
+
+        Args:
+            candidates: Number of leading rows to consider
+            limit: Maximum number of rows returned
+
+        Returns:
+            Row indexes, most data points first (ties keep row order)
+        """
+        points = self.data_points()[:candidates]
+        order = np.argsort(-points, kind='stable')
+        return [int(row) for row in order[points[order] > 0][:limit]]
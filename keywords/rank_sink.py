@@ -0,0 +1,376 @@
+"""
+Write-behind sink for SERP crawl outcomes
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import Keyword, ProjectDailyStats, Rank, SerpSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+# Keyword fields written when a new organic rank is applied
+RANK_CHANGE_FIELDS = (
+    'rank', 'rank_status', 'rank_diff_from_last_time', 'initial_rank', 'rank_url',
+    'rank_url_path', 'highest_rank', 'impact', 'next_crawl_at', 'crawl_priority', 'processing',
+)
+
+
+class RankResultSink:
+    """
+    Collect finished crawl outcomes and write them in bulk.
+
+    Instead of saving the keyword, the Rank, the keyword again (update_rank),
+    competitors and every manual target rank one by one, crawl handlers stage
+    their writes here. Every `max_batch` keywords or `max_wait` seconds the
+    sink writes them in one transaction:
+
+        - previous ranks from each keyword's rolling state (one query per crawl
+          day only for keywords whose state does not cover it)
+        - one INSERT ... ON CONFLICT upsert of Rank rows (keyword, scraped_date)
+        - bulk_update of changed Keyword fields
+        - one ProjectDailyStats update per project whose counters changed
+        - bulk upsert of TargetKeywordRank and SerpSnapshot rows
+        - bulk insert of the SERP domain index (SerpDomainRank)
+
+    If the bulk write fails, every keyword is retried on its own so one bad row
+    never loses the rest of the batch.
+
+    Usage:
+        sink = RankResultSink(max_batch=50, max_wait=5)
+        sink.update_keyword(keyword, ['success_api_hit_count', 'scraped_at'])
+        sink.add_rank(rank, url=rank_url)
+        sink.maybe_flush()
+        ...
+        sink.flush()
+    """
+
+    def __init__(self, max_batch: int = 50, max_wait: float = 5.0):
+        """
+        Args:
+            max_batch: Flush once this many keywords have pending writes
+            max_wait: Flush once the oldest pending write is this many seconds old
+                (checked in maybe_flush, i.e. as results arrive)
+        """
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max_wait
+        self.flushed = 0
+        self._entries: Dict[int, dict] = {}
+        self._first_pending_at: Optional[float] = None
+        self._extractor = None
+
+    @property
+    def extractor(self):
+        """RankingExtractor writing into this sink, shared by every keyword of the batch"""
+        if self._extractor is None:
+            from .ranking_extractor import RankingExtractor
+            self._extractor = RankingExtractor(sink=self)
+        return self._extractor
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _entry(self, keyword: Keyword) -> dict:
+        """Pending writes for a keyword, created on first use"""
+        entry = self._entries.get(keyword.id)
+        if entry is None:
+            entry = {
+                'keyword': keyword,
+                'fields': set(),
+                'rank': None,
+                'rank_url': None,
+                'target_ranks': [],
+                'snapshot': None,
+                'domain_ranks': None,
+                'callbacks': [],
+            }
+            self._entries[keyword.id] = entry
+            if self._first_pending_at is None:
+                self._first_pending_at = time.monotonic()
+        elif entry['keyword'] is not keyword:
+            # Later handlers may pass a fresh instance - keep its values
+            entry['keyword'] = keyword
+        return entry
+
+    def update_keyword(self, keyword: Keyword, fields: Iterable[str]) -> None:
+        """
+        Stage keyword fields already set on the instance
+
+        Args:
+            keyword: Keyword instance with the new values
+            fields: Names of the fields to write
+        """
+        self._entry(keyword)['fields'].update(fields)
+
+    def add_rank(self, rank: Rank, url: Optional[str] = None) -> None:
+        """
+        Stage a new Rank row
+
+        Organic ranks also update the keyword's rank fields, exactly like
+        Rank.save() -> Keyword.update_rank() does.
+
+        Args:
+            rank: Unsaved Rank instance
+            url: Ranking URL for the keyword (organic ranks only)
+        """
+        entry = self._entry(rank.keyword)
+        entry['rank'] = rank
+        entry['rank_url'] = url
+
+    def on_rank_created(self, keyword: Keyword, callback: Callable[[Rank], None]) -> None:
+        """
+        Run callback with the keyword's new Rank once it is committed
+
+        Args:
+            keyword: Keyword whose staged rank the callback needs
+            callback: Callable receiving the saved Rank
+        """
+        self._entry(keyword)['callbacks'].append(callback)
+
+    def add_target_ranks(self, keyword: Keyword, target_ranks: List) -> None:
+        """
+        Stage manual target ranks for a keyword
+
+        Args:
+            keyword: Keyword the ranks belong to
+            target_ranks: Unsaved TargetKeywordRank instances
+        """
+        self._entry(keyword)['target_ranks'].extend(target_ranks)
+
+    def add_snapshot(self, snapshot: SerpSnapshot) -> None:
+        """
+        Stage the shared SERP snapshot produced by a keyword's crawl
+
+        Args:
+            snapshot: Unsaved SerpSnapshot with source_keyword set
+        """
+        self._entry(snapshot.source_keyword)['snapshot'] = snapshot
+
+    def add_domain_ranks(self, keyword: Keyword, serp: tuple) -> None:
+        """
+        Stage the SERP domain index rows of a keyword's crawl
+
+        Args:
+            keyword: Keyword the SERP belongs to
+            serp: (project ID, keyword ID, scraped date, dict of domain to
+                position), as taken by SerpDomainRank.replace
+        """
+        self._entry(keyword)['domain_ranks'] = serp
+
+    def discard(self, keyword: Keyword) -> None:
+        """
+        Drop everything staged for a keyword (e.g. after its handler failed midway)
+
+        Args:
+            keyword: Keyword instance
+        """
+        self._entries.pop(keyword.id, None)
+        if not self._entries:
+            self._first_pending_at = None
+
+    def maybe_flush(self) -> int:
+        """
+        Flush if the batch is full or the oldest pending write is too old
+
+        Returns:
+            Number of keywords written (0 if nothing was flushed)
+        """
+        if not self._entries:
+            return 0
+        if len(self._entries) >= self.max_batch or time.monotonic() - self._first_pending_at >= self.max_wait:
+            return self.flush()
+        return 0
+
+    def flush(self) -> int:
+        """
+        Write every pending outcome
+
+        Returns:
+            Number of keywords written
+        """
+        entries = list(self._entries.values())
+        self._entries = {}
+        self._first_pending_at = None
+        if not entries:
+            return 0
+
+        try:
+            self._write(entries)
+            written = entries
+        except Exception as e:
+            logger.error(f"RANK SINK: bulk write of {len(entries)} keywords failed, retrying one by one: {e}")
+            written = []
+            for entry in entries:
+                if entry['rank'] is not None:
+                    entry['rank'].pk = None
+                try:
+                    self._write([entry])
+                    written.append(entry)
+                except Exception as entry_error:
+                    logger.error(f"RANK SINK: failed to write results for keyword {entry['keyword'].id}: {entry_error}")
+
+        for entry in written:
+            if entry['rank'] is None:
+                continue
+            for callback in entry['callbacks']:
+                try:
+                    callback(entry['rank'])
+                except Exception as e:
+                    logger.warning(f"RANK SINK: post-write callback failed for keyword {entry['keyword'].id}: {e}")
+
+        self.flushed += len(written)
+        logger.info(f"RANK SINK: wrote results for {len(written)}/{len(entries)} keywords")
+        return len(written)
+
+    def _write(self, entries: List[dict]) -> None:
+        """Write entries in one transaction"""
+        from competitors.models import CompetitorStats, SerpDomainRank, TargetKeywordRank
+
+        ranked = [entry for entry in entries if entry['rank'] is not None]
+        for entry in ranked:
+            rank = entry['rank']
+            if rank.scraped_date is None:
+                rank.scraped_date = Rank.date_for(rank.created_at)
+
+        # Previous ranks come from each keyword's rolling state; keywords
+        # without usable state are looked up together, one query per crawl day
+        missing = {}
+        for entry in ranked:
+            keyword, rank = entry['keyword'], entry['rank']
+            if rank.is_organic and not keyword.has_rank_state_for(rank.scraped_date):
+                missing.setdefault(rank.scraped_date, []).append(keyword.id)
+        looked_up = {
+            scraped_date: self._previous_ranks(keyword_ids, scraped_date)
+            for scraped_date, keyword_ids in missing.items()
+        }
+
+        for entry in ranked:
+            keyword, rank = entry['keyword'], entry['rank']
+            if rank.is_organic:
+                if rank.scraped_date in looked_up:
+                    previous_rank = looked_up[rank.scraped_date].get(keyword.id, 0)
+                else:
+                    previous_rank = keyword.previous_rank_for(rank.scraped_date)
+                keyword.apply_rank_change(rank.rank, previous_rank, url=entry['rank_url'], from_rank_save=True)
+                entry['fields'].update(RANK_CHANGE_FIELDS)
+            keyword.advance_rank_state(rank.rank, rank.scraped_date)
+            entry['fields'].update(Keyword.RANK_STATE_FIELDS)
+
+        now = timezone.now()
+        keywords = []
+        fields = set()
+        stats_deltas = {}
+        for entry in entries:
+            if entry['fields']:
+                keyword = entry['keyword']
+                keyword.updated_at = now
+                keywords.append(keyword)
+                fields.update(entry['fields'])
+                
+                # bulk_update skips Keyword.save(), so collect the stats changes here
+                delta = keyword.stats_delta() if entry['fields'] & set(Keyword.STATS_FIELDS) else None
+                if delta:
+                    project_delta = stats_deltas.setdefault(keyword.project_id, {})
+                    for field, value in delta.items():
+                        project_delta[field] = project_delta.get(field, 0) + value
+
+        # Later stages of the same batch win for duplicate keys
+        ranks = {}
+        for entry in ranked:
+            rank = entry['rank']
+            ranks[(rank.keyword_id, rank.scraped_date)] = rank
+        target_ranks = {}
+        snapshots = {}
+        for entry in entries:
+            for target_rank in entry['target_ranks']:
+                target_ranks[(target_rank.target_id, target_rank.keyword_id)] = target_rank
+            snapshot = entry['snapshot']
+            if snapshot is not None:
+                key = (snapshot.query, snapshot.country_code, snapshot.location, snapshot.scraped_date)
+                snapshots[key] = snapshot
+
+        with transaction.atomic():
+            if ranks:
+                Rank.upsert(list(ranks.values()))
+            if keywords:
+                Keyword.objects.bulk_update(keywords, sorted(fields | {'updated_at'}))
+            for project_id, delta in stats_deltas.items():
+                ProjectDailyStats.apply_delta(project_id, delta)
+            if target_ranks:
+                competitor_deltas = self._competitor_stats_deltas(target_ranks)
+                TargetKeywordRank.objects.bulk_create(
+                    list(target_ranks.values()),
+                    update_conflicts=True,
+                    unique_fields=['target', 'keyword'],
+                    update_fields=['rank', 'rank_url', 'scraped_at', 'updated_at']
+                )
+                CompetitorStats.apply_deltas(competitor_deltas)
+            if snapshots:
+                SerpSnapshot.objects.bulk_create(
+                    list(snapshots.values()),
+                    update_conflicts=True,
+                    unique_fields=['query', 'country_code', 'location', 'scraped_date'],
+                    update_fields=['results_file', 'html_file_path', 'source_keyword']
+                )
+            SerpDomainRank.replace(entry['domain_ranks'] for entry in entries if entry['domain_ranks'] is not None)
+        
+        for keyword in keywords:
+            keyword._remember_stats_contribution()
+
+    @staticmethod
+    def _previous_ranks(keyword_ids: List[int], scraped_date) -> Dict[int, int]:
+        """
+        Rank each keyword is compared against, for all keywords in one query
+
+        Same rule as Keyword.update_rank: the latest rank from a day before
+        scraped_date.
+
+        Args:
+            keyword_ids: Keyword IDs
+            scraped_date: Day of the new ranks
+
+        Returns:
+            Dict of keyword ID to previous rank (keywords without history omitted)
+        """
+        previous = Rank.objects.filter(
+            keyword=OuterRef('pk'),
+            scraped_date__lt=scraped_date
+        ).order_by('-scraped_date').values('rank')[:1]
+
+        rows = Keyword.objects.filter(id__in=keyword_ids).annotate(
+            history_rank=Subquery(previous)
+        ).values_list('id', 'history_rank')
+
+        return {keyword_id: rank for keyword_id, rank in rows if rank is not None}
+
+    @staticmethod
+    def _competitor_stats_deltas(target_ranks: Dict[tuple, Any]) -> Dict[int, Dict[str, int]]:
+        """
+        CompetitorStats changes of upserting target ranks, from their current rows
+
+        Args:
+            target_ranks: Dict of (target ID, keyword ID) to unsaved TargetKeywordRank
+
+        Returns:
+            Dict of target ID to counter deltas
+        """
+        from competitors.models import CompetitorStats, TargetKeywordRank
+
+        old_ranks = {
+            (target_id, keyword_id): rank
+            for target_id, keyword_id, rank in TargetKeywordRank.objects.filter(
+                target_id__in={key[0] for key in target_ranks},
+                keyword_id__in={key[1] for key in target_ranks}
+            ).values_list('target_id', 'keyword_id', 'rank')
+        }
+
+        deltas = {}
+        for key, target_rank in target_ranks.items():
+            CompetitorStats.merge_delta(deltas, key[0], CompetitorStats.rank_delta(old_ranks.get(key), target_rank.rank))
+        return deltas
@@ -4,34 +4,126 @@ Ranking extraction service for processing SERP HTML and creating rank records
 
 import logging
 from datetime import datetime
-from pathlib import Path
 from typing import Dict, Any, Optional, Tuple
 from urllib.parse import urlparse
 
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
 from services.google_search_parser import GoogleSearchParser
 from services.r2_storage import get_r2_service
-from .models import Keyword, Rank
+from .models import Keyword, Rank, SerpSnapshot
+from .serp_archive import parse_serp_key, read_serp_key
 
 logger = logging.getLogger(__name__)
 
 
+class ParsedSerp:
+    """
+    SERP HTML together with its parsed results.
+    
+    Built once per fetch and handed to every downstream consumer (top pages,
+    top competitors, domain rank, SERP features, manual targets and the R2
+    upload) so the HTML is only turned into a DOM tree a single time. Parsing
+    happens lazily on first access to `results` and is never retried, a failed
+    parse is remembered as None.
+    
+    Usage:
+        parsed_serp = ParsedSerp(html_content)
+        organic = parsed_serp.results.get('organic_results', [])
+    """
+    
+    _NOT_PARSED = object()
+    
+    def __init__(
+        self,
+        html_content: str,
+        parser: Optional[GoogleSearchParser] = None,
+        profile: Optional[str] = None
+    ):
+        """
+        Args:
+            html_content: Raw SERP HTML
+            parser: Optional parser instance, a GoogleSearchParser is created if omitted
+            profile: Parse profile ('full' or 'rank'), defaults to settings.SERP_PARSE_PROFILE
+        """
+        self.html_content = html_content
+        self.profile = profile or getattr(settings, 'SERP_PARSE_PROFILE', 'full')
+        self._parser = parser
+        self._results = self._NOT_PARSED
+    
+    @classmethod
+    def from_results(cls, parsed_results: Dict[str, Any], html_content: str = '') -> 'ParsedSerp':
+        """
+        Wrap results that were already parsed elsewhere
+        
+        Args:
+            parsed_results: Parsed results from GoogleSearchParser
+            html_content: Raw SERP HTML if still available
+        
+        Returns:
+            ParsedSerp instance that will not parse again
+        """
+        parsed_serp = cls(html_content)
+        parsed_serp._results = parsed_results
+        return parsed_serp
+    
+    @property
+    def is_parsed(self) -> bool:
+        """Whether the HTML has been parsed (successfully or not)"""
+        return self._results is not self._NOT_PARSED
+    
+    @property
+    def results(self) -> Optional[Dict[str, Any]]:
+        """
+        Parsed results dict, or None if the HTML could not be parsed
+        """
+        if self._results is self._NOT_PARSED:
+            try:
+                parser = self._parser or GoogleSearchParser()
+                self._results = parser.parse(self.html_content, profile=self.profile) or None
+            except Exception as e:
+                logger.error(f"Error parsing SERP HTML: {e}")
+                self._results = None
+        return self._results
+    
+    @property
+    def organic_results(self) -> list:
+        """Organic results, empty if the HTML could not be parsed"""
+        return (self.results or {}).get('organic_results', [])
+
+
 class RankingExtractor:
     """
     Service for extracting rankings from SERP HTML and storing results
     """
     
-    def __init__(self):
+    def __init__(self, sink=None):
+        """
+        Args:
+            sink: Optional RankResultSink - database writes are staged there and
+                written in bulk instead of saved per keyword
+        """
         self.parser = GoogleSearchParser()
-        self.r2_service = get_r2_service()
+        self.sink = sink
+        self._r2_service = None
+        self._manual_targets = {}
+    
+    @property
+    def r2_service(self):
+        """R2 client, created on first use so parse-only callers need no credentials"""
+        if self._r2_service is None:
+            self._r2_service = get_r2_service()
+        return self._r2_service
     
     def process_serp_html(
         self,
         keyword: Keyword,
         html_content: str,
-        scraped_date: datetime
+        scraped_date: datetime,
+        parsed_serp: Optional[ParsedSerp] = None,
+        profile: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Process SERP HTML to extract rankings and create Rank record
@@ -40,13 +132,20 @@ class RankingExtractor:
             keyword: Keyword model instance
             html_content: Raw SERP HTML
             scraped_date: Date when the SERP was scraped
+            parsed_serp: Already parsed SERP for this fetch, reused instead of
+                parsing html_content again
+            profile: Parse profile when parsing here - 'full' for every SERP
+                feature or 'rank' for results only; defaults to settings.SERP_PARSE_PROFILE
         
         Returns:
             Dict with processing results or None if failed
         """
         try:
-            # Parse HTML to extract search results
-            parsed_results = self._parse_html(html_content)
+            # Parse HTML to extract search results (once per fetch)
+            if parsed_serp is not None:
+                parsed_results = parsed_serp.results
+            else:
+                parsed_results = self._parse_html(html_content, profile)
             
             if not parsed_results:
                 logger.error(f"Failed to parse HTML for keyword {keyword.id}")
@@ -63,6 +162,48 @@ class RankingExtractor:
                 logger.error(f"Failed to store results in R2 for keyword {keyword.id}")
                 return None
             
+            # Share the parsed SERP with other keywords crawling the same query today
+            self._record_snapshot(keyword, r2_path, scraped_date)
+            
+            result = self.process_parsed_results(keyword, parsed_results, scraped_date, r2_path)
+            
+            # Rank-only parses skip SERP features - fill them in off the hot path
+            if result and parsed_results.get('profile') == 'rank':
+                if self.sink is not None:
+                    self.sink.on_rank_created(keyword, lambda rank: self._schedule_enrichment(keyword, rank.id))
+                else:
+                    self._schedule_enrichment(keyword, result['rank_id'])
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Error processing SERP for keyword {keyword.id}: {e}")
+            return None
+    
+    def process_parsed_results(
+        self,
+        keyword: Keyword,
+        parsed_results: Dict[str, Any],
+        scraped_date: datetime,
+        r2_path: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Run the per-project rank extraction on already parsed SERP results
+        
+        Used directly when the SERP comes from a shared same-day snapshot, so
+        only the project-specific work (domain rank, competitors, manual targets)
+        is repeated.
+        
+        Args:
+            keyword: Keyword model instance
+            parsed_results: Parsed search results from GoogleSearchParser
+            scraped_date: Date when the SERP was scraped
+            r2_path: R2 path of the stored parsed results
+        
+        Returns:
+            Dict with processing results or None if failed
+        """
+        try:
             # Extract domain ranking
             rank_position, is_organic, rank_url = self._find_domain_rank(
                 parsed_results,
@@ -78,6 +219,9 @@ class RankingExtractor:
             # Track manual targets if any exist
             self._track_manual_targets(keyword, parsed_results)
             
+            # Index every domain of the top 100 for competitor analysis
+            self._index_serp_domains(keyword, parsed_results, scraped_date)
+            
             # Create Rank record
             rank = self._create_rank_record(
                 keyword,
@@ -107,18 +251,133 @@ class RankingExtractor:
             logger.error(f"Error processing SERP for keyword {keyword.id}: {e}")
             return None
     
-    def _parse_html(self, html_content: str) -> Optional[Dict[str, Any]]:
+    def load_snapshot_results(self, snapshot) -> Optional[Dict[str, Any]]:
+        """
+        Load parsed results for a shared SERP snapshot from R2
+        
+        Args:
+            snapshot: SerpSnapshot instance
+        
+        Returns:
+            Parsed results dict or None if unavailable
+        """
+        try:
+            stored = self.r2_service.download_json(snapshot.results_file)
+            if not stored:
+                return None
+            results = stored.get('results')
+            return results if isinstance(results, dict) else None
+        except Exception as e:
+            logger.error(f"Error loading SERP snapshot {snapshot.id} from R2: {e}")
+            return None
+    
+    def _record_snapshot(self, keyword: Keyword, r2_path: str, scraped_date: datetime) -> None:
+        """
+        Record the parsed SERP as the shared snapshot for its query/country/location/date
+        
+        Args:
+            keyword: Keyword model instance
+            r2_path: R2 path of the stored parsed results
+            scraped_date: Date when the SERP was scraped
+        """
+        if not getattr(settings, 'SERP_SNAPSHOT_REUSE', False):
+            return
+        
+        try:
+            if self.sink is not None:
+                self.sink.add_snapshot(SerpSnapshot(
+                    scraped_date=scraped_date.date(),
+                    results_file=r2_path,
+                    html_file_path=keyword.scrape_do_file_path or '',
+                    source_keyword=keyword,
+                    **SerpSnapshot.key_for_keyword(keyword)
+                ))
+                return
+            
+            SerpSnapshot.record(
+                keyword,
+                scraped_date.date(),
+                r2_path,
+                html_file_path=keyword.scrape_do_file_path or ''
+            )
+        except Exception as e:
+            # Snapshot sharing is an optimization - never break rank tracking
+            logger.warning(f"Failed to record SERP snapshot for keyword {keyword.id}: {e}")
+    
+    def _schedule_enrichment(self, keyword: Keyword, rank_id: int) -> None:
+        """
+        Queue a full parse of a rank-only SERP on the low-priority queue
+        
+        Args:
+            keyword: Keyword model instance
+            rank_id: ID of the Rank created from the rank-only parse
+        """
+        if not getattr(settings, 'SERP_ENRICHMENT_ENABLED', False) or not keyword.scrape_do_file_path:
+            return
+        
+        try:
+            from .tasks import enrich_rank_serp_features
+            enrich_rank_serp_features.apply_async(
+                args=[rank_id, keyword.scrape_do_file_path],
+                queue='celery',
+                priority=1
+            )
+        except Exception as e:
+            # Enrichment is best effort - the rank itself is already stored
+            logger.warning(f"Failed to queue SERP enrichment for rank {rank_id}: {e}")
+    
+    def enrich_rank(self, rank: Rank, html_content: str) -> bool:
+        """
+        Run the full parse for a rank stored from a rank-only parse
+        
+        Re-uploads the complete parsed SERP over the rank's R2 file and sets its
+        SERP feature flags.
+        
+        Args:
+            rank: Rank model instance
+            html_content: Raw SERP HTML the rank was extracted from
+        
+        Returns:
+            True if the rank was enriched
+        """
+        parsed_results = self._parse_html(html_content, 'full')
+        if not parsed_results or parsed_results.get('error'):
+            logger.error(f"Full parse failed while enriching rank {rank.id}")
+            return False
+        
+        r2_path = self._store_results_in_r2(rank.keyword, parsed_results, rank.created_at)
+        if not r2_path:
+            return False
+        
+        serp_features = self._detect_serp_features(parsed_results)
+        
+        # Queryset update - Rank.save() would re-run Keyword.update_rank
+        Rank.objects.filter(id=rank.id).update(
+            has_map_result=serp_features['has_map_result'],
+            has_video_result=serp_features['has_video_result'],
+            has_image_result=serp_features['has_image_result'],
+            search_results_file=r2_path
+        )
+        
+        logger.info(f"Enriched rank {rank.id} with full SERP features")
+        return True
+    
+    def _parse_html(self, html_content: str, profile: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Parse HTML using GoogleSearchParser
         
         Args:
             html_content: Raw SERP HTML
+            profile: Parse profile, defaults to settings.SERP_PARSE_PROFILE
         
         Returns:
             Parsed results dict or None if failed
         """
         try:
-            parsed = self.parser.parse(html_content)
+            parsed = self.parser.parse(
+                html_content,
+                profile=profile or getattr(settings, 'SERP_PARSE_PROFILE', 'full')
+            )
             return parsed
         except Exception as e:
             logger.error(f"HTML parsing error: {e}")
@@ -336,7 +595,7 @@ class RankingExtractor:
             if not organic_results:
                 logger.debug(f"No organic results found for keyword {keyword.id}")
                 keyword.top_competitors = []
-                keyword.save(update_fields=['top_competitors'])
+                self._save_keyword(keyword, ['top_competitors'])
                 return
             
             # Get project domain to exclude it
@@ -375,7 +634,7 @@ class RankingExtractor:
             
             # Update keyword with top competitors
             keyword.top_competitors = top_competitors
-            keyword.save(update_fields=['top_competitors'])
+            self._save_keyword(keyword, ['top_competitors'])
             
             # If we found fewer than 3 competitors in top 20, log it
             if len(top_competitors) < 3:
@@ -395,20 +654,34 @@ class RankingExtractor:
         """
         try:
             # Import here to avoid circular imports
-            from competitors.models import Target, TargetKeywordRank
+            from competitors.models import CompetitorStats, Target, TargetKeywordRank
             
-            # Get manual targets for this project
-            manual_targets = Target.objects.filter(
-                project=keyword.project,
-                is_manual=True
-            )
+            # Get manual targets for this project (once per extractor)
+            manual_targets = self._manual_targets.get(keyword.project_id)
+            if manual_targets is None:
+                manual_targets = list(Target.objects.filter(
+                    project=keyword.project,
+                    is_manual=True
+                ))
+                self._manual_targets[keyword.project_id] = manual_targets
             
-            if not manual_targets.exists():
+            if not manual_targets:
                 return
             
             # Get organic results
             organic_results = parsed_results.get('organic_results', [])
             
+            if self.sink is not None:
+                self.sink.add_target_ranks(keyword, self._manual_target_ranks(keyword, manual_targets, organic_results))
+                return
+            
+            # Previous ranks, for the competitor stats deltas
+            old_ranks = dict(TargetKeywordRank.objects.filter(
+                keyword=keyword,
+                target__in=manual_targets
+            ).values_list('target_id', 'rank'))
+            stats_deltas = {}
+            
             for target in manual_targets:
                 # Find target in results
                 target_domain = self._normalize_domain(target.domain)
@@ -430,6 +703,7 @@ class RankingExtractor:
                             }
                         )
                         found = True
+                        CompetitorStats.merge_delta(stats_deltas, target.id, CompetitorStats.rank_delta(old_ranks.get(target.id), position))
                         logger.info(f"Tracked manual target {target.domain} at position {position} for keyword '{keyword.keyword}'")
                         break
                 
@@ -444,12 +718,90 @@ class RankingExtractor:
                             'scraped_at': timezone.now()
                         }
                     )
+                    CompetitorStats.merge_delta(stats_deltas, target.id, CompetitorStats.rank_delta(old_ranks.get(target.id), 0))
                     logger.info(f"Manual target {target.domain} not found in top 100 for keyword '{keyword.keyword}'")
+            
+            CompetitorStats.apply_deltas(stats_deltas)
                         
         except Exception as e:
             logger.error(f"Error tracking manual targets for keyword {keyword.id}: {str(e)}")
             # Don't raise - target tracking shouldn't break main keyword tracking
     
+    def _manual_target_ranks(self, keyword: Keyword, manual_targets: list, organic_results: list) -> list:
+        """
+        Build unsaved TargetKeywordRank rows for manual targets
+        
+        Args:
+            keyword: Keyword model instance
+            manual_targets: Manual Target instances of the keyword's project
+            organic_results: Organic results from the parsed SERP
+        
+        Returns:
+            List of TargetKeywordRank instances (rank 0 when not in the top 100)
+        """
+        from competitors.models import TargetKeywordRank
+        
+        domains = [self._extract_domain(result.get('url', '')) for result in organic_results[:100]]
+        now = timezone.now()
+        target_ranks = []
+        
+        for target in manual_targets:
+            target_domain = self._normalize_domain(target.domain)
+            rank, rank_url = 0, ''
+            for position, result_domain in enumerate(domains, 1):
+                if self._domains_match(target_domain, result_domain):
+                    rank, rank_url = position, organic_results[position - 1].get('url', '')
+                    break
+            
+            target_ranks.append(TargetKeywordRank(
+                target=target,
+                keyword=keyword,
+                rank=rank,
+                rank_url=rank_url,
+                scraped_at=now
+            ))
+        
+        return target_ranks
+    
+    def _index_serp_domains(self, keyword: Keyword, parsed_results: Dict[str, Any], scraped_date: datetime) -> None:
+        """
+        Record the position of every domain in the top 100 (SerpDomainRank)
+        
+        Args:
+            keyword: Keyword model instance
+            parsed_results: Parsed search results from GoogleSearchParser
+            scraped_date: Date when the SERP was scraped
+        """
+        if not getattr(settings, 'SERP_DOMAIN_INDEX_ENABLED', False):
+            return
+        
+        try:
+            from competitors.models import SerpDomainRank
+            
+            organic_results = parsed_results.get('organic_results', [])
+            positions = SerpDomainRank.domain_positions([
+                self._extract_domain(result.get('url', '')) for result in organic_results[:100]
+            ])
+            if timezone.is_naive(scraped_date):
+                scraped_date = timezone.make_aware(scraped_date)
+            serp = (keyword.project_id, keyword.id, Rank.date_for(scraped_date), positions)
+            
+            if self.sink is not None:
+                self.sink.add_domain_ranks(keyword, serp)
+            else:
+                SerpDomainRank.replace([serp])
+                
+        except Exception as e:
+            logger.error(f"Error indexing SERP domains for keyword {keyword.id}: {str(e)}")
+            # Don't raise - the domain index shouldn't break main keyword tracking
+    
+    def _save_keyword(self, keyword: Keyword, fields: list) -> None:
+        """Save keyword fields now, or stage them in the sink"""
+        if self.sink is not None:
+            self.sink.update_keyword(keyword, fields)
+        else:
+            keyword.save(update_fields=fields)
+    
     def _create_rank_record(
         self,
         keyword: Keyword,
@@ -487,17 +839,21 @@ class RankingExtractor:
             has_video_result=serp_features.get('has_video_result', False),
             has_image_result=serp_features.get('has_image_result', False),
             search_results_file=r2_path,
-            created_at=scraped_date  # Use the scraping date as created_at
+            created_at=scraped_date,  # Use the scraping date as created_at
+            scraped_date=Rank.date_for(scraped_date)
         )
         
-        # Attach URL to be used in save method
-        if rank_url:
-            rank._rank_url = rank_url
+        if self.sink is not None:
+            # Written (and applied to the keyword) on the sink's next flush
+            self.sink.add_rank(rank, url=rank_url)
+            return rank
         
-        # Save the rank (this will trigger keyword.update_rank)
-        rank.save()
+        # Insert, or replace the keyword's rank for the same day (force crawls),
+        # and apply it to the keyword in the same transaction
+        with transaction.atomic():
+            Rank.upsert([rank])
+            keyword.record_rank(rank, url=rank_url)
         
-        # The Rank model's save method will automatically update the keyword's rank
         logger.info(
             f"Created Rank record: id={rank.id}, keyword={keyword.id}, "
             f"position={rank_position}, date={scraped_date.date()}"
@@ -512,11 +868,11 @@ def process_stored_html(
     scraped_date: Optional[datetime] = None
 ) -> Optional[Dict[str, Any]]:
     """
-    Convenience function to process stored HTML file
+    Convenience function to process an archived SERP
     
     Args:
         keyword_id: ID of the keyword
-        html_path: Path to HTML file (relative to SCRAPE_DO_STORAGE_ROOT)
+        html_path: SERP key ({project_id}/{keyword_id}/{YYYY-MM-DD}.html)
         scraped_date: Date when scraped (defaults to parsing from filename)
     
     Returns:
@@ -528,24 +884,18 @@ def process_stored_html(
         logger.error(f"Keyword {keyword_id} not found")
         return None
     
-    # Read HTML from local storage
-    storage_root = Path(settings.SCRAPE_DO_STORAGE_ROOT)
-    html_file = storage_root / html_path
-    
-    if not html_file.exists():
-        logger.error(f"HTML file not found: {html_path}")
+    # Read HTML from the SERP archive
+    html_content = read_serp_key(html_path)
+    if html_content is None:
+        logger.error(f"SERP not found: {html_path}")
         return None
     
-    html_content = html_file.read_text(encoding='utf-8')
-    
-    # Parse date from filename if not provided
+    # Parse date from the key if not provided
     if not scraped_date:
         try:
-            # Extract date from filename (assumes YYYY-MM-DD.html format)
-            date_str = html_file.stem  # Gets filename without extension
-            scraped_date = datetime.strptime(date_str, '%Y-%m-%d')
+            scraped_date = datetime.combine(parse_serp_key(html_path)[1], datetime.min.time())
             scraped_date = timezone.make_aware(scraped_date)
-        except:
+        except (ValueError, TypeError):
             scraped_date = timezone.now()
     
     # Process the HTML
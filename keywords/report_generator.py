@@ -4,17 +4,22 @@ Handles CSV and PDF report generation with data processing
 """
 
 import io
-import csv
 import json
 import logging
 from datetime import datetime, timedelta, date
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 from collections import defaultdict
 
 import pandas as pd
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Q, Prefetch
 
+from services.csv_stream import CSVLineWriter, iter_encoded_chunks
+
+from .rank_matrix import RankMatrix
+from .report_pdf import get_render_pool, render_keyword_rankings_pdf
+
 # PDF generation imports
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
@@ -30,18 +35,178 @@ from reportlab.lib.enums import TA_CENTER, TA_RIGHT, TA_LEFT
 
 logger = logging.getLogger(__name__)
 
+# Keywords whose daily rank cells are labelled at once while streaming the CSV
+CSV_LABEL_BLOCK = 1000
+
+# Keyword columns used by the keyword rankings report
+KEYWORD_FIELDS = (
+    'id', 'keyword', 'country', 'country_code',
+    'rank', 'rank_url', 'rank_status', 'impact',
+    'created_at', 'scraped_at'
+)
+
+
+def load_rank_matrix(keyword_ids: List[int], start_date: date, end_date: date) -> RankMatrix:
+    """
+    Load the organic ranks of a period into a keyword x date rank matrix
+    
+    Args:
+        keyword_ids: Keyword IDs in row order
+        start_date: First day of the period
+        end_date: Last day of the period
+    
+    Returns:
+        RankMatrix with the best rank per keyword and day
+    """
+    from .models import Rank
+    
+    # Load ranks for date range (scraped_date is the partition key, so only
+    # the months in the range are scanned)
+    ranks_qs = Rank.objects.filter(
+        keyword_id__in=keyword_ids,
+        scraped_date__gte=start_date,
+        scraped_date__lte=end_date,
+        is_organic=True  # Only organic ranks
+    ).values_list('keyword_id', 'scraped_date', 'rank')
+    
+    # Best (lowest) rank per keyword and day; missing days stay NO_DATA and show as NR
+    return RankMatrix.from_rows(
+        keyword_ids,
+        start_date,
+        (end_date - start_date).days + 1,
+        ranks_qs.iterator(chunk_size=10000)
+    )
+
+
+def load_project_trend(project, start_date: date, end_date: date) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Project-wide metrics at the first and last day of a period from the daily rollups
+    
+    Args:
+        project: Project instance
+        start_date: First day of the period
+        end_date: Last day of the period
+    
+    Returns:
+        Dict with 'start' and 'end' metrics, or None if not available
+    """
+    from .models import ProjectDailyStats
+    
+    days = list(ProjectDailyStats.objects.filter(
+        project=project,
+        date__gte=start_date,
+        date__lte=end_date
+    ).order_by('date'))
+    if not days:
+        return None
+    
+    def metrics(stats):
+        return {
+            'date': stats.date.isoformat(),
+            'top3_count': stats.top3_count,
+            'top10_count': stats.top10_count,
+            'top30_count': stats.top30_count,
+            'avg_rank': round(stats.avg_rank, 1) if stats.avg_rank is not None else None,
+            'visibility_score': stats.visibility_score,
+        }
+    
+    return {'start': metrics(days[0]), 'end': metrics(days[-1])}
+
+
+class ReportDataset:
+    """
+    Keywords and rank history of a project period, loaded once for several reports
+    
+    Scheduled reports of the same project and period that come due together
+    are generated from one dataset: each report takes its keywords' rows from
+    the shared rank matrix instead of querying Keyword and Rank again.
+    """
+    
+    def __init__(self, project, start_date: date, end_date: date):
+        """
+        Initialize an empty dataset
+        
+        Args:
+            project: Project instance
+            start_date: First day of the period
+            end_date: Last day of the period
+        """
+        self.project = project
+        self.start_date = start_date
+        self.end_date = end_date
+        self.keywords_data = []
+        self.rank_matrix = None
+        self.project_trend = None
+    
+    @classmethod
+    def load(cls, project, start_date: date, end_date: date) -> 'ReportDataset':
+        """
+        Load all active keywords of the project and their ranks for the period
+        
+        Args:
+            project: Project instance
+            start_date: First day of the period
+            end_date: Last day of the period
+        
+        Returns:
+            Loaded ReportDataset
+        """
+        from .models import Keyword
+        
+        dataset = cls(project, start_date, end_date)
+        dataset.keywords_data = list(
+            Keyword.objects.filter(project=project, archive=False).order_by('keyword').values(*KEYWORD_FIELDS)
+        )
+        dataset.rank_matrix = load_rank_matrix([kw['id'] for kw in dataset.keywords_data], start_date, end_date)
+        dataset.project_trend = load_project_trend(project, start_date, end_date)
+        
+        logger.info(f"Loaded shared report data for project {project.id}: {len(dataset.keywords_data)} keywords, "
+                    f"{start_date} to {end_date}")
+        return dataset
+    
+    def matches(self, report) -> bool:
+        """Whether the report covers this dataset's project and period"""
+        return (
+            report.project_id == self.project.id and
+            report.start_date == self.start_date and
+            report.end_date == self.end_date
+        )
+    
+    def select(self, keyword_ids: Optional[List[int]] = None) -> Tuple[List[Dict[str, Any]], RankMatrix]:
+        """
+        Keywords and rank matrix for a report's keyword selection
+        
+        Args:
+            keyword_ids: Selected keyword IDs, or None for all keywords
+        
+        Returns:
+            Tuple of (keyword rows, rank matrix) in keyword order
+        """
+        if keyword_ids is None:
+            return self.keywords_data, self.rank_matrix
+        
+        selected = set(keyword_ids)
+        rows = [row for row, kw in enumerate(self.keywords_data) if kw['id'] in selected]
+        return [self.keywords_data[row] for row in rows], self.rank_matrix.take_rows(rows)
+
 
 class KeywordReportGenerator:
     """Generate keyword ranking reports in CSV and PDF formats"""
     
-    def __init__(self, report):
+    def __init__(self, report, defer_pdf: bool = False, dataset: Optional[ReportDataset] = None):
         """
         Initialize report generator
         
         Args:
             report: KeywordReport instance
+            defer_pdf: Return the keyword rankings PDF as data ('pdf_data') for
+                another worker to render, instead of rendering it here
+            dataset: Shared keywords and ranks of the report's project and
+                period; loaded from the database when not given
         """
         self.report = report
+        self.defer_pdf = defer_pdf
+        self.dataset = dataset
         self.project = report.project
         self.report_type = report.report_type
         self.start_date = report.start_date
@@ -55,7 +220,7 @@ class KeywordReportGenerator:
         
         # Storage for processed data
         self.keywords_data = []
-        self.ranking_data = {}
+        self.rank_matrix = None
         self.summary_stats = {}
         
     def _generate_date_range(self) -> List[date]:
@@ -112,24 +277,29 @@ class KeywordReportGenerator:
         
         try:
             # Load and process data
-            logger.info(f"Loading data for keyword rankings report {self.report.id}")
-            self._load_keyword_data()
-            self._load_ranking_data()
+            if self.dataset is not None:
+                self._use_dataset()
+            else:
+                logger.info(f"Loading data for keyword rankings report {self.report.id}")
+                self._load_keyword_data()
+                self._load_ranking_data()
             self._calculate_summary_stats()
             
             # Generate CSV if requested
             if self.report.report_format in ['csv', 'both']:
                 logger.info("Generating CSV report")
-                csv_content = self._generate_csv()
-                results['csv_content'] = csv_content
-                results['csv_size'] = len(csv_content)
+                results['csv_stream'] = iter_encoded_chunks(self._generate_csv())
             
             # Generate PDF if requested
             if self.report.report_format in ['pdf', 'both']:
-                logger.info("Generating PDF report")
-                pdf_content = self._generate_pdf()
-                results['pdf_content'] = pdf_content
-                results['pdf_size'] = len(pdf_content)
+                if self.defer_pdf:
+                    # Rendered on the reports_pdf queue while the CSV streams
+                    results['pdf_data'] = self.build_pdf_data()
+                else:
+                    logger.info("Generating PDF report")
+                    pdf_content = self._generate_pdf()
+                    results['pdf_content'] = pdf_content
+                    results['pdf_size'] = len(pdf_content)
             
             results['success'] = True
             results['summary'] = self.summary_stats
@@ -164,111 +334,75 @@ class KeywordReportGenerator:
         keywords_qs = keywords_qs.order_by('keyword')
         
         # Store keywords
-        self.keywords_data = list(keywords_qs.values(
-            'id', 'keyword', 'country', 'country_code',
-            'rank', 'rank_url', 'rank_status', 'impact',
-            'created_at', 'scraped_at'
-        ))
+        self.keywords_data = list(keywords_qs.values(*KEYWORD_FIELDS))
         
         logger.info(f"Loaded {len(self.keywords_data)} keywords")
     
     def _load_ranking_data(self):
-        """Load historical ranking data for date range"""
-        from .models import Rank
+        """Load historical ranking data for date range into a keyword x date rank matrix"""
+        # Matrix rows follow keywords_data order
+        self.rank_matrix = load_rank_matrix([kw['id'] for kw in self.keywords_data], self.start_date, self.end_date)
         
-        # Get all keyword IDs
-        keyword_ids = [kw['id'] for kw in self.keywords_data]
-        
-        # Load ranks for date range
-        start_datetime = timezone.make_aware(
-            datetime.combine(self.start_date, datetime.min.time())
-        )
-        end_datetime = timezone.make_aware(
-            datetime.combine(self.end_date, datetime.max.time())
-        )
-        
-        ranks_qs = Rank.objects.filter(
-            keyword_id__in=keyword_ids,
-            created_at__gte=start_datetime,
-            created_at__lte=end_datetime,
-            is_organic=True  # Only organic ranks
-        ).order_by('keyword_id', 'created_at')
-        
-        # Organize ranks by keyword and date
-        self.ranking_data = defaultdict(lambda: defaultdict(dict))
+        logger.info(f"Loaded ranking data for {int((self.rank_matrix.data_points() > 0).sum())} keywords")
+    
+    def _use_dataset(self):
+        """Take the report's keywords and ranks from the shared dataset"""
+        if not self.dataset.matches(self.report):
+            raise ValueError(f"Shared report data does not cover report {self.report.id}")
         
-        for rank in ranks_qs:
-            rank_date = rank.created_at.date()
-            keyword_id = rank.keyword_id
-            
-            # Store the best (lowest) rank for each day
-            if rank_date not in self.ranking_data[keyword_id] or \
-               rank.rank < self.ranking_data[keyword_id][rank_date].get('rank', 999):
-                self.ranking_data[keyword_id][rank_date] = {
-                    'rank': rank.rank,
-                    'created_at': rank.created_at
-                }
+        keyword_ids = None
+        if self.report.keywords.exists():
+            keyword_ids = list(self.report.keywords.values_list('id', flat=True))
         
-        # Don't fill missing ranks - show NR for missing data
-        logger.info(f"Loaded ranking data for {len(self.ranking_data)} keywords")
+        self.keywords_data, self.rank_matrix = self.dataset.select(keyword_ids)
+        logger.info(f"Using shared report data for report {self.report.id}: {len(self.keywords_data)} keywords")
     
     def _calculate_summary_stats(self):
         """Calculate summary statistics for the report"""
         total_keywords = len(self.keywords_data)
         
-        # Calculate ranking improvements/declines
-        improvements = 0
-        declines = 0
-        no_change = 0
-        
-        for kw_data in self.keywords_data:
-            keyword_id = kw_data['id']
-            
-            if keyword_id not in self.ranking_data:
-                continue
-            
-            # Get first and last rank in period
-            dates_with_data = sorted([d for d in self.date_range if d in self.ranking_data[keyword_id]])
-            
-            if len(dates_with_data) >= 2:
-                first_rank = self.ranking_data[keyword_id][dates_with_data[0]]['rank']
-                last_rank = self.ranking_data[keyword_id][dates_with_data[-1]]['rank']
-                
-                if first_rank > 100:
-                    first_rank = 101  # Treat >100 as 101
-                if last_rank > 100:
-                    last_rank = 101
-                
-                if last_rank < first_rank:
-                    improvements += 1
-                elif last_rank > first_rank:
-                    declines += 1
-                else:
-                    no_change += 1
+        # Ranking improvements/declines between the first and last day with data
+        change_counts = self.rank_matrix.change_counts()
         
         self.summary_stats = {
             'total_keywords': total_keywords,
             'date_range': f"{self.start_date.strftime('%Y-%m-%d')} to {self.end_date.strftime('%Y-%m-%d')}",
             'days_covered': len(self.date_range),
-            'improvements': improvements,
-            'declines': declines,
-            'no_change': no_change,
+            'improvements': change_counts['improvements'],
+            'declines': change_counts['declines'],
+            'no_change': change_counts['no_change'],
+            'project_trend': self._load_project_trend(),
             'report_generated': timezone.now().isoformat()
         }
     
-    def _generate_csv(self) -> bytes:
+    def _load_project_trend(self) -> Optional[Dict[str, Dict[str, Any]]]:
         """
-        Generate CSV report matching the sample format
+        Project-wide metrics at the first and last day of the period from the daily rollups
+        
+        Only used when the report covers all of the project's keywords.
         
         Returns:
-            CSV content as bytes
+            Dict with 'start' and 'end' metrics, or None if not available
         """
-        output = io.StringIO()
+        if self.report.keywords.exists():
+            return None
+        
+        if self.dataset is not None:
+            return self.dataset.project_trend
+        
+        return load_project_trend(self.project, self.start_date, self.end_date)
+    
+    def _generate_csv(self) -> Iterator[str]:
+        """
+        Generate CSV report matching the sample format, one line at a time
         
+        Yields:
+            CSV lines
+        """
         # Write header information
-        output.write(f"Domain,{self.project.domain}\n")
-        output.write(f"Start Date,{self.start_date.strftime('%a %b %d %Y')}\n")
-        output.write(f"End Date,{self.end_date.strftime('%a %b %d %Y')}\n")
+        yield f"Domain,{self.project.domain}\n"
+        yield f"Start Date,{self.start_date.strftime('%a %b %d %Y')}\n"
+        yield f"End Date,{self.end_date.strftime('%a %b %d %Y')}\n"
         
         # Prepare main data headers
         headers = [
@@ -281,193 +415,74 @@ class KeywordReportGenerator:
             headers.append(date_obj.strftime('%d %b %Y'))
         
         # Write main data
-        writer = csv.writer(output)
-        writer.writerow(headers)
+        writer = CSVLineWriter()
+        yield writer.line(headers)
+        
+        # Impact for every keyword at once, daily rank cells a block of keywords at a time
+        impacts = self.rank_matrix.impacts()
+        cells = None
         
         # Write keyword data rows
-        for kw_data in self.keywords_data:
-            keyword_id = kw_data['id']
+        for row_index, kw_data in enumerate(self.keywords_data):
+            if row_index % CSV_LABEL_BLOCK == 0:
+                cells = self.rank_matrix.cell_labels(slice(row_index, row_index + CSV_LABEL_BLOCK))
             
-            # Determine current rank and impact
+            # Determine current rank
             current_rank = kw_data['rank']
             if current_rank == 0 or current_rank > 100:
                 current_rank_str = "NR"
             else:
                 current_rank_str = str(current_rank)
             
-            # Determine rank change impact
-            impact = "no_change"
-            if keyword_id in self.ranking_data:
-                dates_with_data = sorted([d for d in self.date_range if d in self.ranking_data[keyword_id]])
-                if len(dates_with_data) >= 2:
-                    first_rank = self.ranking_data[keyword_id][dates_with_data[0]]['rank']
-                    last_rank = self.ranking_data[keyword_id][dates_with_data[-1]]['rank']
-                    
-                    if last_rank < first_rank:
-                        impact = "up"
-                    elif last_rank > first_rank:
-                        impact = "down"
-            
             row = [
                 f"GOOGLE, {kw_data['country']}",  # Use full country name instead of country_code
                 kw_data['keyword'],
                 kw_data.get('rank_url', ''),
                 kw_data['created_at'].strftime('%Y-%m-%d') if kw_data['created_at'] else '',
                 current_rank_str,
-                impact,
+                impacts[row_index],
                 ""  # Tags (empty for now)
             ]
             
-            # Add daily rank data
-            for date_obj in self.date_range:
-                if keyword_id in self.ranking_data and date_obj in self.ranking_data[keyword_id]:
-                    rank_value = self.ranking_data[keyword_id][date_obj]['rank']
-                    if rank_value == 0 or rank_value > 100:
-                        row.append("NR")
-                    else:
-                        row.append(str(rank_value))
-                else:
-                    row.append("NR")  # No data means not ranking
+            # Add daily rank data (no data means not ranking)
+            row.extend(cells[row_index % CSV_LABEL_BLOCK].tolist())
             
-            writer.writerow(row)
-        
-        # Get CSV content as bytes
-        csv_content = output.getvalue()
-        output.close()
-        
-        return csv_content.encode('utf-8')
+            yield writer.line(row)
     
-    def _generate_pdf(self) -> bytes:
+    def build_pdf_data(self) -> Dict[str, Any]:
         """
-        Generate PDF report with charts and formatted data
+        Precomputed content of the keyword rankings PDF
+        
+        JSON-serializable, so it can be handed to the reports_pdf queue and
+        rendered by report_pdf without database access.
         
         Returns:
-            PDF content as bytes
+            Dict with domain, period, summary, chart and detail table rows
         """
-        buffer = io.BytesIO()
-        
-        # Create PDF document
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=A4,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=18,
-        )
-        
-        # Container for the 'Flowable' objects
-        elements = []
-        
-        # Define styles
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Title'],
-            fontSize=24,
-            textColor=colors.HexColor('#1f2937'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading1'],
-            fontSize=16,
-            textColor=colors.HexColor('#1f2937'),
-            spaceAfter=12,
-            spaceBefore=12
-        )
-        
-        # Add title
-        elements.append(Paragraph(f"Keyword Ranking Report", title_style))
-        elements.append(Paragraph(f"{self.project.domain}", styles['Heading2']))
-        elements.append(Spacer(1, 20))
-        
-        # Add report information
-        info_data = [
-            ['Report Period:', f"{self.start_date.strftime('%B %d, %Y')} - {self.end_date.strftime('%B %d, %Y')}"],
-            ['Total Keywords:', str(self.summary_stats['total_keywords'])],
-            ['Days Covered:', str(self.summary_stats['days_covered'])],
-            ['Generated:', datetime.now().strftime('%B %d, %Y at %I:%M %p')]
-        ]
-        
-        info_table = Table(info_data, colWidths=[2*inch, 4*inch])
-        info_table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ]))
-        
-        elements.append(info_table)
-        elements.append(Spacer(1, 30))
-        
-        # Add summary statistics
-        elements.append(Paragraph("Executive Summary", heading_style))
-        
-        summary_data = [
-            ['Metric', 'Count', 'Percentage'],
-            ['Keywords Improved', str(self.summary_stats['improvements']), 
-             f"{(self.summary_stats['improvements']/max(self.summary_stats['total_keywords'],1)*100):.1f}%"],
-            ['Keywords Declined', str(self.summary_stats['declines']),
-             f"{(self.summary_stats['declines']/max(self.summary_stats['total_keywords'],1)*100):.1f}%"],
-            ['No Change', str(self.summary_stats['no_change']),
-             f"{(self.summary_stats['no_change']/max(self.summary_stats['total_keywords'],1)*100):.1f}%"],
-        ]
-        
-        summary_table = Table(summary_data, colWidths=[2.5*inch, 1.5*inch, 1.5*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 11),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-        
-        elements.append(summary_table)
-        elements.append(PageBreak())
-        
-        # Add ranking trends chart if configured
-        if self.report.include_graphs and len(self.ranking_data) > 0:
-            elements.append(Paragraph("Ranking Trends", heading_style))
-            chart = self._create_ranking_chart()
-            if chart:
-                elements.append(chart)
-                elements.append(Spacer(1, 20))
-        
-        # Add detailed keyword table (paginated)
-        elements.append(Paragraph("Keyword Performance Details", heading_style))
+        return {
+            'domain': self.project.domain,
+            'start_date': self.start_date.isoformat(),
+            'end_date': self.end_date.isoformat(),
+            'summary': self.summary_stats,
+            'chart': self._chart_data() if self.report.include_graphs else None,
+            'detail_rows': self._detail_rows(),
+        }
+    
+    def _detail_rows(self) -> List[List[str]]:
+        """Keyword performance rows (start/end rank, change, status) for keywords with 2+ days of data"""
+        first_ranks, last_ranks = self.rank_matrix.first_last()
+        data_points = self.rank_matrix.data_points()
         
-        # Create detailed table with limited rows per page
-        detail_headers = ['Keyword', 'Start Rank', 'End Rank', 'Change', 'Status']
-        detail_data = [detail_headers]
+        limit = settings.REPORT_PDF_DETAIL_ROWS or len(self.keywords_data)
+        detail_rows = []
         
-        for kw_data in self.keywords_data[:50]:  # Limit to first 50 keywords
-            keyword_id = kw_data['id']
-            
-            if keyword_id not in self.ranking_data:
-                continue
-            
-            dates_with_data = sorted([d for d in self.date_range if d in self.ranking_data[keyword_id]])
-            
-            if len(dates_with_data) >= 2:
-                first_rank = self.ranking_data[keyword_id][dates_with_data[0]]['rank']
-                last_rank = self.ranking_data[keyword_id][dates_with_data[-1]]['rank']
+        for row_index, kw_data in enumerate(self.keywords_data[:limit]):
+            if data_points[row_index] >= 2:
+                first_rank = int(first_ranks[row_index])
+                last_rank = int(last_ranks[row_index])
                 
-                if first_rank > 100:
-                    first_rank_str = "NR"
-                else:
-                    first_rank_str = str(first_rank)
-                
-                if last_rank > 100:
-                    last_rank_str = "NR"
-                else:
-                    last_rank_str = str(last_rank)
+                first_rank_str = "NR" if first_rank > 100 else str(first_rank)
+                last_rank_str = "NR" if last_rank > 100 else str(last_rank)
                 
                 # Calculate change
                 if first_rank > 100 and last_rank > 100:
@@ -496,159 +511,49 @@ class KeywordReportGenerator:
                 if len(keyword_text) > 40:
                     keyword_text = keyword_text[:37] + "..."
                 
-                detail_data.append([
-                    keyword_text,
-                    first_rank_str,
-                    last_rank_str,
-                    change_str,
-                    status
-                ])
+                detail_rows.append([keyword_text, first_rank_str, last_rank_str, change_str, status])
         
-        if len(detail_data) > 1:  # Has data rows
-            detail_table = Table(detail_data, colWidths=[3*inch, 1*inch, 1*inch, 1*inch, 1.5*inch])
-            detail_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-            ]))
-            
-            elements.append(detail_table)
+        return detail_rows
+    
+    def _chart_data(self) -> Optional[Dict[str, Any]]:
+        """
+        Ranking trend series for the keywords with the most data
         
-        # Build PDF
-        try:
-            doc.build(elements)
-        except Exception as e:
-            logger.error(f"Error building PDF: {e}")
-            # Return a simple error PDF
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4)
-            elements = [Paragraph("Error generating report", styles['Title'])]
-            doc.build(elements)
+        Returns:
+            Dict with labels, categories (sampled dates) and series, or None without data
+        """
+        # Of the first 20 keywords, take the 5 with the most data
+        top_rows = self.rank_matrix.top_rows_by_data(candidates=20, limit=5)
         
-        # Get PDF content
-        pdf_content = buffer.getvalue()
-        buffer.close()
+        if not top_rows:
+            return None
         
-        return pdf_content
+        # Sampled dates, ranks inverted so rank 1 appears at top (0 for missing days)
+        step = max(1, len(self.date_range)//10)
+        series = self.rank_matrix.chart_series(top_rows, step)
+        
+        labels = []
+        for row_index in top_rows:
+            # Truncate label if needed
+            keyword_text = self.keywords_data[row_index]['keyword']
+            if len(keyword_text) > 20:
+                keyword_text = keyword_text[:17] + "..."
+            labels.append(keyword_text)
+        
+        return {
+            'labels': labels,
+            'categories': [d.strftime('%m/%d') for d in self.date_range[::step]],
+            'series': series.tolist(),
+        }
     
-    def _create_ranking_chart(self):
-        """Create a ranking trend chart for top keywords"""
-        try:
-            # Select top 10 keywords with most data
-            keywords_with_data = []
-            
-            for kw_data in self.keywords_data[:20]:  # Check first 20 keywords
-                keyword_id = kw_data['id']
-                if keyword_id in self.ranking_data:
-                    data_points = len([d for d in self.date_range if d in self.ranking_data[keyword_id]])
-                    if data_points > 0:
-                        keywords_with_data.append((keyword_id, kw_data['keyword'], data_points))
-            
-            # Sort by data points and take top 5
-            keywords_with_data.sort(key=lambda x: x[2], reverse=True)
-            top_keywords = keywords_with_data[:5]
-            
-            if not top_keywords:
-                return None
-            
-            # Create drawing
-            drawing = Drawing(400, 200)
-            
-            # Create line chart
-            lc = HorizontalLineChart()
-            lc.x = 50
-            lc.y = 50
-            lc.height = 125
-            lc.width = 300
-            
-            # Prepare data
-            data = []
-            labels = []
-            
-            for keyword_id, keyword_text, _ in top_keywords:
-                keyword_data = []
-                for date_obj in self.date_range[::max(1, len(self.date_range)//10)]:  # Sample dates
-                    if date_obj in self.ranking_data[keyword_id]:
-                        # Invert rank for better visualization (lower rank = higher on chart)
-                        rank = self.ranking_data[keyword_id][date_obj]['rank']
-                        if rank > 100:
-                            rank = 100
-                        keyword_data.append(101 - rank)  # Invert so rank 1 appears at top
-                    else:
-                        keyword_data.append(0)
-                
-                if keyword_data:
-                    data.append(keyword_data)
-                    # Truncate label if needed
-                    if len(keyword_text) > 20:
-                        keyword_text = keyword_text[:17] + "..."
-                    labels.append(keyword_text)
-            
-            if not data:
-                return None
-            
-            lc.data = data
-            lc.categoryAxis.categoryNames = [d.strftime('%m/%d') for d in self.date_range[::max(1, len(self.date_range)//10)]]
-            
-            # Style the chart
-            lc.lines[0].strokeColor = colors.blue
-            lc.lines[0].strokeWidth = 2
-            
-            if len(data) > 1:
-                lc.lines[1].strokeColor = colors.green
-                lc.lines[1].strokeWidth = 2
-            
-            if len(data) > 2:
-                lc.lines[2].strokeColor = colors.red
-                lc.lines[2].strokeWidth = 2
-            
-            if len(data) > 3:
-                lc.lines[3].strokeColor = colors.orange
-                lc.lines[3].strokeWidth = 2
-            
-            if len(data) > 4:
-                lc.lines[4].strokeColor = colors.purple
-                lc.lines[4].strokeWidth = 2
-            
-            lc.valueAxis.valueMin = 0
-            lc.valueAxis.valueMax = 101
-            lc.valueAxis.valueStep = 20
-            
-            drawing.add(lc)
-            
-            # Add legend
-            from reportlab.graphics.charts.legends import Legend
-            legend = Legend()
-            legend.x = 360
-            legend.y = 150
-            legend.deltax = 75
-            legend.deltay = 20
-            legend.columnMaximum = 1
-            legend.fontSize = 8
-            
-            # Set legend items
-            legend.colorNamePairs = [
-                (colors.blue, labels[0] if len(labels) > 0 else ''),
-                (colors.green, labels[1] if len(labels) > 1 else ''),
-                (colors.red, labels[2] if len(labels) > 2 else ''),
-                (colors.orange, labels[3] if len(labels) > 3 else ''),
-                (colors.purple, labels[4] if len(labels) > 4 else ''),
-            ][:len(data)]
-            
-            drawing.add(legend)
-            
-            return drawing
-            
-        except Exception as e:
-            logger.error(f"Error creating chart: {e}")
-            return None
+    def _generate_pdf(self) -> bytes:
+        """
+        Generate PDF report with charts and formatted data
+        
+        Returns:
+            PDF content as bytes
+        """
+        return render_keyword_rankings_pdf(self.build_pdf_data(), pool=get_render_pool())
     
     def _generate_page_rankings_report(self) -> Dict[str, Any]:
         """Generate page rankings report showing which pages rank for most keywords"""
@@ -662,93 +567,53 @@ class KeywordReportGenerator:
         try:
             logger.info(f"Generating page rankings report for project {self.project.id}")
             from .models import Keyword
-            from collections import defaultdict
-            from urllib.parse import urlparse
-            
-            # Get all active keywords for the project
-            keywords = Keyword.objects.filter(
-                project=self.project,
-                archive=False
-            ).exclude(rank=0).exclude(rank__gt=100)
+            from .page_rankings import page_groups, top_keywords_by_page
             
-            # Apply keyword filters if set
+            # Project keywords, or the report's keyword selection
+            keywords = Keyword.objects.filter(project=self.project)
             if self.report.keywords.exists():
-                keywords = self.report.keywords.filter(archive=False)
+                keywords = keywords.filter(id__in=self.report.keywords.values_list('id', flat=True))
             
-            # Group keywords by ranking URL
-            page_data = defaultdict(lambda: {
-                'keywords': [],
-                'total_count': 0,
-                'avg_position': 0,
-                'top_3': 0,
-                'top_10': 0,
-                'top_30': 0
-            })
-            
-            for keyword in keywords:
-                if keyword.rank_url:
-                    # Normalize URL (remove query params for grouping)
-                    parsed_url = urlparse(keyword.rank_url)
-                    clean_url = f"{parsed_url.scheme}://{parsed_url.netloc}{parsed_url.path}"
-                    
-                    page_data[clean_url]['keywords'].append({
-                        'keyword': keyword.keyword,
-                        'rank': keyword.rank,
-                        'country': keyword.country  # Include country information
-                    })
-                    page_data[clean_url]['total_count'] += 1
-                    
-                    if keyword.rank <= 3:
-                        page_data[clean_url]['top_3'] += 1
-                    if keyword.rank <= 10:
-                        page_data[clean_url]['top_10'] += 1
-                    if keyword.rank <= 30:
-                        page_data[clean_url]['top_30'] += 1
-            
-            # Calculate average positions
-            for url, data in page_data.items():
-                if data['keywords']:
-                    total_rank = sum(k['rank'] for k in data['keywords'])
-                    data['avg_position'] = round(total_rank / len(data['keywords']), 1)
-            
-            # Sort by total keywords (descending)
-            sorted_pages = sorted(page_data.items(), key=lambda x: x[1]['total_count'], reverse=True)
+            # One row per page, grouped and sorted by total keywords in the database
+            sorted_pages = list(page_groups(keywords))
+            total_keywords = sum(page['total_keywords'] for page in sorted_pages)
             
             # Generate CSV if requested
             if self.report.report_format in ['csv', 'both']:
-                csv_buffer = io.StringIO()
-                csv_writer = csv.writer(csv_buffer)
+                # Top 10 keywords of every page, in one query
+                page_keywords = top_keywords_by_page(keywords, limit=10)
                 
-                # Write headers
-                csv_writer.writerow([
-                    'Page URL',
-                    'Total Keywords',
-                    'Avg. Position',
-                    'Top 3',
-                    'Top 10',
-                    'Top 30',
-                    'Keywords with Country (Top 10)'
-                ])
-                
-                # Write data
-                for url, data in sorted_pages:
-                    # Get top 10 keywords for this page with country information
-                    top_keywords = sorted(data['keywords'], key=lambda x: x['rank'])[:10]
-                    keywords_str = '; '.join([f"{k['keyword']} - {k['country']} (#{k['rank']})" for k in top_keywords])
+                def csv_lines():
+                    csv_writer = CSVLineWriter()
                     
-                    csv_writer.writerow([
-                        url,
-                        data['total_count'],
-                        data['avg_position'],
-                        data['top_3'],
-                        data['top_10'],
-                        data['top_30'],
-                        keywords_str
+                    # Write headers
+                    yield csv_writer.line([
+                        'Page URL',
+                        'Total Keywords',
+                        'Avg. Position',
+                        'Top 3',
+                        'Top 10',
+                        'Top 30',
+                        'Keywords with Country (Top 10)'
                     ])
-                
-                csv_content = csv_buffer.getvalue()
-                results['csv_content'] = csv_content
-                results['csv_size'] = len(csv_content)
+                    
+                    # Write data
+                    for page in sorted_pages:
+                        # Top 10 keywords for this page with country information
+                        top_keywords = page_keywords.get((page['project_id'], page['rank_url_path']), [])
+                        keywords_str = '; '.join([f"{k['keyword']} - {k['country']} (#{k['rank']})" for k in top_keywords])
+                        
+                        yield csv_writer.line([
+                            page['rank_url_path'],
+                            page['total_keywords'],
+                            page['avg_position'],
+                            page['top_3'],
+                            page['top_10'],
+                            page['top_30'],
+                            keywords_str
+                        ])
+                
+                results['csv_stream'] = iter_encoded_chunks(csv_lines())
             
             # Generate PDF if requested
             if self.report.report_format in ['pdf', 'both']:
@@ -775,8 +640,8 @@ class KeywordReportGenerator:
                 summary_data = [
                     ['Metric', 'Value'],
                     ['Total Pages Ranking', len(sorted_pages)],
-                    ['Total Keywords', sum(d['total_count'] for _, d in sorted_pages)],
-                    ['Average Keywords per Page', round(sum(d['total_count'] for _, d in sorted_pages) / max(len(sorted_pages), 1), 1)]
+                    ['Total Keywords', total_keywords],
+                    ['Average Keywords per Page', round(total_keywords / max(len(sorted_pages), 1), 1)]
                 ]
                 summary_table = Table(summary_data, colWidths=[3*inch, 2*inch])
                 summary_table.setStyle(TableStyle([
@@ -795,15 +660,16 @@ class KeywordReportGenerator:
                 story.append(Paragraph("Top Ranking Pages", styles['Heading2']))
                 table_data = [['Page URL', 'Keywords', 'Avg Pos', 'Top 3', 'Top 10']]
                 
-                for url, data in sorted_pages[:20]:  # Top 20 pages
+                for page in sorted_pages[:20]:  # Top 20 pages
                     # Truncate URL for display
+                    url = page['rank_url_path']
                     display_url = url[:50] + '...' if len(url) > 50 else url
                     table_data.append([
                         display_url,
-                        str(data['total_count']),
-                        str(data['avg_position']),
-                        str(data['top_3']),
-                        str(data['top_10'])
+                        str(page['total_keywords']),
+                        str(page['avg_position']),
+                        str(page['top_3']),
+                        str(page['top_10'])
                     ])
                 
                 pages_table = Table(table_data, colWidths=[3.5*inch, 1*inch, 1*inch, 0.75*inch, 0.75*inch])
@@ -826,8 +692,8 @@ class KeywordReportGenerator:
             results['success'] = True
             results['summary'] = {
                 'total_pages': len(sorted_pages),
-                'total_keywords': sum(d['total_count'] for _, d in sorted_pages),
-                'top_page': sorted_pages[0][0] if sorted_pages else None
+                'total_keywords': total_keywords,
+                'top_page': sorted_pages[0]['rank_url_path'] if sorted_pages else None
             }
             
         except Exception as e:
@@ -847,41 +713,24 @@ class KeywordReportGenerator:
         
         try:
             logger.info(f"Generating top competitors report for project {self.project.id}")
-            from competitors.models import Target, TargetKeywordRank
-            from collections import defaultdict
+            from competitors.models import CompetitorStats, Target
             
-            # Get all competitors (targets) for this project
-            competitors = Target.objects.filter(project=self.project)
+            # Precomputed stats of all competitors (targets) for this project
+            stats = CompetitorStats.for_project(self.project.id)
             
             competitor_stats = []
-            
-            for competitor in competitors:
-                # Get latest ranking data for this competitor (target)
-                # Use a simpler approach without distinct to avoid PostgreSQL issues
-                from django.db.models import Max
-                latest_ranks = TargetKeywordRank.objects.filter(
-                    target=competitor
-                ).select_related('keyword')
-                
-                # Calculate stats
-                total_keywords = latest_ranks.count()
-                top_3 = latest_ranks.filter(rank__lte=3).count()
-                top_10 = latest_ranks.filter(rank__lte=10).count()
-                top_30 = latest_ranks.filter(rank__lte=30).count()
-                
-                avg_rank = 0
-                if total_keywords > 0:
-                    ranks = [r.rank for r in latest_ranks if r.rank > 0 and r.rank <= 100]
-                    avg_rank = round(sum(ranks) / len(ranks), 1) if ranks else 0
-                
+            for target_id, domain in Target.objects.filter(project=self.project).values_list('id', 'domain'):
+                target_stats = stats.get(target_id)
+                if target_stats is None:  # Added after the stats were read
+                    continue
                 competitor_stats.append({
-                    'domain': competitor.domain,
-                    'total_keywords': total_keywords,
-                    'avg_rank': avg_rank,
-                    'top_3': top_3,
-                    'top_10': top_10,
-                    'top_30': top_30,
-                    'visibility_score': top_3 * 3 + top_10 * 2 + top_30  # Simple visibility scoring
+                    'domain': domain,
+                    'total_keywords': target_stats.keywords_total,
+                    'avg_rank': target_stats.avg_rank,
+                    'top_3': target_stats.top3_count,
+                    'top_10': target_stats.top10_count,
+                    'top_30': target_stats.top30_count,
+                    'visibility_score': target_stats.visibility_score
                 })
             
             # Sort by visibility score
@@ -889,35 +738,33 @@ class KeywordReportGenerator:
             
             # Generate CSV if requested
             if self.report.report_format in ['csv', 'both']:
-                csv_buffer = io.StringIO()
-                csv_writer = csv.writer(csv_buffer)
-                
-                # Write headers
-                csv_writer.writerow([
-                    'Competitor Domain',
-                    'Total Keywords',
-                    'Avg. Position',
-                    'Top 3',
-                    'Top 10',
-                    'Top 30',
-                    'Visibility Score'
-                ])
-                
-                # Write data
-                for comp in competitor_stats:
-                    csv_writer.writerow([
-                        comp['domain'],
-                        comp['total_keywords'],
-                        comp['avg_rank'],
-                        comp['top_3'],
-                        comp['top_10'],
-                        comp['top_30'],
-                        comp['visibility_score']
+                def csv_lines():
+                    csv_writer = CSVLineWriter()
+                    
+                    # Write headers
+                    yield csv_writer.line([
+                        'Competitor Domain',
+                        'Total Keywords',
+                        'Avg. Position',
+                        'Top 3',
+                        'Top 10',
+                        'Top 30',
+                        'Visibility Score'
                     ])
-                
-                csv_content = csv_buffer.getvalue()
-                results['csv_content'] = csv_content
-                results['csv_size'] = len(csv_content)
+                    
+                    # Write data
+                    for comp in competitor_stats:
+                        yield csv_writer.line([
+                            comp['domain'],
+                            comp['total_keywords'],
+                            comp['avg_rank'],
+                            comp['top_3'],
+                            comp['top_10'],
+                            comp['top_30'],
+                            comp['visibility_score']
+                        ])
+                
+                results['csv_stream'] = iter_encoded_chunks(csv_lines())
             
             # Generate PDF if requested
             if self.report.report_format in ['pdf', 'both']:
@@ -996,22 +843,23 @@ class KeywordReportGenerator:
             from competitors.models import TargetKeywordRank
             from collections import defaultdict
             
-            # Get all competitor keywords (target keyword ranks) for this project
+            # Get all competitor keywords (target keyword ranks) for this project,
+            # as plain rows instead of model instances
             comp_keywords = TargetKeywordRank.objects.filter(
                 target__project=self.project
-            ).select_related('target', 'keyword')
+            ).values_list('keyword__keyword', 'keyword__country', 'target__domain', 'rank', 'rank_url')
             
             # Group by keyword
             keyword_competitors = defaultdict(list)
             
-            for ck in comp_keywords:
+            for keyword_name, country, domain, rank, rank_url in comp_keywords.iterator(chunk_size=5000):
                 # Create a key that includes both keyword and country
-                keyword_key = f"{ck.keyword.keyword}|{ck.keyword.country}"
+                keyword_key = f"{keyword_name}|{country}"
                 keyword_competitors[keyword_key].append({
-                    'competitor': ck.target.domain,
-                    'rank': ck.rank if ck.rank > 0 else 101,
-                    'url': ck.rank_url,
-                    'country': ck.keyword.country
+                    'competitor': domain,
+                    'rank': rank if rank > 0 else 101,
+                    'url': rank_url,
+                    'country': country
                 })
             
             # Sort keywords by number of competitors targeting them
@@ -1039,38 +887,36 @@ class KeywordReportGenerator:
             
             # Generate CSV if requested
             if self.report.report_format in ['csv', 'both']:
-                csv_buffer = io.StringIO()
-                csv_writer = csv.writer(csv_buffer)
-                
-                # Write headers
-                csv_writer.writerow([
-                    'Keyword',
-                    'Country',
-                    'Competitors Count',
-                    'Top Competitor',
-                    'Top Rank',
-                    'All Competitors (Top 5)'
-                ])
-                
-                # Write data
-                for kw_data in keyword_data:
-                    competitors_str = '; '.join([
-                        f"{c['competitor']} (#{c['rank']})"
-                        for c in kw_data['competitors']
-                    ])
+                def csv_lines():
+                    csv_writer = CSVLineWriter()
                     
-                    csv_writer.writerow([
-                        kw_data['keyword'],
-                        kw_data['country'],
-                        kw_data['competitor_count'],
-                        kw_data['top_competitor'],
-                        kw_data['top_rank'] if kw_data['top_rank'] <= 100 else 'NR',
-                        competitors_str
+                    # Write headers
+                    yield csv_writer.line([
+                        'Keyword',
+                        'Country',
+                        'Competitors Count',
+                        'Top Competitor',
+                        'Top Rank',
+                        'All Competitors (Top 5)'
                     ])
-                
-                csv_content = csv_buffer.getvalue()
-                results['csv_content'] = csv_content
-                results['csv_size'] = len(csv_content)
+                    
+                    # Write data
+                    for kw_data in keyword_data:
+                        competitors_str = '; '.join([
+                            f"{c['competitor']} (#{c['rank']})"
+                            for c in kw_data['competitors']
+                        ])
+                        
+                        yield csv_writer.line([
+                            kw_data['keyword'],
+                            kw_data['country'],
+                            kw_data['competitor_count'],
+                            kw_data['top_competitor'],
+                            kw_data['top_rank'] if kw_data['top_rank'] <= 100 else 'NR',
+                            competitors_str
+                        ])
+                
+                results['csv_stream'] = iter_encoded_chunks(csv_lines())
             
             # Generate PDF if requested
             if self.report.report_format in ['pdf', 'both']:
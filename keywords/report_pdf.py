@@ -0,0 +1,430 @@
+"""
+Keyword Rankings PDF Renderer
+Renders the keyword rankings PDF from the precomputed report data built by
+KeywordReportGenerator.build_pdf_data(), without touching the database.
+
+The data is a JSON-serializable dict, so rendering can run in a different
+worker (the reports_pdf queue) while the CSV is being streamed:
+
+    {
+        'domain': 'example.com',
+        'start_date': '2025-09-01',
+        'end_date': '2025-09-30',
+        'summary': {...},  # KeywordReportGenerator.summary_stats
+        'chart': {'labels': [...], 'categories': [...], 'series': [[...], ...]} or None,
+        'detail_rows': [[keyword, start rank, end rank, change, status], ...],
+    }
+
+Chart drawings are cached in the rendering process by a hash of their
+content, and detail tables are split into chunks that a process pool can
+render in parallel before the pages are merged (requires pypdf).
+"""
+
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from django.conf import settings
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.graphics.shapes import Drawing
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.lib.enums import TA_CENTER
+
+try:
+    import pypdf
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Detail table rows per chunk (roughly one page)
+DETAIL_ROWS_PER_CHUNK = 40
+
+DETAIL_HEADERS = ['Keyword', 'Start Rank', 'End Rank', 'Change', 'Status']
+
+LINE_COLORS = [colors.blue, colors.green, colors.red, colors.orange, colors.purple]
+
+_render_pool = None
+
+# Built chart drawings by content hash (drawings don't pickle, so they can't
+# go through the Django cache; the reports_pdf worker is long-lived instead)
+_chart_cache = OrderedDict()
+_chart_cache_lock = threading.Lock()
+
+
+def get_render_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Process pool for rendering detail table chunks
+
+    Returns None when REPORT_PDF_PROCESSES is below 2, or inside a daemonic
+    process (Celery prefork children) which can't start children of its own.
+    The reports_pdf worker runs a threads pool so it can use the process pool.
+
+    Returns:
+        Shared ProcessPoolExecutor or None
+    """
+    global _render_pool
+
+    processes = getattr(settings, 'REPORT_PDF_PROCESSES', 0)
+    if processes < 2 or multiprocessing.current_process().daemon:
+        return None
+
+    if _render_pool is None:
+        _render_pool = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _render_pool
+
+
+def _styles() -> Dict[str, ParagraphStyle]:
+    """Paragraph styles used by the keyword rankings PDF"""
+    styles = getSampleStyleSheet()
+    return {
+        'styles': styles,
+        'title': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Title'],
+            fontSize=24,
+            textColor=colors.HexColor('#1f2937'),
+            spaceAfter=30,
+            alignment=TA_CENTER
+        ),
+        'heading': ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading1'],
+            fontSize=16,
+            textColor=colors.HexColor('#1f2937'),
+            spaceAfter=12,
+            spaceBefore=12
+        ),
+    }
+
+
+def _build_document(elements: List[Any]) -> bytes:
+    """
+    Build a PDF document from flowables
+
+    Args:
+        elements: Platypus flowables
+
+    Returns:
+        PDF content as bytes (a one-line error document if the build failed)
+    """
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        rightMargin=72,
+        leftMargin=72,
+        topMargin=72,
+        bottomMargin=18,
+    )
+
+    try:
+        doc.build(elements)
+    except Exception as e:
+        logger.error(f"Error building PDF: {e}")
+        # Return a simple error PDF
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4)
+        doc.build([Paragraph("Error generating report", getSampleStyleSheet()['Title'])])
+
+    pdf_content = buffer.getvalue()
+    buffer.close()
+    return pdf_content
+
+
+def detail_table(rows: List[List[str]]) -> Table:
+    """
+    Keyword performance table for one chunk of detail rows
+
+    Args:
+        rows: Detail rows (without the header)
+
+    Returns:
+        Table flowable with the header row repeated on every page
+    """
+    table = Table([DETAIL_HEADERS] + rows, colWidths=[3*inch, 1*inch, 1*inch, 1*inch, 1.5*inch], repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+    ]))
+    return table
+
+
+def render_detail_chunk(rows: List[List[str]]) -> bytes:
+    """
+    Render one chunk of the detail table as its own PDF
+
+    Module-level so it can run in the render process pool.
+
+    Args:
+        rows: Detail rows (without the header)
+
+    Returns:
+        PDF content as bytes
+    """
+    return _build_document([detail_table(rows)])
+
+
+def build_ranking_chart(chart: Dict[str, Any]) -> Drawing:
+    """
+    Ranking trend line chart for up to five keywords
+
+    Args:
+        chart: Dict with 'labels' (keyword per line), 'categories' (x axis
+            dates) and 'series' (inverted ranks per keyword)
+
+    Returns:
+        Drawing with the chart and its legend
+    """
+    drawing = Drawing(400, 200)
+
+    # Create line chart
+    lc = HorizontalLineChart()
+    lc.x = 50
+    lc.y = 50
+    lc.height = 125
+    lc.width = 300
+    lc.data = chart['series']
+    lc.categoryAxis.categoryNames = chart['categories']
+
+    # Style the chart
+    for index, color in enumerate(LINE_COLORS[:len(chart['series'])]):
+        lc.lines[index].strokeColor = color
+        lc.lines[index].strokeWidth = 2
+
+    lc.valueAxis.valueMin = 0
+    lc.valueAxis.valueMax = 101
+    lc.valueAxis.valueStep = 20
+
+    drawing.add(lc)
+
+    # Add legend
+    legend = Legend()
+    legend.x = 360
+    legend.y = 150
+    legend.deltax = 75
+    legend.deltay = 20
+    legend.columnMaximum = 1
+    legend.fontSize = 8
+    legend.colorNamePairs = list(zip(LINE_COLORS, chart['labels']))[:len(chart['series'])]
+
+    drawing.add(legend)
+
+    return drawing
+
+
+def chart_cache_key(chart: Dict[str, Any]) -> str:
+    """Cache key from a hash of the chart's labels, dates and series"""
+    content = json.dumps(chart, sort_keys=True, separators=(',', ':'))
+    return f"report_chart:{hashlib.sha256(content.encode('utf-8')).hexdigest()}"
+
+
+def get_ranking_chart(chart: Dict[str, Any]) -> Optional[Drawing]:
+    """
+    Ranking trend chart, reused from the cache when the same series was drawn before
+
+    Scheduled reports whose data didn't change since the last run get the
+    cached drawing instead of a new one.
+
+    Args:
+        chart: Chart data (see build_ranking_chart)
+
+    Returns:
+        Drawing, or None if the chart couldn't be built
+    """
+    key = chart_cache_key(chart)
+    with _chart_cache_lock:
+        drawing = _chart_cache.get(key)
+        if drawing is not None:
+            _chart_cache.move_to_end(key)
+            logger.info(f"Reusing cached ranking chart {key}")
+            return drawing
+
+    try:
+        drawing = build_ranking_chart(chart)
+    except Exception as e:
+        logger.error(f"Error creating chart: {e}")
+        return None
+
+    with _chart_cache_lock:
+        _chart_cache[key] = drawing
+        while len(_chart_cache) > getattr(settings, 'REPORT_CHART_CACHE_SIZE', 256):
+            _chart_cache.popitem(last=False)
+
+    return drawing
+
+
+def merge_pdfs(parts: List[bytes]) -> bytes:
+    """
+    Concatenate PDF documents
+
+    Args:
+        parts: PDF contents in page order
+
+    Returns:
+        Merged PDF content as bytes
+    """
+    writer = pypdf.PdfWriter()
+    for part in parts:
+        for page in pypdf.PdfReader(io.BytesIO(part)).pages:
+            writer.add_page(page)
+
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def _report_flowables(data: Dict[str, Any], detail_chunks: List[List[List[str]]]) -> List[Any]:
+    """Title, summary, chart and the given detail table chunks"""
+    styles = _styles()
+    summary = data['summary']
+    start_date = date.fromisoformat(data['start_date'])
+    end_date = date.fromisoformat(data['end_date'])
+
+    elements = []
+
+    # Add title
+    elements.append(Paragraph("Keyword Ranking Report", styles['title']))
+    elements.append(Paragraph(f"{data['domain']}", styles['styles']['Heading2']))
+    elements.append(Spacer(1, 20))
+
+    # Add report information
+    info_data = [
+        ['Report Period:', f"{start_date.strftime('%B %d, %Y')} - {end_date.strftime('%B %d, %Y')}"],
+        ['Total Keywords:', str(summary['total_keywords'])],
+        ['Days Covered:', str(summary['days_covered'])],
+        ['Generated:', datetime.now().strftime('%B %d, %Y at %I:%M %p')]
+    ]
+
+    info_table = Table(info_data, colWidths=[2*inch, 4*inch])
+    info_table.setStyle(TableStyle([
+        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ]))
+
+    elements.append(info_table)
+    elements.append(Spacer(1, 30))
+
+    # Add summary statistics
+    elements.append(Paragraph("Executive Summary", styles['heading']))
+
+    total = max(summary['total_keywords'], 1)
+    summary_data = [
+        ['Metric', 'Count', 'Percentage'],
+        ['Keywords Improved', str(summary['improvements']), f"{(summary['improvements']/total*100):.1f}%"],
+        ['Keywords Declined', str(summary['declines']), f"{(summary['declines']/total*100):.1f}%"],
+        ['No Change', str(summary['no_change']), f"{(summary['no_change']/total*100):.1f}%"],
+    ]
+
+    summary_table = Table(summary_data, colWidths=[2.5*inch, 1.5*inch, 1.5*inch])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]))
+
+    elements.append(summary_table)
+
+    # Project-wide trend from the daily rollups
+    trend = summary.get('project_trend')
+    if trend:
+        elements.append(Spacer(1, 20))
+        trend_data = [
+            ['Project Metric', trend['start']['date'], trend['end']['date']],
+            ['Keywords in Top 3', str(trend['start']['top3_count']), str(trend['end']['top3_count'])],
+            ['Keywords in Top 10', str(trend['start']['top10_count']), str(trend['end']['top10_count'])],
+            ['Keywords in Top 30', str(trend['start']['top30_count']), str(trend['end']['top30_count'])],
+            ['Visibility Score', f"{trend['start']['visibility_score']:.1f}%", f"{trend['end']['visibility_score']:.1f}%"],
+        ]
+        trend_table = Table(trend_data, colWidths=[2.5*inch, 1.5*inch, 1.5*inch])
+        trend_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]))
+        elements.append(trend_table)
+
+    elements.append(PageBreak())
+
+    # Add ranking trends chart if configured
+    if data.get('chart'):
+        elements.append(Paragraph("Ranking Trends", styles['heading']))
+        chart = get_ranking_chart(data['chart'])
+        if chart:
+            elements.append(chart)
+            elements.append(Spacer(1, 20))
+
+    # Add detailed keyword table, one table per chunk
+    elements.append(Paragraph("Keyword Performance Details", styles['heading']))
+    for rows in detail_chunks:
+        elements.append(detail_table(rows))
+
+    return elements
+
+
+def render_keyword_rankings_pdf(data: Dict[str, Any], pool: Optional[ProcessPoolExecutor] = None) -> bytes:
+    """
+    Render the keyword rankings PDF
+
+    With a process pool, pypdf installed and more than one detail chunk, the
+    chunks after the first render in the pool while this process renders the
+    summary pages, and the results are merged. Otherwise everything is built
+    as one document.
+
+    Args:
+        data: Report data from KeywordReportGenerator.build_pdf_data()
+        pool: Optional process pool for detail chunks (see get_render_pool)
+
+    Returns:
+        PDF content as bytes
+    """
+    rows = data['detail_rows']
+    chunks = [rows[i:i + DETAIL_ROWS_PER_CHUNK] for i in range(0, len(rows), DETAIL_ROWS_PER_CHUNK)]
+
+    if pool is not None and not PYPDF_AVAILABLE and len(chunks) > 1:
+        logger.warning(f"pypdf is not installed, rendering {len(chunks)} detail chunks for {data['domain']} serially")
+    if pool is None or not PYPDF_AVAILABLE or len(chunks) < 2:
+        return _build_document(_report_flowables(data, chunks))
+
+    futures = [pool.submit(render_detail_chunk, chunk) for chunk in chunks[1:]]
+    parts = [_build_document(_report_flowables(data, chunks[:1]))]
+    parts.extend(future.result() for future in futures)
+
+    logger.info(f"Rendered {len(chunks)} detail chunks for {data['domain']} in parallel")
+    return merge_pdfs(parts)
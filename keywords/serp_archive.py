@@ -0,0 +1,564 @@
+"""
+Compressed SERP HTML archive packed into daily segment files
+
+Every fetched SERP is compressed (zstd with a dictionary trained on our own
+SERPs, plain zstd before a dictionary exists, zlib when the zstandard package
+is not installed) and appended, like a log, to the segment file of its day:
+
+    SERP_ARCHIVE_ROOT/segments/YYYY-MM-DD/<host>-<pid>.seg
+    SERP_ARCHIVE_ROOT/dicts/<dict id>.zdict    trained dictionaries
+    SERP_ARCHIVE_ROOT/dicts/CURRENT            id of the dictionary used for new blobs
+
+Each process appends to its own segment, so writers never contend for a
+file. A segment record is a small header (magic, length, SHA-256) followed by
+the compressed bytes; SerpBlob stores the segment, offset and length, so a
+read is one seek. Within a day the same HTML is stored once (SERPs shared
+through snapshots).
+
+SerpArchiveEntry maps (keyword, scraped_date) to its SerpBlob. Retention drops
+a whole expired day: its entries, its blobs and its segment directory.
+
+Callers keep addressing a SERP by its key, {project_id}/{keyword_id}/{YYYY-MM-DD}.html
+(Keyword.scrape_do_file_path, parse/enrichment task arguments). Blobs without
+a segment are loose files (SERP_ARCHIVE_ROOT/blobs/ab/cd/<sha256>.zst) written
+before segments existed; keys without an archive entry fall back to the raw
+file under SCRAPE_DO_STORAGE_ROOT that the fetcher wrote before the archive.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import socket
+import struct
+import threading
+import zlib
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Keyword, SerpArchiveEntry, SerpBlob
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Segment record header: magic, compressed length, SHA-256 of the HTML
+RECORD_HEADER = struct.Struct('>4sI32s')
+RECORD_MAGIC = b'SRP1'
+
+# Dictionaries loaded in this process, by id (dictionaries never change once written)
+_dictionaries: Dict[int, 'zstandard.ZstdCompressionDict'] = {}
+
+
+def archive_root() -> Path:
+    return Path(settings.SERP_ARCHIVE_ROOT)
+
+
+def serp_key(project_id: int, keyword_id: int, scraped_date: Union[date, str]) -> str:
+    """Key of a keyword's SERP of a day: {project_id}/{keyword_id}/{YYYY-MM-DD}.html"""
+    if isinstance(scraped_date, date):
+        scraped_date = scraped_date.strftime('%Y-%m-%d')
+    return f"{project_id}/{keyword_id}/{scraped_date}.html"
+
+
+def parse_serp_key(key: str) -> Tuple[int, date]:
+    """
+    Split a SERP key into keyword ID and date
+
+    Raises:
+        ValueError: The key is not in {project_id}/{keyword_id}/{YYYY-MM-DD}.html form
+    """
+    path = Path(key)
+    return int(path.parent.name), datetime.strptime(path.stem, '%Y-%m-%d').date()
+
+
+def blob_path(content_hash: str, codec: str) -> Path:
+    """Path of a loose blob (written before segments existed)"""
+    extension = 'zz' if codec == 'zlib' else 'zst'
+    return archive_root() / 'blobs' / content_hash[:2] / content_hash[2:4] / f"{content_hash}.{extension}"
+
+
+# --- Compression -----------------------------------------------------------
+
+def _dictionary(dict_id: int) -> 'zstandard.ZstdCompressionDict':
+    """Load a trained dictionary, cached for the life of the process"""
+    dictionary = _dictionaries.get(dict_id)
+    if dictionary is None:
+        data = (archive_root() / 'dicts' / f"{dict_id}.zdict").read_bytes()
+        dictionary = zstandard.ZstdCompressionDict(data)
+        _dictionaries[dict_id] = dictionary
+    return dictionary
+
+
+def current_dictionary_id() -> Optional[int]:
+    """Id of the dictionary new blobs are compressed with, if one was trained"""
+    try:
+        return int((archive_root() / 'dicts' / 'CURRENT').read_text().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def compress(html: bytes) -> Tuple[str, bytes]:
+    """
+    Compress SERP HTML with the best available codec
+
+    Returns:
+        Tuple of (codec, compressed bytes); the codec is "zstd:<dict id>",
+        "zstd" or "zlib"
+    """
+    if not ZSTD_AVAILABLE:
+        return 'zlib', zlib.compress(html, 6)
+
+    level = settings.SERP_ARCHIVE_ZSTD_LEVEL
+    dict_id = current_dictionary_id()
+    if dict_id is None:
+        return 'zstd', zstandard.ZstdCompressor(level=level).compress(html)
+    compressor = zstandard.ZstdCompressor(level=level, dict_data=_dictionary(dict_id))
+    return f"zstd:{dict_id}", compressor.compress(html)
+
+
+def decompress(codec: str, data: bytes) -> bytes:
+    """Reverse compress() for a blob stored with codec"""
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    if not ZSTD_AVAILABLE:
+        raise RuntimeError(f"zstandard is required to read {codec} SERP blobs")
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(data)
+    dict_id = int(codec.split(':', 1)[1])
+    return zstandard.ZstdDecompressor(dict_data=_dictionary(dict_id)).decompress(data)
+
+
+def train_dictionary(samples: Iterable[bytes], dict_size: int = 112640) -> int:
+    """
+    Train a zstd dictionary on sample SERPs and make it the current one
+
+    Blobs written earlier keep the dictionary they were compressed with.
+
+    Args:
+        samples: Raw SERP HTML documents (a few hundred is plenty)
+        dict_size: Maximum dictionary size in bytes
+
+    Returns:
+        Id of the new dictionary
+    """
+    if not ZSTD_AVAILABLE:
+        raise RuntimeError("zstandard is required to train a SERP dictionary")
+
+    dictionary = zstandard.train_dictionary(dict_size, list(samples))
+    dict_id = dictionary.dict_id()
+    dicts_dir = archive_root() / 'dicts'
+    dicts_dir.mkdir(parents=True, exist_ok=True)
+    _write_atomic(dicts_dir / f"{dict_id}.zdict", dictionary.as_bytes())
+    _write_atomic(dicts_dir / 'CURRENT', str(dict_id).encode())
+    logger.info(f"[SERP ARCHIVE] Trained dictionary {dict_id} ({len(dictionary.as_bytes())} bytes)")
+    return dict_id
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    temp_path = path.with_name(f"{path.name}.tmp")
+    try:
+        temp_path.write_bytes(data)
+        temp_path.replace(path)
+    except Exception:
+        if temp_path.exists():
+            temp_path.unlink()
+        raise
+
+
+# --- Segments --------------------------------------------------------------
+
+def segment_dir(day: date) -> Path:
+    return archive_root() / 'segments' / day.strftime('%Y-%m-%d')
+
+
+class SegmentWriter:
+    """
+    Appends compressed SERPs to this process's segment file of the day
+
+    The file handle stays open across appends and is reopened when the day
+    changes, after a fork (the file name carries the pid) or when the
+    archive root moves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._file = None
+        self._path = None
+
+    def append(self, day: date, content_hash: str, data: bytes) -> Tuple[str, int]:
+        """
+        Append one compressed SERP
+
+        Returns:
+            Tuple of (segment path relative to SERP_ARCHIVE_ROOT, offset of the data)
+        """
+        segment = f"segments/{day.strftime('%Y-%m-%d')}/{socket.gethostname()}-{os.getpid()}.seg"
+        path = archive_root() / segment
+        with self._lock:
+            if self._path != path or self._file is None or self._file.closed:
+                self.close()
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(path, 'ab')
+                self._path = path
+
+            # A failed earlier write may have left a partial record - always append at the end
+            start = self._file.seek(0, os.SEEK_END)
+            self._file.write(RECORD_HEADER.pack(RECORD_MAGIC, len(data), bytes.fromhex(content_hash)) + data)
+            self._file.flush()
+            return segment, start + RECORD_HEADER.size
+
+    def close(self) -> None:
+        if self._file is not None and not self._file.closed:
+            self._file.close()
+        self._file = None
+        self._path = None
+
+
+_writer = SegmentWriter()
+
+
+def read_segment_record(segment: str, offset: int, length: int) -> bytes:
+    """Read the compressed data of one record: a single seek into the segment"""
+    with open(archive_root() / segment, 'rb') as f:
+        f.seek(offset)
+        data = f.read(length)
+    if len(data) != length:
+        raise FileNotFoundError(f"Segment {segment} is truncated at offset {offset}")
+    return data
+
+
+def iter_segment(segment: str):
+    """
+    Scan a segment file record by record (e.g. to rebuild or verify the index)
+
+    Yields:
+        Tuples of (content hash, data offset, compressed length)
+    """
+    with open(archive_root() / segment, 'rb') as f:
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            magic, length, digest = RECORD_HEADER.unpack(header)
+            if magic != RECORD_MAGIC:
+                raise ValueError(f"Corrupt record in segment {segment} at offset {f.tell() - RECORD_HEADER.size}")
+            offset = f.tell()
+            f.seek(length, os.SEEK_CUR)
+            yield digest.hex(), offset, length
+
+
+# --- Writing ---------------------------------------------------------------
+
+def store_blob(html: bytes, day: date) -> SerpBlob:
+    """
+    Store HTML once per day in the day's segment
+
+    Args:
+        html: SERP HTML
+        day: Segment day (the SERP's scraped date)
+
+    Returns:
+        The SerpBlob holding the HTML (existing or new)
+    """
+    content_hash = hashlib.sha256(html).hexdigest()
+    blob = SerpBlob.objects.filter(content_hash=content_hash, segment_date=day).first()
+    if blob is not None:
+        return blob
+
+    codec, data = compress(html)
+    segment, offset = _writer.append(day, content_hash, data)
+    try:
+        with transaction.atomic():
+            return SerpBlob.objects.create(
+                content_hash=content_hash,
+                codec=codec,
+                size=len(html),
+                stored_size=len(data),
+                segment_date=day,
+                segment=segment,
+                offset=offset
+            )
+    except IntegrityError:
+        # Another worker stored the same SERP concurrently - the appended
+        # record is dead weight until the day is dropped
+        return SerpBlob.objects.get(content_hash=content_hash, segment_date=day)
+
+
+def store_serp(keyword: Keyword, html: Union[str, bytes], scraped_date: date, overwrite: bool = False) -> Tuple[str, bool]:
+    """
+    Archive a keyword's SERP of a day
+
+    Args:
+        keyword: Keyword the SERP was fetched for
+        html: SERP HTML
+        scraped_date: Crawl date
+        overwrite: Replace a SERP already archived for the day (force crawls)
+
+    Returns:
+        Tuple of (SERP key, True if the HTML was stored, False if the day was
+        already archived and left unchanged)
+    """
+    key = serp_key(keyword.project_id, keyword.id, scraped_date)
+    entry = SerpArchiveEntry.objects.filter(keyword_id=keyword.id, scraped_date=scraped_date).first()
+    if entry is not None and not overwrite:
+        return key, False
+
+    if isinstance(html, str):
+        html = html.encode('utf-8')
+    # prune() may drop the blob between store_blob and the entry insert - store it again then
+    for _ in range(3):
+        if _attach(keyword.id, scraped_date, store_blob(html, scraped_date).id):
+            return key, True
+    raise RuntimeError(f"Could not archive SERP {key}: blob pruned while storing")
+
+
+def _attach(keyword_id: int, scraped_date: date, blob_id: int) -> bool:
+    """
+    Point a keyword's entry of the day at a blob
+
+    The blob row is locked for the insert, so prune() (which locks and
+    re-checks blobs before deleting them) never removes a blob that is
+    being referenced.
+
+    Returns:
+        False if the blob no longer exists
+    """
+    with transaction.atomic():
+        if not SerpBlob.objects.select_for_update().filter(id=blob_id).exists():
+            return False
+        SerpArchiveEntry.objects.update_or_create(
+            keyword_id=keyword_id,
+            scraped_date=scraped_date,
+            defaults={'blob_id': blob_id, 'created_at': timezone.now()}
+        )
+    return True
+
+
+def link_serp(keyword: Keyword, scraped_date: date, source_key: str) -> Optional[str]:
+    """
+    Archive another keyword's SERP of the day for keyword without storing it again
+
+    Used when a keyword is served from a shared SERP snapshot: both keywords'
+    entries point at the same blob. Only a blob of the same day is shared, so
+    dropping a day never takes another day's entries with it.
+
+    Returns:
+        The keyword's SERP key, or None if source_key is not archived
+    """
+    try:
+        source_keyword_id, source_date = parse_serp_key(source_key)
+    except (ValueError, TypeError):
+        return None
+
+    source = SerpArchiveEntry.objects.filter(
+        keyword_id=source_keyword_id, scraped_date=source_date
+    ).select_related('blob').first()
+    if source is None or source.blob.segment_date not in (None, scraped_date):
+        return None
+
+    if not _attach(keyword.id, scraped_date, source.blob_id):
+        return None
+    return serp_key(keyword.project_id, keyword.id, scraped_date)
+
+
+# --- Reading ---------------------------------------------------------------
+
+def read_blob(blob: SerpBlob) -> bytes:
+    if blob.segment:
+        data = read_segment_record(blob.segment, blob.offset, blob.stored_size)
+    else:
+        data = blob_path(blob.content_hash, blob.codec).read_bytes()
+    return decompress(blob.codec, data)
+
+
+def read_serp_bytes(keyword: Union[Keyword, int], scraped_date: Union[date, str]) -> Optional[bytes]:
+    """
+    HTML of a keyword's SERP of a day as bytes
+
+    Args:
+        keyword: Keyword instance or ID
+        scraped_date: Crawl date (date or YYYY-MM-DD)
+
+    Returns:
+        The HTML, or None if the SERP is neither archived nor a legacy raw file
+    """
+    if isinstance(scraped_date, str):
+        scraped_date = datetime.strptime(scraped_date, '%Y-%m-%d').date()
+    keyword_id = keyword if isinstance(keyword, int) else keyword.id
+
+    entry = SerpArchiveEntry.objects.select_related('blob').filter(
+        keyword_id=keyword_id,
+        scraped_date=scraped_date
+    ).first()
+    if entry is not None:
+        try:
+            return read_blob(entry.blob)
+        except FileNotFoundError:
+            logger.error(f"[SERP ARCHIVE] Blob {entry.blob.content_hash} missing for keyword {keyword_id} on {scraped_date}")
+            return None
+
+    # Raw file written before the archive existed
+    if isinstance(keyword, int):
+        project_id = Keyword.objects.filter(id=keyword_id).values_list('project_id', flat=True).first()
+        if project_id is None:
+            return None
+    else:
+        project_id = keyword.project_id
+    legacy_file = Path(settings.SCRAPE_DO_STORAGE_ROOT) / serp_key(project_id, keyword_id, scraped_date)
+    if legacy_file.exists():
+        return legacy_file.read_bytes()
+    return None
+
+
+def read_serp(keyword: Union[Keyword, int], scraped_date: Union[date, str]) -> Optional[str]:
+    """
+    HTML of a keyword's SERP of a day
+
+    Args:
+        keyword: Keyword instance or ID
+        scraped_date: Crawl date (date or YYYY-MM-DD)
+
+    Returns:
+        The HTML, or None if no SERP is stored for that day
+    """
+    html = read_serp_bytes(keyword, scraped_date)
+    return html.decode('utf-8') if html is not None else None
+
+
+def read_serp_key(key: str) -> Optional[str]:
+    """
+    HTML stored under a SERP key ({project_id}/{keyword_id}/{YYYY-MM-DD}.html)
+
+    Returns:
+        The HTML, or None if the key is invalid or nothing is stored under it
+    """
+    try:
+        keyword_id, scraped_date = parse_serp_key(key)
+    except (ValueError, TypeError):
+        return None
+    html = read_serp_bytes(keyword_id, scraped_date)
+    return html.decode('utf-8') if html is not None else None
+
+
+# --- Retention -------------------------------------------------------------
+
+def prune(days: Optional[int] = None, batch_size: int = 10000) -> dict:
+    """
+    Drop every day older than the retention window
+
+    A day goes as a whole: its entries, its blobs and its segment directory.
+    Today's segments are never touched, so writers never race a drop.
+    Loose blobs no entry references any more are deleted one by one.
+
+    Args:
+        days: Days of SERPs kept before today (default SERP_HISTORY_DAYS, at least 1)
+        batch_size: Rows deleted per statement
+
+    Returns:
+        Dict with the number of deleted entries, blobs and day segments and the bytes freed
+    """
+    days = max(1, settings.SERP_HISTORY_DAYS if days is None else days)
+    cutoff = timezone.localdate() - timedelta(days=days)
+
+    deleted_entries = _delete_in_batches(SerpArchiveEntry.objects.filter(scraped_date__lt=cutoff), batch_size)
+
+    expired_days = set(
+        SerpBlob.objects.filter(segment_date__lt=cutoff).values_list('segment_date', flat=True).distinct()
+    )
+    segments_root = archive_root() / 'segments'
+    if segments_root.exists():
+        for day_dir in segments_root.iterdir():
+            try:
+                day = datetime.strptime(day_dir.name, '%Y-%m-%d').date()
+            except ValueError:
+                continue
+            if day < cutoff:
+                expired_days.add(day)
+
+    deleted_blobs = 0
+    freed = 0
+    for day in sorted(expired_days):
+        # Entries of other days never point into this segment; drop any stragglers anyway
+        deleted_entries += _delete_in_batches(SerpArchiveEntry.objects.filter(blob__segment_date=day), batch_size)
+        deleted_blobs += _delete_in_batches(SerpBlob.objects.filter(segment_date=day), batch_size)
+        day_dir = segment_dir(day)
+        if day_dir.exists():
+            freed += sum(path.stat().st_size for path in day_dir.iterdir() if path.is_file())
+            shutil.rmtree(day_dir)
+
+    loose_blobs, loose_freed = _prune_loose_blobs(batch_size)
+    deleted_blobs += loose_blobs
+    freed += loose_freed
+
+    logger.info(
+        f"[SERP ARCHIVE] Dropped {len(expired_days)} day segments before {cutoff}: "
+        f"{deleted_entries} entries, {deleted_blobs} blobs ({freed} bytes)"
+    )
+    return {
+        'entries': deleted_entries,
+        'blobs': deleted_blobs,
+        'segments': len(expired_days),
+        'freed_bytes': freed,
+        'cutoff': cutoff.isoformat(),
+    }
+
+
+def _delete_in_batches(queryset, batch_size: int) -> int:
+    """Delete a queryset in id batches so no statement holds locks for long"""
+    deleted = 0
+    while True:
+        ids = list(queryset.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += queryset.model.objects.filter(id__in=ids).delete()[0]
+
+
+def _prune_loose_blobs(batch_size: int) -> Tuple[int, int]:
+    """
+    Delete loose blobs (written before segments) that no entry references
+
+    Returns:
+        Tuple of (deleted blobs, bytes freed)
+    """
+    # Blobs younger than an hour may belong to an entry being written right now
+    orphans = SerpBlob.objects.filter(
+        segment='',
+        entries__isnull=True,
+        created_at__lt=timezone.now() - timedelta(hours=1)
+    )
+    deleted_blobs = 0
+    freed = 0
+    while True:
+        blobs = list(orphans.values_list('id', 'content_hash', 'codec', 'stored_size')[:batch_size])
+        if not blobs:
+            break
+        ids = [blob[0] for blob in blobs]
+        with transaction.atomic():
+            # Lock first, then re-check references: an entry committed by
+            # _attach before the lock was granted keeps its blob
+            locked = list(SerpBlob.objects.select_for_update().filter(id__in=ids).values_list('id', flat=True))
+            referenced = set(
+                SerpArchiveEntry.objects.filter(blob_id__in=locked).values_list('blob_id', flat=True)
+            )
+            doomed = {blob_id for blob_id in locked if blob_id not in referenced}
+            deleted_blobs += SerpBlob.objects.filter(id__in=doomed).delete()[0]
+
+            for blob_id, content_hash, codec, stored_size in blobs:
+                if blob_id not in doomed:
+                    continue
+                try:
+                    blob_path(content_hash, codec).unlink()
+                    freed += stored_size
+                except FileNotFoundError:
+                    pass
+    return deleted_blobs, freed
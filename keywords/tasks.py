@@ -3,7 +3,7 @@ Celery tasks for SERP HTML fetching and storage
 """
 
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 from pathlib import Path
 
 from celery import shared_task
@@ -12,7 +12,9 @@ from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
 
+from . import serp_archive
 from .models import Keyword
+from services.circuit_breaker import get_circuit_breaker
 from services.scrape_do import ScrapeDoService
 
 logger = logging.getLogger(__name__)
@@ -47,88 +49,38 @@ def fetch_keyword_serp_html(self, keyword_id: int) -> None:
             logger.error(f"Keyword with id={keyword_id} not found")
             return
         
-        # Check if this is a force crawl or scheduled crawl
-        is_force_crawl = keyword.crawl_priority == 'critical'
-        
-        # If force crawl, delete today's rank to allow re-ranking
-        if is_force_crawl:
-            from .models import Rank
-            deleted_count = Rank.objects.filter(
-                keyword=keyword,
-                created_at__date=timezone.now().date()
-            ).delete()[0]
-            if deleted_count > 0:
-                logger.info(f"Deleted {deleted_count} existing rank(s) for keyword {keyword.id} (force crawl)")
-        
-        # Check eligibility (unless force crawled)
-        if not is_force_crawl and keyword.scraped_at:
-            # Use the model's should_crawl method for consistency
-            if not keyword.should_crawl():
-                time_since_last = (timezone.now() - keyword.scraped_at).total_seconds() / 3600
-                logger.info(
-                    f"Keyword {keyword_id} not ready for crawl. "
-                    f"Last: {keyword.scraped_at}, Hours since: {time_since_last:.1f}"
-                )
-                # Reset processing flag since we're not actually processing
-                keyword.processing = False
-                keyword.save(update_fields=['processing'])
-                return
+        if not _prepare_keyword_for_fetch(keyword):
+            return
         
-        # Prepare Scrape.do parameters
-        scraper = ScrapeDoService()
+        # Same query already crawled today for another keyword - reuse it
+        if _reuse_serp_snapshot(keyword):
+            return
+        
+        # Scrape.do is down - try again once its circuit lets calls through
+        retry_at = _scrape_circuit_open_until()
+        if retry_at:
+            _defer_fetch(keyword, retry_at)
+            return
         
         # Perform the scrape with retries for network issues only
-        html_content = None
-        error_message = None
-        retries_left = settings.SCRAPE_DO_RETRIES
+        scraper = ScrapeDoService()
+        html_content, error_message = _fetch_serp_html(scraper, keyword)
         
-        while retries_left > 0:
-            try:
-                result = scraper.scrape_google_search(
-                    query=keyword.keyword,
-                    country_code=keyword.country_code or keyword.country,
-                    num_results=100,
-                    location=keyword.location if keyword.location else None,
-                    use_exact_location=bool(keyword.location)  # Use UULE if location is provided
-                )
-                
-                if result and result.get('status_code') == 200:
-                    html_content = result.get('html')
-                    break
-                else:
-                    # Non-200 status - don't retry
-                    status = result.get('status_code', 'Unknown') if result else 'No response'
-                    error_message = f"HTTP {status}"
-                    logger.warning(f"Non-200 response for keyword {keyword_id}: {error_message}")
-                    break
-                    
-            except TimeoutError:
-                retries_left -= 1
-                if retries_left > 0:
-                    logger.info(f"Timeout for keyword {keyword_id}, retrying... ({retries_left} left)")
-                else:
-                    error_message = "Timeout"
-                    
-            except ConnectionError:
-                retries_left -= 1
-                if retries_left > 0:
-                    logger.info(f"Network error for keyword {keyword_id}, retrying... ({retries_left} left)")
-                else:
-                    error_message = "Network error"
-                    
-            except Exception as e:
-                # Unexpected error - don't retry
-                error_message = str(e)[:100]  # Limit error message length
-                logger.error(f"Unexpected error for keyword {keyword_id}: {e}")
-                break
+        sink = _create_result_sink()
         
         # Process the result
+        deferred_until = _deferred_retry_at(error_message)
         if html_content:
             # Success - store the file
-            _handle_successful_fetch(keyword, html_content)
+            _handle_successful_fetch(keyword, html_content, sink=sink)
+        elif deferred_until:
+            _defer_fetch(keyword, deferred_until, sink=sink, reason=error_message)
         else:
             # Failure - update error counters
-            _handle_failed_fetch(keyword, error_message or "Unknown error")
+            _handle_failed_fetch(keyword, error_message or "Unknown error", sink=sink)
+        
+        if sink is not None:
+            sink.flush()
             
     except Exception as e:
         logger.error(f"Task error for keyword {keyword_id}: {e}")
@@ -169,206 +121,625 @@ def fetch_keyword_serp_html(self, keyword_id: int) -> None:
             logger.error(f"Failed to release lock for keyword {keyword_id}: {lock_error}")
 
 
-def _extract_top_competitors(html_content: str, project_domain: str, limit: int = 3) -> list:
+# Hard time limit of fetch_keyword_serp_batch (30 minutes for a full batch)
+SERP_BATCH_TIME_LIMIT = 1800
+
+
+@shared_task(
+    bind=True,
+    max_retries=0,  # Retries are handled per keyword inside _fetch_serp_html
+    time_limit=SERP_BATCH_TIME_LIMIT,
+    soft_time_limit=SERP_BATCH_TIME_LIMIT - 300,  # Soft limit of 25 minutes
+)
+def fetch_keyword_serp_batch(self, keyword_ids: list) -> dict:
+    """
+    Fetch SERP HTML for a batch of keywords concurrently.
+    
+    Loads the whole batch in one query, fetches the SERPs in parallel with a
+    bounded number of in-flight requests and runs the regular success/failure
+    handling for each keyword on this task's own database connection.
+    
+    Args:
+        keyword_ids: IDs of the keywords to fetch SERPs for
+    
+    Returns:
+        Dict with batch statistics
+    """
+    from requests.adapters import HTTPAdapter
+    from .batch_fetcher import BatchSerpFetcher
+    from .ranking_extractor import RankingExtractor
+    
+    stats = {
+        'requested': len(keyword_ids),
+        'fetched': 0,
+        'succeeded': 0,
+        'failed': 0,
+        'skipped': 0,
+        'reused': 0,
+        'deferred': 0,
+    }
+    # Locks outlive the whole batch, so no single task can start on a keyword
+    # still waiting for its turn late in the batch
+    lock_timeout = SERP_BATCH_TIME_LIMIT + 60
+    locked_ids = []
+    sink = None
+    
+    try:
+        # Acquire per-keyword locks so single and batch tasks never overlap
+        for keyword_id in keyword_ids:
+            if cache.add(f"lock:serp:{keyword_id}", "locked", timeout=lock_timeout):
+                locked_ids.append(keyword_id)
+            else:
+                logger.info(f"Task already running for keyword_id={keyword_id}, skipping")
+                stats['skipped'] += 1
+        
+        # Load the whole batch in one query
+        keywords = list(
+            Keyword.objects.select_related('project').filter(id__in=locked_ids)
+        )
+        stats['skipped'] += len(locked_ids) - len(keywords)
+        
+        # Only look snapshots up here; their R2 downloads run in the fetch stage
+        scraped_date = _snapshot_scraped_date()
+        snapshots = {}
+        ready = []
+        for keyword in keywords:
+            if not _prepare_keyword_for_fetch(keyword):
+                stats['skipped'] += 1
+                continue
+            snapshot = _find_serp_snapshot(keyword, scraped_date)
+            if snapshot is not None:
+                snapshots[keyword.id] = snapshot
+            ready.append(keyword)
+        
+        if not ready:
+            return stats
+        
+        # Scrape.do is down - defer the keywords that need it with one update
+        retry_at = _scrape_circuit_open_until()
+        if retry_at:
+            blocked_ids = [keyword.id for keyword in ready if keyword.id not in snapshots]
+            Keyword.objects.filter(id__in=blocked_ids).update(next_crawl_at=retry_at)
+            stats['deferred'] = len(blocked_ids)
+            logger.warning(f"BATCH: Scrape.do circuit open, deferred {len(blocked_ids)} keywords to {retry_at}")
+            ready = [keyword for keyword in ready if keyword.id in snapshots]
+            if not ready:
+                return stats
+        
+        scraper = ScrapeDoService()
+        concurrency = settings.SERP_BATCH_CONCURRENCY
+        # Let the shared session keep one pooled connection per in-flight request
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        scraper.session.mount('https://', adapter)
+        
+        extractor = RankingExtractor() if snapshots else None
+        snapshot_results = {}
+        
+        def fetch(keyword):
+            # Snapshot hits download their parsed results here, concurrently with
+            # the Scrape.do fetches, and fall back to a fetch if that fails
+            snapshot = snapshots.get(keyword.id)
+            if snapshot is not None:
+                parsed_results = _load_serp_snapshot(keyword, snapshot, extractor)
+                if parsed_results is not None:
+                    snapshot_results[keyword.id] = parsed_results
+                    return None, None
+            return _fetch_serp_html(scraper, keyword)
+        
+        fetcher = BatchSerpFetcher(fetch, concurrency=concurrency)
+        
+        sink = _create_result_sink()
+        
+        for keyword, html_content, error_message in fetcher.fetch(ready):
+            parsed_results = snapshot_results.pop(keyword.id, None)
+            if parsed_results is not None:
+                if _apply_serp_snapshot(keyword, snapshots[keyword.id], parsed_results, scraped_date):
+                    stats['reused'] += 1
+                    continue
+                # Rare: the snapshot could not be recorded, fetch on this thread instead
+                html_content, error_message = _fetch_serp_html(scraper, keyword)
+            
+            stats['fetched'] += 1
+            try:
+                deferred_until = _deferred_retry_at(error_message)
+                if html_content:
+                    _handle_successful_fetch(keyword, html_content, sink=sink)
+                    stats['succeeded'] += 1
+                elif deferred_until:
+                    _defer_fetch(keyword, deferred_until, sink=sink, reason=error_message)
+                    stats['deferred'] += 1
+                else:
+                    _handle_failed_fetch(keyword, error_message or "Unknown error", sink=sink)
+                    stats['failed'] += 1
+            except Exception as e:
+                logger.error(f"Batch task error for keyword {keyword.id}: {e}")
+                stats['failed'] += 1
+                try:
+                    if sink is not None:
+                        sink.discard(keyword)
+                    _handle_failed_fetch(keyword, str(e)[:100], sink=sink)
+                except Exception:
+                    pass
+            
+            if sink is not None:
+                sink.maybe_flush()
+        
+        logger.info(
+            f"BATCH: fetched {stats['fetched']}/{stats['requested']} keywords, "
+            f"succeeded={stats['succeeded']}, failed={stats['failed']}, "
+            f"reused={stats['reused']}, deferred={stats['deferred']}, skipped={stats['skipped']}"
+        )
+        return stats
+    
+    except Exception as e:
+        logger.error(f"Batch task error for keywords {keyword_ids[:5]}...: {e}", exc_info=True)
+        stats['error'] = str(e)
+        return stats
+    finally:
+        # Write results still pending in the sink before the flags are reset
+        if sink is not None:
+            try:
+                sink.flush()
+            except Exception as flush_error:
+                logger.error(f"BATCH RESULT FLUSH FAILED for keywords {locked_ids[:5]}...: {flush_error}")
+        
+        # Always reset processing flags for the whole batch in one statement
+        try:
+            if locked_ids:
+                Keyword.objects.filter(id__in=locked_ids).update(processing=False)
+        except Exception as cleanup_error:
+            logger.error(f"BATCH CLEANUP FAILED for keywords {locked_ids[:5]}...: {cleanup_error}")
+        
+        try:
+            cache.delete_many([f"lock:serp:{keyword_id}" for keyword_id in locked_ids])
+        except Exception as lock_error:
+            logger.error(f"Failed to release batch locks: {lock_error}")
+
+
+# _fetch_serp_html error when Scrape.do's circuit breaker refused the call
+CIRCUIT_OPEN_ERROR = 'Circuit open'
+
+# _fetch_serp_html error when the shared rate limiter gave the call no slot
+RATE_LIMITED_ERROR = 'Rate limited'
+
+
+def _scrape_circuit_open_until():
+    """
+    When the open Scrape.do circuit lets calls through again.
+    
+    Only reads the breaker state, so it never uses up a half-open probe.
+    
+    Returns:
+        Aware datetime, or None when Scrape.do may be called now
+    """
+    breaker = get_circuit_breaker('scrape_do')
+    open_until = breaker.open_until() if breaker is not None else None
+    if open_until is None:
+        return None
+    return datetime.fromtimestamp(open_until, tz=dt_timezone.utc)
+
+
+def _scrape_circuit_retry_at():
+    """Retry time for a keyword whose scrape the circuit refused"""
+    return _scrape_circuit_open_until() or (
+        timezone.now() + timedelta(seconds=settings.CIRCUIT_BREAKER_RECOVERY_SECONDS)
+    )
+
+
+def _deferred_retry_at(error_message: str):
     """
-    Extract top competitor domains from SERP HTML (excluding project domain)
+    Retry time for a fetch that was refused before reaching Scrape.do.
     
     Args:
-        html_content: Raw HTML from Google search
+        error_message: Error returned by _fetch_serp_html
+        
+    Returns:
+        Aware datetime, or None when the error is a real fetch failure
+    """
+    if error_message == CIRCUIT_OPEN_ERROR:
+        return _scrape_circuit_retry_at()
+    if error_message == RATE_LIMITED_ERROR:
+        return timezone.now() + timedelta(seconds=settings.SCRAPE_DO_LIMITER_MAX_WAIT)
+    return None
+
+
+def _defer_fetch(keyword: Keyword, retry_at, sink=None, reason: str = CIRCUIT_OPEN_ERROR) -> None:
+    """
+    Put a keyword back for a later crawl without counting a failure.
+    
+    Used when no request was sent - the Scrape.do circuit is open or the
+    shared rate limiter had no slot: the keyword is rescheduled at retry_at
+    instead of waiting out timeouts and retries.
+    
+    Args:
+        keyword: Keyword instance
+        retry_at: When the keyword should be crawled
+        sink: Optional RankResultSink collecting the database writes
+        reason: Why the fetch was deferred (for the log)
+    """
+    keyword.next_crawl_at = retry_at
+    keyword.processing = False
+    _save_fetched_keyword(keyword, ['next_crawl_at', 'processing'], sink)
+    logger.info(f"DEFERRED: keyword_id={keyword.id}, {reason}, retry at {retry_at}")
+
+
+def _create_result_sink():
+    """
+    Create the write-behind result sink if it is enabled.
+    
+    Returns:
+        RankResultSink or None when results are saved per keyword
+    """
+    if not settings.SERP_RESULT_SINK_ENABLED:
+        return None
+    
+    from .rank_sink import RankResultSink
+    return RankResultSink(
+        max_batch=settings.SERP_RESULT_SINK_BATCH_SIZE,
+        max_wait=settings.SERP_RESULT_SINK_FLUSH_SECONDS
+    )
+
+
+def _prepare_keyword_for_fetch(keyword: Keyword) -> bool:
+    """
+    Apply force-crawl cleanup and the crawl eligibility check before fetching.
+    
+    Args:
+        keyword: Keyword instance
+        
+    Returns:
+        True if the keyword should be fetched now, False otherwise
+    """
+    # Check if this is a force crawl or scheduled crawl. Today's rank is not
+    # deleted up front - the new rank replaces it (upsert on keyword + date)
+    is_force_crawl = keyword.crawl_priority == 'critical'
+    
+    # Check eligibility (unless force crawled)
+    if not is_force_crawl and keyword.scraped_at:
+        # Use the model's should_crawl method for consistency
+        if not keyword.should_crawl():
+            time_since_last = (timezone.now() - keyword.scraped_at).total_seconds() / 3600
+            logger.info(
+                f"Keyword {keyword.id} not ready for crawl. "
+                f"Last: {keyword.scraped_at}, Hours since: {time_since_last:.1f}"
+            )
+            # Reset processing flag since we're not actually processing
+            keyword.processing = False
+            keyword.save(update_fields=['processing'])
+            return False
+    
+    return True
+
+
+def _fetch_serp_html(scraper: ScrapeDoService, keyword: Keyword) -> tuple:
+    """
+    Fetch SERP HTML for a keyword, retrying on network issues only.
+    
+    Does not touch the database, so it is safe to call from fetch threads.
+    
+    Args:
+        scraper: ScrapeDoService instance
+        keyword: Keyword instance
+        
+    Returns:
+        Tuple of (html_content, error_message); html_content is None on failure
+    """
+    html_content = None
+    error_message = None
+    retries_left = settings.SCRAPE_DO_RETRIES
+    
+    while retries_left > 0:
+        try:
+            result = scraper.scrape_google_search(
+                query=keyword.keyword,
+                country_code=keyword.country_code or keyword.country,
+                num_results=100,
+                location=keyword.location if keyword.location else None,
+                use_exact_location=bool(keyword.location)  # Use UULE if location is provided
+            )
+            
+            if result and result.get('status_code') == 200:
+                html_content = result.get('html')
+                break
+            elif result and result.get('circuit_open'):
+                # Not a keyword failure - the caller defers the keyword
+                error_message = CIRCUIT_OPEN_ERROR
+                break
+            elif result and result.get('rate_limited'):
+                # No slot in the shared window - nothing was sent, defer too
+                error_message = RATE_LIMITED_ERROR
+                break
+            else:
+                # Non-200 status - don't retry
+                status = result.get('status_code', 'Unknown') if result else 'No response'
+                error_message = f"HTTP {status}"
+                logger.warning(f"Non-200 response for keyword {keyword.id}: {error_message}")
+                break
+                
+        except TimeoutError:
+            retries_left -= 1
+            if retries_left > 0:
+                logger.info(f"Timeout for keyword {keyword.id}, retrying... ({retries_left} left)")
+            else:
+                error_message = "Timeout"
+                
+        except ConnectionError:
+            retries_left -= 1
+            if retries_left > 0:
+                logger.info(f"Network error for keyword {keyword.id}, retrying... ({retries_left} left)")
+            else:
+                error_message = "Network error"
+                
+        except Exception as e:
+            # Unexpected error - don't retry
+            error_message = str(e)[:100]  # Limit error message length
+            logger.error(f"Unexpected error for keyword {keyword.id}: {e}")
+            break
+    
+    return html_content, error_message
+
+
+def _top_competitors_from_results(parsed_results: dict, project_domain: str, limit: int = 3) -> list:
+    """
+    Extract top competitor domains from parsed SERP results (excluding project domain)
+    
+    Args:
+        parsed_results: Parsed results from GoogleSearchParser
         project_domain: The project's own domain to exclude
         limit: Number of top competitors to extract (default 3)
         
     Returns:
         List of dictionaries with position, domain, and url
     """
-    from services.google_search_parser import GoogleSearchParser
+    organic_results = parsed_results.get('organic_results', [])
+    top_competitors = []
+    seen_domains = set()
     
-    try:
-        parser = GoogleSearchParser()
-        parsed_results = parser.parse(html_content)
-        
-        organic_results = parsed_results.get('organic_results', [])
-        top_competitors = []
-        seen_domains = set()
-        
-        # Clean project domain
-        project_domain = project_domain.lower().replace('www.', '').replace('http://', '').replace('https://', '')
-        
-        for i, result in enumerate(organic_results[:20], 1):  # Check top 20 to find competitors
-            if result.get('url'):
-                # Extract domain from URL
-                url = result['url']
-                domain_parts = url.lower().replace('http://', '').replace('https://', '').split('/')
-                result_domain = domain_parts[0].replace('www.', '') if domain_parts else ''
-                
-                # Skip if it's the project's own domain or already seen
-                if not result_domain or project_domain in result_domain or result_domain in project_domain:
-                    continue
-                    
-                if result_domain in seen_domains:
-                    continue
-                    
-                seen_domains.add(result_domain)
+    # Clean project domain
+    project_domain = project_domain.lower().replace('www.', '').replace('http://', '').replace('https://', '')
+    
+    for i, result in enumerate(organic_results[:20], 1):  # Check top 20 to find competitors
+        if result.get('url'):
+            # Extract domain from URL
+            url = result['url']
+            domain_parts = url.lower().replace('http://', '').replace('https://', '').split('/')
+            result_domain = domain_parts[0].replace('www.', '') if domain_parts else ''
+            
+            # Skip if it's the project's own domain or already seen
+            if not result_domain or project_domain in result_domain or result_domain in project_domain:
+                continue
                 
-                top_competitors.append({
-                    'position': i,
-                    'domain': result_domain,
-                    'url': url
-                })
+            if result_domain in seen_domains:
+                continue
                 
-                if len(top_competitors) >= limit:
-                    break
-        
-        return top_competitors
-    except Exception as e:
-        logger.warning(f"Failed to extract top competitors: {e}")
-        return []
+            seen_domains.add(result_domain)
+            
+            top_competitors.append({
+                'position': i,
+                'domain': result_domain,
+                'url': url
+            })
+            
+            if len(top_competitors) >= limit:
+                break
+    
+    return top_competitors
 
 
-def _extract_top_pages(html_content: str, limit: int = 3) -> list:
+def _top_pages_from_results(parsed_results: dict, limit: int = 3) -> list:
     """
-    Extract top ranking pages from SERP HTML
+    Extract top ranking pages from parsed SERP results
     
     Args:
-        html_content: Raw HTML from Google search
+        parsed_results: Parsed results from GoogleSearchParser
         limit: Number of top pages to extract (default 3)
         
     Returns:
         List of dictionaries with position and url
     """
-    from services.google_search_parser import GoogleSearchParser
+    organic_results = parsed_results.get('organic_results', [])
+    top_pages = []
     
-    try:
-        parser = GoogleSearchParser()
-        parsed_results = parser.parse(html_content)
-        
-        organic_results = parsed_results.get('organic_results', [])
-        top_pages = []
-        
-        for i, result in enumerate(organic_results[:limit], 1):
-            if result.get('url'):
-                top_pages.append({
-                    'position': i,
-                    'url': result['url']
-                })
-        
-        return top_pages
-    except Exception as e:
-        logger.warning(f"Failed to extract top pages: {e}")
-        return []
+    for i, result in enumerate(organic_results[:limit], 1):
+        if result.get('url'):
+            top_pages.append({
+                'position': i,
+                'url': result['url']
+            })
+    
+    return top_pages
+
+
+def _snapshot_scraped_date():
+    """Today's scrape date, on the same basis as the stored HTML files (see _handle_successful_fetch)"""
+    date_str = datetime.now().strftime('%Y-%m-%d')
+    return timezone.make_aware(datetime.strptime(date_str, '%Y-%m-%d'))
 
 
-def _handle_successful_fetch(keyword: Keyword, html_content: str) -> None:
+def _find_serp_snapshot(keyword: Keyword, scraped_date):
     """
-    Handle successful SERP fetch - store file, extract rankings, and update database.
+    Today's shared SERP snapshot a keyword can be served from.
+    
+    Only queries the database; loading the snapshot's parsed results from R2
+    is left to the caller (see _load_serp_snapshot).
     
     Args:
         keyword: Keyword instance
-        html_content: HTML content to store
+        scraped_date: Aware datetime of today's scrape date
+        
+    Returns:
+        SerpSnapshot, or None if the keyword must be fetched
     """
-    # Build file path
-    date_str = datetime.now().strftime('%Y-%m-%d')
-    relative_path = f"{keyword.project_id}/{keyword.id}/{date_str}.html"
-    absolute_path = Path(settings.SCRAPE_DO_STORAGE_ROOT) / relative_path
+    from .models import SerpSnapshot
     
-    # Track if this is a new file or existing
-    is_new_file = not absolute_path.exists()
+    if not settings.SERP_SNAPSHOT_REUSE or keyword.crawl_priority == 'critical':
+        return None
     
-    # Check if file for today already exists (idempotency)
-    # For force crawls, we overwrite; for regular crawls, we skip
-    is_force_crawl = keyword.crawl_priority == 'critical'
+    try:
+        snapshot = SerpSnapshot.find_for_keyword(keyword, scraped_date.date())
+    except Exception as e:
+        logger.warning(f"Snapshot lookup failed for keyword {keyword.id}, fetching instead: {e}")
+        return None
+    
+    if not snapshot or snapshot.source_keyword_id == keyword.id:
+        return None
+    return snapshot
+
+
+def _load_serp_snapshot(keyword: Keyword, snapshot, extractor=None):
+    """
+    Download a snapshot's parsed results from R2.
+    
+    Makes no database queries, so the batch task runs it on its fetch threads.
     
-    if not is_new_file and not is_force_crawl:
-        logger.info(f"File already exists for today: {relative_path} (skipping overwrite)")
-        # Don't overwrite for regular crawls, but still count as success
-        # Extract top 10 ranking pages (to ensure we have enough after filtering own domain)
-        top_pages = _extract_top_pages(html_content, limit=10)
+    Args:
+        keyword: Keyword instance to be served from the snapshot
+        snapshot: SerpSnapshot found by _find_serp_snapshot
+        extractor: Optional RankingExtractor to reuse
         
-        # Extract top 3 competitors (excluding project domain)
-        top_competitors = _extract_top_competitors(html_content, keyword.project.domain, limit=3)
+    Returns:
+        Parsed results dict, or None if the keyword must be fetched
+    """
+    from .ranking_extractor import RankingExtractor
+    
+    try:
+        parsed_results = (extractor or RankingExtractor()).load_snapshot_results(snapshot)
+    except Exception as e:
+        logger.warning(f"Snapshot {snapshot.id} download failed for keyword {keyword.id}, fetching instead: {e}")
+        return None
+    
+    if not parsed_results:
+        logger.info(f"Snapshot {snapshot.id} unavailable for keyword {keyword.id}, fetching instead")
+        return None
+    return parsed_results
+
+
+def _apply_serp_snapshot(keyword: Keyword, snapshot, parsed_results: dict, scraped_date) -> bool:
+    """
+    Record a keyword's crawl from a loaded SERP snapshot.
+    
+    Args:
+        keyword: Keyword instance
+        snapshot: SerpSnapshot the results were loaded from
+        parsed_results: Results returned by _load_serp_snapshot
+        scraped_date: Aware datetime of today's scrape date
         
-        # Update database to reflect the fetch attempt
-        keyword.success_api_hit_count += 1
+    Returns:
+        True if the keyword was served from the snapshot, False if it must be fetched
+    """
+    from .models import Rank, SerpSnapshot
+    from .ranking_extractor import RankingExtractor
+    
+    try:
+        keyword.ranking_pages = _top_pages_from_results(parsed_results, limit=10)
+        keyword.top_competitors = _top_competitors_from_results(parsed_results, keyword.project.domain, limit=3)
         keyword.last_error_message = None
-        keyword.processing = False  # Reset processing flag
-        keyword.ranking_pages = top_pages  # Update top 10 pages
-        keyword.top_competitors = top_competitors  # Update top 3 competitors
+        keyword.processing = False
         keyword.scraped_at = timezone.now()
+        # The keyword's archived SERP points at the source keyword's blob
+        if snapshot.html_file_path:
+            keyword.scrape_do_file_path = (
+                serp_archive.link_serp(keyword, scraped_date.date(), snapshot.html_file_path)
+                or keyword.scrape_do_file_path
+            )
+        keyword.save()
         
-        # Update file path if it's different
-        if not keyword.scrape_do_file_path or keyword.scrape_do_file_path != relative_path:
-            keyword.scrape_do_file_path = relative_path
-            # Ensure it's in the file list
-            if relative_path not in (keyword.scrape_do_files or []):
-                file_list = keyword.scrape_do_files or []
-                file_list.insert(0, relative_path)
-                keyword.scrape_do_files = file_list[:settings.SERP_HISTORY_DAYS]
+        if not Rank.objects.filter(keyword=keyword, scraped_date=scraped_date.date()).exists():
+            RankingExtractor().process_parsed_results(keyword, parsed_results, scraped_date, snapshot.results_file)
         
-        # Save keyword updates before ranking process
-        keyword.save()
+        SerpSnapshot.objects.filter(id=snapshot.id).update(reuse_count=models.F('reuse_count') + 1)
         
-        # Process for ranking (which might update rank and track manual targets)
-        _process_ranking_if_needed(keyword, html_content, date_str)
-        return
-    elif not is_new_file and is_force_crawl:
-        logger.info(f"File exists but force crawl requested: {relative_path} (will overwrite)")
-    
-    # Ensure directory exists
-    absolute_path.parent.mkdir(parents=True, exist_ok=True)
+        logger.info(
+            f"SNAPSHOT: keyword_id={keyword.id} served from snapshot {snapshot.id} "
+            f"(source keyword {snapshot.source_keyword_id})"
+        )
+        return True
     
-    # Write file atomically
-    temp_path = absolute_path.with_suffix('.tmp')
-    try:
-        temp_path.write_text(html_content, encoding='utf-8')
-        temp_path.replace(absolute_path)
     except Exception as e:
-        # Clean up partial write
-        if temp_path.exists():
-            temp_path.unlink()
-        raise e
-    
-    # Update file list (insert at index 0)
-    file_list = keyword.scrape_do_files or []
-    file_list.insert(0, relative_path)
-    
-    # Trim to keep only last 7 files
-    files_to_delete = []
-    if len(file_list) > settings.SERP_HISTORY_DAYS:
-        files_to_delete = file_list[settings.SERP_HISTORY_DAYS:]
-        file_list = file_list[:settings.SERP_HISTORY_DAYS]
-    
-    # Delete old files from disk
-    storage_root = Path(settings.SCRAPE_DO_STORAGE_ROOT)
-    for old_file in files_to_delete:
-        old_path = storage_root / old_file
-        try:
-            if old_path.exists():
-                old_path.unlink()
-                logger.info(f"Deleted old file: {old_file}")
-        except Exception as e:
-            logger.warning(f"Failed to delete old file {old_file}: {e}")
+        logger.warning(f"Snapshot reuse failed for keyword {keyword.id}, fetching instead: {e}")
+        return False
+
+
+def _reuse_serp_snapshot(keyword: Keyword) -> bool:
+    """
+    Serve a keyword from today's shared SERP snapshot instead of fetching it.
     
-    # Extract top 10 ranking pages before updating database (to ensure we have enough after filtering own domain)
-    top_pages = _extract_top_pages(html_content, limit=10)
+    Another keyword with the same query, country and location may already have
+    been crawled today. In that case only the per-project rank extraction runs
+    on the stored parsed results - no Scrape.do call, parse or R2 upload, and
+    the keyword's archived SERP shares the source keyword's blob.
+    Force crawls always fetch a fresh SERP.
     
-    # Extract top 3 competitors (excluding project domain)
-    top_competitors = _extract_top_competitors(html_content, keyword.project.domain, limit=3)
+    Args:
+        keyword: Keyword instance
+        
+    Returns:
+        True if the keyword was served from a snapshot, False if it must be fetched
+    """
+    scraped_date = _snapshot_scraped_date()
+    snapshot = _find_serp_snapshot(keyword, scraped_date)
+    if snapshot is None:
+        return False
+    
+    parsed_results = _load_serp_snapshot(keyword, snapshot)
+    if parsed_results is None:
+        return False
+    return _apply_serp_snapshot(keyword, snapshot, parsed_results, scraped_date)
+
+
+def _handle_successful_fetch(keyword: Keyword, html_content: str, sink=None) -> None:
+    """
+    Handle successful SERP fetch - archive the HTML, extract rankings, and update database.
+    
+    Args:
+        keyword: Keyword instance
+        html_content: HTML content to store
+        sink: Optional RankResultSink collecting the database writes
+    """
+    from .ranking_extractor import ParsedSerp
+    
+    # With the parse queue enabled this worker only stores the HTML and the
+    # serp_parse workers do the CPU-bound work
+    parse_inline = not settings.SERP_PARSE_QUEUE_ENABLED
     
-    # Update database
+    # Parse once - shared by top pages, competitors and ranking extraction
+    parsed_serp = ParsedSerp(html_content) if parse_inline else None
+    
+    # Archive the SERP (compressed, stored once per distinct HTML)
+    date_str = datetime.now().strftime('%Y-%m-%d')
+    
+    # For force crawls, we overwrite today's SERP; for regular crawls, we keep it (idempotency)
+    is_force_crawl = keyword.crawl_priority == 'critical'
+    relative_path, stored = serp_archive.store_serp(
+        keyword, html_content, datetime.strptime(date_str, '%Y-%m-%d').date(), overwrite=is_force_crawl
+    )
+    if not stored:
+        logger.info(f"SERP already archived for today: {relative_path} (skipping overwrite)")
+    elif is_force_crawl:
+        logger.info(f"SERP archived for force crawl: {relative_path}")
+    
+    # Update database - retention is date based (prune_serp_archive), nothing to rotate here
     keyword.scrape_do_file_path = relative_path
-    keyword.scrape_do_files = file_list
     keyword.success_api_hit_count += 1
     keyword.last_error_message = None
     keyword.processing = False  # Reset processing flag
-    keyword.ranking_pages = top_pages  # Store top 10 pages
-    keyword.top_competitors = top_competitors  # Store top 3 competitors
     keyword.scraped_at = timezone.now()
+    updated_fields = [
+        'scrape_do_file_path', 'success_api_hit_count',
+        'last_error_message', 'processing', 'scraped_at',
+    ]
+    if parse_inline:
+        _apply_serp_summary(keyword, parsed_serp)
+        updated_fields += ['ranking_pages', 'top_competitors']
     
     # Save keyword updates before ranking process
-    keyword.save()
+    _save_fetched_keyword(keyword, updated_fields, sink)
     
-    # Process ranking extraction for new file (this will update rank and track manual targets)
-    _process_ranking_if_needed(keyword, html_content, date_str)
+    # Process ranking extraction (this will update rank and track manual targets)
+    if parse_inline:
+        _process_ranking_if_needed(keyword, html_content, date_str, parsed_serp, sink=sink)
+    else:
+        _enqueue_serp_parse(relative_path)
     
     logger.info(
         f"SUCCESS: keyword_id={keyword.id}, status=200, "
@@ -376,19 +747,174 @@ def _handle_successful_fetch(keyword: Keyword, html_content: str) -> None:
     )
 
 
-def _handle_failed_fetch(keyword: Keyword, error_message: str) -> None:
+def _save_fetched_keyword(keyword: Keyword, fields: list, sink=None) -> None:
+    """
+    Persist a keyword's fetch bookkeeping, or stage it in the result sink.
+    
+    Args:
+        keyword: Keyword instance with updated fields
+        fields: Fields changed by the fetch (only used with a sink)
+        sink: Optional RankResultSink
+    """
+    if sink is not None:
+        sink.update_keyword(keyword, fields)
+    else:
+        keyword.save()
+
+
+def _apply_serp_summary(keyword: Keyword, parsed_serp) -> None:
+    """
+    Set the keyword's top ranking pages and competitors from a parsed SERP.
+    
+    Args:
+        keyword: Keyword instance (not saved)
+        parsed_serp: ParsedSerp for the keyword's latest SERP
+    """
+    results = parsed_serp.results or {}
+    # Top 10 pages (to ensure we have enough after filtering own domain)
+    keyword.ranking_pages = _top_pages_from_results(results, limit=10)
+    # Top 3 competitors (excluding project domain)
+    keyword.top_competitors = _top_competitors_from_results(results, keyword.project.domain, limit=3)
+
+
+def _enqueue_serp_parse(relative_path: str) -> None:
+    """
+    Hand a stored SERP over to the parse stage.
+    
+    The message only carries the SERP key; keyword and crawl date are
+    encoded in it ({project_id}/{keyword_id}/{YYYY-MM-DD}.html).
+    
+    Args:
+        relative_path: SERP key of the archived HTML
+    """
+    parse_keyword_serp.apply_async(args=[relative_path], queue='serp_parse')
+    logger.info(f"PARSE QUEUED: file={relative_path}")
+
+
+# Broker queues feeding each SERP pipeline stage
+SERP_PIPELINE_STAGES = {
+    'fetch': ('serp_high', 'serp_default'),
+    'parse': ('serp_parse',),
+}
+
+
+def get_serp_pipeline_queue_depths() -> dict:
+    """
+    Count messages waiting in each SERP pipeline stage's broker queues.
+    
+    Returns:
+        Dict of stage name to {'queues': {queue: depth}, 'total': depth};
+        a queue that cannot be inspected reports None
+    """
+    from kombu.exceptions import ChannelError
+    from limeclicks.celery import app
+    
+    depths = {}
+    with app.connection_for_read() as connection:
+        channel = connection.default_channel
+        for stage, queue_names in SERP_PIPELINE_STAGES.items():
+            queues = {}
+            for queue_name in queue_names:
+                try:
+                    queues[queue_name] = channel.queue_declare(queue=queue_name, passive=True).message_count
+                except ChannelError:
+                    # Never declared on the broker - nothing has been published to it yet
+                    queues[queue_name] = 0
+                except Exception as e:
+                    logger.warning(f"Could not read depth of queue {queue_name}: {e}")
+                    queues[queue_name] = None
+            depths[stage] = {
+                'queues': queues,
+                'total': sum(depth for depth in queues.values() if depth),
+            }
+    return depths
+
+
+def _parse_serp_file_path(relative_path: str) -> tuple:
+    """
+    Split a stored SERP path into keyword ID and date string.
+    
+    Args:
+        relative_path: Path in {project_id}/{keyword_id}/{YYYY-MM-DD}.html form
+    
+    Returns:
+        Tuple of (keyword_id, date_str)
+    """
+    path = Path(relative_path)
+    date_str = path.stem
+    datetime.strptime(date_str, '%Y-%m-%d')  # Validate
+    return int(path.parent.name), date_str
+
+
+@shared_task(
+    bind=True,
+    max_retries=0,
+    time_limit=120,  # Parsing is CPU-bound and never waits on the network
+    soft_time_limit=90,
+)
+def parse_keyword_serp(self, html_file_path: str) -> bool:
+    """
+    Parse stage of the SERP pipeline: parse a stored SERP, update the keyword's
+    top pages/competitors and extract today's rank.
+    
+    Consumed from the serp_parse queue by a prefork worker sized to the CPU
+    cores, so slow parses never hold a fetch worker's network slot.
+    
+    Args:
+        html_file_path: SERP key (see keywords.serp_archive)
+    
+    Returns:
+        True if the SERP was parsed
+    """
+    from .ranking_extractor import ParsedSerp
+    
+    try:
+        keyword_id, date_str = _parse_serp_file_path(html_file_path)
+    except (ValueError, TypeError) as e:
+        logger.error(f"[PARSE] Invalid SERP file path {html_file_path}: {e}")
+        return False
+    
+    try:
+        keyword = Keyword.objects.select_related('project').get(id=keyword_id)
+    except Keyword.DoesNotExist:
+        logger.info(f"[PARSE] Keyword {keyword_id} no longer exists, skipping {html_file_path}")
+        return False
+    
+    html_content = serp_archive.read_serp(keyword, date_str)
+    if html_content is None:
+        logger.warning(f"[PARSE] SERP {html_file_path} not found, skipping keyword {keyword_id}")
+        return False
+    
+    try:
+        parsed_serp = ParsedSerp(html_content)
+        
+        _apply_serp_summary(keyword, parsed_serp)
+        Keyword.objects.filter(id=keyword.id).update(
+            ranking_pages=keyword.ranking_pages,
+            top_competitors=keyword.top_competitors
+        )
+        
+        _process_ranking_if_needed(keyword, html_content, date_str, parsed_serp)
+        return True
+    except Exception as e:
+        logger.error(f"[PARSE] Failed to parse {html_file_path} for keyword {keyword_id}: {e}")
+        return False
+
+
+def _handle_failed_fetch(keyword: Keyword, error_message: str, sink=None) -> None:
     """
     Handle failed SERP fetch - update error counters.
     
     Args:
         keyword: Keyword instance
         error_message: Minimal error message to store
+        sink: Optional RankResultSink collecting the database writes
     """
     # Update only error fields, leave file paths unchanged
     keyword.failed_api_hit_count += 1
     keyword.last_error_message = error_message[:255]  # Ensure it fits in field
     keyword.processing = False  # Reset processing flag on failure
-    keyword.save()
+    _save_fetched_keyword(keyword, ['failed_api_hit_count', 'last_error_message', 'processing'], sink)
     
     logger.warning(
         f"FAILURE: keyword_id={keyword.id}, "
@@ -396,7 +922,7 @@ def _handle_failed_fetch(keyword: Keyword, error_message: str) -> None:
     )
 
 
-def _process_ranking_if_needed(keyword: Keyword, html_content: str, date_str: str) -> None:
+def _process_ranking_if_needed(keyword: Keyword, html_content: str, date_str: str, parsed_serp=None, sink=None) -> None:
     """
     Process ranking extraction if not already done for today.
     
@@ -404,6 +930,8 @@ def _process_ranking_if_needed(keyword: Keyword, html_content: str, date_str: st
         keyword: Keyword instance
         html_content: HTML content to parse
         date_str: Date string (YYYY-MM-DD format)
+        parsed_serp: Optional ParsedSerp for this fetch so the HTML is not parsed again
+        sink: Optional RankResultSink collecting the database writes
     """
     from .models import Rank
     from .ranking_extractor import RankingExtractor
@@ -412,14 +940,14 @@ def _process_ranking_if_needed(keyword: Keyword, html_content: str, date_str: st
     scraped_date = datetime.strptime(date_str, '%Y-%m-%d')
     scraped_date = timezone.make_aware(scraped_date)
     
-    # For force crawls, we've already deleted today's rank, so process anyway
+    # Force crawls replace today's rank, so process anyway
     is_force_crawl = keyword.crawl_priority == 'critical'
     
     if not is_force_crawl:
         # Check if we already have a rank for this date
         existing_rank = Rank.objects.filter(
             keyword=keyword,
-            created_at__date=scraped_date.date()
+            scraped_date=scraped_date.date()
         ).exists()
         
         if existing_rank:
@@ -428,8 +956,8 @@ def _process_ranking_if_needed(keyword: Keyword, html_content: str, date_str: st
     
     # Process ranking
     try:
-        extractor = RankingExtractor()
-        result = extractor.process_serp_html(keyword, html_content, scraped_date)
+        extractor = sink.extractor if sink is not None else RankingExtractor()
+        result = extractor.process_serp_html(keyword, html_content, scraped_date, parsed_serp=parsed_serp)
         
         if result and result.get('success'):
             logger.info(
@@ -442,17 +970,63 @@ def _process_ranking_if_needed(keyword: Keyword, html_content: str, date_str: st
         logger.error(f"Error processing ranking for keyword {keyword.id}: {e}")
 
 
+def _resolve_fetch_mode(fetch_mode: str = None) -> str:
+    """
+    Resolve the SERP fetch mode for enqueue tasks.
+    
+    Args:
+        fetch_mode: 'single' (one task per keyword) or 'batch' (one task per
+            SERP_BATCH_SIZE keywords); defaults to settings.SERP_FETCH_MODE
+    
+    Returns:
+        Normalized fetch mode
+    """
+    mode = (fetch_mode or settings.SERP_FETCH_MODE or 'single').lower()
+    if mode not in ('single', 'batch'):
+        logger.warning(f"Unknown SERP fetch mode '{mode}', falling back to 'single'")
+        mode = 'single'
+    return mode
+
+
+def _enqueue_keyword_batches(keyword_ids: list, queue_name: str = None, priority: int = 5) -> list:
+    """
+    Enqueue fetch_keyword_serp_batch tasks for keyword IDs in SERP_BATCH_SIZE chunks.
+    
+    Args:
+        keyword_ids: Keyword IDs to fetch
+        queue_name: Optional queue to route the batches to
+        priority: Task priority
+    
+    Returns:
+        List of AsyncResult objects, one per batch
+    """
+    batch_size = max(1, settings.SERP_BATCH_SIZE)
+    options = {'priority': priority}
+    if queue_name:
+        options['queue'] = queue_name
+    
+    results = []
+    for start in range(0, len(keyword_ids), batch_size):
+        chunk = keyword_ids[start:start + batch_size]
+        results.append(fetch_keyword_serp_batch.apply_async(args=[chunk], **options))
+    return results
+
+
 @shared_task
-def enqueue_keyword_scrapes_batch():
+def enqueue_keyword_scrapes_batch(fetch_mode: str = None):
     """
     Enhanced Celery Beat task with auto-recovery mechanisms.
     Runs every 5 minutes and enqueues up to 500 keywords that haven't been scraped in 24+ hours.
     Includes self-healing features to prevent stuck keywords.
+    
+    Args:
+        fetch_mode: 'single' or 'batch'; defaults to settings.SERP_FETCH_MODE
     """
     from django.db import connection
     from project.models import Project
     
     try:
+        fetch_mode = _resolve_fetch_mode(fetch_mode)
         now = timezone.now()
         min_interval = timedelta(hours=settings.FETCH_MIN_INTERVAL_HOURS)
         cutoff_time = now - min_interval
@@ -504,10 +1078,13 @@ def enqueue_keyword_scrapes_batch():
             if active_tasks:
                 for worker, tasks in active_tasks.items():
                     for task in tasks:
+                        args = task.get('args', [])
                         if 'fetch_keyword_serp_html' in task.get('name', ''):
-                            args = task.get('args', [])
                             if args and isinstance(args[0], int):
                                 active_keyword_ids.add(args[0])
+                        elif 'fetch_keyword_serp_batch' in task.get('name', ''):
+                            if args and isinstance(args[0], list):
+                                active_keyword_ids.update(args[0])
             
             # Reset keywords that claim to be processing but aren't in active tasks
             orphaned_keywords = processing_keywords.exclude(id__in=active_keyword_ids)
@@ -516,6 +1093,15 @@ def enqueue_keyword_scrapes_batch():
             if orphaned_reset_count > 0:
                 logger.info(f"[AUTO-RECOVERY] Reset {orphaned_reset_count} orphaned processing flags")
         
+        # Scrape.do is down - queue nothing until its circuit lets calls through
+        retry_at = _scrape_circuit_open_until()
+        if retry_at:
+            logger.warning(f"Scrape.do circuit open until {retry_at}, not enqueueing keywords")
+            return {
+                'total': 0, 'high_priority': 0, 'default_priority': 0,
+                'circuit_open': True, 'retry_at': retry_at.isoformat()
+            }
+        
         # Find eligible keywords that aren't already processing
         # Wrap in transaction for select_for_update
         from django.db import transaction
@@ -541,6 +1127,8 @@ def enqueue_keyword_scrapes_batch():
         
         enqueued_high = 0
         enqueued_default = 0
+        high_ids = []
+        default_ids = []
         
         for keyword_id, scraped_at in eligible_keywords:
             # Only use serp_high for keywords that have never been scraped
@@ -548,20 +1136,28 @@ def enqueue_keyword_scrapes_batch():
                 queue_name = 'serp_high'
                 priority = 10
                 enqueued_high += 1
+                high_ids.append(keyword_id)
             else:
                 queue_name = 'serp_default'
                 priority = 5
                 enqueued_default += 1
+                default_ids.append(keyword_id)
             
-            # Enqueue the task
-            fetch_keyword_serp_html.apply_async(
-                args=[keyword_id],
-                queue=queue_name,
-                priority=priority
-            )
+            if fetch_mode == 'single':
+                # Enqueue the task
+                fetch_keyword_serp_html.apply_async(
+                    args=[keyword_id],
+                    queue=queue_name,
+                    priority=priority
+                )
+        
+        if fetch_mode == 'batch':
+            # One task per SERP_BATCH_SIZE keywords, fetched concurrently
+            _enqueue_keyword_batches(high_ids, queue_name='serp_high', priority=10)
+            _enqueue_keyword_batches(default_ids, queue_name='serp_default', priority=5)
     
         logger.info(
-            f"Enqueued batch of {len(eligible_keywords)} keywords. "
+            f"Enqueued batch of {len(eligible_keywords)} keywords ({fetch_mode} mode). "
             f"High priority (never scraped): {enqueued_high}, "
             f"Default priority: {enqueued_default}"
         )
@@ -570,7 +1166,8 @@ def enqueue_keyword_scrapes_batch():
             'total': len(eligible_keywords),
             'high_priority': enqueued_high,
             'default_priority': enqueued_default,
-            'batch_size': BATCH_SIZE
+            'batch_size': BATCH_SIZE,
+            'fetch_mode': fetch_mode
         }
     except Exception as e:
         logger.error(f"Error in enqueue_keyword_scrapes_batch: {e}", exc_info=True)
@@ -585,7 +1182,7 @@ def enqueue_keyword_scrapes_batch():
 # ===================================================================
 
 @shared_task
-def daily_queue_all_keywords():
+def daily_queue_all_keywords(fetch_mode: str = None):
     """
     DAILY BULK SCHEDULER - Queue ALL keywords at start of day (12:01 AM)
     
@@ -594,6 +1191,9 @@ def daily_queue_all_keywords():
     2. Spreads execution evenly across 24 hours
     3. Logs everything for verification
     4. Returns detailed statistics
+    
+    Args:
+        fetch_mode: 'single' or 'batch'; defaults to settings.SERP_FETCH_MODE
     """
     import random
     from django.db import transaction
@@ -624,6 +1224,15 @@ def daily_queue_all_keywords():
             logger.warning("[DAILY QUEUE] No active keywords found!")
             return stats
         
+        fetch_mode = _resolve_fetch_mode(fetch_mode)
+        stats['fetch_mode'] = fetch_mode
+        
+        if fetch_mode == 'batch':
+            _daily_queue_keyword_batches(keywords, stats)
+            logger.info(f"[DAILY QUEUE] COMPLETED: {stats['queued_count']}/{stats['total_keywords']} keywords queued in batches")
+            _schedule_gap_detection_tasks()
+            return stats
+        
         # Create queue tracking entries and queue ALL tasks immediately
         for keyword in keywords.iterator():
             try:
@@ -665,6 +1274,50 @@ def daily_queue_all_keywords():
         return stats
 
 
+def _daily_queue_keyword_batches(keywords, stats: dict) -> None:
+    """
+    Queue the daily keyword set as fetch_keyword_serp_batch tasks.
+    
+    Tracking fields are written with one UPDATE per batch instead of one
+    save() per keyword.
+    
+    Args:
+        keywords: Keyword queryset to queue
+        stats: daily_queue_all_keywords statistics dict, updated in place
+    """
+    from django.db import transaction
+    
+    batch_size = max(1, settings.SERP_BATCH_SIZE)
+    keyword_ids = list(keywords.values_list('id', flat=True))
+    
+    for start in range(0, len(keyword_ids), batch_size):
+        chunk = keyword_ids[start:start + batch_size]
+        try:
+            # Queue the batch immediately with standard priority - NO DELAYS
+            result = fetch_keyword_serp_batch.apply_async(
+                args=[chunk],
+                priority=5,  # Standard daily priority
+                countdown=0  # IMMEDIATE - no delays
+            )
+            
+            # Track this queue operation for every keyword in the batch
+            now = timezone.now()
+            with transaction.atomic():
+                Keyword.objects.filter(id__in=chunk).update(
+                    last_queue_date=now.date(),
+                    daily_queue_task_id=str(result.id),
+                    expected_crawl_time=now  # Expected immediately
+                )
+            
+            stats['queued_count'] += len(chunk)
+            logger.info(f"[DAILY QUEUE] Queued {stats['queued_count']}/{stats['total_keywords']} keywords...")
+            
+        except Exception as e:
+            stats['error_count'] += len(chunk)
+            stats['errors'].append(f"Batch starting at keyword {chunk[0]}: {str(e)}")
+            logger.error(f"[DAILY QUEUE] Failed to queue batch starting at keyword {chunk[0]}: {e}")
+
+
 @shared_task  
 def queue_new_keyword_immediately(keyword_id):
     """
@@ -922,6 +1575,193 @@ def _schedule_gap_detection_tasks():
     # We don't need to schedule extra tasks since Celery beat handles the schedule
 
 
+@shared_task(
+    bind=True,
+    max_retries=0,
+    time_limit=120,
+    soft_time_limit=90,
+)
+def enrich_rank_serp_features(self, rank_id: int, html_file_path: str) -> bool:
+    """
+    Full-parse a SERP that was ranked with the rank-only profile and store the
+    SERP features. Runs on the low-priority queue so feature extraction never
+    delays daily rank checks.
+    
+    Args:
+        rank_id: ID of the Rank to enrich
+        html_file_path: SERP key (see keywords.serp_archive)
+    
+    Returns:
+        True if the rank was enriched
+    """
+    from .models import Rank
+    from .ranking_extractor import RankingExtractor
+    
+    try:
+        rank = Rank.objects.select_related('keyword__project').get(id=rank_id)
+    except Rank.DoesNotExist:
+        logger.info(f"[ENRICH] Rank {rank_id} no longer exists, skipping")
+        return False
+    
+    try:
+        keyword_id, scraped_date = serp_archive.parse_serp_key(html_file_path)
+    except (ValueError, TypeError) as e:
+        logger.error(f"[ENRICH] Invalid SERP key {html_file_path}: {e}")
+        return False
+    
+    html_content = serp_archive.read_serp_bytes(keyword_id, scraped_date)
+    if html_content is None:
+        logger.info(f"[ENRICH] SERP {html_file_path} pruned, skipping rank {rank_id}")
+        return False
+    
+    try:
+        extractor = RankingExtractor()
+        return extractor.enrich_rank(rank, html_content)
+    except Exception as e:
+        logger.error(f"[ENRICH] Failed to enrich rank {rank_id}: {e}")
+        return False
+
+
+@shared_task
+def prune_serp_archive():
+    """
+    Drop every archived SERP day older than SERP_HISTORY_DAYS (entries, blobs
+    and the day's segment files).
+    """
+    try:
+        return serp_archive.prune()
+    except Exception as e:
+        logger.error(f"[SERP ARCHIVE] Prune failed: {e}")
+        return {'entries': 0, 'blobs': 0, 'segments': 0, 'error': str(e)}
+
+
+@shared_task
+def cleanup_old_serp_snapshots():
+    """
+    Delete shared SERP snapshot rows older than the SERP history window.
+    The R2 result files stay with the keyword's rank history.
+    """
+    from .models import SerpSnapshot
+    
+    try:
+        cutoff = timezone.now().date() - timedelta(days=settings.SERP_HISTORY_DAYS)
+        deleted_count = SerpSnapshot.objects.filter(scraped_date__lt=cutoff).delete()[0]
+        logger.info(f"[SNAPSHOT CLEANUP] Deleted {deleted_count} SERP snapshots older than {cutoff}")
+        return {'deleted': deleted_count}
+    except Exception as e:
+        logger.error(f"[SNAPSHOT CLEANUP] Failed: {e}")
+        return {'deleted': 0, 'error': str(e)}
+
+
+@shared_task
+def maintain_rank_partitions():
+    """
+    Keep the monthly Rank partitions ahead of time and retire expired ones.
+    
+    Creates the partitions for the current and next RANK_PARTITION_MONTHS_AHEAD
+    months. When RANK_PARTITION_RETENTION_MONTHS is set, partitions older than
+    the window are retired: with RANK_PARTITION_ARCHIVE they are exported to
+    Parquet in R2, detached and dropped, otherwise only detached (the tables
+    stay in the database).
+    No-op unless the Rank table is partitioned (PostgreSQL).
+    """
+    from services.r2_storage import get_r2_service
+    from . import partitions
+    
+    stats = {'created': [], 'detached': [], 'archived': [], 'errors': []}
+    
+    try:
+        stats['created'] = partitions.ensure_partitions(settings.RANK_PARTITION_MONTHS_AHEAD)
+    except Exception as e:
+        logger.error(f"[RANK PARTITIONS] Failed to create partitions: {e}")
+        stats['errors'].append(str(e))
+    
+    if settings.RANK_PARTITION_RETENTION_MONTHS <= 0:
+        return stats
+    
+    for name in partitions.expired_partitions(settings.RANK_PARTITION_RETENTION_MONTHS):
+        try:
+            if settings.RANK_PARTITION_ARCHIVE:
+                # Archive while still attached so a failed upload leaves the data in place
+                key = partitions.archive_partition(name, get_r2_service())
+                if not key:
+                    stats['errors'].append(f"{name}: archive failed")
+                    continue
+                stats['archived'].append(key)
+            
+            partitions.detach_partition(name)
+            stats['detached'].append(name)
+            
+            if settings.RANK_PARTITION_ARCHIVE:
+                partitions.drop_partition_table(name)
+        except Exception as e:
+            logger.error(f"[RANK PARTITIONS] Failed to retire partition {name}: {e}")
+            stats['errors'].append(f"{name}: {e}")
+    
+    logger.info(
+        f"[RANK PARTITIONS] Created {len(stats['created'])}, detached {len(stats['detached'])}, "
+        f"archived {len(stats['archived'])} partitions"
+    )
+    return stats
+
+
+@shared_task
+def reconcile_project_daily_stats(chunk_size: int = 500):
+    """
+    Rebuild today's ProjectDailyStats of every project from its keywords,
+    and the CompetitorStats of the projects' targets from their ranks.
+    
+    The rows are maintained incrementally as ranks are written; this nightly
+    pass corrects drift from bulk updates that bypass Keyword.save() and
+    closes the day with exact numbers.
+    """
+    from competitors.models import CompetitorStats, Target
+    from project.models import Project
+    from .models import ProjectDailyStats
+    
+    project_ids = list(Project.objects.order_by('id').values_list('id', flat=True))
+    rebuilt = 0
+    
+    for start in range(0, len(project_ids), chunk_size):
+        chunk = project_ids[start:start + chunk_size]
+        try:
+            rebuilt += len(ProjectDailyStats.rebuild(chunk))
+            CompetitorStats.rebuild(Target.objects.filter(project_id__in=chunk).values_list('id', flat=True))
+        except Exception as e:
+            logger.error(f"[PROJECT STATS] Failed to rebuild stats for projects {chunk[0]}-{chunk[-1]}: {e}")
+    
+    logger.info(f"[PROJECT STATS] Reconciled daily stats for {rebuilt}/{len(project_ids)} projects")
+    return {'projects': len(project_ids), 'rebuilt': rebuilt}
+
+
+@shared_task
+def prune_serp_domain_index(batch_size: int = 10000):
+    """
+    Delete SERP domain index rows older than SERP_DOMAIN_INDEX_RETENTION_DAYS.
+    
+    Deletes in id batches so no single statement holds locks on the table
+    for long; a retention of 0 keeps everything.
+    """
+    from competitors.models import SerpDomainRank
+    
+    retention_days = getattr(settings, 'SERP_DOMAIN_INDEX_RETENTION_DAYS', 90)
+    if retention_days <= 0:
+        return {'deleted': 0}
+    
+    cutoff = timezone.localdate() - timedelta(days=retention_days)
+    expired = SerpDomainRank.objects.filter(scraped_date__lt=cutoff)
+    deleted = 0
+    
+    while True:
+        ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += SerpDomainRank.objects.filter(id__in=ids).delete()[0]
+    
+    logger.info(f"[SERP INDEX] Pruned {deleted} domain ranks before {cutoff}")
+    return {'deleted': deleted, 'cutoff': cutoff.isoformat()}
+
+
 @shared_task
 def cleanup_stuck_keywords():
     """
@@ -993,10 +1833,13 @@ def cleanup_stuck_keywords():
         if active_tasks:
             for worker, tasks in active_tasks.items():
                 for task in tasks:
+                    args = task.get('args', [])
                     if 'fetch_keyword_serp_html' in task.get('name', ''):
-                        args = task.get('args', [])
                         if args and isinstance(args[0], int):
                             active_keyword_ids.add(args[0])
+                    elif 'fetch_keyword_serp_batch' in task.get('name', ''):
+                        if args and isinstance(args[0], list):
+                            active_keyword_ids.update(args[0])
         
         # 3. Find keywords claiming to be processing but not in active tasks
         # BUT only reset those stuck for more than 30 minutes (allow time for queuing)
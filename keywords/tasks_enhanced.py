@@ -5,7 +5,6 @@ This file contains the permanent fix for keyword crawling issues
 
 import logging
 from datetime import datetime, timedelta
-from pathlib import Path
 
 from celery import shared_task
 from celery.exceptions import SoftTimeLimitExceeded
@@ -14,6 +13,7 @@ from django.core.cache import cache
 from django.db import models, transaction
 from django.utils import timezone
 
+from . import serp_archive
 from .models import Keyword
 from services.scrape_do import ScrapeDoService
 
@@ -73,7 +73,7 @@ def fetch_keyword_serp_html_enhanced(self, keyword_id: int) -> None:
             from .models import Rank
             deleted_count = Rank.objects.filter(
                 keyword=keyword,
-                created_at__date=timezone.now().date()
+                scraped_date=timezone.localdate()
             ).delete()[0]
             if deleted_count > 0:
                 logger.info(f"Deleted {deleted_count} existing rank(s) for keyword {keyword.id} (force crawl)")
@@ -182,51 +182,17 @@ def fetch_keyword_serp_html_enhanced(self, keyword_id: int) -> None:
 
 
 def _handle_successful_fetch(keyword: Keyword, html_content: str) -> None:
-    """Handle successful SERP fetch - store file and update database."""
-    # Build file path
+    """Handle successful SERP fetch - archive the HTML and update database."""
+    # Archive the SERP (compressed, stored once per distinct HTML)
     date_str = datetime.now().strftime('%Y-%m-%d')
-    relative_path = f"{keyword.project_id}/{keyword.id}/{date_str}.html"
-    absolute_path = Path(settings.SCRAPE_DO_STORAGE_ROOT) / relative_path
     
-    # Check if file already exists
+    # Force crawls replace today's SERP, regular crawls keep it
     is_force_crawl = keyword.crawl_priority == 'critical'
-    
-    if absolute_path.exists() and not is_force_crawl:
-        logger.info(f"File already exists for today: {relative_path} (skipping overwrite)")
-    else:
-        # Ensure directory exists
-        absolute_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        # Write file atomically
-        temp_path = absolute_path.with_suffix('.tmp')
-        try:
-            temp_path.write_text(html_content, encoding='utf-8')
-            temp_path.replace(absolute_path)
-        except Exception as e:
-            if temp_path.exists():
-                temp_path.unlink()
-            raise e
-    
-    # Update file list
-    file_list = keyword.scrape_do_files or []
-    if relative_path not in file_list:
-        file_list.insert(0, relative_path)
-    
-    # Trim to keep only last 7 files
-    if len(file_list) > settings.SERP_HISTORY_DAYS:
-        files_to_delete = file_list[settings.SERP_HISTORY_DAYS:]
-        file_list = file_list[:settings.SERP_HISTORY_DAYS]
-        
-        # Delete old files
-        storage_root = Path(settings.SCRAPE_DO_STORAGE_ROOT)
-        for old_file in files_to_delete:
-            old_path = storage_root / old_file
-            try:
-                if old_path.exists():
-                    old_path.unlink()
-                    logger.info(f"Deleted old file: {old_file}")
-            except Exception as e:
-                logger.warning(f"Failed to delete old file {old_file}: {e}")
+    relative_path, stored = serp_archive.store_serp(
+        keyword, html_content, datetime.strptime(date_str, '%Y-%m-%d').date(), overwrite=is_force_crawl
+    )
+    if not stored:
+        logger.info(f"SERP already archived for today: {relative_path} (skipping overwrite)")
     
     # Extract ranking data
     from services.google_search_parser import GoogleSearchParser
@@ -276,9 +242,8 @@ def _handle_successful_fetch(keyword: Keyword, html_content: str) -> None:
     except Exception as e:
         logger.warning(f"Failed to extract ranking data: {e}")
     
-    # Update database
+    # Update database - retention is date based (prune_serp_archive), nothing to rotate here
     keyword.scrape_do_file_path = relative_path
-    keyword.scrape_do_files = file_list
     keyword.success_api_hit_count += 1
     keyword.last_error_message = None
     keyword.scraped_at = timezone.now()
@@ -317,7 +282,7 @@ def _process_ranking_if_needed(keyword: Keyword, html_content: str, date_str: st
     if not is_force_crawl:
         existing_rank = Rank.objects.filter(
             keyword=keyword,
-            created_at__date=scraped_date.date()
+            scraped_date=scraped_date.date()
         ).exists()
         
         if existing_rank:
@@ -3,6 +3,8 @@ Background tasks for keyword report generation
 """
 
 import logging
+import uuid
+from collections import defaultdict
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
 
@@ -29,7 +31,6 @@ def generate_keyword_report(self, report_id: int) -> Dict[str, Any]:
         Dict with generation results
     """
     from .models_reports import KeywordReport
-    from .report_generator import KeywordReportGenerator
     
     try:
         # Get report instance
@@ -38,123 +39,328 @@ def generate_keyword_report(self, report_id: int) -> Dict[str, Any]:
         # Mark as processing
         report.mark_as_processing()
         
-        # Initialize generator
-        generator = KeywordReportGenerator(report)
-        
-        # Generate reports
-        results = generator.generate_reports()
+        return _generate_and_store(report)
         
-        if not results['success']:
-            raise Exception(results.get('error', 'Unknown error generating report'))
+    except KeywordReport.DoesNotExist:
+        logger.error(f"Report {report_id} not found")
+        return {'success': False, 'error': 'Report not found'}
         
-        # Initialize R2 storage
-        r2_service = get_r2_service()
+    except Exception as e:
+        logger.error(f"Error generating report {report_id}: {e}", exc_info=True)
         
-        # Generate base path for files
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        base_path = f"keyword_reports/{report.project.domain}/{timestamp}"
+        # Mark as failed, cancelling a PDF part already queued by this attempt
+        try:
+            KeywordReport.cancel_parts(report_id)
+            report = KeywordReport.objects.get(id=report_id)
+            report.mark_as_failed(str(e))
+        except:
+            pass
         
-        # Upload CSV if generated
-        if 'csv_content' in results:
-            # Generate filename based on report type
-            if report.start_date and report.end_date:
-                csv_filename = f"{report.project.domain}_{report.start_date.strftime('%Y%m%d')}_{report.end_date.strftime('%Y%m%d')}.csv"
-            else:
-                # For reports without date ranges (page_rankings, top_competitors, etc.)
-                csv_filename = f"{report.project.domain}_{report.report_type}_{timestamp}.csv"
-            csv_key = f"{base_path}/{csv_filename}"
-            
-            # Convert CSV string to bytes if needed
-            import io
-            if isinstance(results['csv_content'], str):
-                csv_bytes = io.BytesIO(results['csv_content'].encode('utf-8'))
-            else:
-                csv_bytes = io.BytesIO(results['csv_content'])
-            
-            upload_result = r2_service.upload_file(
-                csv_bytes,  # file_obj
-                csv_key,  # key
-                metadata={
-                    'report_id': str(report.id),
-                    'project_id': str(report.project.id),
-                    'type': 'keyword_report_csv'
-                },
-                content_type='text/csv'
-            )
-            
-            if upload_result['success']:
-                report.csv_file_path = csv_key
-                report.csv_file_size = results['csv_size']
-                logger.info(f"CSV uploaded to R2: {csv_key}")
-            else:
-                logger.error(f"Failed to upload CSV: {upload_result.get('error')}")
+        # Retry if possible
+        if self.request.retries < self.max_retries:
+            raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
         
-        # Upload PDF if generated
-        if 'pdf_content' in results:
-            # Generate filename based on report type
-            if report.start_date and report.end_date:
-                pdf_filename = f"{report.project.domain}_{report.start_date.strftime('%Y%m%d')}_{report.end_date.strftime('%Y%m%d')}.pdf"
-            else:
-                # For reports without date ranges (page_rankings, top_competitors, etc.)
-                pdf_filename = f"{report.project.domain}_{report.report_type}_{timestamp}.pdf"
-            pdf_key = f"{base_path}/{pdf_filename}"
-            
-            upload_result = r2_service.upload_file(
-                results['pdf_content'],  # file_obj
-                pdf_key,  # key
-                metadata={
+        return {'success': False, 'error': str(e)}
+
+
+@shared_task(bind=True, max_retries=0)
+def generate_scheduled_report_batch(self, report_ids: List[int]) -> Dict[str, Any]:
+    """
+    Generate scheduled reports of one project and period from shared data
+    
+    The project's keywords and rank history are loaded once into a
+    ReportDataset, and every report (whatever its format or keyword
+    selection) is built from it. A report that fails here is handed to
+    generate_keyword_report, which loads its own data and retries.
+    
+    Args:
+        report_ids: IDs of KeywordReports with the same project and date range
+    
+    Returns:
+        Dict with the generated and failed report IDs
+    """
+    from .models_reports import KeywordReport
+    from .report_generator import ReportDataset
+    
+    reports = list(KeywordReport.objects.filter(id__in=report_ids).select_related('project').order_by('id'))
+    if not reports:
+        logger.error(f"Reports {report_ids} not found")
+        return {'success': False, 'error': 'Reports not found'}
+    
+    generated = []
+    failed = []
+    
+    try:
+        first = reports[0]
+        dataset = ReportDataset.load(first.project, first.start_date, first.end_date)
+    except Exception as e:
+        logger.error(f"Error loading shared data for reports {report_ids}: {e}", exc_info=True)
+        dataset = None
+    
+    for report in reports:
+        try:
+            report.mark_as_processing()
+            _generate_and_store(report, dataset=dataset if dataset and dataset.matches(report) else None)
+            generated.append(report.id)
+        except Exception as e:
+            logger.error(f"Error generating scheduled report {report.id} from shared data: {e}", exc_info=True)
+            failed.append(report.id)
+            if report.pending_parts:
+                # A PDF part was queued before the failure; cancel it so it
+                # can't complete the report while the retry generates it again
+                KeywordReport.cancel_parts(report.id)
+            generate_keyword_report.delay(report.id)
+    
+    logger.info(f"Scheduled report batch done: {len(generated)} generated, {len(failed)} handed to generate_keyword_report")
+    
+    return {
+        'success': not failed,
+        'generated': generated,
+        'failed': failed
+    }
+
+
+def _generate_and_store(report, dataset=None) -> Dict[str, Any]:
+    """
+    Generate a report, upload its files to R2 and complete it
+    
+    Args:
+        report: KeywordReport instance already marked as processing
+        dataset: Shared ReportDataset of the report's project and period, if any
+    
+    Returns:
+        Dict with generation results
+    
+    Raises:
+        Exception: If the report could not be generated
+    """
+    from .models_reports import KeywordReport
+    from .report_generator import KeywordReportGenerator
+    
+    # Initialize generator (with the PDF queue enabled, the keyword rankings
+    # PDF comes back as data for the reports_pdf workers)
+    defer_pdf = settings.REPORT_PDF_QUEUE_ENABLED and report.report_type == 'keyword_rankings'
+    generator = KeywordReportGenerator(report, defer_pdf=defer_pdf, dataset=dataset)
+    
+    # Generate reports
+    results = generator.generate_reports()
+    
+    if not results['success']:
+        raise Exception(results.get('error', 'Unknown error generating report'))
+    
+    # Initialize R2 storage
+    r2_service = get_r2_service()
+    
+    # Generate base path for files (reports of a scheduled batch can share the
+    # project, period and second, so the report ID keeps their keys apart)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    base_path = f"keyword_reports/{report.project.domain}/{timestamp}_{report.id}"
+    
+    # Queue the PDF first so it renders while the CSV streams; whichever
+    # part finishes last completes the report. The data stays on the report
+    # row with the ID of the task meant to render it, so the task message only
+    # carries the report ID and a cancelled attempt's task can be recognized
+    if 'pdf_data' in results:
+        pdf_task_id = uuid.uuid4().hex
+        report.pending_parts = 2 if 'csv_stream' in results else 1
+        report.pdf_data = {'task_id': pdf_task_id, 'data': results['pdf_data']}
+        report.save(update_fields=['pending_parts', 'pdf_data', 'updated_at'])
+        render_keyword_report_pdf.apply_async(
+            args=[
+                report.id,
+                f"{base_path}/{_report_filename(report, timestamp, 'pdf')}",
+                {
                     'report_id': str(report.id),
                     'project_id': str(report.project.id),
                     'type': 'keyword_report_pdf'
-                },
-                content_type='application/pdf'
-            )
-            
-            if upload_result['success']:
-                report.pdf_file_path = pdf_key
-                report.pdf_file_size = results['pdf_size']
-                logger.info(f"PDF uploaded to R2: {pdf_key}")
-            else:
-                logger.error(f"Failed to upload PDF: {upload_result.get('error')}")
-        
-        # Save file paths to database
-        if report.csv_file_path or report.pdf_file_path:
-            report.save(update_fields=['csv_file_path', 'csv_file_size', 'pdf_file_path', 'pdf_file_size'])
+                }
+            ],
+            queue='reports_pdf',
+            task_id=pdf_task_id
+        )
+    
+    # Stream CSV if generated (rows are produced while the upload runs)
+    if 'csv_stream' in results:
+        csv_key = f"{base_path}/{_report_filename(report, timestamp, 'csv')}"
+        
+        upload_result = r2_service.upload_stream(
+            results['csv_stream'],  # chunks
+            csv_key,  # key
+            metadata={
+                'report_id': str(report.id),
+                'project_id': str(report.project.id),
+                'type': 'keyword_report_csv'
+            },
+            content_type='text/csv'
+        )
         
-        # Mark as completed
-        report.mark_as_completed()
+        if upload_result['success']:
+            report.csv_file_path = csv_key
+            report.csv_file_size = upload_result['size']
+            logger.info(f"CSV streamed to R2: {csv_key} ({upload_result['size']} bytes)")
+        else:
+            logger.error(f"Failed to upload CSV: {upload_result.get('error')}")
+    
+    # Upload PDF if generated
+    if 'pdf_content' in results:
+        pdf_key = f"{base_path}/{_report_filename(report, timestamp, 'pdf')}"
+        
+        upload_result = r2_service.upload_file(
+            results['pdf_content'],  # file_obj
+            pdf_key,  # key
+            metadata={
+                'report_id': str(report.id),
+                'project_id': str(report.project.id),
+                'type': 'keyword_report_pdf'
+            },
+            content_type='application/pdf'
+        )
         
-        # Send email notification if configured
-        if report.send_email_notification and report.created_by:
-            send_report_ready_email.delay(report.id)
+        if upload_result['success']:
+            report.pdf_file_path = pdf_key
+            report.pdf_file_size = results['pdf_size']
+            logger.info(f"PDF uploaded to R2: {pdf_key}")
+        else:
+            logger.error(f"Failed to upload PDF: {upload_result.get('error')}")
+    
+    if 'pdf_data' in results:
+        if 'csv_stream' in results:
+            finished = KeywordReport.finish_part(
+                report.id,
+                csv_file_path=report.csv_file_path,
+                csv_file_size=report.csv_file_size
+            )
+            if finished and finished.status == 'processing':
+                _complete_report(finished)
         
         return {
             'success': True,
             'report_id': report.id,
             'csv_path': report.csv_file_path,
-            'pdf_path': report.pdf_file_path,
+            'pdf_queued': True,
             'summary': results.get('summary', {})
         }
+    
+    # Save file paths to database
+    if report.csv_file_path or report.pdf_file_path:
+        report.save(update_fields=['csv_file_path', 'csv_file_size', 'pdf_file_path', 'pdf_file_size'])
+    
+    _complete_report(report)
+    
+    return {
+        'success': True,
+        'report_id': report.id,
+        'csv_path': report.csv_file_path,
+        'pdf_path': report.pdf_file_path,
+        'summary': results.get('summary', {})
+    }
+
+
+def _report_filename(report, timestamp: str, extension: str) -> str:
+    """
+    File name of a generated report file
+    
+    Args:
+        report: KeywordReport instance
+        timestamp: Generation timestamp (used for reports without a date range)
+        extension: 'csv' or 'pdf'
+    
+    Returns:
+        File name
+    """
+    if report.start_date and report.end_date:
+        return f"{report.project.domain}_{report.start_date.strftime('%Y%m%d')}_{report.end_date.strftime('%Y%m%d')}.{extension}"
+    # For reports without date ranges (page_rankings, top_competitors, etc.)
+    return f"{report.project.domain}_{report.report_type}_{timestamp}.{extension}"
+
+
+def _complete_report(report) -> None:
+    """
+    Mark a report as completed and send the ready notification if configured
+    
+    Args:
+        report: KeywordReport instance
+    """
+    report.mark_as_completed()
+    
+    # Send email notification if configured
+    if report.send_email_notification and report.created_by_id:
+        send_report_ready_email.delay(report.id)
+
+
+@shared_task(
+    bind=True,
+    max_retries=0,
+    time_limit=900,
+    soft_time_limit=840,
+)
+def render_keyword_report_pdf(self, report_id: int, pdf_key: str, metadata: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Render and upload a keyword rankings PDF from precomputed report data
+    
+    Consumed from the reports_pdf queue by a dedicated worker, so rendering
+    runs alongside the CSV upload and outside the data-loading workers. The
+    report is completed by whichever of this task and generate_keyword_report
+    finishes last; a failed render completes it without a PDF.
+    
+    The report data (KeywordReport.pdf_data, from
+    KeywordReportGenerator.build_pdf_data()) is read from the report and
+    cleared when the part finishes. If the data was staged for another task
+    (the attempt that queued this one failed and was cancelled), nothing is
+    rendered.
+    
+    Args:
+        report_id: ID of the KeywordReport
+        pdf_key: R2 key for the PDF
+        metadata: R2 object metadata
+    
+    Returns:
+        Dict with the PDF path, or the error
+    """
+    from .models_reports import KeywordReport
+    from .report_pdf import get_render_pool, render_keyword_rankings_pdf
+    
+    staged = KeywordReport.objects.filter(id=report_id).values_list('pdf_data', flat=True).first()
+    if not staged or staged.get('task_id') != self.request.id:
+        logger.info(f"PDF task {self.request.id} for report {report_id} was cancelled")
+        return {'success': False, 'report_id': report_id, 'pdf_path': None, 'error': 'Cancelled'}
+    
+    fields = {'pdf_data': None}
+    error = None
+    try:
+        pdf_content = render_keyword_rankings_pdf(staged['data'], pool=get_render_pool())
+        upload_result = get_r2_service().upload_file(
+            pdf_content,
+            pdf_key,
+            metadata=metadata,
+            content_type='application/pdf'
+        )
         
+        if upload_result['success']:
+            fields.update(pdf_file_path=pdf_key, pdf_file_size=len(pdf_content))
+            logger.info(f"PDF uploaded to R2: {pdf_key}")
+        else:
+            error = upload_result.get('error')
+            logger.error(f"Failed to upload PDF: {error}")
+    except Exception as e:
+        error = str(e)
+        logger.error(f"Error rendering PDF for report {report_id}: {e}", exc_info=True)
+    
+    try:
+        report = KeywordReport.finish_part(report_id, pdf_task_id=self.request.id, **fields)
     except KeywordReport.DoesNotExist:
         logger.error(f"Report {report_id} not found")
         return {'success': False, 'error': 'Report not found'}
-        
-    except Exception as e:
-        logger.error(f"Error generating report {report_id}: {e}", exc_info=True)
-        
-        # Mark as failed
-        try:
-            report = KeywordReport.objects.get(id=report_id)
-            report.mark_as_failed(str(e))
-        except:
-            pass
-        
-        # Retry if possible
-        if self.request.retries < self.max_retries:
-            raise self.retry(exc=e, countdown=60 * (self.request.retries + 1))
-        
-        return {'success': False, 'error': str(e)}
+    
+    if report and report.status == 'processing':
+        _complete_report(report)
+    
+    return {
+        'success': error is None,
+        'report_id': report_id,
+        'pdf_path': fields.get('pdf_file_path'),
+        'error': error
+    }
 
 
 @shared_task
@@ -223,14 +429,21 @@ def process_scheduled_reports() -> Dict[str, Any]:
     processed = 0
     failed = 0
     
+    # Report IDs per (project, start date, end date): reports of a group are
+    # generated together from one load of keywords and ranks
+    batches = defaultdict(list)
+    
     try:
-        # Get all active schedules that should run now
-        due_schedules = ReportSchedule.objects.filter(
-            is_active=True,
-            next_run_at__lte=timezone.now()
+        # Get all active schedules that should run now (one query, with the
+        # project, owner and keyword selection of each schedule)
+        due_schedules = list(
+            ReportSchedule.objects.filter(
+                is_active=True,
+                next_run_at__lte=timezone.now()
+            ).select_related('project', 'created_by').prefetch_related('keywords').order_by('project_id', 'id')
         )
         
-        logger.info(f"Found {due_schedules.count()} scheduled reports to process")
+        logger.info(f"Found {len(due_schedules)} scheduled reports to process")
         
         for schedule in due_schedules:
             try:
@@ -252,16 +465,17 @@ def process_scheduled_reports() -> Dict[str, Any]:
                     send_email_notification=True  # Always send for scheduled reports
                 )
                 
-                # Copy keyword configuration
-                if schedule.keywords.exists():
-                    report.keywords.set(schedule.keywords.all())
+                # Copy keyword configuration (prefetched)
+                schedule_keywords = list(schedule.keywords.all())
+                if schedule_keywords:
+                    report.keywords.set(schedule_keywords)
                 
                 report.include_tags = schedule.include_tags
                 report.exclude_tags = schedule.exclude_tags
                 report.save()
                 
-                # Generate report in background
-                generate_keyword_report.delay(report.id)
+                # Generated in background once all due schedules are collected
+                batches[(schedule.project_id, start_date, end_date)].append(report.id)
                 
                 # Update schedule
                 schedule.last_run_at = timezone.now()
@@ -287,6 +501,12 @@ def process_scheduled_reports() -> Dict[str, Any]:
                 except:
                     pass
         
+        for report_ids in batches.values():
+            if len(report_ids) == 1:
+                generate_keyword_report.delay(report_ids[0])
+            else:
+                generate_scheduled_report_batch.delay(report_ids)
+        
         return {
             'processed': processed,
             'failed': failed,
@@ -386,22 +386,29 @@ class KeywordRankTracker:
         """
         try:
             # Import here to avoid circular imports
-            from competitors.models import Target, TargetKeywordRank
+            from competitors.models import CompetitorStats, Target, TargetKeywordRank
             
             # Get manual targets for this project
-            manual_targets = Target.objects.filter(
+            manual_targets = list(Target.objects.filter(
                 project=keyword.project,
                 is_manual=True
-            )
+            ))
             
-            if not manual_targets.exists():
+            if not manual_targets:
                 return
             
-            logger.info(f"Tracking {manual_targets.count()} manual targets for keyword: {keyword.keyword}")
+            logger.info(f"Tracking {len(manual_targets)} manual targets for keyword: {keyword.keyword}")
             
             # Get organic results
             organic_results = parsed_results.get('organic_results', [])
             
+            # Previous ranks, for the competitor stats deltas
+            old_ranks = dict(TargetKeywordRank.objects.filter(
+                keyword=keyword,
+                target__in=manual_targets
+            ).values_list('target_id', 'rank'))
+            stats_deltas = {}
+            
             for target in manual_targets:
                 # Clean target domain for matching
                 target_domain = target.domain.lower().replace('www.', '').replace('http://', '').replace('https://', '')
@@ -431,6 +438,7 @@ class KeywordRankTracker:
                         else:
                             logger.info(f"Updated rank entry for manual target {target.domain}")
                         
+                        CompetitorStats.merge_delta(stats_deltas, target.id, CompetitorStats.rank_delta(old_ranks.get(target.id), i))
                         found = True
                         break
                 
@@ -450,6 +458,10 @@ class KeywordRankTracker:
                     
                     if created:
                         logger.info(f"Created not-ranking entry for manual target {target.domain}")
+                    
+                    CompetitorStats.merge_delta(stats_deltas, target.id, CompetitorStats.rank_delta(old_ranks.get(target.id), 0))
+            
+            CompetitorStats.apply_deltas(stats_deltas)
                         
         except Exception as e:
             logger.error(f"Error tracking manual targets: {str(e)}")
@@ -6,7 +6,7 @@ from django.db.models import Count, Q, Max, Min, Avg
 from django.utils import timezone
 from core.utils import simple_paginate
 from django.core.paginator import Paginator  # Keep for now, will remove after full refactor
-from .models import Tag, Keyword, KeywordTag
+from .models import Tag, Keyword, KeywordTag, ProjectDailyStats
 from .crawl_scheduler import CrawlScheduler
 from common.utils import create_ajax_response, get_logger
 from project.models import Project
@@ -33,18 +33,16 @@ def keywords_list(request):
             Q(title__icontains=search_query)
         )
     
+    # Today's keyword rollups of every project of the user, one query
+    all_project_ids = Project.objects.filter(
+        Q(user=request.user) | Q(members=request.user)
+    ).distinct().values_list('id', flat=True)
+    project_stats = ProjectDailyStats.current_for(all_project_ids)
+    
     # Get projects with keywords for display
     projects_with_keywords = []
     for project in user_projects:
-        project_keywords = Keyword.objects.filter(project=project, archive=False)
-        keyword_stats = project_keywords.aggregate(
-            total_keywords=Count('id'),
-            avg_rank=Avg('rank'),
-            top10_count=Count('id', filter=Q(rank__lte=10, rank__gt=0)),
-            improved_count=Count('id', filter=Q(rank_status='up')),
-            declined_count=Count('id', filter=Q(rank_status='down')),
-            not_ranking_count=Count('id', filter=Q(rank=0) | Q(rank__gt=100))
-        )
+        keyword_stats = project_stats[project.id].as_keyword_stats()
         
         # Calculate health score
         total = keyword_stats['total_keywords'] or 0
@@ -66,15 +64,11 @@ def keywords_list(request):
         })
     
     # Calculate overall statistics across all projects (owned and shared)
-    all_keywords = Keyword.objects.filter(
-        Q(project__user=request.user) | Q(project__members=request.user),
-        archive=False
-    ).distinct()
-    total_keywords = all_keywords.count()
-    top10_count = all_keywords.filter(rank__lte=10, rank__gt=0).count()
-    improved_count = all_keywords.filter(rank_status='up').count()
-    declined_count = all_keywords.filter(rank_status='down').count()
-    not_ranking_count = all_keywords.filter(Q(rank=0) | Q(rank__gt=100)).count()
+    total_keywords = sum(stats.keywords_total for stats in project_stats.values())
+    top10_count = sum(stats.top10_count for stats in project_stats.values())
+    improved_count = sum(stats.improved_count for stats in project_stats.values())
+    declined_count = sum(stats.declined_count for stats in project_stats.values())
+    not_ranking_count = sum(stats.not_ranking_count for stats in project_stats.values())
     
     # Pagination using centralized utility
     pagination_context = simple_paginate(request, projects_with_keywords, 12)
@@ -223,15 +217,19 @@ def project_keywords(request, project_id):
     elif filter_status == 'not_ranking':
         keywords_qs = keywords_qs.filter(Q(rank=0) | Q(rank__gt=100))
     
-    # Calculate statistics
-    keyword_stats = keywords_qs.aggregate(
-        total_keywords=Count('id'),
-        avg_rank=Avg('rank'),
-        top10_count=Count('id', filter=Q(rank__lte=10, rank__gt=0)),
-        improved_count=Count('id', filter=Q(rank_status='up')),
-        declined_count=Count('id', filter=Q(rank_status='down')),
-        not_ranking_count=Count('id', filter=Q(rank=0) | Q(rank__gt=100))
-    )
+    # Calculate statistics - the unfiltered view reads the project's daily rollup
+    is_filtered = any([search_query, country_filter, tag_filter, rank_compare and rank_value, filter_status != 'all'])
+    if is_filtered:
+        keyword_stats = keywords_qs.aggregate(
+            total_keywords=Count('id'),
+            avg_rank=Avg('rank'),
+            top10_count=Count('id', filter=Q(rank__lte=10, rank__gt=0)),
+            improved_count=Count('id', filter=Q(rank_status='up')),
+            declined_count=Count('id', filter=Q(rank_status='down')),
+            not_ranking_count=Count('id', filter=Q(rank=0) | Q(rank__gt=100))
+        )
+    else:
+        keyword_stats = ProjectDailyStats.current_for([project.id])[project.id].as_keyword_stats()
     
     # Pagination using centralized utility
     pagination_context = simple_paginate(request, keywords_qs, per_page)
@@ -1082,16 +1080,19 @@ def keyword_detail(request, keyword_id):
     if not keyword:
         return redirect('keywords:list')
     
-    # Get ranking history (last 30 entries)
+    # Get ranking history (last 30 entries), bounded by date so only recent
+    # Rank partitions are scanned
+    from datetime import timedelta
+    from django.conf import settings
     from .models import Rank
-    ranking_history = list(Rank.objects.filter(
-        keyword=keyword
-    ).order_by('-created_at')[:30])
+    recent_ranks = Rank.objects.filter(
+        keyword=keyword,
+        scraped_date__gte=timezone.localdate() - timedelta(days=settings.RANK_HISTORY_WINDOW_DAYS)
+    ).order_by('-scraped_date')
+    ranking_history = list(recent_ranks[:30])
     
     # Get the most recent rank with search results
-    latest_rank = Rank.objects.filter(
-        keyword=keyword
-    ).order_by('-created_at').first()
+    latest_rank = ranking_history[0] if ranking_history else None
     
     # Calculate rank changes
     for i, history in enumerate(ranking_history):
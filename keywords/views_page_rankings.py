@@ -10,8 +10,8 @@ from django.db.models import Q, Count, Avg, F, Value, CharField
 from django.db.models.functions import Concat
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from .models import Keyword, Rank
+from .page_rankings import page_groups, ranked_keywords, top_keywords_by_page
 from project.models import Project
-from urllib.parse import urlparse
 import json
 
 
@@ -59,15 +59,13 @@ def page_rankings_data(request):
     except (ValueError, TypeError):
         per_page = 50
     
-    # Base queryset - get all keywords user has access to
-    keywords = Keyword.objects.filter(
-        Q(project__user=request.user) |
-        Q(project__members=request.user)
-    ).filter(
-        archive=False,
-        rank__gt=0,
-        rank__lte=100
-    ).select_related('project').distinct()
+    # Base queryset - keywords of the projects the user has access to
+    # (a subquery, so project members don't duplicate rows in the counts)
+    accessible_projects = Project.objects.filter(
+        Q(user=request.user) |
+        Q(members=request.user)
+    ).values('id')
+    keywords = Keyword.objects.filter(project_id__in=accessible_projects)
     
     # Apply project filter
     if project_id:
@@ -80,61 +78,8 @@ def page_rankings_data(request):
             Q(keyword__icontains=search_query)
         )
     
-    # Group by page URL and get counts
-    page_data = {}
-    for keyword in keywords:
-        if keyword.rank_url:
-            # Clean up the URL for grouping
-            page_url = keyword.rank_url.strip()
-            
-            if page_url not in page_data:
-                page_data[page_url] = {
-                    'url': page_url,
-                    'project': keyword.project.domain,
-                    'project_id': keyword.project.id,
-                    'keywords': [],
-                    'total_keywords': 0,
-                    'avg_position': 0,
-                    'avg_cpc': 0,
-                    'total_traffic': 0,
-                    'best_keyword': None,
-                    'best_position': 101
-                }
-            
-            # Add keyword details
-            page_data[page_url]['keywords'].append({
-                'id': keyword.id,
-                'keyword': keyword.keyword,
-                'rank': keyword.rank,
-                'rank_diff': keyword.rank_diff_from_last_time,
-                'cpc': 0,  # CPC field doesn't exist in current model
-                'search_volume': 0,  # search_volume field doesn't exist in current model
-                'traffic': 0,  # traffic field doesn't exist in current model
-                'country': keyword.country
-            })
-            
-            page_data[page_url]['total_keywords'] += 1
-            page_data[page_url]['total_traffic'] += 0  # traffic field doesn't exist
-            
-            # Track best ranking keyword
-            if keyword.rank < page_data[page_url]['best_position']:
-                page_data[page_url]['best_position'] = keyword.rank
-                page_data[page_url]['best_keyword'] = keyword.keyword
-    
-    # Calculate averages
-    for url, data in page_data.items():
-        if data['keywords']:
-            data['avg_position'] = round(
-                sum(k['rank'] for k in data['keywords']) / len(data['keywords']), 1
-            )
-            data['avg_cpc'] = 0  # CPC not available in current model
-    
-    # Convert to list and sort by total keywords
-    pages_list = list(page_data.values())
-    pages_list.sort(key=lambda x: x['total_keywords'], reverse=True)
-    
-    # Paginate
-    paginator = Paginator(pages_list, per_page)
+    # Group by page in the database; only the requested page of rows is fetched
+    paginator = Paginator(page_groups(keywords), per_page)
     
     try:
         pages = paginator.page(page)
@@ -148,14 +93,23 @@ def page_rankings_data(request):
         logger.error(f"Pagination error in page_rankings_data: {str(e)}")
         pages = paginator.page(1)
     
+    # Best keyword of the listed pages only
+    page_items = list(pages)
+    best_keywords = top_keywords_by_page(
+        keywords.filter(rank_url_path__in={item['rank_url_path'] for item in page_items}),
+        limit=1
+    )
+    
     # Format response
     pages_data = []
     total_keywords_sum = 0
     position_sum = 0
     
-    for page_item in pages:
+    for page_item in page_items:
+        best = best_keywords.get((page_item['project_id'], page_item['rank_url_path']))
+        
         # Extract page title from URL (last part)
-        url_parts = page_item['url'].rstrip('/').split('/')
+        url_parts = page_item['rank_url_path'].rstrip('/').split('/')
         page_title = url_parts[-1] if url_parts else 'Homepage'
         if page_title:
             # Clean up the title
@@ -164,15 +118,15 @@ def page_rankings_data(request):
             page_title = 'Homepage'
         
         pages_data.append({
-            'url': page_item['url'],
+            'url': page_item['rank_url_path'],
             'page_title': page_title,
-            'project': page_item['project'],
+            'project': page_item['project__domain'],
             'project_id': page_item['project_id'],
             'total_keywords': page_item['total_keywords'],
             'avg_position': page_item['avg_position'],
-            'avg_cpc': page_item['avg_cpc'],
-            'total_traffic': page_item['total_traffic'],
-            'best_keyword': page_item['best_keyword'],
+            'avg_cpc': 0,  # CPC not available in current model
+            'total_traffic': 0,  # traffic field doesn't exist in current model
+            'best_keyword': best[0]['keyword'] if best else None,
             'best_position': page_item['best_position']
         })
         
@@ -247,15 +201,13 @@ def page_keywords_detail(request):
             'error': 'URL parameter required'
         })
     
-    # Get all keywords for this page
-    keywords = Keyword.objects.filter(
-        Q(project__user=request.user) |
-        Q(project__members=request.user)
-    ).filter(
-        rank_url=page_url,
-        archive=False,
-        rank__gt=0,
-        rank__lte=100
+    # Get all keywords for this page (loaded when the page row is expanded)
+    accessible_projects = Project.objects.filter(
+        Q(user=request.user) |
+        Q(members=request.user)
+    ).values('id')
+    keywords = ranked_keywords(
+        Keyword.objects.filter(project_id__in=accessible_projects, rank_url_path=page_url)
     ).select_related('project')
     
     if project_id:
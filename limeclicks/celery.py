@@ -19,6 +19,12 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 app.conf.task_routes = {
     # Keywords tasks
     'keywords.tasks.fetch_keyword_serp_html': {'queue': 'serp_default'},
+    'keywords.tasks.fetch_keyword_serp_batch': {'queue': 'serp_default'},
+    'keywords.tasks.enrich_rank_serp_features': {'queue': 'celery'},
+    'keywords.tasks.parse_keyword_serp': {'queue': 'serp_parse'},
+    
+    # Report PDF rendering - dedicated worker
+    'keywords.tasks_reports.render_keyword_report_pdf': {'queue': 'reports_pdf'},
     
     
     # Site audit tasks - High priority for new domains
@@ -47,6 +53,12 @@ app.conf.task_queues = (
     Queue('serp_high', Exchange('serp'), routing_key='serp.high', priority=8),
     Queue('serp_default', Exchange('serp'), routing_key='serp.default', priority=4),
     
+    # SERP parse stage - CPU bound, consumed by the prefork parser worker
+    Queue('serp_parse', Exchange('serp'), routing_key='serp.parse', priority=6),
+    
+    # Report PDF rendering - CPU bound, consumed by the PDF worker
+    Queue('reports_pdf', Exchange('reports'), routing_key='reports.pdf', priority=3),
+    
     # Default queue
     Queue('celery', Exchange('celery'), routing_key='celery', priority=1),
 )
@@ -141,6 +153,41 @@ app.conf.beat_schedule = {
         'options': {'queue': 'celery', 'priority': 7}
     },
     
+    # Drop shared SERP snapshots past the history window - Daily
+    'cleanup-old-serp-snapshots': {
+        'task': 'keywords.tasks.cleanup_old_serp_snapshots',
+        'schedule': crontab(hour=1, minute=15),  # Daily at 1:15 AM
+        'options': {'queue': 'celery', 'priority': 3}
+    },
+    
+    # Drop archived SERP HTML past the history window - Daily
+    'prune-serp-archive': {
+        'task': 'keywords.tasks.prune_serp_archive',
+        'schedule': crontab(hour=1, minute=30),  # Daily at 1:30 AM
+        'options': {'queue': 'celery', 'priority': 3}
+    },
+    
+    # Create upcoming monthly Rank partitions, archive expired ones - Daily
+    'maintain-rank-partitions': {
+        'task': 'keywords.tasks.maintain_rank_partitions',
+        'schedule': crontab(hour=1, minute=45),  # Daily at 1:45 AM
+        'options': {'queue': 'celery', 'priority': 3}
+    },
+    
+    # Rebuild project keyword rollups from keywords - Nightly, before the day closes
+    'reconcile-project-daily-stats': {
+        'task': 'keywords.tasks.reconcile_project_daily_stats',
+        'schedule': crontab(hour=23, minute=50),  # Daily at 11:50 PM
+        'options': {'queue': 'celery', 'priority': 3}
+    },
+    
+    # Drop SERP domain index rows past their retention - Nightly
+    'prune-serp-domain-index': {
+        'task': 'keywords.tasks.prune_serp_domain_index',
+        'schedule': crontab(hour=2, minute=30),  # Daily at 2:30 AM
+        'options': {'queue': 'celery', 'priority': 3}
+    },
+    
     # Worker health check - Less frequent
     'worker-health-check': {
         'task': 'keywords.tasks.worker_health_check',
@@ -392,6 +392,10 @@ CELERY_TASK_ROUTES = {
     'accounts.tasks.*': {'queue': 'accounts'},
     'limeclicks.tasks.*': {'queue': 'default'},
     'keywords.tasks.fetch_keyword_serp_html': {'queue': 'serp_default'},
+    'keywords.tasks.fetch_keyword_serp_batch': {'queue': 'serp_default'},
+    'keywords.tasks.enrich_rank_serp_features': {'queue': 'celery'},
+    'keywords.tasks.parse_keyword_serp': {'queue': 'serp_parse'},
+    'keywords.tasks_reports.render_keyword_report_pdf': {'queue': 'reports_pdf'},
 }
 
 # Celery beat schedule (for periodic tasks)
@@ -468,7 +472,46 @@ CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 SCRAPE_DO_STORAGE_ROOT = os.getenv('SCRAPE_DO_STORAGE_ROOT', os.path.join(BASE_DIR, 'storage', 'scrape_do'))
 SCRAPE_DO_TIMEOUT = int(os.getenv('SCRAPE_DO_TIMEOUT', '60'))
 SCRAPE_DO_RETRIES = int(os.getenv('SCRAPE_DO_RETRIES', '3'))
+SCRAPE_DO_CACHE_BACKEND = os.getenv('SCRAPE_DO_CACHE_BACKEND', 'disk')  # 'disk' (HTML on local disk, index in Redis) or 'django' (whole responses in the Django cache)
+SCRAPE_DO_CACHE_ROOT = os.getenv('SCRAPE_DO_CACHE_ROOT', os.path.join(BASE_DIR, 'storage', 'scrape_do_cache'))  # Disk tier of the Scrape.do response cache
+SCRAPE_DO_CACHE_MAX_BYTES = int(os.getenv('SCRAPE_DO_CACHE_MAX_BYTES', str(2 * 1024 ** 3)))  # Disk tier size bound per host, least recently used responses evicted first
+SCRAPE_DO_CACHE_REDIS_URL = os.getenv('SCRAPE_DO_CACHE_REDIS_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))  # Shared index, counters and generation of the response cache
+SCRAPE_DO_RATE_LIMIT_ENABLED = os.getenv('SCRAPE_DO_RATE_LIMIT_ENABLED', 'True').lower() in ('1', 'true', 'yes')  # Shared token bucket + AIMD concurrency window for all workers (services.rate_limiter)
+SCRAPE_DO_LIMITER_REDIS_URL = os.getenv('SCRAPE_DO_LIMITER_REDIS_URL', os.getenv('REDIS_URL', 'redis://localhost:6379/0'))
+SCRAPE_DO_RATE_PER_SECOND = float(os.getenv('SCRAPE_DO_RATE_PER_SECOND', '10'))  # Requests per second across all workers
+SCRAPE_DO_RATE_BURST = float(os.getenv('SCRAPE_DO_RATE_BURST', '20'))  # Token bucket size
+SCRAPE_DO_CONCURRENCY_INITIAL = float(os.getenv('SCRAPE_DO_CONCURRENCY_INITIAL', '20'))  # Starting concurrency window
+SCRAPE_DO_CONCURRENCY_MIN = float(os.getenv('SCRAPE_DO_CONCURRENCY_MIN', '2'))  # Floor of the window after 429s/errors
+SCRAPE_DO_CONCURRENCY_MAX = float(os.getenv('SCRAPE_DO_CONCURRENCY_MAX', '100'))  # Ceiling of the window (Scrape.do plan limit)
+SCRAPE_DO_LATENCY_TARGET = float(os.getenv('SCRAPE_DO_LATENCY_TARGET', '30'))  # Seconds; slower responses shrink the window
+SCRAPE_DO_LIMITER_MAX_WAIT = float(os.getenv('SCRAPE_DO_LIMITER_MAX_WAIT', '120'))  # Seconds a request waits for a slot before failing as rate limited
+CIRCUIT_BREAKER_ENABLED = os.getenv('CIRCUIT_BREAKER_ENABLED', 'True').lower() in ('1', 'true', 'yes')  # Redis-shared breakers for Scrape.do, DataForSEO, PageSpeed and R2 (services.circuit_breaker)
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_BREAKER_FAILURE_THRESHOLD', '5'))  # Consecutive timeouts/connection errors/5xx that open a circuit
+CIRCUIT_BREAKER_RECOVERY_SECONDS = float(os.getenv('CIRCUIT_BREAKER_RECOVERY_SECONDS', '60'))  # Open time before a half-open probe, doubled on each failed probe
+CIRCUIT_BREAKER_MAX_RECOVERY_SECONDS = float(os.getenv('CIRCUIT_BREAKER_MAX_RECOVERY_SECONDS', '900'))  # Cap of the doubled open time
 SERP_HISTORY_DAYS = int(os.getenv('SERP_HISTORY_DAYS', '7'))
+SERP_ARCHIVE_ROOT = os.getenv('SERP_ARCHIVE_ROOT', os.path.join(BASE_DIR, 'storage', 'serp_archive'))  # Compressed, content-addressed SERP HTML (keywords.serp_archive)
+SERP_ARCHIVE_ZSTD_LEVEL = int(os.getenv('SERP_ARCHIVE_ZSTD_LEVEL', '10'))  # zstd level for archived SERPs
 FETCH_MIN_INTERVAL_HOURS = int(os.getenv('FETCH_MIN_INTERVAL_HOURS', '24'))
+SERP_FETCH_MODE = os.getenv('SERP_FETCH_MODE', 'single')  # 'single' (task per keyword) or 'batch'
+SERP_BATCH_SIZE = int(os.getenv('SERP_BATCH_SIZE', '100'))  # Keywords per batch fetch task
+SERP_BATCH_CONCURRENCY = int(os.getenv('SERP_BATCH_CONCURRENCY', '20'))  # In-flight requests per batch task
+SERP_SNAPSHOT_REUSE = os.getenv('SERP_SNAPSHOT_REUSE', 'True').lower() in ('1', 'true', 'yes')  # Share same-day SERPs across keywords
+SERP_PARSE_PROFILE = os.getenv('SERP_PARSE_PROFILE', 'full')  # 'full' or 'rank' (results only, features deferred)
+SERP_ENRICHMENT_ENABLED = os.getenv('SERP_ENRICHMENT_ENABLED', 'True').lower() in ('1', 'true', 'yes')  # Full-parse rank-only SERPs on the low-priority queue
+SERP_PARSE_QUEUE_ENABLED = os.getenv('SERP_PARSE_QUEUE_ENABLED', 'False').lower() in ('1', 'true', 'yes')  # Fetch workers hand stored HTML to the serp_parse queue
+SERP_RESULT_SINK_ENABLED = os.getenv('SERP_RESULT_SINK_ENABLED', 'False').lower() in ('1', 'true', 'yes')  # Bulk-write crawl results instead of per-keyword saves
+SERP_RESULT_SINK_BATCH_SIZE = int(os.getenv('SERP_RESULT_SINK_BATCH_SIZE', '50'))  # Keywords per bulk write
+SERP_RESULT_SINK_FLUSH_SECONDS = float(os.getenv('SERP_RESULT_SINK_FLUSH_SECONDS', '5'))  # Max age of a pending result
+RANK_PARTITION_MONTHS_AHEAD = int(os.getenv('RANK_PARTITION_MONTHS_AHEAD', '3'))  # Monthly Rank partitions created ahead of time (PostgreSQL)
+RANK_PARTITION_RETENTION_MONTHS = int(os.getenv('RANK_PARTITION_RETENTION_MONTHS', '0'))  # Months of Rank history kept attached, 0 = keep all
+RANK_PARTITION_ARCHIVE = os.getenv('RANK_PARTITION_ARCHIVE', 'True').lower() in ('1', 'true', 'yes')  # Archive expired partitions to Parquet in R2 before dropping them
+SERP_DOMAIN_INDEX_ENABLED = os.getenv('SERP_DOMAIN_INDEX_ENABLED', 'False').lower() in ('1', 'true', 'yes')  # Record every top 100 domain per crawl (competitors.SerpDomainRank), up to 100 rows per keyword per day
+SERP_DOMAIN_INDEX_RETENTION_DAYS = int(os.getenv('SERP_DOMAIN_INDEX_RETENTION_DAYS', '90'))  # Days of SERP domain index kept, 0 = keep all
+RANK_HISTORY_WINDOW_DAYS = int(os.getenv('RANK_HISTORY_WINDOW_DAYS', '365'))  # Keyword detail history lookback (bounds partitions scanned)
+REPORT_PDF_QUEUE_ENABLED = os.getenv('REPORT_PDF_QUEUE_ENABLED', 'False').lower() in ('1', 'true', 'yes')  # Render keyword ranking PDFs on the reports_pdf queue while the CSV streams
+REPORT_PDF_PROCESSES = int(os.getenv('REPORT_PDF_PROCESSES', '2'))  # Processes rendering PDF table chunks in parallel (threads-pool workers only)
+REPORT_PDF_DETAIL_ROWS = int(os.getenv('REPORT_PDF_DETAIL_ROWS', '50'))  # Keywords in the PDF performance table, 0 = all
+REPORT_CHART_CACHE_SIZE = int(os.getenv('REPORT_CHART_CACHE_SIZE', '256'))  # Chart drawings kept per rendering process, reused for identical series
 # Site URL for generating absolute links (must be set in production environment)
 SITE_URL = os.environ.get('SITE_URL', 'http://localhost:8000')
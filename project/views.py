@@ -47,6 +47,10 @@ def project_list(request):
     pagination_context = simple_paginate(request, projects, 12)
     projects_page = pagination_context['page_obj']
     
+    # Keyword counts from today's project rollups, one query for the page
+    from keywords.models import ProjectDailyStats
+    project_stats = ProjectDailyStats.current_for([project.id for project in projects_page])
+    
     # Add role and additional information to each project
     projects_with_info = []
     for project in projects_page:
@@ -69,9 +73,8 @@ def project_list(request):
                     audit_score = 0
         
         # Get keyword statistics
-        keywords = project.keywords.all()
-        keywords_in_top_10 = keywords.filter(rank__lte=10, rank__gt=0).count()
-        keywords_tracked = keywords.filter(rank__gt=0).count()
+        keywords_in_top_10 = project_stats[project.id].top10_count
+        keywords_tracked = project_stats[project.id].ranked_count
         
         # Get domain rank from latest backlink profile
         domain_rank = None
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Rank Partitioning Benchmark
+Compares report and keyword detail query latency on a plain Rank table and a
+monthly partitioned one, using a synthetic dataset in a scratch schema.
+
+Requires PostgreSQL. Nothing outside the scratch schema is touched.
+
+Usage:
+    # 50M rows: 50,000 keywords x 1,000 days (the load takes a while)
+    DATABASE_URL=postgres://... python scripts/benchmark_rank_partitioning.py
+
+    # Smaller run, keep the data for further runs
+    python scripts/benchmark_rank_partitioning.py --rows 5000000 --keep
+    python scripts/benchmark_rank_partitioning.py --rows 5000000 --skip-load
+
+Results (defaults: 50M rows per table, 500 keywords per report, 20 runs;
+PostgreSQL 16.2, 1 CPU, 5 GB RAM, load and index build 14m45s):
+
+    query            table                      relations  median ms    p95 ms    max ms
+    90-day report    rank_plain (before)                1     274.64    587.58    587.58
+    90-day report    rank_partitioned (after)           4     218.44    270.08    270.08
+    keyword detail   rank_plain (before)                1       0.45      0.59      0.59
+    keyword detail   rank_partitioned (after)          14       1.36      2.06      2.06
+
+The report scans only the 4 monthly partitions of its 90 days. Keyword
+detail spans RANK_HISTORY_WINDOW_DAYS (365), so it probes one index per
+partition in the window; it stays around a millisecond.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+import dj_database_url
+import psycopg2
+
+COLUMNS = '''
+    id bigint NOT NULL,
+    keyword_id integer NOT NULL,
+    rank integer NOT NULL,
+    is_organic boolean NOT NULL,
+    has_map_result boolean NOT NULL DEFAULT false,
+    has_video_result boolean NOT NULL DEFAULT false,
+    has_image_result boolean NOT NULL DEFAULT false,
+    search_results_file varchar(500),
+    created_at timestamptz NOT NULL,
+    scraped_date date NOT NULL
+'''
+
+# Same indexes as keywords_rank (Rank.Meta + unique keyword/scraped_date)
+INDEXES = (
+    'CREATE INDEX ON {table} (keyword_id, created_at DESC)',
+    'CREATE INDEX ON {table} (keyword_id, rank)',
+    'CREATE INDEX ON {table} (keyword_id, is_organic)',
+    'CREATE INDEX ON {table} (created_at)',
+    'CREATE UNIQUE INDEX ON {table} (keyword_id, scraped_date)',
+)
+
+# Report query before (created_at range, plain table) and after (scraped_date range)
+REPORT_BEFORE = '''
+    SELECT keyword_id, rank, created_at FROM {table}
+    WHERE keyword_id = ANY(%(keyword_ids)s) AND created_at >= %(start)s AND created_at <= %(end)s
+      AND is_organic ORDER BY keyword_id, created_at
+'''
+REPORT_AFTER = '''
+    SELECT keyword_id, rank, created_at FROM {table}
+    WHERE keyword_id = ANY(%(keyword_ids)s) AND scraped_date >= %(start_date)s AND scraped_date <= %(end_date)s
+      AND is_organic ORDER BY keyword_id, scraped_date
+'''
+DETAIL_BEFORE = 'SELECT * FROM {table} WHERE keyword_id = %(keyword_id)s ORDER BY created_at DESC LIMIT 30'
+DETAIL_AFTER = '''
+    SELECT * FROM {table} WHERE keyword_id = %(keyword_id)s AND scraped_date >= %(history_start)s
+    ORDER BY scraped_date DESC LIMIT 30
+'''
+
+
+def add_months(day, months):
+    """First day of the month `months` after the month containing day"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def create_tables(cursor, schema, first_day, last_day):
+    """Create the plain and partitioned tables in the scratch schema"""
+    cursor.execute(f'DROP SCHEMA IF EXISTS {schema} CASCADE')
+    cursor.execute(f'CREATE SCHEMA {schema}')
+    cursor.execute(f'CREATE TABLE {schema}.rank_plain ({COLUMNS}, PRIMARY KEY (id))')
+    cursor.execute(
+        f'CREATE TABLE {schema}.rank_partitioned ({COLUMNS}, PRIMARY KEY (id, scraped_date)) '
+        f'PARTITION BY RANGE (scraped_date)'
+    )
+
+    month = first_day.replace(day=1)
+    while month <= last_day:
+        cursor.execute(
+            f'CREATE TABLE {schema}.rank_partitioned_p{month:%Y_%m} PARTITION OF {schema}.rank_partitioned '
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        )
+        month = add_months(month, 1)
+    cursor.execute(f'CREATE TABLE {schema}.rank_partitioned_default PARTITION OF {schema}.rank_partitioned DEFAULT')
+
+
+def load(connection, schema, keywords, days, last_day):
+    """Insert one rank per keyword per day into both tables, one day per statement"""
+    first_day = last_day - timedelta(days=days - 1)
+    with connection.cursor() as cursor:
+        create_tables(cursor, schema, first_day, last_day)
+    connection.commit()
+
+    started = time.perf_counter()
+    for offset in range(days):
+        day = first_day + timedelta(days=offset)
+        for table in ('rank_plain', 'rank_partitioned'):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'''
+                    INSERT INTO {schema}.{table} (id, keyword_id, rank, is_organic, created_at, scraped_date)
+                    SELECT %(offset)s::bigint * %(keywords)s + k, k,
+                           CASE WHEN random() < 0.3 THEN 0 ELSE 1 + floor(random() * 100)::int END,
+                           random() > 0.05,
+                           %(day)s::timestamptz + interval '1 second' * floor(random() * 86400),
+                           %(day)s
+                    FROM generate_series(1, %(keywords)s) AS k
+                    ''',
+                    {'offset': offset, 'keywords': keywords, 'day': day}
+                )
+        connection.commit()
+        if (offset + 1) % 50 == 0 or offset + 1 == days:
+            print(f"  loaded {offset + 1}/{days} days ({(offset + 1) * keywords:,} rows per table, "
+                  f"{time.perf_counter() - started:.0f}s)")
+
+    with connection.cursor() as cursor:
+        for table in ('rank_plain', 'rank_partitioned'):
+            for index in INDEXES:
+                cursor.execute(index.format(table=f'{schema}.{table}'))
+            cursor.execute(f'ANALYZE {schema}.{table}')
+    connection.commit()
+    return first_day
+
+
+def scanned_relations(cursor, sql, params):
+    """Relation names the plan touches (partitions actually scanned)"""
+    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    relations = set()
+    stack = [plan[0]['Plan']]
+    while stack:
+        node = stack.pop()
+        if 'Relation Name' in node:
+            relations.add(node['Relation Name'])
+        stack.extend(node.get('Plans', []))
+    return relations
+
+
+def measure(connection, sql, params_list):
+    """Run a query once per parameter set, returning latencies in ms"""
+    timings = []
+    with connection.cursor() as cursor:
+        for params in params_list:
+            started = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+    connection.rollback()
+    return timings
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--dsn', default=os.getenv('DATABASE_URL'), help='PostgreSQL URL (default: DATABASE_URL)')
+    arg_parser.add_argument('--schema', default='rank_partition_bench')
+    arg_parser.add_argument('--rows', type=int, default=50_000_000, help='Synthetic rows per table')
+    arg_parser.add_argument('--keywords', type=int, default=50_000, help='Distinct keywords')
+    arg_parser.add_argument('--report-days', type=int, default=90)
+    arg_parser.add_argument('--report-keywords', type=int, default=500, help='Keywords per report query')
+    arg_parser.add_argument('--history-days', type=int, default=365, help='Keyword detail lookback')
+    arg_parser.add_argument('--runs', type=int, default=20)
+    arg_parser.add_argument('--skip-load', action='store_true', help='Reuse data from a previous --keep run')
+    arg_parser.add_argument('--keep', action='store_true', help='Keep the scratch schema')
+    args = arg_parser.parse_args()
+
+    if not args.dsn:
+        print('Set DATABASE_URL or pass --dsn')
+        return 1
+
+    db = dj_database_url.parse(args.dsn)
+    connection = psycopg2.connect(
+        dbname=db['NAME'], user=db['USER'], password=db['PASSWORD'], host=db['HOST'], port=db['PORT'] or 5432
+    )
+
+    days = max(1, args.rows // args.keywords)
+    last_day = date.today()
+    if args.skip_load:
+        first_day = last_day - timedelta(days=days - 1)
+    else:
+        print(f"Loading {days * args.keywords:,} rows per table ({args.keywords:,} keywords x {days} days)")
+        first_day = load(connection, args.schema, args.keywords, days, last_day)
+
+    rng = random.Random(42)
+    report_start = max(first_day, last_day - timedelta(days=args.report_days - 1))
+    report_params = [{
+        'keyword_ids': rng.sample(range(1, args.keywords + 1), min(args.report_keywords, args.keywords)),
+        'start': f'{report_start} 00:00:00+00',
+        'end': f'{last_day} 23:59:59.999999+00',
+        'start_date': report_start,
+        'end_date': last_day,
+    } for _ in range(args.runs)]
+    detail_params = [{
+        'keyword_id': rng.randint(1, args.keywords),
+        'history_start': last_day - timedelta(days=args.history_days),
+    } for _ in range(args.runs)]
+
+    cases = [
+        ('90-day report', 'before', REPORT_BEFORE, 'rank_plain', report_params),
+        ('90-day report', 'after', REPORT_AFTER, 'rank_partitioned', report_params),
+        ('keyword detail', 'before', DETAIL_BEFORE, 'rank_plain', detail_params),
+        ('keyword detail', 'after', DETAIL_AFTER, 'rank_partitioned', detail_params),
+    ]
+
+    header = f"{'query':<16} {'table':<26} {'relations':>9} {'median ms':>10} {'p95 ms':>9} {'max ms':>9}"
+    print(header)
+    print('-' * len(header))
+    for name, label, template, table, params_list in cases:
+        sql = template.format(table=f'{args.schema}.{table}')
+        with connection.cursor() as cursor:
+            relations = scanned_relations(cursor, sql, params_list[0])
+        measure(connection, sql, params_list[:1])  # Warm the cache
+        timings = sorted(measure(connection, sql, params_list))
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        print(
+            f"{name:<16} {table + ' (' + label + ')':<26} {len(relations):>9} "
+            f"{statistics.median(timings):>10.2f} {p95:>9.2f} {timings[-1]:>9.2f}"
+        )
+
+    if not args.keep:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP SCHEMA {args.schema} CASCADE')
+        connection.commit()
+    connection.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Keyword Report Generation Benchmark
+Compares the keyword rankings report pipeline (rank loading, summary stats and
+CSV rows) on nested per-keyword dicts with the KeywordReportGenerator rank
+matrix, on synthetic data for a large project.
+
+Runs offline without a database. Rows stand in for the values_list() rows the
+generator reads; the legacy path gets them as lightweight objects, so model
+instantiation cost (which it also paid) is not included in its timings.
+
+Usage:
+    # 2,000 keywords x 365 days
+    python scripts/benchmark_report_generator.py
+
+    # Bigger project, several runs
+    python scripts/benchmark_report_generator.py --keywords 10000 --days 365 --runs 3
+"""
+
+import argparse
+import csv
+import io
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import date, timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from keywords.rank_matrix import RankMatrix  # noqa: E402
+
+
+class RankRow:
+    """Stand-in for a Rank instance on the legacy path"""
+
+    __slots__ = ('keyword_id', 'scraped_date', 'rank')
+
+    def __init__(self, keyword_id, scraped_date, rank):
+        self.keyword_id = keyword_id
+        self.scraped_date = scraped_date
+        self.rank = rank
+
+
+def synthetic_rows(keywords, days, start_date, seed=42):
+    """One rank per keyword per day, ~5% days missing and ~25% not ranking"""
+    rng = random.Random(seed)
+    rows = []
+    for keyword_id in range(1, keywords + 1):
+        base = rng.randint(1, 100)
+        for offset in range(days):
+            if rng.random() < 0.05:
+                continue
+            rank = 0 if rng.random() < 0.25 else max(1, min(100, base + rng.randint(-5, 5)))
+            rows.append((keyword_id, start_date + timedelta(days=offset), rank))
+    return rows
+
+
+def legacy_report(keyword_ids, date_range, rows):
+    """Previous pipeline: nested dicts, dates re-sorted per keyword for stats and CSV"""
+    ranking_data = defaultdict(lambda: defaultdict(dict))
+    for rank in (RankRow(*row) for row in rows):
+        if rank.scraped_date not in ranking_data[rank.keyword_id] or \
+           rank.rank < ranking_data[rank.keyword_id][rank.scraped_date].get('rank', 999):
+            ranking_data[rank.keyword_id][rank.scraped_date] = {'rank': rank.rank}
+
+    improvements = declines = no_change = 0
+    for keyword_id in keyword_ids:
+        if keyword_id not in ranking_data:
+            continue
+        dates_with_data = sorted([d for d in date_range if d in ranking_data[keyword_id]])
+        if len(dates_with_data) >= 2:
+            first_rank = min(ranking_data[keyword_id][dates_with_data[0]]['rank'], 101)
+            last_rank = min(ranking_data[keyword_id][dates_with_data[-1]]['rank'], 101)
+            if last_rank < first_rank:
+                improvements += 1
+            elif last_rank > first_rank:
+                declines += 1
+            else:
+                no_change += 1
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    for keyword_id in keyword_ids:
+        impact = 'no_change'
+        dates_with_data = sorted([d for d in date_range if d in ranking_data[keyword_id]])
+        if len(dates_with_data) >= 2:
+            first_rank = ranking_data[keyword_id][dates_with_data[0]]['rank']
+            last_rank = ranking_data[keyword_id][dates_with_data[-1]]['rank']
+            impact = 'up' if last_rank < first_rank else 'down' if last_rank > first_rank else 'no_change'
+        row = [keyword_id, impact]
+        for date_obj in date_range:
+            if date_obj in ranking_data[keyword_id]:
+                rank_value = ranking_data[keyword_id][date_obj]['rank']
+                row.append('NR' if rank_value == 0 or rank_value > 100 else str(rank_value))
+            else:
+                row.append('NR')
+        writer.writerow(row)
+    return (improvements, declines, no_change), len(output.getvalue())
+
+
+def matrix_report(keyword_ids, date_range, rows):
+    """Current pipeline: keyword x date int16 matrix"""
+    matrix = RankMatrix.from_rows(keyword_ids, date_range[0], len(date_range), iter(rows))
+    counts = matrix.change_counts()
+
+    output = io.StringIO()
+    writer = csv.writer(output)
+    impacts = matrix.impacts()
+    cells = matrix.cell_labels()
+    for row_index, keyword_id in enumerate(keyword_ids):
+        writer.writerow([keyword_id, impacts[row_index]] + cells[row_index].tolist())
+    return (counts['improvements'], counts['declines'], counts['no_change']), len(output.getvalue())
+
+
+def measure(pipeline, keyword_ids, date_range, rows, runs):
+    """Median wall time (s) and peak traced memory (MB) of a pipeline"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = pipeline(keyword_ids, date_range, rows)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    pipeline(keyword_ids, date_range, rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(timings), peak / (1024 * 1024), result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--keywords', type=int, default=2000)
+    arg_parser.add_argument('--days', type=int, default=365)
+    arg_parser.add_argument('--runs', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    start_date = date(2025, 1, 1)
+    date_range = [start_date + timedelta(days=offset) for offset in range(args.days)]
+    keyword_ids = list(range(1, args.keywords + 1))
+    print(f"Generating {args.keywords:,} keywords x {args.days} days of ranks")
+    rows = synthetic_rows(args.keywords, args.days, start_date)
+    print(f"  {len(rows):,} rows")
+
+    header = f"{'pipeline':<10} {'median s':>9} {'peak MB':>9} {'improved':>9} {'declined':>9} {'no change':>10}"
+    print(header)
+    print('-' * len(header))
+    for name, pipeline in (('dicts', legacy_report), ('matrix', matrix_report)):
+        seconds, peak_mb, ((improvements, declines, no_change), _) = measure(
+            pipeline, keyword_ids, date_range, rows, args.runs
+        )
+        print(f"{name:<10} {seconds:>9.2f} {peak_mb:>9.1f} {improvements:>9} {declines:>9} {no_change:>10}")
+
+    print("Counts differ where a first or last rank is 0: the dicts compare it as rank 0, the matrix as NR")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
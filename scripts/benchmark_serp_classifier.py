@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+SERP Result Classification Micro-benchmark
+Compares selector-based result classification with SerpDomClassifier on stored SERP HTML
+
+Usage:
+    python scripts/benchmark_serp_classifier.py [paths ...] [--repeat 5]
+
+Paths may be HTML files or directories (searched recursively for *.html), e.g.
+the checked-in corpus under tests/fixtures/serp or SCRAPE_DO_STORAGE_ROOT.
+"""
+
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+from bs4 import BeautifulSoup
+from soupsieve.css_match import CSSMatch
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services.google_search_parser import GoogleSearchParser  # noqa: E402
+from services.serp_benchmark import collect_serp_files  # noqa: E402
+from services.serp_classifier import SerpDomClassifier  # noqa: E402
+
+DEFAULT_CORPUS = Path(__file__).resolve().parent.parent / 'tests' / 'fixtures' / 'serp'
+
+
+def measure(parser, soup, repeat):
+    """
+    Run result classification on an already built tree
+
+    Returns:
+        Tuple of (best wall time in ms, element visits, organic count, sponsored count)
+    """
+    visits = {'count': 0}
+    original_match = CSSMatch.match
+    original_walk = SerpDomClassifier._walk
+
+    def counting_match(self, el):
+        visits['count'] += 1
+        return original_match(self, el)
+
+    def counting_walk(self, *args, **kwargs):
+        original_walk(self, *args, **kwargs)
+        visits['count'] += self.visits
+
+    # One instrumented run for visit counts, then untimed-overhead timing runs
+    with patch.object(CSSMatch, 'match', counting_match), \
+            patch.object(SerpDomClassifier, '_walk', counting_walk):
+        organic, sponsored = parser._extract_all_results(soup)
+
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parser._extract_all_results(soup)
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, visits['count'], len(organic), len(sponsored)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('paths', nargs='*', default=[str(DEFAULT_CORPUS)])
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    files = collect_serp_files(args.paths)
+    if not files:
+        print('No SERP HTML files found')
+        return 1
+
+    legacy = GoogleSearchParser(single_pass=False)
+    single_pass = GoogleSearchParser(single_pass=True)
+
+    header = f"{'document':<40} {'elements':>8} {'visits before':>14} {'visits after':>13} {'ms before':>10} {'ms after':>9} {'speedup':>8}"
+    print(header)
+    print('-' * len(header))
+
+    totals = {'before_ms': 0.0, 'after_ms': 0.0, 'before_visits': 0, 'after_visits': 0}
+    mismatches = []
+
+    for path in files:
+        soup = BeautifulSoup(path.read_bytes(), 'html.parser')
+        element_count = len(soup.find_all(True))
+
+        before_ms, before_visits, *before_counts = measure(legacy, soup, args.repeat)
+        after_ms, after_visits, *after_counts = measure(single_pass, soup, args.repeat)
+        if before_counts != after_counts:
+            mismatches.append(path.name)
+
+        totals['before_ms'] += before_ms
+        totals['after_ms'] += after_ms
+        totals['before_visits'] += before_visits
+        totals['after_visits'] += after_visits
+
+        speedup = before_ms / after_ms if after_ms else 0
+        print(
+            f"{path.name[:40]:<40} {element_count:>8} {before_visits:>14} {after_visits:>13} "
+            f"{before_ms:>10.2f} {after_ms:>9.2f} {speedup:>7.1f}x"
+        )
+
+    print('-' * len(header))
+    speedup = totals['before_ms'] / totals['after_ms'] if totals['after_ms'] else 0
+    print(
+        f"{'TOTAL (' + str(len(files)) + ' documents)':<40} {'':>8} {totals['before_visits']:>14} "
+        f"{totals['after_visits']:>13} {totals['before_ms']:>10.2f} {totals['after_ms']:>9.2f} {speedup:>7.1f}x"
+    )
+
+    if mismatches:
+        print(f"\nResult counts differ for: {', '.join(mismatches)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+SERP Parser Benchmark
+Runs GoogleSearchParser and RankingExtractor's rank stage over a directory of stored SERP HTML
+
+Runs offline without a database or environment configuration.
+
+Usage:
+    # Benchmark the checked-in corpus against its committed baseline
+    python scripts/benchmark_serp_parser.py --baseline tests/fixtures/serp_baseline.json
+
+    # Refresh the committed baseline after regenerating the corpus or changing the parser
+    python scripts/benchmark_serp_parser.py --save-baseline tests/fixtures/serp_baseline.json
+
+    # Benchmark stored crawls and write a baseline
+    python scripts/benchmark_serp_parser.py storage/scrape_do --save-baseline serp_baseline.json
+
+    # Compare against the baseline, exit 1 if throughput drops more than 10%
+    python scripts/benchmark_serp_parser.py storage/scrape_do --baseline serp_baseline.json --threshold 0.10
+"""
+
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from services.serp_benchmark import (  # noqa: E402
+    SerpBenchmark,
+    collect_serp_files,
+    compare_with_baseline,
+    load_baseline,
+    save_baseline,
+)
+
+DEFAULT_CORPUS = PROJECT_ROOT / 'tests' / 'fixtures' / 'serp'
+
+
+def load_ranking_extractor():
+    """
+    Import RankingExtractor with a minimal in-memory Django configuration
+
+    Returns:
+        RankingExtractor instance or None if the models cannot be loaded
+    """
+    import django
+    from django.conf import settings
+
+    try:
+        if not settings.configured:
+            settings.configure(
+                INSTALLED_APPS=[
+                    'django.contrib.contenttypes',
+                    'django.contrib.auth',
+                    'accounts',
+                    'project',
+                    'keywords',
+                ],
+                AUTH_USER_MODEL='accounts.User',
+                DATABASES={},
+                USE_TZ=True,
+            )
+            django.setup()
+
+        from keywords.ranking_extractor import RankingExtractor
+        return RankingExtractor()
+    except Exception as e:
+        print(f"Rank stage disabled: {e}")
+        return None
+
+
+def print_report(report, top_stages=8):
+    """Print a human readable summary of a benchmark report"""
+    print(f"{'document':<40} {'KB':>8} {'parse ms':>10} {'peak MB':>8} {'organic':>8} {'ads':>5}")
+    print('-' * 84)
+    for doc in report['documents']:
+        print(
+            f"{doc['document'][:40]:<40} {doc['bytes'] / 1024:>8.1f} {doc['parse_ms']:>10.2f} "
+            f"{doc['peak_memory_bytes'] / 1_000_000:>8.2f} "
+            f"{doc['features'].get('organic_results', 0):>8} {doc['features'].get('sponsored_results', 0):>5}"
+        )
+
+    summary = report['summary']
+    print('-' * 84)
+    print(
+        f"{summary['documents']} documents, {summary['total_parse_ms']:.1f} ms total, "
+        f"{summary['docs_per_second']:.2f} docs/s, {summary['mb_per_second']:.2f} MB/s, "
+        f"peak {summary['max_peak_memory_bytes'] / 1_000_000:.2f} MB"
+    )
+
+    print('\nSlowest stages (inclusive ms across corpus):')
+    for stage, ms in list(summary['stages_ms'].items())[:top_stages]:
+        print(f"  {stage:<28} {ms:>10.2f}")
+
+    print('\nSERP features (SERPs / items):')
+    for feature, counts in summary['features'].items():
+        print(f"  {feature:<28} {counts['serps']:>5} / {counts['items']}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('paths', nargs='*', default=[str(DEFAULT_CORPUS)], help='HTML files or directories')
+    arg_parser.add_argument('--profile', default='full', choices=('full', 'rank'))
+    arg_parser.add_argument('--repeat', type=int, default=3, help='Timed runs per document (median reported)')
+    arg_parser.add_argument('--domain', default='example.com', help='Domain to rank in the rank stage')
+    arg_parser.add_argument('--no-rank', action='store_true', help='Skip the RankingExtractor rank stage')
+    arg_parser.add_argument('--save-baseline', metavar='PATH', help='Write the report as a JSON baseline')
+    arg_parser.add_argument('--baseline', metavar='PATH', help='Compare against a JSON baseline')
+    arg_parser.add_argument('--threshold', type=float, default=0.10, help='Allowed throughput drop (fraction)')
+    arg_parser.add_argument('--per-document', action='store_true', help='Apply the threshold to every document')
+    arg_parser.add_argument('--json', action='store_true', help='Print the full report as JSON')
+    args = arg_parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    files = collect_serp_files(args.paths)
+    if not files:
+        print('No SERP HTML files found')
+        return 1
+
+    benchmark = SerpBenchmark(
+        profile=args.profile,
+        repeat=args.repeat,
+        ranking_extractor=None if args.no_rank else load_ranking_extractor(),
+        domain=args.domain
+    )
+    report = benchmark.run(files)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+    if args.save_baseline:
+        save_baseline(report, args.save_baseline)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = load_baseline(args.baseline)
+        regressions = compare_with_baseline(report, baseline, args.threshold, per_document=args.per_document)
+        if regressions:
+            print(f"\nREGRESSION against {args.baseline}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(
+            f"\nOK: {report['summary']['docs_per_second']:.2f} docs/s vs baseline "
+            f"{baseline['summary']['docs_per_second']:.2f} docs/s (threshold {args.threshold:.0%})"
+        )
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+"""
+SERP Fixture Generator
+Writes full-page, anonymized Google desktop SERPs for the parser corpus in
+tests/fixtures/serp, one file per result layout.
+
+The pages follow the markup Scrape.do returns for a desktop Google search:
+a head with large inline style and script blocks (most of a real page's
+bytes), the search form and app bar, #rso with MjjYud-wrapped result
+blocks, SERP features with their real container classes, #botstuff and
+the footer. Everything that identifies a user or session is synthetic:
+ei/ved/hveid tokens, ping URLs, thumbnails and the footer location. Output
+is deterministic, so regenerating without changes gives identical files.
+
+Layouts:
+    desktop_organic_ads_sitelinks  top and bottom text ads with sitelinks,
+                                   ten organic results, related searches
+    desktop_local_pack             local pack with map and place cards
+    desktop_featured_snippet_paa   featured snippet and People also ask
+    desktop_top_stories_videos     top stories and video carousels
+    desktop_shopping_knowledge     shopping ads and a knowledge panel
+
+Usage:
+    python scripts/generate_serp_fixtures.py
+    python scripts/generate_serp_fixtures.py --output /tmp/serp --layout desktop_local_pack
+"""
+
+import argparse
+import base64
+import html
+import random
+import string
+import sys
+from pathlib import Path
+from urllib.parse import quote, urlencode
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_OUTPUT = PROJECT_ROOT / 'tests' / 'fixtures' / 'serp'
+
+TOKEN_CHARS = string.ascii_letters + string.digits + '-_'
+
+
+class Page:
+    """Synthetic tokens and page furniture for one SERP"""
+
+    def __init__(self, query, seed):
+        self.query = query
+        self.rng = random.Random(seed)
+        self.ei = self.token(22)
+        self.hveid_counter = 0
+        self.image_counter = 0
+        self.images = {}
+
+    def token(self, length):
+        return ''.join(self.rng.choice(TOKEN_CHARS) for _ in range(length))
+
+    def ved(self):
+        return '2ahUKEwi' + self.token(35)
+
+    def hveid(self):
+        self.hveid_counter += 1
+        return f"CA{string.ascii_uppercase[self.hveid_counter % 26]}QAA"
+
+    def ping(self, url):
+        return '/url?' + urlencode({'sa': 't', 'source': 'web', 'rct': 'j', 'opi': '89978449', 'url': url,
+                                    'ved': self.ved()})
+
+    def class_name(self):
+        return self.rng.choice(string.ascii_letters) + self.token(5).replace('-', 'a').replace('_', 'b')
+
+    def thumbnail(self, size=1800):
+        """Reference to an inline JPEG set by script, like Google's dimg_ thumbnails"""
+        self.image_counter += 1
+        image_id = f"dimg_{self.token(6)}_{self.image_counter}"
+        payload = bytes(self.rng.getrandbits(8) for _ in range(size))
+        self.images[image_id] = 'data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQABAAD/' + base64.b64encode(payload).decode()
+        return image_id
+
+    def favicon(self):
+        payload = bytes(self.rng.getrandbits(8) for _ in range(220))
+        return 'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAABwAAAAcCAMAAABF0y+mAAAA' + base64.b64encode(payload).decode()
+
+    def stylesheet(self, rules):
+        properties = ('display:flex', 'margin:0 0 8px', 'padding:0 16px', 'color:#4d5156', 'font-size:14px',
+                      'line-height:22px', 'overflow:hidden', 'position:relative', 'border-radius:8px',
+                      'white-space:nowrap', 'text-overflow:ellipsis', 'background-color:#fff', 'max-width:600px',
+                      'flex-direction:column', 'align-items:center', 'cursor:pointer', 'box-sizing:border-box')
+        return ''.join(
+            f".{self.class_name()}{{{';'.join(self.rng.sample(properties, self.rng.randint(2, 6)))}}}"
+            for _ in range(rules)
+        )
+
+    def script(self, functions):
+        """Minified-looking JavaScript of Google's inline modules"""
+        parts = []
+        for _ in range(functions):
+            name, a, b = self.class_name(), self.class_name(), self.class_name()
+            body = self.rng.choice((
+                f"return {a}.{b}?{a}.{b}({self.rng.randint(0, 999)}):void 0",
+                f"var c=[];for(var d=0;d<{a}.length;d++)c.push({b}({a}[d]));return c",
+                f"{a}=String({a});return {a}.replace(/[\\s\\xa0]+/g,\" \").trim()",
+                f"if(!{a})throw Error(\"{self.token(4)}\");this.{b}={a};this.size={self.rng.randint(1, 64)}",
+                f"return Object.prototype.hasOwnProperty.call({a},\"{self.token(6)}\")",
+            ))
+            parts.append(f"function {name}({a},{b}){{{body}}}")
+        return f"(function(){{{';'.join(parts)}}}).call(this);"
+
+
+def text_ad(page, ad):
+    sitelinks = ''.join(
+        f'<div class="MhgNwc"><a class="ynAwRc" href="{html.escape(link)}" data-ved="{page.ved()}">'
+        f'<div class="fCBnFe">{html.escape(label)}</div></a></div>'
+        for label, link in ad.get('sitelinks', [])
+    )
+    return (
+        f'<div class="uEierd" data-hveid="{page.hveid()}" data-ved="{page.ved()}">'
+        f'<div data-text-ad="1" data-pla="0" class="{page.class_name()}" data-rw="{page.token(40)}">'
+        f'<div class="v5yQqb" jsname="UWckNb"><a class="sVXRqc" data-pcu="{html.escape(ad["url"])}" '
+        f'href="{html.escape(ad["url"])}" data-ved="{page.ved()}" data-agdh="arwt"><div class="CCgQ5 vCa9Yd QfkTvb N8QANc '
+        f'Va3FIb EE3Upf" role="heading" aria-level="3"><span>{html.escape(ad["title"])}</span></div>'
+        f'<div class="d8lRkd"><div class="dyjrff ob9lvb"><span class="U3A9Ac qV8iec">Sponsored</span></div>'
+        f'<span class="x2VHCd OSrXXb ob9lvb" role="text">{html.escape(ad["display"])}</span></div></a></div>'
+        f'<div class="MUxGbd yDYNvb lyLwlc" style="-webkit-line-clamp:2">{html.escape(ad["text"])}</div>'
+        f'{sitelinks}</div></div>'
+    )
+
+
+def organic(page, result):
+    url = result['url']
+    date = f'<span class="LEwnzc Sqrs4e"><span>{result["date"]}</span> — </span>' if result.get('date') else ''
+    sitelinks = ''
+    if result.get('sitelinks'):
+        rows = ''.join(
+            f'<tr><td class="cIkxbf"><h3 class="usJj9c"><a class="l" href="{html.escape(link)}" '
+            f'data-ved="{page.ved()}">{html.escape(label)}</a></h3><div class="zz3gNc">{html.escape(snippet)}</div></td></tr>'
+            for label, link, snippet in result['sitelinks']
+        )
+        sitelinks = f'<div class="HiHjCd"><table class="jmjoTe" role="presentation"><tbody>{rows}</tbody></table></div>'
+    host, _, path = url.partition('://')[2].partition('/')
+    crumbs = ''.join(f' › {html.escape(part)}' for part in path.strip('/').split('/')[:2] if part)
+    return (
+        f'<div class="MjjYud"><div jscontroller="SC7lYd" class="g Ww4FFb vt6azd tF2Cxc asEBEc" '
+        f'jsaction="QyLbLe:OMITTED;" data-hveid="{page.hveid()}" data-ved="{page.ved()}">'
+        f'<div class="N54PNb BToiNc cvP2Ce" data-snc="{page.token(6)}">'
+        f'<div class="kb0PBd cvP2Ce jGGQ5e" data-snf="x5WNvb" data-snhf="0"><div class="yuRUbf"><div>'
+        f'<span jscontroller="msmzHf" jsaction="rcuQ6b:npT2md;PYDNKe:bLV6Bd;mLt3mc">'
+        f'<a jsname="UWckNb" href="{html.escape(url)}" data-ved="{page.ved()}" ping="{html.escape(page.ping(url))}">'
+        f'<br><h3 class="LC20lb MBeuO DKV0Md">{html.escape(result["title"])}</h3>'
+        f'<div class="notranslate TbwUpd NJjxre iUh30 ojE3Fb"><span class="H9lube">'
+        f'<div class="eqA2re NjwKYd Vwoesf" aria-hidden="true"><img class="XNo5Ab" src="{page.favicon()}" '
+        f'style="height:18px;width:18px" alt="" data-atf="1" data-frt="0"></div></span><div>'
+        f'<span class="VuuXrf">{html.escape(result["site"])}</span><div class="byrV5b">'
+        f'<cite class="qLRx3b tjvcx GvPZzd cHaqb" role="text">https://{html.escape(host)}'
+        f'<span class="ylgVCe ob9lvb" role="text">{crumbs}</span></cite></div></div></div></a></span></div></div></div>'
+        f'<div class="kb0PBd cvP2Ce A9Y9g" data-sncf="1" data-snf="nke7rc">'
+        f'<div class="VwiC3b yXK7lf lVm3ye r025kc hJNv6b Hdw6tb" style="-webkit-line-clamp:2">'
+        f'{date}<span>{html.escape(result["snippet"])}</span></div></div>{sitelinks}</div></div></div>'
+    )
+
+
+def local_pack(page, places):
+    cards = ''.join(
+        f'<div jscontroller="AtSb" class="VkpGBb" data-hveid="{page.hveid()}"><div class="cXedhc">'
+        f'<a class="vwVdIc wzN8Ac rllt__link a-no-hover-decoration" data-cid="{page.rng.randint(10 ** 18, 10 ** 19)}" '
+        f'role="link" tabindex="0" data-ved="{page.ved()}"><div><div class="rllt__details">'
+        f'<div class="dbg0pd" role="heading" aria-level="3"><span class="OSrXXb">{html.escape(place["name"])}</span></div>'
+        f'<div><span class="Y0A0hc"><span class="yi40Hd YrbPuc" aria-hidden="true">{place["rating"]}</span>'
+        f'<span class="z3HNkc" aria-label="Rated {place["rating"]} out of 5,"><span style="width:{int(place["rating"] * 14)}px">'
+        f'</span></span><span class="RDApEe YrbPuc">({place["reviews"]})</span></span> · {html.escape(place["type"])}</div>'
+        f'<div>{html.escape(place["address"])} · <span class="LrzXr">{html.escape(place["phone"])}</span></div>'
+        f'<div><span class="ZkP5Je">{html.escape(place["hours"])}</span></div></div></div></a>'
+        f'<a class="yYlJEf Q7PwXb L48Cpd brKmxb" href="{html.escape(place["website"])}" data-ved="{page.ved()}">'
+        f'<span class="BSaJxc">Website</span></a></div></div>'
+        for place in places
+    )
+    return (
+        f'<div class="MjjYud"><div class="Qq3Lb" data-hveid="{page.hveid()}"><div jscontroller="ylyWH" '
+        f'data-loc="1" aria-label="Results for {html.escape(page.query)}"><h2 class="Uo8X3b OhScic zsYMMe">Places</h2>'
+        f'<div class="lu-fs" id="lu_map" data-ved="{page.ved()}"><img id="{page.thumbnail(9000)}" alt="Map of '
+        f'{html.escape(page.query)}" style="width:652px;height:202px"></div><div class="rlfl__tls rl_tls">{cards}</div>'
+        f'<a class="tiS4rf Q2MMlc" href="/search?tbs=lf:1&amp;tbm=lcl&amp;q={quote(page.query)}" data-ved="{page.ved()}">'
+        f'<span class="Z4Cazf OSrXXb">More places</span></a></div></div></div>'
+    )
+
+
+def featured_snippet(page, snippet):
+    items = ''.join(f'<li class="TrT0Xe">{html.escape(step)}</li>' for step in snippet['steps'])
+    url = snippet['url']
+    return (
+        f'<div class="MjjYud"><div class="ULSxyf"><div class="M8OgIe"><div class="kp-blk c2xzTb" data-hveid="{page.hveid()}">'
+        f'<div class="xpdopen"><div class="ifM9O"><div class="wDYxhc" data-md="83" data-tts="answers">'
+        f'<div class="di3YZe"><div class="co8aDb" role="heading" aria-level="3"><b>{html.escape(snippet["heading"])}</b></div>'
+        f'<div class="RqBzHd"><ol class="X5LH0c">{items}</ol></div></div></div>'
+        f'<div class="g" data-hveid="{page.hveid()}"><div class="yuRUbf"><a href="{html.escape(url)}" '
+        f'data-ved="{page.ved()}" ping="{html.escape(page.ping(url))}"><h3 class="LC20lb MBeuO DKV0Md">'
+        f'{html.escape(snippet["title"])}</h3><div class="TbwUpd"><cite class="iUh30">{html.escape(url)}</cite></div>'
+        f'</a></div></div></div></div></div></div></div></div>'
+    )
+
+
+def people_also_ask(page, questions):
+    pairs = ''.join(
+        f'<div class="related-question-pair" data-q="{html.escape(question)}" data-lk="{page.token(8)}">'
+        f'<div jsname="F79BRe" class="wQiwMc" data-ved="{page.ved()}"><div class="dnXCYb" role="button" tabindex="0" '
+        f'aria-expanded="false"><div class="JlqpRe"><span class="CSkcDe">{html.escape(question)}</span></div></div></div>'
+        f'</div>'
+        for question in questions
+    )
+    return (
+        f'<div class="MjjYud"><div class="cUnQKe" data-hveid="{page.hveid()}"><div data-attrid="PeopleAlsoAsk" '
+        f'data-ved="{page.ved()}"><div class="Wt5Tfe"><div class="YR2tRd"><h2 class="adDDi">People also ask</h2>'
+        f'</div>{pairs}</div></div></div></div>'
+    )
+
+
+def top_stories(page, stories):
+    cards = ''.join(
+        f'<g-inner-card class="{page.class_name()}"><div class="SoaBEf" role="listitem"><a class="WlydOe" '
+        f'href="{html.escape(story["url"])}" data-ved="{page.ved()}"><div class="mCBkyc tNxQIb ynAwRc" role="heading" '
+        f'aria-level="3">{html.escape(story["title"])}</div><div class="CEMjEf NUnG9d"><span>{html.escape(story["source"])}'
+        f'</span></div><div class="OSrXXb"><span class="WG9SHc">{html.escape(story["age"])}</span></div>'
+        f'<img id="{page.thumbnail()}" alt="" style="height:92px;width:92px"></a></div></g-inner-card>'
+        for story in stories
+    )
+    return (
+        f'<div class="MjjYud"><g-section-with-header class="yG4QQe TBC9ub" data-hveid="{page.hveid()}">'
+        f'<div aria-label="Top stories" role="heading" aria-level="2" class="e2BEnf U7izfe">Top stories</div>'
+        f'<g-scrolling-carousel data-title="news" class="{page.class_name()}"><div class="ftSUBd">{cards}</div>'
+        f'</g-scrolling-carousel></g-section-with-header></div>'
+    )
+
+
+def videos(page, items):
+    cards = ''.join(
+        f'<div class="RzdJxc" data-vid="{page.token(11)}" data-hveid="{page.hveid()}"><a href="{html.escape(video["url"])}" '
+        f'data-ved="{page.ved()}"><div class="fc9yUc tNxQIb ynAwRc OSrXXb" role="heading" aria-level="3">'
+        f'{html.escape(video["title"])}</div><img id="{page.thumbnail(2600)}" alt="" style="height:90px;width:160px">'
+        f'<span class="mNr4H" aria-label="Duration {video["duration"]}">{video["duration"]}</span></a>'
+        f'<div class="Sg4azc"><cite class="qLRx3b">{html.escape(video["platform"])}</cite> · '
+        f'<span class="fG8Fp">{html.escape(video["date"])}</span></div></div>'
+        for video in items
+    )
+    return (
+        f'<div class="MjjYud"><div class="ULSxyf"><div jscontroller="Ag6Ddf" data-init-vis="true" class="VibNM">'
+        f'<div class="e2BEnf U7izfe" role="heading" aria-level="2">Videos</div>'
+        f'<g-scrolling-carousel class="{page.class_name()}">{cards}</g-scrolling-carousel></div></div></div>'
+    )
+
+
+def shopping(page, products):
+    units = ''.join(
+        f'<div class="mnr-c pla-unit" data-hveid="{page.hveid()}" data-dtld="{html.escape(product["store"])}">'
+        f'<a class="plantl pla-unit-single-clickable-target" href="{html.escape(product["url"])}" data-ved="{page.ved()}">'
+        f'<img id="{page.thumbnail(2200)}" alt="" style="height:130px;width:130px"></a>'
+        f'<div class="pygFLb"><span>{html.escape(product["name"])}</span></div><div class="T4OwTb">'
+        f'<span class="e10twf">{product["price"]}</span></div><div class="LbUacb"><span class="vjtvZc">'
+        f'{html.escape(product["store"])}</span></div><span class="z3HNkc" aria-label="Rated {product["rating"]} out of 5 stars">'
+        f'</span></div>'
+        for product in products
+    )
+    return (
+        f'<div class="MjjYud"><div class="commercial-unit commercial-unit-desktop-top" data-hveid="{page.hveid()}">'
+        f'<div class="cu-container"><h3 class="Uo8X3b">Sponsored · Shop {html.escape(page.query)}</h3>'
+        f'<g-scrolling-carousel class="{page.class_name()}">{units}</g-scrolling-carousel></div></div></div>'
+    )
+
+
+def knowledge_panel(page, panel):
+    facts = ''.join(
+        f'<div class="wDYxhc" data-attrid="kc:/{page.token(6)}"><span class="w8qArf"><b>{html.escape(label)}</b>: </span>'
+        f'<span class="LrzXr kno-fv">{html.escape(value)}</span></div>'
+        for label, value in panel['facts']
+    )
+    return (
+        f'<div id="rhs" class="TQc1id" role="complementary"><div class="kp-wholepage ss6qqb" data-hveid="{page.hveid()}">'
+        f'<g-img class="ivg-i"><img data-atf="1" id="{page.thumbnail(5200)}" src="data:image/gif;base64,R0lGODlhAQABAIAAAP'
+        f'///////yH5BAEKAAEALAAAAAABAAEAAAICTAEAOw==" alt="{html.escape(panel["title"])}"></g-img>'
+        f'<div data-attrid="title" role="heading" aria-level="2"><h2 class="qrShPb">{html.escape(panel["title"])}</h2></div>'
+        f'<div data-attrid="subtitle" class="wwUB2c"><span>{html.escape(panel["subtitle"])}</span></div>'
+        f'<div class="kno-rdesc" data-attrid="description"><span>{html.escape(panel["description"])}</span> '
+        f'<a class="ruhjFe" href="{html.escape(panel["source"])}">Wikipedia</a></div>{facts}</div></div>'
+    )
+
+
+def related_searches(page, searches):
+    links = ''.join(
+        f'<div class="s75CSd u60jwe r2fjmd AB4Wff"><a class="ngTNl ggLgoc" href="/search?q={quote(search)}" '
+        f'data-ved="{page.ved()}"><div class="b2Rnsc vIifob">{html.escape(search)}</div></a></div>'
+        for search in searches
+    )
+    return (
+        f'<div id="bres" class="{page.class_name()}"><div class="ULSxyf"><div class="oIk2Cb">'
+        f'<div class="adDDi" role="heading" aria-level="2">People also search for</div>'
+        f'<div class="y6Uyqe"><div class="AJLUJb">{links}</div></div></div></div></div>'
+    )
+
+
+def render_page(page, blocks, top_ads=(), bottom_ads=(), rhs='', related=(), total='About 1,000,000 results',
+                seconds='0.41'):
+    query = html.escape(page.query)
+    styles = ''.join(f'<style nonce="{page.token(22)}">{page.stylesheet(400)}</style>' for _ in range(3))
+    scripts = ''.join(f'<script nonce="{page.token(22)}">{page.script(220)}</script>' for _ in range(6))
+
+    top = ''
+    if top_ads:
+        top = (f'<div id="tvcap"><div id="tads" aria-label="Ads" class="{page.class_name()}"><h1 class="bNg8Rb OhScic '
+               f'zsYMMe BBwThe">Ads</h1>{"".join(text_ad(page, ad) for ad in top_ads)}</div></div>')
+    bottom = ''
+    if bottom_ads:
+        bottom = (f'<div id="bottomads"><div id="tadsb" aria-label="Ads"><h1 class="bNg8Rb">Ads</h1>'
+                  f'{"".join(text_ad(page, ad) for ad in bottom_ads)}</div></div>')
+
+    pages = ''.join(
+        f'<td><a aria-label="Page {n}" class="fl" href="/search?q={quote(page.query)}&amp;start={(n - 1) * 10}">'
+        f'<span class="SJajHc NVbCr"></span>{n}</a></td>'
+        for n in range(2, 11)
+    )
+    image_script = ';'.join(
+        f"(function(){{var s='{data}';var ii=['{image_id}'];_setImagesSrc(ii,s);}})()"
+        for image_id, data in page.images.items()
+    )
+
+    return (
+        '<!doctype html><html itemscope="" itemtype="http://schema.org/SearchResultsPage" lang="en"><head>'
+        '<meta charset="UTF-8"><meta content="/images/branding/googleg/1x/googleg_standard_color_128dp.png" '
+        'itemprop="image"><meta content="origin" name="referrer">'
+        f'<title>{query} - Google Search</title>'
+        f'<script nonce="{page.token(22)}">(function(){{window.google={{kEI:\'{page.ei}\',kEXPI:\'0,'
+        f'{",".join(str(page.rng.randint(10 ** 6, 10 ** 7)) for _ in range(120))}\',kBL:\'{page.token(4)}\','
+        f'kOPI:89978449}};google.sn=\'web\';google.kHL=\'en\';}})();</script>'
+        f'{styles}{scripts}</head>'
+        f'<body jsmodel="hspDDf" jsaction="xjhTIf:.CLIENT;O2vyse:.CLIENT;IVKTfe:.CLIENT" class="srp" marginheight="3" '
+        f'topmargin="3" id="gsr"><div id="searchform" class="CvDJxb"><form class="tsf" action="/search" role="search" '
+        f'method="GET" name="f"><div class="A8SBwf"><div class="RNNXgb"><textarea class="gLFyf" name="q" '
+        f'aria-label="Search" role="combobox" maxlength="2048">{query}</textarea></div></div>'
+        f'<input value="{page.token(30)}" name="sca_esv" type="hidden"><input name="ei" value="{page.ei}" type="hidden">'
+        f'</form></div><div id="appbar" class="{page.class_name()}"><div id="slim_appbar"><div id="result-stats">'
+        f'{total}<nobr> ({seconds} seconds)&nbsp;</nobr></div></div></div>'
+        f'<div id="rcnt" class="GyAeWb"><div id="center_col" class="s6JM6d">{top}'
+        f'<div id="res" role="main"><div id="search"><div data-async-context="query:{quote(page.query)}">'
+        f'<h1 class="bNg8Rb OhScic zsYMMe BBwThe">Search Results</h1><div id="rso" class="dURPMd">'
+        f'{"".join(blocks)}</div></div></div></div>{bottom}'
+        f'<div id="botstuff">{related_searches(page, related) if related else ""}'
+        f'<div role="navigation"><table class="AaVjTc" role="presentation"><tbody><tr><td class="YyVfkd">'
+        f'<span class="SJajHc"></span>1</td>{pages}</tr></tbody></table></div></div></div>{rhs}</div>'
+        f'<div id="footcnt"><div id="fbarcnt"><div class="fbar"><span class="EYqSq unknown_loc"></span>'
+        f'<span class="dfB0uf">United States</span> - <span>From your IP address</span></div></div></div>'
+        f'<script nonce="{page.token(22)}">{image_script}</script>'
+        f'<script nonce="{page.token(22)}">{page.script(160)}</script></body></html>'
+    )
+
+
+def organic_results(page, site_results):
+    return [organic(page, result) for result in site_results]
+
+
+def desktop_organic_ads_sitelinks():
+    page = Page('project management software', seed=101)
+    top_ads = [
+        {'url': 'https://www.taskgrid.example/plans', 'display': 'www.taskgrid.example/plans',
+         'title': 'TaskGrid™ Project Management - Plan, Track & Ship Faster',
+         'text': 'Boards, timelines and workload views in one place. Start a free 14-day trial today.',
+         'sitelinks': [('Pricing', 'https://www.taskgrid.example/pricing'),
+                       ('Templates', 'https://www.taskgrid.example/templates'),
+                       ('Integrations', 'https://www.taskgrid.example/integrations')]},
+        {'url': 'https://get.flowboard.example/teams', 'display': 'get.flowboard.example',
+         'title': 'Flowboard for Teams | Visual Project Planning',
+         'text': 'Drag-and-drop planning for teams of every size. Free for up to 10 users.'},
+        {'url': 'https://www.crewplan.example/', 'display': 'www.crewplan.example',
+         'title': 'Crewplan - Resource Planning Made Simple',
+         'text': 'See who is working on what. Capacity planning, time tracking and reports.'},
+    ]
+    bottom_ads = [
+        {'url': 'https://www.sprintly.example/compare', 'display': 'www.sprintly.example/compare',
+         'title': 'Compare Project Tools - Sprintly vs. the Rest',
+         'text': 'Side-by-side comparison of features, pricing and support.'},
+        {'url': 'https://www.ganttway.example/', 'display': 'www.ganttway.example',
+         'title': 'GanttWay Online Gantt Charts',
+         'text': 'Interactive Gantt charts with dependencies and baselines.'},
+    ]
+    results = [
+        {'url': 'https://www.taskgrid.example/', 'site': 'TaskGrid', 'title': 'TaskGrid: Project Management Software for Teams',
+         'snippet': 'Plan projects, assign tasks and follow progress on boards, lists and timelines.',
+         'sitelinks': [('Features', 'https://www.taskgrid.example/features', 'Boards, timelines, workload and more.'),
+                       ('Pricing', 'https://www.taskgrid.example/pricing', 'Free, Team and Business plans.'),
+                       ('Log in', 'https://app.taskgrid.example/login', 'Sign in to your workspace.'),
+                       ('Templates', 'https://www.taskgrid.example/templates', 'Start from 200+ templates.')]},
+        {'url': 'https://www.techreviewer.example/best-project-management-software', 'site': 'TechReviewer',
+         'title': 'The 12 Best Project Management Software of 2026', 'date': 'Feb 12, 2026',
+         'snippet': 'We tested 40 tools over six months with real teams to find the best options for every budget.'},
+        {'url': 'https://en.wikipedia.org/wiki/Project_management_software', 'site': 'Wikipedia',
+         'title': 'Project management software - Wikipedia',
+         'snippet': 'Project management software is software used for project planning, scheduling and resource allocation.'},
+        {'url': 'https://www.reddit.com/r/projectmanagement/comments/1k2j3h/what_tool_do_you_use/', 'site': 'Reddit',
+         'title': 'What tool do you use for project management? : r/projectmanagement',
+         'snippet': 'We moved from spreadsheets to a kanban tool last year and never looked back.'},
+        {'url': 'https://www.flowboard.example/guides/project-management', 'site': 'Flowboard',
+         'title': 'What Is Project Management Software? A Complete Guide',
+         'snippet': 'Learn how project management software works, which features matter and how to choose one.'},
+        {'url': 'https://www.softwarecompare.example/project-management/', 'site': 'SoftwareCompare',
+         'title': 'Best Project Management Software 2026 - Reviews & Pricing',
+         'snippet': 'Find the best project management software for your business. Compare product reviews and features.'},
+        {'url': 'https://www.example.com/project-management', 'site': 'Example',
+         'title': 'Project Management Software | Example',
+         'snippet': 'Organize work, automate workflows and report on every project from one workspace.'},
+        {'url': 'https://www.pmjournal.example/articles/choosing-a-pm-tool', 'site': 'PM Journal',
+         'title': 'How to Choose a Project Management Tool in 2026', 'date': 'Jan 8, 2026',
+         'snippet': 'Five questions to ask before you commit your team to a new tool.'},
+        {'url': 'https://www.youtube.com/watch?v=q8z2pmtools', 'site': 'YouTube',
+         'title': 'Top 5 Project Management Tools Compared - YouTube',
+         'snippet': 'A walkthrough of the five most popular tools with pros and cons for small teams.'},
+        {'url': 'https://www.smallbiz.example/tools/project-management', 'site': 'SmallBiz',
+         'title': 'Free and Low-Cost Project Management Apps for Small Business',
+         'snippet': 'Our picks for teams on a budget, including free plans that scale.'},
+    ]
+    related = ['project management software free', 'best project management software', 'project management tools list',
+               'project management software for small business', 'agile project management software',
+               'construction project management software', 'project management software comparison',
+               'open source project management software']
+    return render_page(page, organic_results(page, results), top_ads=top_ads, bottom_ads=bottom_ads, related=related,
+                       total='About 2,870,000,000 results', seconds='0.52')
+
+
+def desktop_local_pack():
+    page = Page('emergency plumber', seed=202)
+    top_ads = [
+        {'url': 'https://www.rapidrooter.example/emergency', 'display': 'www.rapidrooter.example',
+         'title': '24/7 Emergency Plumber - On Site in 60 Minutes',
+         'text': 'Licensed and insured plumbers. Upfront pricing, no overtime charges.'},
+        {'url': 'https://www.pipepros.example/book', 'display': 'www.pipepros.example/book',
+         'title': 'Pipe Pros Plumbing | Book Online Now',
+         'text': 'Burst pipes, leaks and blocked drains fixed fast. Call or book online.'},
+    ]
+    places = [
+        {'name': 'Northside Plumbing & Heating', 'rating': 4.8, 'reviews': 412, 'type': 'Plumber',
+         'address': '1200 Elm St', 'phone': '(555) 014-2233', 'hours': 'Open 24 hours',
+         'website': 'https://www.northsideplumbing.example/'},
+        {'name': 'Rapid Rooter Drain Service', 'rating': 4.6, 'reviews': 1093, 'type': 'Plumber',
+         'address': '87 Harbor Ave', 'phone': '(555) 019-7781', 'hours': 'Open 24 hours',
+         'website': 'https://www.rapidrooter.example/'},
+        {'name': 'Ortiz Family Plumbing', 'rating': 4.9, 'reviews': 268, 'type': 'Plumber',
+         'address': '45 Mill Rd', 'phone': '(555) 010-4402', 'hours': 'Closes 8 PM',
+         'website': 'https://www.ortizplumbing.example/'},
+    ]
+    results = [
+        {'url': 'https://www.rapidrooter.example/emergency-plumbing/', 'site': 'Rapid Rooter',
+         'title': 'Emergency Plumbing Services - Available 24/7 | Rapid Rooter',
+         'snippet': 'When a pipe bursts you need help now. Our plumbers are on call around the clock.'},
+        {'url': 'https://www.homeservices.example/plumbers/emergency', 'site': 'HomeServices',
+         'title': 'Top 10 Emergency Plumbers Near You (with Reviews)',
+         'snippet': 'Compare rated local plumbers and get quotes in minutes.'},
+        {'url': 'https://www.northsideplumbing.example/', 'site': 'Northside Plumbing',
+         'title': 'Northside Plumbing & Heating | Emergency Plumber',
+         'snippet': 'Family owned since 1987. Leak detection, water heaters and drain cleaning.'},
+        {'url': 'https://www.example.com/emergency-plumber', 'site': 'Example',
+         'title': 'Emergency Plumber - Fast Response | Example',
+         'snippet': 'Call now for burst pipes, leaks and blocked drains. Same-day service.'},
+        {'url': 'https://www.diyhome.example/what-to-do-burst-pipe', 'site': 'DIY Home',
+         'title': 'What to Do When a Pipe Bursts: 7 Steps', 'date': 'Dec 2, 2025',
+         'snippet': 'Shut off the main valve, open the faucets and call a licensed plumber.'},
+        {'url': 'https://www.costguide.example/plumbing/emergency-plumber-cost', 'site': 'CostGuide',
+         'title': 'How Much Does an Emergency Plumber Cost? (2026)',
+         'snippet': 'Expect a call-out fee plus an hourly rate that is higher at night and on weekends.'},
+        {'url': 'https://www.nextdoorhub.example/pages/plumbers', 'site': 'NextdoorHub',
+         'title': 'Plumbers recommended by your neighbors',
+         'snippet': 'See which plumbers your neighbors trust, with recommendations and photos.'},
+        {'url': 'https://www.ortizplumbing.example/services/', 'site': 'Ortiz Family Plumbing',
+         'title': 'Plumbing Services | Ortiz Family Plumbing',
+         'snippet': 'Repairs, repiping, fixture installs and emergency calls.'},
+    ]
+    blocks = [local_pack(page, places)] + organic_results(page, results)
+    return render_page(page, blocks, top_ads=top_ads, bottom_ads=top_ads[:1], total='About 41,300,000 results',
+                       seconds='0.47')
+
+
+def desktop_featured_snippet_paa():
+    page = Page('how to descale a coffee maker', seed=303)
+    snippet = {
+        'heading': 'How to descale a coffee maker',
+        'steps': ['Fill the reservoir with equal parts white vinegar and water.',
+                  'Start a brew cycle and stop it halfway through.',
+                  'Let it sit for 30 minutes, then finish the cycle.',
+                  'Run two or three cycles with fresh water to rinse.'],
+        'url': 'https://www.kitchenlab.example/how-to-descale-coffee-maker',
+        'title': 'How to Descale a Coffee Maker (Step by Step) - KitchenLab',
+    }
+    questions = ['Can I descale my coffee maker with vinegar?', 'How often should you descale a coffee maker?',
+                 'What happens if you never descale your coffee maker?', 'Is descaling solution better than vinegar?']
+    results = [
+        {'url': 'https://www.kitchenlab.example/how-to-descale-coffee-maker', 'site': 'KitchenLab',
+         'title': 'How to Descale a Coffee Maker (Step by Step) - KitchenLab', 'date': 'Sep 30, 2025',
+         'snippet': 'Mineral buildup slows brewing and changes the taste. Here is how to remove it.'},
+        {'url': 'https://www.cleaningtips.example/descale-coffee-machine', 'site': 'CleaningTips',
+         'title': 'Descaling Your Coffee Machine: Vinegar vs. Citric Acid',
+         'snippet': 'Citric acid leaves less smell behind, while vinegar is cheap and easy to find.'},
+        {'url': 'https://support.brewmaster.example/articles/descaling', 'site': 'BrewMaster Support',
+         'title': 'Descaling your BrewMaster coffee maker',
+         'snippet': 'When the descale light comes on, use the included solution and follow these steps.'},
+        {'url': 'https://www.example.com/blog/descale-coffee-maker', 'site': 'Example',
+         'title': 'Descale a Coffee Maker in 4 Easy Steps | Example Blog',
+         'snippet': 'A clean machine makes better coffee. Our quick guide takes 30 minutes.'},
+        {'url': 'https://www.reddit.com/r/Coffee/comments/9x8c7v/descaling_tips/', 'site': 'Reddit',
+         'title': 'Descaling tips? : r/Coffee',
+         'snippet': 'I use a citric acid solution every two months and rinse three times.'},
+        {'url': 'https://www.homeguide.example/kitchen/coffee-maker-cleaning', 'site': 'HomeGuide',
+         'title': 'How to Clean a Coffee Maker Inside and Out',
+         'snippet': 'Daily, weekly and monthly cleaning for drip machines, pod brewers and espresso makers.'},
+        {'url': 'https://www.youtube.com/watch?v=descale42x', 'site': 'YouTube',
+         'title': 'How To Descale Any Coffee Maker - YouTube',
+         'snippet': 'A quick video guide to descaling drip and single-serve machines.'},
+        {'url': 'https://www.waterquality.example/hard-water-appliances', 'site': 'WaterQuality',
+         'title': 'Hard Water and Your Appliances',
+         'snippet': 'Why scale forms in kettles and coffee makers and how to prevent it.'},
+        {'url': 'https://www.consumerlab.example/coffee-makers/care', 'site': 'ConsumerLab',
+         'title': 'Coffee Maker Care: What Our Tests Found',
+         'snippet': 'Machines descaled monthly brewed hotter and faster in our lab tests.'},
+    ]
+    blocks = [featured_snippet(page, snippet), people_also_ask(page, questions)] + organic_results(page, results)
+    related = ['how to descale a coffee maker with vinegar', 'how to descale a coffee maker without vinegar',
+               'descaling solution', 'how to clean a coffee maker with baking soda']
+    return render_page(page, blocks, related=related, total='About 9,420,000 results', seconds='0.38')
+
+
+def desktop_top_stories_videos():
+    page = Page('electric vehicle tax credit', seed=404)
+    stories = [
+        {'url': 'https://www.dailyledger.example/2026/10/ev-credit-changes', 'source': 'Daily Ledger',
+         'title': 'What the new EV tax credit rules mean for buyers', 'age': '3 hours ago'},
+        {'url': 'https://www.autowire.example/news/ev-credit-dealers', 'source': 'AutoWire',
+         'title': 'Dealers report rush of EV sales ahead of credit deadline', 'age': '7 hours ago'},
+        {'url': 'https://www.citypost.example/business/ev-incentives', 'source': 'City Post',
+         'title': 'State EV incentives: a guide by region', 'age': '1 day ago'},
+    ]
+    items = [
+        {'url': 'https://www.youtube.com/watch?v=evcredit01', 'title': 'EV Tax Credit Explained in 5 Minutes',
+         'duration': '5:12', 'platform': 'YouTube · Money Matters', 'date': 'Sep 18, 2026'},
+        {'url': 'https://www.youtube.com/watch?v=evcredit02', 'title': 'Which EVs Still Qualify for the Credit?',
+         'duration': '11:47', 'platform': 'YouTube · Plug In Weekly', 'date': 'Aug 2, 2026'},
+        {'url': 'https://www.videohub.example/v/ev-credit-dealer', 'title': 'Claiming the credit at the dealership',
+         'duration': '3:05', 'platform': 'VideoHub', 'date': 'Jul 21, 2026'},
+    ]
+    results = [
+        {'url': 'https://www.irs.gov/credits-deductions/credits-for-new-clean-vehicles', 'site': 'IRS',
+         'title': 'Credits for new clean vehicles purchased in 2023 or after',
+         'snippet': 'You may qualify for a credit up to $7,500 if you buy a new, qualified plug-in EV or fuel cell vehicle.'},
+        {'url': 'https://fueleconomy.gov/feg/tax2023.shtml', 'site': 'FuelEconomy.gov',
+         'title': 'Federal Tax Credits for Plug-in Electric and Fuel Cell Vehicles',
+         'snippet': 'Find out which vehicles qualify and how the credit is calculated.'},
+        {'url': 'https://www.example.com/guides/ev-tax-credit', 'site': 'Example',
+         'title': 'EV Tax Credit Guide 2026 | Example',
+         'snippet': 'Income limits, price caps and how to transfer the credit to the dealer.'},
+        {'url': 'https://www.taxhelp.example/ev-credit-faq', 'site': 'TaxHelp',
+         'title': 'EV Tax Credit FAQ: Eligibility, Limits and Deadlines', 'date': 'Oct 1, 2026',
+         'snippet': 'Answers to the most common questions about claiming the clean vehicle credit.'},
+        {'url': 'https://www.autowire.example/ev-credit-list', 'site': 'AutoWire',
+         'title': 'Every EV That Qualifies for the Federal Tax Credit',
+         'snippet': 'Our list is updated weekly as manufacturers change sourcing.'},
+        {'url': 'https://en.wikipedia.org/wiki/Plug-in_electric_vehicle_policies', 'site': 'Wikipedia',
+         'title': 'Plug-in electric vehicle policies - Wikipedia',
+         'snippet': 'Governments have introduced policies and incentives to promote plug-in electric vehicles.'},
+        {'url': 'https://www.reddit.com/r/electricvehicles/comments/7h6g5f/tax_credit_question/', 'site': 'Reddit',
+         'title': 'Tax credit question : r/electricvehicles',
+         'snippet': 'Did anyone get the credit applied at the point of sale? How did it go?'},
+        {'url': 'https://www.energy.gov/save/ev-incentives', 'site': 'Energy.gov',
+         'title': 'Electric Vehicle Incentives',
+         'snippet': 'Federal, state and utility incentives for buying and charging an EV.'},
+    ]
+    blocks = [top_stories(page, stories)] + organic_results(page, results[:3]) + [videos(page, items)] + \
+        organic_results(page, results[3:])
+    related = ['ev tax credit 2026 list', 'ev tax credit income limit', 'used ev tax credit', 'ev tax credit lease']
+    return render_page(page, blocks, related=related, total='About 187,000,000 results', seconds='0.44')
+
+
+def desktop_shopping_knowledge():
+    page = Page('standing desk', seed=505)
+    products = [
+        {'name': 'Lumen Pro Electric Standing Desk 60"', 'price': '$449.99', 'store': 'DeskDepot',
+         'url': 'https://www.deskdepot.example/lumen-pro-60', 'rating': 4.6},
+        {'name': 'Oakline Dual-Motor Sit Stand Desk', 'price': '$629.00', 'store': 'Oakline',
+         'url': 'https://www.oakline.example/dual-motor', 'rating': 4.8},
+        {'name': 'FlexRise Compact Standing Desk 48"', 'price': '$279.95', 'store': 'OfficeMart',
+         'url': 'https://www.officemart.example/flexrise-48', 'rating': 4.3},
+        {'name': 'Ergonest L-Shaped Standing Desk', 'price': '$799.00', 'store': 'Ergonest',
+         'url': 'https://www.ergonest.example/l-shaped', 'rating': 4.5},
+        {'name': 'Bamboo Top Height Adjustable Desk', 'price': '$519.00', 'store': 'GreenWork',
+         'url': 'https://www.greenwork.example/bamboo-desk', 'rating': 4.7},
+        {'name': 'Desktop Riser Converter 32"', 'price': '$139.99', 'store': 'DeskDepot',
+         'url': 'https://www.deskdepot.example/riser-32', 'rating': 4.2},
+    ]
+    panel = {
+        'title': 'Standing desk', 'subtitle': 'Furniture',
+        'description': 'A standing desk, or stand-up desk, is a desk conceived for writing, reading or drawing '
+                       'while standing up or while sitting on a high stool.',
+        'source': 'https://en.wikipedia.org/wiki/Standing_desk',
+        'facts': [('Type', 'Desk'), ('Related', 'Treadmill desk, Sit-stand desk')],
+    }
+    results = [
+        {'url': 'https://www.deskdepot.example/standing-desks', 'site': 'DeskDepot',
+         'title': 'Standing Desks - Electric & Manual | DeskDepot',
+         'snippet': 'Shop electric, manual and converter standing desks. Free shipping over $99.'},
+        {'url': 'https://www.techreviewer.example/best-standing-desks', 'site': 'TechReviewer',
+         'title': 'The Best Standing Desks for 2026, Tested', 'date': 'Aug 14, 2026',
+         'snippet': 'We measured wobble, motor noise and height range on 22 desks.'},
+        {'url': 'https://en.wikipedia.org/wiki/Standing_desk', 'site': 'Wikipedia',
+         'title': 'Standing desk - Wikipedia',
+         'snippet': 'A standing desk is a desk conceived for writing, reading or drawing while standing up.'},
+        {'url': 'https://www.oakline.example/', 'site': 'Oakline',
+         'title': 'Oakline Sit-Stand Desks | Built to Last',
+         'snippet': 'Solid wood tops, dual motors and a 15-year warranty.'},
+        {'url': 'https://www.example.com/standing-desk', 'site': 'Example',
+         'title': 'Standing Desk Buying Guide | Example',
+         'snippet': 'Desk height, frame stability and top size: what to look for before you buy.'},
+        {'url': 'https://www.healthline.example/standing-desk-benefits', 'site': 'HealthLine',
+         'title': '7 Benefits of Using a Standing Desk',
+         'snippet': 'Standing more often may lower blood sugar and ease back pain, studies suggest.'},
+        {'url': 'https://www.reddit.com/r/StandingDesk/comments/3f4g5h/recommendations/', 'site': 'Reddit',
+         'title': 'Recommendations under $500? : r/StandingDesk',
+         'snippet': 'Look for a dual motor frame; the single motor ones wobble at full height.'},
+        {'url': 'https://www.officemart.example/furniture/desks/standing', 'site': 'OfficeMart',
+         'title': 'Standing Desks | OfficeMart',
+         'snippet': 'Sit-stand desks for home and office. Order online, pick up in store.'},
+        {'url': 'https://www.ergonomics.example/standing-desk-setup', 'site': 'Ergonomics Today',
+         'title': 'How to Set Up a Standing Desk Correctly',
+         'snippet': 'Elbows at 90 degrees, screen at eye level and a mat under your feet.'},
+    ]
+    blocks = [shopping(page, products)] + organic_results(page, results)
+    related = ['standing desk electric', 'standing desk converter', 'best standing desk', 'standing desk near me']
+    return render_page(page, blocks, rhs=knowledge_panel(page, panel), related=related,
+                       total='About 311,000,000 results', seconds='0.49')
+
+
+LAYOUTS = {
+    'desktop_organic_ads_sitelinks': desktop_organic_ads_sitelinks,
+    'desktop_local_pack': desktop_local_pack,
+    'desktop_featured_snippet_paa': desktop_featured_snippet_paa,
+    'desktop_top_stories_videos': desktop_top_stories_videos,
+    'desktop_shopping_knowledge': desktop_shopping_knowledge,
+}
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--output', default=str(DEFAULT_OUTPUT), help='Directory to write the fixtures to')
+    arg_parser.add_argument('--layout', action='append', choices=sorted(LAYOUTS), help='Only write these layouts')
+    args = arg_parser.parse_args()
+
+    output = Path(args.output)
+    output.mkdir(parents=True, exist_ok=True)
+    for name in args.layout or LAYOUTS:
+        path = output / f'{name}.html'
+        path.write_text(LAYOUTS[name](), encoding='utf-8')
+        print(f"{path} ({path.stat().st_size / 1024:.0f} KB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
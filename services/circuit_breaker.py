@@ -0,0 +1,408 @@
+"""
+Circuit breakers for outbound providers
+Shared by every worker through Redis
+
+Each provider (Scrape.do, DataForSEO, PageSpeed Insights, R2) has one breaker:
+
+- closed: calls go through. failure_threshold consecutive failures (timeouts,
+  connection errors, 5xx) open the circuit.
+- open: calls fail instantly with CircuitOpenError until open_until, so a
+  provider outage costs no timeouts. Callers defer their work to
+  CircuitOpenError.retry_at.
+- half_open: after the recovery timeout a few probe calls go through. A
+  success closes the circuit; a failure opens it again with a doubled recovery
+  timeout (capped at max_recovery_timeout).
+
+State changes run as Lua scripts, so all workers agree on the state, and each
+transition is logged and pushed to a capped Redis list (transitions()) for
+dashboards and the circuit_breakers command. If Redis is unreachable the
+breaker stays out of the way and every call goes through.
+
+Usage:
+    breaker = get_circuit_breaker('dataforseo')
+    with breaker.guard() as call:
+        response = requests.get(...)
+        call.status_code = response.status_code
+"""
+
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import redis
+import requests
+from django.conf import settings
+
+from .rate_limiter import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+PROVIDERS = ('scrape_do', 'dataforseo', 'pagespeed', 'r2')
+
+# Exceptions that mean the provider is down or unreachable
+HTTP_FAILURES: Tuple[Type[BaseException], ...] = (requests.Timeout, requests.ConnectionError)
+
+
+class CircuitOpenError(requests.RequestException):
+    """
+    Raised instead of calling a provider whose circuit is open
+
+    A RequestException, so existing request error handling treats it like a
+    connection error that failed instantly.
+    """
+
+    def __init__(self, name: str, retry_at: float):
+        self.name = name
+        self.retry_at = retry_at
+        super().__init__(f"Circuit for {name} is open until {datetime.fromtimestamp(retry_at, dt_timezone.utc).isoformat()}")
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until the provider may be called again"""
+        return max(0.0, self.retry_at - time.time())
+
+
+ALLOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local max_probes = tonumber(ARGV[2])
+local probe_timeout = tonumber(ARGV[3])
+local h = redis.call('HMGET', KEYS[1], 'state', 'open_until', 'probes', 'probe_until')
+local state = h[1] or 'closed'
+if state == 'closed' then
+    return {1, 'closed', ''}
+end
+local transition = ''
+if state == 'open' then
+    local open_until = tonumber(h[2]) or 0
+    if now < open_until then
+        return {0, tostring(open_until), ''}
+    end
+    state = 'half_open'
+    redis.call('HSET', KEYS[1], 'state', 'half_open', 'probes', 0)
+    redis.call('LPUSH', KEYS[2], now .. '|open|half_open')
+    redis.call('LTRIM', KEYS[2], 0, 99)
+    transition = 'open>half_open'
+    h[3] = 0
+end
+local probes = tonumber(h[3]) or 0
+local probe_until = tonumber(h[4]) or 0
+if probes >= max_probes and now >= probe_until then
+    probes = 0  -- Probes of a dead worker never reported back
+end
+if probes < max_probes then
+    redis.call('HSET', KEYS[1], 'probes', probes + 1, 'probe_until', tostring(now + probe_timeout))
+    return {1, 'half_open', transition}
+end
+return {0, tostring(probe_until), transition}
+"""
+
+RECORD_SCRIPT = """
+local now = tonumber(ARGV[1])
+local outcome = ARGV[2]
+local threshold = tonumber(ARGV[3])
+local recovery = tonumber(ARGV[4])
+local max_recovery = tonumber(ARGV[5])
+local h = redis.call('HMGET', KEYS[1], 'state', 'failures', 'trips', 'probes')
+local state = h[1] or 'closed'
+local failures = tonumber(h[2]) or 0
+local trips = tonumber(h[3]) or 0
+local probes = tonumber(h[4]) or 0
+
+local function open(from, open_trips)
+    local timeout = math.min(max_recovery, recovery * math.pow(2, open_trips - 1))
+    redis.call('HSET', KEYS[1], 'state', 'open', 'opened_at', tostring(now),
+        'open_until', tostring(now + timeout), 'failures', 0, 'probes', 0, 'trips', open_trips)
+    redis.call('LPUSH', KEYS[2], now .. '|' .. from .. '|open')
+    redis.call('LTRIM', KEYS[2], 0, 99)
+    return from .. '>open'
+end
+
+if outcome == 'success' then
+    redis.call('HINCRBY', KEYS[1], 'successes', 1)
+    if state == 'half_open' then
+        redis.call('HSET', KEYS[1], 'state', 'closed', 'failures', 0, 'probes', 0, 'trips', 0)
+        redis.call('LPUSH', KEYS[2], now .. '|half_open|closed')
+        redis.call('LTRIM', KEYS[2], 0, 99)
+        return 'half_open>closed'
+    elseif state == 'closed' and failures > 0 then
+        redis.call('HSET', KEYS[1], 'failures', 0)
+    end
+elseif outcome == 'failure' then
+    redis.call('HINCRBY', KEYS[1], 'total_failures', 1)
+    if state == 'half_open' then
+        return open('half_open', trips + 1)
+    elseif state == 'closed' then
+        failures = failures + 1
+        if failures >= threshold then
+            return open('closed', 1)
+        end
+        redis.call('HSET', KEYS[1], 'failures', failures)
+    end
+elseif state == 'half_open' and probes > 0 then
+    -- Neither a success nor a provider failure: hand the probe back
+    redis.call('HSET', KEYS[1], 'probes', probes - 1)
+end
+return ''
+"""
+
+
+class Call:
+    """
+    One call allowed through a breaker
+
+    Set status_code once the provider answered: a 5xx is a failure, any other
+    status a success (the provider is up), whatever exception follows. Without
+    a status, exceptions in the failure list are failures and others are
+    neutral (our bug, not the provider's).
+    """
+
+    def __init__(self, breaker: Optional['CircuitBreaker'], failure_exceptions: Tuple[Type[BaseException], ...]):
+        self.breaker = breaker
+        self.failure_exceptions = failure_exceptions
+        self.status_code: Optional[int] = None
+        self.failed = False
+
+    def __enter__(self) -> 'Call':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if self.breaker is None:
+            return False
+
+        if exc_type is not None and issubclass(exc_type, CircuitOpenError):
+            outcome = 'neutral'
+        elif self.failed:
+            outcome = 'failure'
+        elif self.status_code is not None:
+            outcome = 'failure' if self.status_code >= 500 else 'success'
+        elif exc_type is None:
+            outcome = 'success'
+        elif issubclass(exc_type, self.failure_exceptions):
+            outcome = 'failure'
+        else:
+            outcome = 'neutral'
+        self.breaker.record(outcome)
+        return False
+
+
+class CircuitBreaker:
+    """
+    Closed / open / half-open breaker shared through Redis
+
+    Args:
+        name: Provider name
+        client: Redis client (default from SCRAPE_DO_LIMITER_REDIS_URL)
+        failure_threshold: Consecutive failures that open the circuit
+        recovery_timeout: Seconds the circuit stays open before probing
+        max_recovery_timeout: Cap of the doubled recovery timeout
+        half_open_max_calls: Probe calls allowed at once in half-open state
+        probe_timeout: Seconds after which an unreported probe is given up
+        failure_exceptions: Exceptions counted as provider failures
+    """
+
+    def __init__(self, name: str, client: Optional[redis.Redis] = None, failure_threshold: int = 5,
+                 recovery_timeout: float = 60.0, max_recovery_timeout: float = 900.0,
+                 half_open_max_calls: int = 1, probe_timeout: float = 120.0,
+                 failure_exceptions: Tuple[Type[BaseException], ...] = HTTP_FAILURES):
+        self.name = name
+        self.client = client if client is not None else get_redis_client()
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.max_recovery_timeout = max_recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.probe_timeout = probe_timeout
+        self.failure_exceptions = failure_exceptions
+
+        self.state_key = f"circuit:{name}"
+        self.events_key = f"circuit:{name}:transitions"
+        self._allow = self.client.register_script(ALLOW_SCRIPT)
+        self._record = self.client.register_script(RECORD_SCRIPT)
+
+    def allow(self) -> Tuple[bool, Optional[float]]:
+        """
+        Whether a call may go through now
+
+        Returns:
+            Tuple of (allowed, retry_at timestamp when not allowed)
+        """
+        try:
+            allowed, detail, transition = self._allow(
+                keys=[self.state_key, self.events_key],
+                args=[time.time(), self.half_open_max_calls, self.probe_timeout]
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Circuit breaker {self.name} unavailable, not guarding: {e}")
+            return True, None
+
+        self._log_transition(transition)
+        if allowed:
+            return True, None
+        return False, float(detail)
+
+    def check(self) -> None:
+        """
+        Raises:
+            CircuitOpenError: If the circuit does not let a call through now
+        """
+        allowed, retry_at = self.allow()
+        if not allowed:
+            raise CircuitOpenError(self.name, retry_at)
+
+    def guard(self, failure_exceptions: Optional[Tuple[Type[BaseException], ...]] = None) -> Call:
+        """
+        Check the circuit and return a context manager that records the outcome
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        self.check()
+        return Call(self, failure_exceptions or self.failure_exceptions)
+
+    def open_until(self) -> Optional[float]:
+        """
+        When an open circuit lets calls through again
+
+        Reads the state only, so unlike allow() it never uses up a half-open
+        probe - use it to decide whether to defer work before starting it.
+
+        Returns:
+            Timestamp, or None when calls may go through now
+        """
+        try:
+            state, open_until = self.client.hmget(self.state_key, 'state', 'open_until')
+        except redis.RedisError:
+            return None
+        if state != b'open' or open_until is None or float(open_until) <= time.time():
+            return None
+        return float(open_until)
+
+    def record(self, outcome: str) -> None:
+        """Record 'success', 'failure' or 'neutral' for a call that went through"""
+        try:
+            transition = self._record(
+                keys=[self.state_key, self.events_key],
+                args=[time.time(), outcome, self.failure_threshold, self.recovery_timeout,
+                      self.max_recovery_timeout]
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Circuit breaker {self.name} could not record a call: {e}")
+            return
+        self._log_transition(transition)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Current state for dashboards
+
+        Returns:
+            Dict with state, consecutive failures, open_until, trips and
+            successes / total_failures counters
+        """
+        values = self.client.hgetall(self.state_key)
+        values = {key.decode(): value.decode() for key, value in values.items()}
+        state = values.get('state', 'closed')
+        open_until = float(values['open_until']) if state == 'open' and 'open_until' in values else None
+        return {
+            'name': self.name,
+            'state': state,
+            'failures': int(values.get('failures', 0)),
+            'open_until': open_until,
+            'trips': int(values.get('trips', 0)),
+            'successes': int(values.get('successes', 0)),
+            'total_failures': int(values.get('total_failures', 0)),
+        }
+
+    def transitions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Most recent state transitions, newest first
+
+        Returns:
+            List of dicts with at (timestamp), from and to
+        """
+        events = []
+        for event in self.client.lrange(self.events_key, 0, limit - 1):
+            at, from_state, to_state = event.decode().split('|')
+            events.append({'at': float(at), 'from': from_state, 'to': to_state})
+        return events
+
+    def reset(self) -> None:
+        """Force the circuit closed (e.g. after a provider confirmed recovery)"""
+        self.client.delete(self.state_key)
+        logger.warning(f"[CIRCUIT] {self.name}: reset to closed")
+
+    def _log_transition(self, transition) -> None:
+        if not transition:
+            return
+        if isinstance(transition, bytes):
+            transition = transition.decode()
+        from_state, to_state = transition.split('>')
+        log = logger.info if to_state == 'closed' else logger.warning
+        log(f"[CIRCUIT] {self.name}: {from_state} -> {to_state}")
+
+
+def guard(breaker: Optional[CircuitBreaker],
+          failure_exceptions: Optional[Tuple[Type[BaseException], ...]] = None) -> Call:
+    """
+    breaker.guard(), or a call that records nothing when breakers are disabled
+
+    Raises:
+        CircuitOpenError: If the circuit is open
+    """
+    if breaker is None:
+        return Call(None, ())
+    return breaker.guard(failure_exceptions)
+
+
+# One breaker per provider and configuration per process (state is in Redis)
+_breakers: Dict[tuple, CircuitBreaker] = {}
+
+
+def get_circuit_breaker(name: str, client: Optional[redis.Redis] = None, **kwargs) -> Optional[CircuitBreaker]:
+    """
+    Breaker for a provider configured from settings
+
+    Without a client the breaker is built once per process and configuration
+    and shared by every caller.
+
+    Args:
+        name: Provider name (see PROVIDERS)
+        client: Optional Redis client (tests pass a fakeredis client)
+        **kwargs: Overrides of the CircuitBreaker options
+
+    Returns:
+        CircuitBreaker, or None when CIRCUIT_BREAKER_ENABLED is off
+    """
+    if not settings.CIRCUIT_BREAKER_ENABLED:
+        return None
+    options = {
+        'failure_threshold': settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        'recovery_timeout': settings.CIRCUIT_BREAKER_RECOVERY_SECONDS,
+        'max_recovery_timeout': settings.CIRCUIT_BREAKER_MAX_RECOVERY_SECONDS,
+    }
+    options.update(kwargs)
+    if client is not None:
+        return CircuitBreaker(name, client=client, **options)
+
+    key = (name, settings.SCRAPE_DO_LIMITER_REDIS_URL, tuple(sorted(options.items())))
+    breaker = _breakers.get(key)
+    if breaker is None:
+        breaker = _breakers.setdefault(key, CircuitBreaker(name, **options))
+    return breaker
+
+
+def get_breaker_status() -> List[Dict[str, Any]]:
+    """
+    State and recent transitions of every provider's breaker
+
+    Returns:
+        List of status dicts with a 'transitions' list each
+    """
+    statuses = []
+    for name in PROVIDERS:
+        breaker = get_circuit_breaker(name)
+        if breaker is None:
+            break
+        status = breaker.status()
+        status['transitions'] = breaker.transitions()
+        statuses.append(status)
+    return statuses
@@ -0,0 +1,66 @@
+"""
+Streaming CSV Helpers
+Turns row generators into encoded byte chunks without building the file in memory
+"""
+
+import codecs
+import csv
+from typing import Any, Iterable, Iterator, Sequence
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class _LineBuffer:
+    """File-like object for csv.writer that hands back each formatted line"""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+class CSVLineWriter:
+    """Format rows as CSV lines, with the same dialect and quoting as csv.writer"""
+
+    def __init__(self, **fmtparams):
+        self._writer = csv.writer(_LineBuffer(), **fmtparams)
+
+    def line(self, row: Sequence[Any]) -> str:
+        """
+        Format one row
+
+        Args:
+            row: Sequence of cell values
+
+        Returns:
+            CSV line including the line terminator
+        """
+        return self._writer.writerow(row)
+
+
+def iter_encoded_chunks(lines: Iterable[str], encoding: str = 'utf-8',
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Encode text lines incrementally into byte chunks of about chunk_size
+
+    Only one chunk is held at a time, so memory stays flat however many lines
+    the generator produces.
+
+    Args:
+        lines: Iterable of text (CSV lines or any other text fragments)
+        encoding: Output encoding
+        chunk_size: Minimum bytes per yielded chunk (the last one may be smaller)
+
+    Yields:
+        Encoded byte chunks
+    """
+    encoder = codecs.getincrementalencoder(encoding)()
+    buffer = bytearray()
+
+    for line in lines:
+        buffer += encoder.encode(line)
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+
+    buffer += encoder.encode('', final=True)
+    if buffer:
+        yield bytes(buffer)
@@ -12,6 +12,8 @@ import base64
 from typing import Optional, Dict, Any, List
 from urllib.parse import urljoin
 
+from .circuit_breaker import get_circuit_breaker, guard
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,6 +48,9 @@ class DataForSEOClient:
             "Content-Type": "application/json"
         }
         
+        # Shared with every worker - an outage fails calls fast instead of timing out
+        self.circuit_breaker = get_circuit_breaker('dataforseo')
+        
         logger.info(
             f"DataForSEO client initialized for user: {self.username[:3]}***"
             f"{' with webhook URL' if self.webhook_url else ''}"
@@ -62,16 +67,22 @@ class DataForSEOClient:
             
         Returns:
             API response as dictionary
+            
+        Raises:
+            CircuitOpenError: If the DataForSEO circuit is open (a RequestException)
         """
         url = f"{self.BASE_URL}{endpoint}"
         
+        if method not in ("POST", "GET"):
+            raise ValueError(f"Unsupported method: {method}")
+        
         try:
-            if method == "POST":
-                response = requests.post(url, json=data, headers=self.headers, timeout=30)
-            elif method == "GET":
-                response = requests.get(url, headers=self.headers, timeout=30)
-            else:
-                raise ValueError(f"Unsupported method: {method}")
+            with guard(self.circuit_breaker) as call:
+                if method == "POST":
+                    response = requests.post(url, json=data, headers=self.headers, timeout=30)
+                else:
+                    response = requests.get(url, headers=self.headers, timeout=30)
+                call.status_code = response.status_code
             
             response.raise_for_status()
             return response.json()
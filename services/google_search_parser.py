@@ -5,12 +5,19 @@ Extracts structured data from Google search HTML with robust selectors
 
 import logging
 import re
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Union
 from urllib.parse import urlparse, parse_qs
 from bs4 import BeautifulSoup
 
+from .serp_classifier import SerpDomClassifier
+
 logger = logging.getLogger(__name__)
 
+# Parse profiles: 'full' runs every SERP feature extractor, 'rank' only walks
+# the result containers and stops after RANK_PROFILE_MAX_ORGANIC organic results.
+PARSE_PROFILES = ('full', 'rank')
+RANK_PROFILE_MAX_ORGANIC = 100
+
 
 class GoogleSearchParser:
     """
@@ -18,8 +25,16 @@ class GoogleSearchParser:
     Extracts structured data with multiple fallback selectors
     """
     
-    def __init__(self):
-        """Initialize the parser with selector configurations"""
+    def __init__(self, single_pass: bool = True):
+        """
+        Initialize the parser with selector configurations
+        
+        Args:
+            single_pass: Classify result containers with SerpDomClassifier (one
+                DOM traversal) instead of per-element selector queries
+        """
+        self.single_pass = single_pass
+        
         # Multiple selector strategies for robustness
         self.result_selectors = [
             # Primary selectors
@@ -32,6 +47,17 @@ class GoogleSearchParser:
             {'selector': 'div[data-sokoban-container]', 'type': 'container'},
         ]
         
+        # Dedicated ad containers
+        self.ad_selectors = [
+            'div[data-text-ad]',
+            'div.uEierd',  # Shopping ads
+            'div[aria-label*="Ad"]',
+            'div[data-rw]',  # Text ads
+            'div.commercial-unit',
+            'div.ads-ad',
+            'li.ads-ad',
+        ]
+        
         # Title selectors with priority
         self.title_selectors = [
             'h3',
@@ -76,12 +102,14 @@ class GoogleSearchParser:
             'img.rISBZc',
         ]
     
-    def parse(self, html: str) -> Dict[str, Any]:
+    def parse(self, html: Union[str, bytes], profile: str = 'full') -> Dict[str, Any]:
         """
         Parse Google search results HTML
         
         Args:
-            html: Raw HTML from Google search
+            html: Raw HTML from Google search, as text or undecoded bytes
+            profile: 'full' for every SERP feature, or 'rank' for organic and
+                sponsored results only (see parse_rank_only)
             
         Returns:
             Dictionary containing:
@@ -95,6 +123,11 @@ class GoogleSearchParser:
             logger.error("No HTML content provided")
             return {'organic_results': [], 'sponsored_results': [], 'error': 'No HTML content'}
         
+        if profile == 'rank':
+            return self.parse_rank_only(html)
+        if profile not in PARSE_PROFILES:
+            logger.warning(f"Unknown parse profile '{profile}', running full parse")
+        
         try:
             soup = BeautifulSoup(html, 'html.parser')
             
@@ -201,12 +234,58 @@ class GoogleSearchParser:
             logger.error(f"Error parsing Google search HTML: {str(e)}")
             return {'organic_results': [], 'sponsored_results': [], 'error': str(e)}
     
-    def _extract_all_results(self, soup: BeautifulSoup) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    def parse_rank_only(self, html: Union[str, bytes]) -> Dict[str, Any]:
+        """
+        Parse only what daily rank tracking needs
+        
+        Walks the result containers once in document order and stops after
+        RANK_PROFILE_MAX_ORGANIC organic results. SERP feature extractors (local
+        pack, videos, flights, weather, ...) are skipped; run a full parse when
+        those are needed.
+        
+        Args:
+            html: Raw HTML from Google search, as text or undecoded bytes
+            
+        Returns:
+            Dictionary with organic_results, sponsored_results, their counts and
+            profile='rank'
+        """
+        if not html:
+            logger.error("No HTML content provided")
+            return {'organic_results': [], 'sponsored_results': [], 'error': 'No HTML content', 'profile': 'rank'}
+        
+        try:
+            soup = BeautifulSoup(html, 'html.parser')
+            organic_results, sponsored_results = self._extract_all_results(
+                soup,
+                max_organic=RANK_PROFILE_MAX_ORGANIC
+            )
+            
+            return {
+                'organic_results': organic_results,
+                'sponsored_results': sponsored_results,
+                'organic_count': len(organic_results),
+                'sponsored_count': len(sponsored_results),
+                'results': organic_results,
+                'profile': 'rank'
+            }
+            
+        except Exception as e:
+            logger.error(f"Error parsing Google search HTML (rank profile): {str(e)}")
+            return {'organic_results': [], 'sponsored_results': [], 'error': str(e), 'profile': 'rank'}
+    
+    def _extract_all_results(
+        self,
+        soup: BeautifulSoup,
+        max_organic: Optional[int] = None
+    ) -> tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         """
         Extract both organic and sponsored search results
         
         Args:
             soup: BeautifulSoup object
+            max_organic: Stop walking result containers once this many organic
+                results were found (None for no limit)
             
         Returns:
             Tuple of (organic_results, sponsored_results)
@@ -217,31 +296,41 @@ class GoogleSearchParser:
         organic_position = 1
         sponsored_position = 1
         
-        # Try each selector strategy
-        result_elements = []
-        for selector_config in self.result_selectors:
-            selector = selector_config['selector']
-            elements = soup.select(selector)
-            
-            if elements:
-                logger.info(f"Found {len(elements)} total results using selector: {selector}")
-                result_elements = elements
-                break
-        
-        # Also look for dedicated ad containers
-        ad_selectors = [
-            'div[data-text-ad]',
-            'div.uEierd',  # Shopping ads
-            'div[aria-label*="Ad"]',
-            'div[data-rw]',  # Text ads
-            'div.commercial-unit',
-            'div.ads-ad',
-            'li.ads-ad',
-        ]
-        
-        ad_elements = []
-        for ad_selector in ad_selectors:
-            ad_elements.extend(soup.select(ad_selector))
+        classifier = None
+        if self.single_pass:
+            classifier = SerpDomClassifier.build(
+                soup,
+                [config['selector'] for config in self.result_selectors],
+                self.ad_selectors
+            )
+        
+        if classifier:
+            # One traversal classifies containers, ads and special results
+            result_elements = classifier.result_elements()
+            ad_elements = classifier.ad_elements()
+            is_ad = classifier.is_ad
+            is_special_result = classifier.is_special_result
+            if result_elements:
+                selector = self.result_selectors[classifier.result_selector_index()]['selector']
+                logger.info(f"Found {len(result_elements)} total results using selector: {selector}")
+        else:
+            # Try each selector strategy
+            result_elements = []
+            for selector_config in self.result_selectors:
+                selector = selector_config['selector']
+                elements = soup.select(selector)
+                
+                if elements:
+                    logger.info(f"Found {len(elements)} total results using selector: {selector}")
+                    result_elements = elements
+                    break
+            
+            # Also look for dedicated ad containers
+            ad_elements = []
+            for ad_selector in self.ad_selectors:
+                ad_elements.extend(soup.select(ad_selector))
+            is_ad = self._is_ad
+            is_special_result = self._is_special_result
         
         # Process ad elements first
         for element in ad_elements:
@@ -254,8 +343,11 @@ class GoogleSearchParser:
         
         # Process all elements
         for element in result_elements:
+            if max_organic is not None and len(organic_results) >= max_organic:
+                break
+            
             # Check if it's an ad/sponsored result
-            if self._is_ad(element):
+            if is_ad(element):
                 # Parse as sponsored result
                 result = self._parse_sponsored_result(element, sponsored_position)
                 if result and result.get('url'):
@@ -265,7 +357,7 @@ class GoogleSearchParser:
                     if not any(r['url'] == result['url'] for r in sponsored_results):
                         sponsored_results.append(result)
                         sponsored_position += 1
-            elif self._is_special_result(element):
+            elif is_special_result(element):
                 # Parse special result but track separately
                 result = self._parse_special_result(element, organic_position)
                 if result:
@@ -355,8 +447,8 @@ class GoogleSearchParser:
         """Extract the ad label (Ad, Sponsored, etc.)"""
         # Look for ad labels
         label_selectors = [
-            'span:contains("Ad")',
-            'span:contains("Sponsored")',
+            'span:-soup-contains("Ad")',
+            'span:-soup-contains("Sponsored")',
             'div[aria-label*="Ad"]',
             '.ads-label',
             '.D1fz0e',  # Google's ad label class
@@ -774,8 +866,8 @@ class GoogleSearchParser:
         """Check if element is an ad"""
         # Check for ad indicators
         ad_indicators = [
-            'span:contains("Ad")',
-            'span:contains("Sponsored")',
+            'span:-soup-contains("Ad")',
+            'span:-soup-contains("Sponsored")',
             'div[data-hveid][aria-label*="Ad"]',
             'div.uEierd',  # Shopping ads
         ]
@@ -911,7 +1003,7 @@ class GoogleSearchParser:
                 place['phone'] = phone_elem.get_text(strip=True)
             
             # Extract hours
-            hours_elem = card.select_one('div.W4Efsd span:contains("Open"), span.ZkP5Je')
+            hours_elem = card.select_one('div.W4Efsd span:-soup-contains("Open"), span.ZkP5Je')
             if hours_elem:
                 place['hours'] = hours_elem.get_text(strip=True)
             
@@ -1105,7 +1197,7 @@ class GoogleSearchParser:
         tweets = []
         
         # Look for Twitter container
-        twitter_container = soup.select_one('div[data-attrid*="twitter"], g-section-with-header:has(cite:contains("twitter.com"))')
+        twitter_container = soup.select_one('div[data-attrid*="twitter"], g-section-with-header:has(cite:-soup-contains("twitter.com"))')
         
         if twitter_container:
             tweet_elements = twitter_container.select('g-inner-card, div[data-hveid]')
@@ -1182,7 +1274,7 @@ class GoogleSearchParser:
         """Extract Recipe results"""
         recipes = []
         
-        recipe_container = soup.select_one('div[data-attrid*="recipe"], g-section-with-header:has(span:contains("recipe"))')
+        recipe_container = soup.select_one('div[data-attrid*="recipe"], g-section-with-header:has(span:-soup-contains("recipe"))')
         
         if recipe_container:
             recipe_elements = recipe_container.select('g-inner-card, div.MUs7Tc')
@@ -8,14 +8,59 @@ import boto3
 import logging
 import mimetypes
 import gzip
-from typing import Optional, Dict, Any, BinaryIO, Union
+from typing import Optional, Dict, Any, BinaryIO, Iterable, Union
 from datetime import datetime
-from botocore.exceptions import ClientError
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
 import hashlib
 import json
 
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breaker
+
 logger = logging.getLogger(__name__)
 
+# Exceptions that mean R2 is down or unreachable (timeouts, refused or dropped connections)
+R2_FAILURES = (BotoConnectionError, HTTPClientError)
+
+# S3 multipart parts must be at least 5 MiB, except the last one
+MULTIPART_PART_SIZE = 8 * 1024 * 1024
+
+
+class CircuitBreakerClient:
+    """
+    boto3 S3 client wrapper that sends every API call through the 'r2' breaker
+
+    While the circuit is open calls raise a ClientError with code
+    'CircuitOpen' right away, so the service's existing ClientError handling
+    reports the failure without waiting out connection timeouts. Local
+    helpers (presigned URLs, paginators) are not guarded.
+    """
+
+    LOCAL_METHODS = {'generate_presigned_url', 'generate_presigned_post', 'get_paginator', 'get_waiter', 'can_paginate'}
+
+    def __init__(self, client, breaker: CircuitBreaker):
+        self._client = client
+        self._breaker = breaker
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if name in self.LOCAL_METHODS or name.startswith('_') or not callable(attribute):
+            return attribute
+
+        def guarded(*args, **kwargs):
+            try:
+                call = self._breaker.guard(R2_FAILURES)
+            except CircuitOpenError as e:
+                raise ClientError({'Error': {'Code': 'CircuitOpen', 'Message': str(e)}}, name) from e
+
+            with call:
+                try:
+                    return attribute(*args, **kwargs)
+                except ClientError as e:
+                    call.status_code = e.response.get('ResponseMetadata', {}).get('HTTPStatusCode')
+                    raise
+
+        return guarded
+
 
 class R2StorageService:
     """
@@ -56,6 +101,11 @@ class R2StorageService:
             region_name='auto'  # R2 uses 'auto' for region
         )
         
+        # Shared with every worker - an outage fails calls fast instead of timing out
+        breaker = get_circuit_breaker('r2')
+        if breaker is not None:
+            self.client = CircuitBreakerClient(self.client, breaker)
+        
         # Initialize S3 resource for higher-level operations
         self.resource = boto3.resource(
             's3',
@@ -153,6 +203,116 @@ class R2StorageService:
                 'error': str(e)
             }
     
+    def upload_stream(
+        self,
+        chunks: Iterable[bytes],
+        key: str,
+        metadata: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None,
+        part_size: int = MULTIPART_PART_SIZE
+    ) -> Dict[str, Any]:
+        """
+        Upload a stream of byte chunks to R2 as a multipart upload
+        
+        Chunks are buffered and sent in parts of exactly part_size bytes (only the
+        last part is shorter), so about one part is held in memory. Streams
+        smaller than one part are sent with a single put_object. A failed upload
+        is aborted so no parts are left behind.
+        
+        Args:
+            chunks: Iterable of bytes (e.g. a generator)
+            key: Object key (path) in R2
+            metadata: Optional metadata to attach to the object
+            content_type: MIME type of the file
+            part_size: Bytes per uploaded part (at least 5 MiB)
+        
+        Returns:
+            Dict with upload details including URL, total size and part count
+        """
+        extra_args = {}
+        if content_type:
+            extra_args['ContentType'] = content_type
+        else:
+            guessed_type, _ = mimetypes.guess_type(key)
+            if guessed_type:
+                extra_args['ContentType'] = guessed_type
+        if metadata:
+            extra_args['Metadata'] = metadata
+        
+        upload_id = None
+        parts = []
+        size = 0
+        buffer = bytearray()
+        
+        def upload_part(body):
+            response = self.client.upload_part(
+                Bucket=self.bucket_name,
+                Key=key,
+                UploadId=upload_id,
+                PartNumber=len(parts) + 1,
+                Body=body
+            )
+            parts.append({'PartNumber': len(parts) + 1, 'ETag': response['ETag']})
+        
+        try:
+            for chunk in chunks:
+                buffer += chunk
+                size += len(chunk)
+                while len(buffer) >= part_size:
+                    if upload_id is None:
+                        upload_id = self.client.create_multipart_upload(
+                            Bucket=self.bucket_name,
+                            Key=key,
+                            **extra_args
+                        )['UploadId']
+                    # R2 requires every part but the last to have the same size
+                    upload_part(bytes(buffer[:part_size]))
+                    del buffer[:part_size]
+            
+            if upload_id is None:
+                self.client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    Body=bytes(buffer),
+                    **extra_args
+                )
+            else:
+                if buffer:
+                    upload_part(bytes(buffer))
+                self.client.complete_multipart_upload(
+                    Bucket=self.bucket_name,
+                    Key=key,
+                    UploadId=upload_id,
+                    MultipartUpload={'Parts': parts}
+                )
+            
+            logger.info(f"Successfully streamed {size} bytes to R2: {key} ({max(len(parts), 1)} parts)")
+            
+            return {
+                'success': True,
+                'key': key,
+                'bucket': self.bucket_name,
+                'url': self.get_url(key),
+                'size': size,
+                'parts': max(len(parts), 1)
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to stream file to R2: {key}: {str(e)}")
+            if upload_id is not None:
+                try:
+                    self.client.abort_multipart_upload(
+                        Bucket=self.bucket_name,
+                        Key=key,
+                        UploadId=upload_id
+                    )
+                except Exception as abort_error:
+                    logger.warning(f"Failed to abort multipart upload {upload_id} for {key}: {abort_error}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
     def download_file(self, key: str) -> Optional[bytes]:
         """
         Download a file from R2
@@ -0,0 +1,354 @@
+"""
+Distributed adaptive rate limiter for outbound API calls
+Shared by every worker through Redis
+
+Two controls gate each request:
+
+- A token bucket caps the request rate (rate per second, burst).
+- An AIMD concurrency window caps requests in flight across all workers.
+  Every fast, successful response grows the window by 1/window, which is
+  about +1 per window of requests. A 429, a 5xx, a timeout or a response
+  slower than the latency target shrinks it multiplicatively, at most once
+  per cooldown, so one burst of failures counts as one congestion signal.
+
+Both run as Lua scripts, so check-and-update is atomic across workers. Slots
+in the window are leases with an expiry, so a killed worker cannot leak
+capacity. The limiter fails open: if Redis is unreachable, requests go
+through unthrottled rather than stalling the crawl.
+
+Usage:
+    limiter = get_rate_limiter('scrape_do')
+    with limiter.limit() as permit:
+        response = session.get(...)
+        permit.status_code = response.status_code
+"""
+
+import logging
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when no slot was granted within the limiter's max wait"""
+
+
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+if now > ts then
+    tokens = math.min(burst, tokens + (now - ts) * rate)
+    ts = now
+end
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(ts))
+redis.call('EXPIRE', KEYS[1], 3600)
+return {tostring(wait), tostring(tokens)}
+"""
+
+ACQUIRE_SLOT_SCRIPT = """
+local now = tonumber(ARGV[1])
+local lease_ttl = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+local window = tonumber(redis.call('HGET', KEYS[2], 'window') or ARGV[4])
+if redis.call('ZCARD', KEYS[1]) < math.max(1, math.floor(window)) then
+    redis.call('ZADD', KEYS[1], now + lease_ttl, ARGV[2])
+    redis.call('EXPIRE', KEYS[1], math.ceil(lease_ttl * 2))
+    return 1
+end
+return 0
+"""
+
+RELEASE_SLOT_SCRIPT = """
+local now = tonumber(ARGV[2])
+local ok = tonumber(ARGV[3])
+local latency = tonumber(ARGV[4])
+local target = tonumber(ARGV[5])
+local min_window = tonumber(ARGV[6])
+local max_window = tonumber(ARGV[7])
+local beta = tonumber(ARGV[9])
+local cooldown = tonumber(ARGV[10])
+local alpha = tonumber(ARGV[11])
+
+redis.call('ZREM', KEYS[1], ARGV[1])
+local state = redis.call('HMGET', KEYS[2], 'window', 'latency_ewma', 'error_rate', 'last_decrease')
+local window = tonumber(state[1]) or tonumber(ARGV[8])
+local latency_ewma = tonumber(state[2]) or latency
+local error_rate = tonumber(state[3]) or 0
+local last_decrease = tonumber(state[4]) or 0
+
+latency_ewma = latency_ewma + alpha * (latency - latency_ewma)
+error_rate = error_rate + alpha * ((ok == 1 and 0 or 1) - error_rate)
+
+if ok == 0 or latency > target then
+    if now - last_decrease >= cooldown then
+        window = math.max(min_window, window * beta)
+        last_decrease = now
+    end
+else
+    window = math.min(max_window, window + 1 / window)
+end
+
+redis.call('HSET', KEYS[2], 'window', tostring(window), 'latency_ewma', tostring(latency_ewma),
+    'error_rate', tostring(error_rate), 'last_decrease', tostring(last_decrease))
+return tostring(window)
+"""
+
+
+class Permit:
+    """
+    One granted request slot
+
+    Set status_code inside the with block; an exception or a 429/5xx status
+    counts as a congestion signal.
+    """
+
+    def __init__(self, limiter: 'AdaptiveRateLimiter', lease: Optional[str], waited: float):
+        self.limiter = limiter
+        self.lease = lease
+        self.waited = waited
+        self.status_code: Optional[int] = None
+        self.started = time.monotonic()
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code is None or not (self.status_code == 429 or self.status_code >= 500)
+
+    def __enter__(self) -> 'Permit':
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        ok = exc_type is None and self.ok
+        self.limiter.release(self, ok, time.monotonic() - self.started)
+        return False
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket plus AIMD concurrency window shared through Redis
+
+    Args:
+        name: Limiter name (one per provider)
+        client: Redis client (default from SCRAPE_DO_LIMITER_REDIS_URL)
+        rate: Requests per second
+        burst: Token bucket size
+        initial_window / min_window / max_window: Concurrency window bounds
+        latency_target: Responses slower than this (seconds) shrink the window
+        decrease_factor: Multiplicative decrease of the window
+        cooldown: Minimum seconds between two decreases
+        max_wait: Seconds acquire() waits before raising RateLimitExceeded
+        lease_ttl: Seconds after which a slot of a dead worker is reclaimed
+    """
+
+    poll_interval = 0.05  # Seconds between attempts to get a slot in a full window
+
+    def __init__(self, name: str, client: Optional[redis.Redis] = None, rate: float = 10.0,
+                 burst: float = 20.0, initial_window: float = 10.0, min_window: float = 1.0,
+                 max_window: float = 100.0, latency_target: float = 30.0,
+                 decrease_factor: float = 0.5, cooldown: float = 2.0, max_wait: float = 120.0,
+                 lease_ttl: float = 300.0, ewma_alpha: float = 0.1):
+        self.name = name
+        self.client = client if client is not None else get_redis_client()
+        self.rate = rate
+        self.burst = burst
+        self.initial_window = initial_window
+        self.min_window = min_window
+        self.max_window = max_window
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.max_wait = max_wait
+        self.lease_ttl = lease_ttl
+        self.ewma_alpha = ewma_alpha
+
+        prefix = f"ratelimit:{name}"
+        self.bucket_key = f"{prefix}:bucket"
+        self.leases_key = f"{prefix}:leases"
+        self.state_key = f"{prefix}:state"
+        self._take_token = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._acquire_slot = self.client.register_script(ACQUIRE_SLOT_SCRIPT)
+        self._release_slot = self.client.register_script(RELEASE_SLOT_SCRIPT)
+
+    def limit(self) -> Permit:
+        """Wait for a slot and a token; use the result as a context manager"""
+        return self.acquire()
+
+    def acquire(self) -> Permit:
+        """
+        Wait for a concurrency slot, then for a token
+
+        Returns:
+            Permit to release when the request is done
+
+        Raises:
+            RateLimitExceeded: If max_wait passed without a slot and a token
+        """
+        started = time.monotonic()
+        deadline = started + self.max_wait
+        lease = uuid.uuid4().hex
+        throttled = False
+
+        try:
+            while not self._acquire_slot(
+                keys=[self.leases_key, self.state_key],
+                args=[time.time(), lease, self.lease_ttl, self.initial_window]
+            ):
+                if time.monotonic() >= deadline:
+                    self._record_wait(time.monotonic() - started)
+                    raise RateLimitExceeded(f"No {self.name} slot within {self.max_wait}s")
+                throttled = True
+                time.sleep(self.poll_interval)
+
+            while True:
+                wait, _ = self._take_token(keys=[self.bucket_key], args=[self.rate, self.burst, time.time()])
+                wait = float(wait)
+                if wait <= 0:
+                    break
+                if time.monotonic() + wait > deadline:
+                    self.client.zrem(self.leases_key, lease)
+                    self._record_wait(time.monotonic() - started)
+                    raise RateLimitExceeded(f"No {self.name} token within {self.max_wait}s")
+                throttled = True
+                time.sleep(wait)
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiter {self.name} unavailable, not throttling: {e}")
+            return Permit(self, None, time.monotonic() - started)
+
+        waited = time.monotonic() - started
+        if throttled:
+            self._record_wait(waited)
+        return Permit(self, lease, waited)
+
+    def release(self, permit: Permit, ok: bool, latency: float) -> None:
+        """Give the slot back and feed the outcome into the window"""
+        if permit.lease is None:
+            return
+        try:
+            self._release_slot(
+                keys=[self.leases_key, self.state_key],
+                args=[
+                    permit.lease, time.time(), 1 if ok else 0, latency, self.latency_target,
+                    self.min_window, self.max_window, self.initial_window, self.decrease_factor,
+                    self.cooldown, self.ewma_alpha
+                ]
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Rate limiter {self.name} could not record a response: {e}")
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Current limiter state, shared by all workers
+
+        Returns:
+            Dict with tokens, window, in_flight, latency_ewma, error_rate,
+            throttled (waits) and throttled_seconds
+        """
+        now = time.time()
+        pipe = self.client.pipeline()
+        pipe.hmget(self.bucket_key, 'tokens', 'ts')
+        pipe.zcount(self.leases_key, now, '+inf')
+        pipe.hmget(self.state_key, 'window', 'latency_ewma', 'error_rate', 'throttled', 'throttled_seconds')
+        (tokens, ts), in_flight, (window, latency_ewma, error_rate, throttled, throttled_seconds) = pipe.execute()
+
+        if tokens is None:
+            tokens = self.burst
+        else:
+            tokens = min(self.burst, float(tokens) + max(0.0, now - float(ts)) * self.rate)
+
+        return {
+            'name': self.name,
+            'rate': self.rate,
+            'burst': self.burst,
+            'tokens': round(tokens, 2),
+            'window': round(float(window), 2) if window is not None else self.initial_window,
+            'in_flight': in_flight,
+            'latency_ewma': round(float(latency_ewma), 3) if latency_ewma is not None else None,
+            'error_rate': round(float(error_rate), 4) if error_rate is not None else 0.0,
+            'throttled': int(throttled or 0),
+            'throttled_seconds': round(float(throttled_seconds or 0), 3),
+        }
+
+    def reset(self) -> None:
+        self.client.delete(self.bucket_key, self.leases_key, self.state_key)
+
+    def _record_wait(self, seconds: float) -> None:
+        try:
+            pipe = self.client.pipeline()
+            pipe.hincrby(self.state_key, 'throttled', 1)
+            pipe.hincrbyfloat(self.state_key, 'throttled_seconds', seconds)
+            pipe.execute()
+        except redis.RedisError:
+            pass
+
+
+# One client (and connection pool) per URL and one limiter per configuration
+# per process, so services built for every task reuse connections.
+_clients: Dict[str, redis.Redis] = {}
+_limiters: Dict[tuple, AdaptiveRateLimiter] = {}
+
+
+def get_redis_client(url: Optional[str] = None) -> redis.Redis:
+    """
+    Shared Redis client for a URL
+
+    Args:
+        url: Redis URL (default SCRAPE_DO_LIMITER_REDIS_URL)
+
+    Returns:
+        redis.Redis reused by every caller in this process
+    """
+    url = url or settings.SCRAPE_DO_LIMITER_REDIS_URL
+    client = _clients.get(url)
+    if client is None:
+        client = _clients.setdefault(url, redis.Redis.from_url(url, socket_timeout=5))
+    return client
+
+
+def get_rate_limiter(name: str = 'scrape_do', client: Optional[redis.Redis] = None) -> Optional[AdaptiveRateLimiter]:
+    """
+    Scrape.do limiter configured from settings
+
+    Without a client the limiter is built once per process and configuration
+    and shared; its state lives in Redis, so sharing it is safe.
+
+    Args:
+        name: Limiter name
+        client: Optional Redis client (tests pass a fakeredis client)
+
+    Returns:
+        AdaptiveRateLimiter, or None when SCRAPE_DO_RATE_LIMIT_ENABLED is off
+    """
+    if not settings.SCRAPE_DO_RATE_LIMIT_ENABLED:
+        return None
+    options = dict(
+        rate=settings.SCRAPE_DO_RATE_PER_SECOND,
+        burst=settings.SCRAPE_DO_RATE_BURST,
+        initial_window=settings.SCRAPE_DO_CONCURRENCY_INITIAL,
+        min_window=settings.SCRAPE_DO_CONCURRENCY_MIN,
+        max_window=settings.SCRAPE_DO_CONCURRENCY_MAX,
+        latency_target=settings.SCRAPE_DO_LATENCY_TARGET,
+        max_wait=settings.SCRAPE_DO_LIMITER_MAX_WAIT,
+    )
+    if client is not None:
+        return AdaptiveRateLimiter(name, client=client, **options)
+
+    key = (name, settings.SCRAPE_DO_LIMITER_REDIS_URL, tuple(sorted(options.items())))
+    limiter = _limiters.get(key)
+    if limiter is None:
+        limiter = _limiters.setdefault(key, AdaptiveRateLimiter(name, **options))
+    return limiter
@@ -0,0 +1,313 @@
+"""
+Response cache for Scrape.do results
+Keeps the HTML of cached responses out of Redis
+
+The default tier (DiskResponseCache) writes each response compressed to a
+sharded directory on local disk and keeps only a tiny index entry in Redis
+(SCRAPE_DO_CACHE_REDIS_URL), so the Redis instance shared with the Celery
+broker never holds SERP HTML. The index entry of a response is a hash of
+host -> file size: every worker on a host sees the files written by the
+others, and a host that lacks the file simply misses without disturbing the
+entries of other hosts. Each host's directory is bounded by
+SCRAPE_DO_CACHE_MAX_BYTES and evicts least recently used files first.
+
+DjangoResponseCache keeps whole responses in the Django cache (the previous
+behaviour) for setups without a local disk worth using.
+
+Both tiers count hits, misses and bytes in Redis, so the numbers cover every
+worker, and support bulk clears through a generation counter: clearing bumps
+the generation, which invalidates every index entry at once. Like the rate
+limiter, the cache fails open: when Redis is unreachable, lookups miss and
+writes are skipped.
+"""
+
+import json
+import logging
+import os
+import shutil
+import socket
+import uuid
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+
+from .rate_limiter import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = ('hits', 'misses', 'bytes_read', 'bytes_written', 'evictions')
+
+
+class ResponseCache:
+    """
+    Base class of the Scrape.do response cache tiers
+
+    Subclasses implement _load, _store, _delete and _purge; keys are already
+    unique per request (see ScrapeDoService._generate_cache_key).
+
+    Args:
+        client: Redis client for the index and counters (default from
+            SCRAPE_DO_CACHE_REDIS_URL)
+    """
+
+    prefix = 'scrape_do_cache'
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        self.client = client if client is not None else get_redis_client(settings.SCRAPE_DO_CACHE_REDIS_URL)
+        self.stats_key = f"{self.prefix}:stats"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Cached response for key
+
+        Returns:
+            The cached result dict or None on a miss
+        """
+        try:
+            result = self._load(self._index_key(key), key)
+            self._incr('hits' if result is not None else 'misses')
+        except redis.RedisError as e:
+            logger.warning(f"Response cache index unavailable, treating as a miss: {e}")
+            return None
+        return result
+
+    def set(self, key: str, result: Dict[str, Any], ttl: int) -> None:
+        """Cache a response for ttl seconds"""
+        try:
+            self._store(self._index_key(key), key, result, ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Response cache index unavailable, not caching: {e}")
+
+    def delete(self, key: str) -> None:
+        """Drop one cached response (all hosts)"""
+        self._delete(self._index_key(key), key)
+
+    def clear(self) -> None:
+        """Drop every cached response (all workers)"""
+        self.client.incr(f"{self.prefix}:generation")
+        self._purge()
+        logger.info(f"Cleared {self.__class__.__name__}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Counters shared by all workers
+
+        Returns:
+            Dict with hits, misses, hit_rate, bytes_read, bytes_written, evictions
+            and (for bounded tiers) bytes_stored
+        """
+        values = self.client.hgetall(self.stats_key)
+        stats = {name: int(values.get(name.encode(), 0)) for name in COUNTERS}
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 4) if lookups else 0.0
+        return stats
+
+    def reset_stats(self) -> None:
+        self.client.delete(self.stats_key)
+
+    def _index_key(self, key: str) -> str:
+        generation = int(self.client.get(f"{self.prefix}:generation") or 0)
+        return f"{self.prefix}:{generation}:{key}"
+
+    def _incr(self, name: str, delta: int = 1) -> None:
+        self.client.hincrby(self.stats_key, name, delta)
+
+    def _load(self, index_key: str, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _store(self, index_key: str, key: str, result: Dict[str, Any], ttl: int) -> None:
+        raise NotImplementedError
+
+    def _delete(self, index_key: str, key: str) -> None:
+        raise NotImplementedError
+
+    def _purge(self) -> None:
+        pass
+
+
+class DjangoResponseCache(ResponseCache):
+    """Whole responses in the Django cache, counters and generation in Redis"""
+
+    def _load(self, index_key: str, key: str) -> Optional[Dict[str, Any]]:
+        result = cache.get(index_key)
+        if result is not None:
+            self._incr('bytes_read', len(result.get('html') or ''))
+        return result
+
+    def _store(self, index_key: str, key: str, result: Dict[str, Any], ttl: int) -> None:
+        cache.set(index_key, result, ttl)
+        self._incr('bytes_written', len(result.get('html') or ''))
+
+    def _delete(self, index_key: str, key: str) -> None:
+        cache.delete(index_key)
+
+
+class DiskResponseCache(ResponseCache):
+    """
+    Compressed responses on local disk, index entries in Redis
+
+    Files live in root/<first two hex chars of the key hash>/<key>.zz. A hit
+    touches the file's mtime, and eviction removes the oldest mtimes first,
+    which makes the directory an LRU. The directory belongs to one host, so
+    its size (bytes_stored) and eviction lock are kept per host.
+
+    Args:
+        root: Cache directory (default SCRAPE_DO_CACHE_ROOT)
+        max_bytes: Size bound of the directory (default SCRAPE_DO_CACHE_MAX_BYTES, 0 = unbounded)
+        compression_level: zlib level
+        client: Redis client for the index and counters
+        host: Name of this host in the index (default the hostname)
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None,
+                 compression_level: int = 6, client: Optional[redis.Redis] = None,
+                 host: Optional[str] = None):
+        super().__init__(client)
+        self.root = Path(root or settings.SCRAPE_DO_CACHE_ROOT)
+        self.max_bytes = settings.SCRAPE_DO_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.compression_level = compression_level
+        self.host = host or socket.gethostname()
+        self.bytes_stored_key = f"{self.prefix}:bytes_stored:{self.host}"
+
+    def path(self, key: str) -> Path:
+        name = key.rsplit('_', 1)[-1]
+        return self.root / name[:2] / f"{key}.zz"
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        stats['host'] = self.host
+        stats['bytes_stored'] = int(self.client.get(self.bytes_stored_key) or 0)
+        stats['max_bytes'] = self.max_bytes
+        return stats
+
+    def _load(self, index_key: str, key: str) -> Optional[Dict[str, Any]]:
+        if self.client.hget(index_key, self.host) is None:
+            return None
+
+        path = self.path(key)
+        try:
+            data = path.read_bytes()
+            result = json.loads(zlib.decompress(data))
+        except FileNotFoundError:
+            # Evicted - this host's index entry is stale
+            self.client.hdel(index_key, self.host)
+            return None
+        except (zlib.error, ValueError):
+            logger.warning(f"Dropping corrupt cached response {path}")
+            self.client.hdel(index_key, self.host)
+            path.unlink(missing_ok=True)
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._incr('bytes_read', len(data))
+        return result
+
+    def _store(self, index_key: str, key: str, result: Dict[str, Any], ttl: int) -> None:
+        data = zlib.compress(json.dumps(result).encode('utf-8'), self.compression_level)
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+
+        temp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            temp_path.write_bytes(data)
+            os.replace(temp_path, path)
+        except OSError as e:
+            temp_path.unlink(missing_ok=True)
+            logger.warning(f"Could not cache response on disk: {e}")
+            return
+
+        pipe = self.client.pipeline()
+        pipe.hset(index_key, self.host, len(data))
+        pipe.expire(index_key, ttl)
+        pipe.hincrby(self.stats_key, 'bytes_written', len(data))
+        pipe.incrby(self.bytes_stored_key, len(data) - replaced)
+        bytes_stored = pipe.execute()[-1]
+
+        if self.max_bytes and bytes_stored > self.max_bytes:
+            self.evict()
+
+    def _delete(self, index_key: str, key: str) -> None:
+        # Files stay until the LRU drops them, so bytes_stored stays exact
+        self.client.delete(index_key)
+
+    def evict(self, target_ratio: float = 0.9) -> int:
+        """
+        Delete least recently used files until this host's directory is under
+        target_ratio of max_bytes
+
+        Returns:
+            Number of files deleted
+        """
+        lock_key = f"{self.prefix}:evicting:{self.host}"
+        if not self.client.set(lock_key, 1, nx=True, ex=300):
+            return 0  # Another worker on this host is evicting
+
+        try:
+            files = []
+            for path in self.root.glob('*/*.zz'):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+            total = sum(size for _, size, _ in files)
+            target = self.max_bytes * target_ratio
+            evicted = 0
+            for _, size, path in sorted(files):
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                evicted += 1
+
+            # Resync this host's counter with what is really on disk
+            self.client.set(self.bytes_stored_key, total)
+            if evicted:
+                self._incr('evictions', evicted)
+                logger.info(f"Evicted {evicted} cached responses, {total} bytes left")
+            return evicted
+        finally:
+            self.client.delete(lock_key)
+
+    def _purge(self) -> None:
+        # Only this host's directory can be emptied here; files left on other
+        # hosts are unreachable after the generation bump and age out of their LRU
+        if self.root.exists():
+            for shard in self.root.iterdir():
+                shutil.rmtree(shard, ignore_errors=True)
+        self.client.set(self.bytes_stored_key, 0)
+
+
+RESPONSE_CACHE_BACKENDS = {
+    'disk': DiskResponseCache,
+    'django': DjangoResponseCache,
+}
+
+
+def get_response_cache(backend: Optional[str] = None) -> ResponseCache:
+    """
+    Response cache tier selected by SCRAPE_DO_CACHE_BACKEND
+
+    Args:
+        backend: 'disk' or 'django' (default from settings)
+
+    Returns:
+        ResponseCache instance
+    """
+    backend = backend or getattr(settings, 'SCRAPE_DO_CACHE_BACKEND', 'disk')
+    if backend not in RESPONSE_CACHE_BACKENDS:
+        raise ValueError(f"Unknown SCRAPE_DO_CACHE_BACKEND: {backend}")
+    return RESPONSE_CACHE_BACKENDS[backend]()
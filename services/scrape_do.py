@@ -8,11 +8,14 @@ import requests
 from urllib.parse import quote, urlencode
 from typing import Optional, Dict, Any
 from django.conf import settings
-from django.core.cache import cache
 import hashlib
 import json
 import base64
 
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breaker, guard
+from .rate_limiter import AdaptiveRateLimiter, RateLimitExceeded, get_rate_limiter
+from .response_cache import ResponseCache, get_response_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -216,17 +219,32 @@ class ScrapeDoService:
         'VA': 'www.google.com.va'
     }
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        response_cache: Optional[ResponseCache] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
         """
         Initialize the Scrape.do service
         
         Args:
             api_key: Optional API key. If not provided, uses SCRAPPER_API_KEY from settings
+            response_cache: Optional cache tier. If not provided, uses SCRAPE_DO_CACHE_BACKEND
+            rate_limiter: Optional limiter shared by all workers. If not provided, built
+                from the SCRAPE_DO_RATE_* settings (None when rate limiting is disabled)
+            circuit_breaker: Optional breaker shared by all workers. If not provided, the
+                'scrape_do' breaker (None when circuit breakers are disabled)
         """
         self.api_key = api_key or getattr(settings, 'SCRAPPER_API_KEY', None)
         if not self.api_key:
             raise ValueError("SCRAPPER_API_KEY not found in settings or environment")
         
+        self.response_cache = response_cache or get_response_cache()
+        self.rate_limiter = rate_limiter if rate_limiter is not None else get_rate_limiter('scrape_do')
+        self.circuit_breaker = circuit_breaker if circuit_breaker is not None else get_circuit_breaker('scrape_do')
+        
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'LimeClicks-Scraper/1.0'
@@ -270,7 +288,7 @@ class ScrapeDoService:
             # Generate cache key if caching is enabled
             if use_cache:
                 cache_key = self._generate_cache_key(url, country_code, render, **kwargs)
-                cached_result = cache.get(cache_key)
+                cached_result = self.response_cache.get(cache_key)
                 if cached_result:
                     logger.info(f"Cache hit for URL: {url}")
                     return cached_result
@@ -308,12 +326,9 @@ class ScrapeDoService:
             log_params['token'] = '***hidden***'
             logger.info(f"Scraping URL: {url} with params: {log_params}")
             
-            # Make the request
-            response = self.session.get(
-                self.BASE_URL,
-                params=params,
-                timeout=self.DEFAULT_TIMEOUT
-            )
+            # Make the request (fails fast while the circuit is open, then
+            # waits for a slot of the shared rate limiter)
+            response = self._get(params)
             
             # Check if request was successful
             if response.status_code == 200:
@@ -327,7 +342,7 @@ class ScrapeDoService:
                 
                 # Cache successful results if caching is enabled
                 if use_cache:
-                    cache.set(cache_key, result, self.CACHE_TTL)
+                    self.response_cache.set(cache_key, result, self.CACHE_TTL)
                     logger.info(f"Cached result for URL: {url}")
                 
                 logger.info(f"Successfully scraped URL: {url}")
@@ -341,6 +356,14 @@ class ScrapeDoService:
                     'success': False
                 }
                 
+        except CircuitOpenError as e:
+            logger.warning(f"Not scraping URL: {url}, {str(e)}")
+            return {'error': str(e), 'success': False, 'circuit_open': True, 'retry_at': e.retry_at}
+        
+        except RateLimitExceeded as e:
+            logger.warning(f"Rate limited while scraping URL: {url}, {str(e)}")
+            return {'error': str(e), 'success': False, 'rate_limited': True}
+        
         except requests.exceptions.Timeout:
             logger.error(f"Timeout while scraping URL: {url}")
             return {'error': 'Request timeout', 'success': False}
@@ -353,6 +376,23 @@ class ScrapeDoService:
             logger.error(f"Unexpected error while scraping URL: {url}, Error: {str(e)}")
             return {'error': str(e), 'success': False}
     
+    def _get(self, params: Dict[str, Any]) -> requests.Response:
+        """
+        Send one API request through the circuit breaker and the rate limiter
+        
+        The response status (or the exception) feeds the breaker and the
+        limiter's concurrency window.
+        """
+        with guard(self.circuit_breaker) as call:
+            if self.rate_limiter is None:
+                response = self.session.get(self.BASE_URL, params=params, timeout=self.DEFAULT_TIMEOUT)
+            else:
+                with self.rate_limiter.limit() as permit:
+                    response = self.session.get(self.BASE_URL, params=params, timeout=self.DEFAULT_TIMEOUT)
+                    permit.status_code = response.status_code
+            call.status_code = response.status_code
+            return response
+    
     def scrape_batch(
         self, 
         urls: list, 
@@ -561,21 +601,39 @@ class ScrapeDoService:
         key_hash = hashlib.md5(key_string.encode()).hexdigest()
         return f"scrape_do_{key_hash}"
     
-    def clear_cache(self, url: Optional[str] = None):
+    def clear_cache(
+        self,
+        url: Optional[str] = None,
+        country_code: Optional[str] = None,
+        render: bool = False,
+        **kwargs
+    ):
         """
         Clear cached results
         
         Args:
             url: Optional URL to clear specific cache. If None, clears all scrape.do cache
+            country_code: Country code the URL was scraped with
+            render: Whether the URL was scraped with JS rendering
+            **kwargs: Additional Scrape.do parameters the URL was scraped with
         """
         if url:
-            # Clear specific URL cache (would need to match exact parameters)
-            cache_key = self._generate_cache_key(url)
-            cache.delete(cache_key)
+            # The key covers the same parameters as scrape()
+            cache_key = self._generate_cache_key(url, country_code, render, **kwargs)
+            self.response_cache.delete(cache_key)
             logger.info(f"Cleared cache for URL: {url}")
         else:
-            # Clear all scrape.do cache (pattern-based, requires cache backend support)
-            logger.info("Cache clearing requires specific implementation based on cache backend")
+            self.response_cache.clear()
+            logger.info("Cleared all scrape.do cache")
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Response cache counters (hits, misses, hit rate, bytes)
+        
+        Returns:
+            Dict of counters shared by all workers
+        """
+        return self.response_cache.stats()
     
     def get_usage(self) -> Optional[Dict[str, Any]]:
         """
@@ -0,0 +1,296 @@
+"""
+SERP parser benchmark harness
+Runs GoogleSearchParser (and optionally RankingExtractor's rank stage) over stored SERP HTML
+"""
+
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List
+
+from services import google_search_parser
+from services.google_search_parser import GoogleSearchParser
+
+BASELINE_VERSION = 1
+
+
+def collect_serp_files(paths: Iterable[str]) -> List[Path]:
+    """
+    Expand files and directories into a sorted list of SERP HTML files
+
+    Args:
+        paths: HTML files or directories (searched recursively for *.html)
+
+    Returns:
+        List of HTML file paths
+    """
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(path.rglob('*.html')))
+        elif path.is_file():
+            files.append(path)
+    return files
+
+
+def feature_counts(parsed_results: Dict[str, Any]) -> Dict[str, int]:
+    """
+    Count items per SERP feature in a parse result
+
+    Args:
+        parsed_results: Output of GoogleSearchParser.parse
+
+    Returns:
+        Dict of feature name to item count (dict features count as 1)
+    """
+    counts = {}
+    for key, value in parsed_results.items():
+        if key == 'results':  # Alias of organic_results
+            continue
+        if isinstance(value, list) and value:
+            counts[key] = len(value)
+        elif isinstance(value, dict) and value:
+            counts[key] = 1
+    return counts
+
+
+class _StageTimer:
+    """Accumulate wall time per named stage while a parse runs"""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+
+    def wrap(self, name: str, func: Callable) -> Callable:
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.totals[name] += time.perf_counter() - started
+        return timed
+
+
+class SerpBenchmark:
+    """
+    Benchmark GoogleSearchParser over a corpus of stored SERPs.
+
+    For every document this records the median parse time over `repeat` runs,
+    inclusive time per parser stage (tree build and each `_extract_*` method),
+    peak traced memory of one parse, and SERP feature counts. When a
+    RankingExtractor is supplied, its rank stage (domain rank, SERP feature
+    flags) is timed on the parsed results as well. Nothing touches the database.
+
+    Usage:
+        report = SerpBenchmark(profile='rank').run(collect_serp_files(['tests/fixtures/serp']))
+        regressions = compare_with_baseline(report, load_baseline('baseline.json'), threshold=0.1)
+    """
+
+    def __init__(
+        self,
+        profile: str = 'full',
+        repeat: int = 3,
+        ranking_extractor: Any = None,
+        domain: str = ''
+    ):
+        """
+        Args:
+            profile: Parse profile ('full' or 'rank')
+            repeat: Timed runs per document (median is reported)
+            ranking_extractor: Optional RankingExtractor for the rank stage
+            domain: Domain to look up in the rank stage
+        """
+        self.profile = profile
+        self.repeat = max(1, int(repeat))
+        self.ranking_extractor = ranking_extractor
+        self.domain = domain
+
+    def _instrumented_parser(self, timer: _StageTimer) -> GoogleSearchParser:
+        """Parser whose extract methods report into timer"""
+        parser = GoogleSearchParser()
+        for name in dir(parser):
+            if name.startswith('_extract_'):
+                setattr(parser, name, timer.wrap(name[len('_extract_'):], getattr(parser, name)))
+        return parser
+
+    def _profile_document(self, html: bytes) -> Dict[str, float]:
+        """Inclusive time in milliseconds per parser stage for one parse"""
+        timer = _StageTimer()
+        parser = self._instrumented_parser(timer)
+
+        original_soup = google_search_parser.BeautifulSoup
+        google_search_parser.BeautifulSoup = timer.wrap('tree_build', original_soup)
+        try:
+            parser.parse(html, profile=self.profile)
+        finally:
+            google_search_parser.BeautifulSoup = original_soup
+
+        return {name: round(seconds * 1000, 3) for name, seconds in sorted(timer.totals.items())}
+
+    def _peak_memory(self, parser: GoogleSearchParser, html: bytes) -> int:
+        """Peak traced allocation in bytes while parsing once"""
+        tracemalloc.start()
+        try:
+            parser.parse(html, profile=self.profile)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak
+
+    def run_document(self, path: Path) -> Dict[str, Any]:
+        """
+        Benchmark a single SERP HTML file
+
+        Args:
+            path: HTML file
+
+        Returns:
+            Per-document result dict
+        """
+        html = path.read_bytes()
+        parser = GoogleSearchParser()
+
+        # Warm-up run, also the result we report counts from
+        parsed = parser.parse(html, profile=self.profile)
+
+        timings = []
+        for _ in range(self.repeat):
+            started = time.perf_counter()
+            parser.parse(html, profile=self.profile)
+            timings.append(time.perf_counter() - started)
+
+        result = {
+            'document': path.name,
+            'bytes': len(html),
+            'parse_ms': round(statistics.median(timings) * 1000, 3),
+            'stages_ms': self._profile_document(html),
+            'peak_memory_bytes': self._peak_memory(parser, html),
+            'features': feature_counts(parsed),
+        }
+        if parsed.get('error'):
+            result['error'] = parsed['error']
+
+        if self.ranking_extractor is not None:
+            started = time.perf_counter()
+            rank, is_organic, _ = self.ranking_extractor._find_domain_rank(parsed, self.domain)
+            self.ranking_extractor._detect_serp_features(parsed)
+            result['rank_ms'] = round((time.perf_counter() - started) * 1000, 3)
+            result['rank'] = rank if is_organic else -rank
+
+        return result
+
+    def run(self, files: List[Path]) -> Dict[str, Any]:
+        """
+        Benchmark every file and summarize
+
+        Args:
+            files: SERP HTML files
+
+        Returns:
+            Report dict (also the baseline file format)
+        """
+        documents = [self.run_document(path) for path in files]
+
+        total_seconds = sum(doc['parse_ms'] for doc in documents) / 1000
+        total_bytes = sum(doc['bytes'] for doc in documents)
+
+        feature_totals = defaultdict(lambda: {'serps': 0, 'items': 0})
+        stage_totals = defaultdict(float)
+        for doc in documents:
+            for feature, count in doc['features'].items():
+                feature_totals[feature]['serps'] += 1
+                feature_totals[feature]['items'] += count
+            for stage, ms in doc['stages_ms'].items():
+                stage_totals[stage] += ms
+
+        return {
+            'version': BASELINE_VERSION,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'environment': {
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'profile': self.profile,
+                'repeat': self.repeat,
+            },
+            'summary': {
+                'documents': len(documents),
+                'total_bytes': total_bytes,
+                'total_parse_ms': round(total_seconds * 1000, 3),
+                'docs_per_second': round(len(documents) / total_seconds, 3) if total_seconds else 0,
+                'mb_per_second': round(total_bytes / 1_000_000 / total_seconds, 3) if total_seconds else 0,
+                'max_peak_memory_bytes': max((doc['peak_memory_bytes'] for doc in documents), default=0),
+                'stages_ms': {stage: round(ms, 3) for stage, ms in sorted(stage_totals.items(), key=lambda item: -item[1])},
+                'features': dict(sorted(feature_totals.items())),
+            },
+            'documents': documents,
+        }
+
+
+def save_baseline(report: Dict[str, Any], path: str) -> None:
+    """Write a benchmark report as the JSON baseline"""
+    Path(path).write_text(json.dumps(report, indent=2, sort_keys=False) + '\n', encoding='utf-8')
+
+
+def load_baseline(path: str) -> Dict[str, Any]:
+    """Read a JSON baseline written by save_baseline"""
+    return json.loads(Path(path).read_text(encoding='utf-8'))
+
+
+def compare_with_baseline(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = 0.10,
+    per_document: bool = False
+) -> List[str]:
+    """
+    Compare a report with a baseline
+
+    Corpus throughput (documents per second) must not drop by more than the
+    threshold. Organic/sponsored result counts per document must match
+    exactly - a parser change that finds a different number of results is a
+    correctness regression, not a performance one.
+
+    Args:
+        report: Current benchmark report
+        baseline: Baseline report
+        threshold: Allowed throughput drop as a fraction (0.10 = 10% slower)
+        per_document: Also apply the threshold to each document's parse time
+            (noisy for small documents)
+
+    Returns:
+        List of human readable regressions (empty if none)
+    """
+    regressions = []
+
+    current_rate = report['summary']['docs_per_second']
+    baseline_rate = baseline['summary']['docs_per_second']
+    if baseline_rate and current_rate < baseline_rate * (1 - threshold):
+        regressions.append(
+            f"corpus throughput {current_rate:.2f} docs/s is "
+            f"{(1 - current_rate / baseline_rate) * 100:.1f}% below baseline {baseline_rate:.2f} docs/s"
+        )
+
+    baseline_docs = {doc['document']: doc for doc in baseline.get('documents', [])}
+    for doc in report['documents']:
+        previous = baseline_docs.get(doc['document'])
+        if not previous:
+            continue
+
+        if per_document and previous['parse_ms'] and doc['parse_ms'] > previous['parse_ms'] / (1 - threshold):
+            regressions.append(
+                f"{doc['document']}: parse {doc['parse_ms']:.2f}ms vs baseline {previous['parse_ms']:.2f}ms"
+            )
+
+        for feature in ('organic_results', 'sponsored_results'):
+            current_count = doc['features'].get(feature, 0)
+            previous_count = previous['features'].get(feature, 0)
+            if current_count != previous_count:
+                regressions.append(
+                    f"{doc['document']}: {feature} count {current_count} vs baseline {previous_count}"
+                )
+
+    return regressions
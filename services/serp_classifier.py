@@ -0,0 +1,263 @@
+"""
+Single-pass DOM classifier for Google SERP result containers
+"""
+
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+from bs4 import BeautifulSoup, CData, Comment, Declaration, Doctype, NavigableString, ProcessingInstruction, Tag
+
+
+# Strings soupsieve's :-soup-contains() ignores when collecting element text
+_SPECIAL_STRINGS = (Comment, Declaration, CData, ProcessingInstruction, Doctype)
+
+# Simple compound selector: optional tag name followed by .class and [attr],
+# [attr="value"] or [attr*="value"] parts - no combinators or pseudo-classes
+_SIMPLE_SELECTOR_RE = re.compile(r'^(?P<tag>[a-zA-Z][\w-]*)?(?P<parts>(?:\.[\w-]+|\[[^\]]+\])*)$')
+_SELECTOR_PART_RE = re.compile(r'\.(?P<cls>[\w-]+)|\[(?P<attr>[\w-]+)(?:(?P<op>\*?=)"(?P<value>[^"]*)")?\]')
+
+# Element feature bits
+SPAN_AD_TEXT = 1 << 0          # span:-soup-contains("Ad")
+SPAN_SPONSORED_TEXT = 1 << 1   # span:-soup-contains("Sponsored")
+AD_HVEID_DIV = 1 << 2          # div[data-hveid][aria-label*="Ad"]
+SHOPPING_AD_DIV = 1 << 3       # div.uEierd
+MEDIA_BLOCK = 1 << 4           # div[data-vid], g-scrolling-carousel
+ANSWER_BLOCK = 1 << 5          # [data-attrid*="kc:/"], [data-tts="answers"]
+
+AD_INDICATORS = SPAN_AD_TEXT | SPAN_SPONSORED_TEXT | AD_HVEID_DIV | SHOPPING_AD_DIV
+SPECIAL_INDICATORS = MEDIA_BLOCK | ANSWER_BLOCK
+
+SPECIAL_RESULT_CLASSES = ('g-blk', 'kno-kp', 'hp-xpdbox', 'g-inner-card', 'kp-blk', 'xpdopen')
+
+
+def _attr_text(tag: Tag, name: str) -> Optional[str]:
+    """Attribute value as soupsieve sees it (multi-valued attributes joined by spaces)"""
+    value = tag.attrs.get(name)
+    if value is None or isinstance(value, str):
+        return value
+    return ' '.join(value)
+
+
+def _content_text(tag: Tag) -> str:
+    """Element text as matched by soupsieve's :-soup-contains()"""
+    return ''.join(
+        node for node in tag.descendants
+        if isinstance(node, NavigableString) and not isinstance(node, _SPECIAL_STRINGS)
+    )
+
+
+def compile_simple_selector(selector: str) -> Optional[Callable[[Tag], bool]]:
+    """
+    Compile a simple compound CSS selector into a predicate
+
+    Args:
+        selector: Selector such as 'div.g', 'div[data-hveid]' or 'div[aria-label*="Ad"]'
+
+    Returns:
+        Predicate taking a Tag, or None if the selector needs the full CSS engine
+    """
+    match = _SIMPLE_SELECTOR_RE.match(selector.strip())
+    if not match or not (match.group('tag') or match.group('parts')):
+        return None
+
+    tag_name = (match.group('tag') or '').lower() or None
+    classes = []
+    attributes = []
+    for part in _SELECTOR_PART_RE.finditer(match.group('parts')):
+        if part.group('cls'):
+            classes.append(part.group('cls'))
+        else:
+            attributes.append((part.group('attr').lower(), part.group('op'), part.group('value')))
+
+    # Every part must have been understood, e.g. no [attr^="x"]
+    rebuilt = ''.join(part.group(0) for part in _SELECTOR_PART_RE.finditer(match.group('parts')))
+    if rebuilt != match.group('parts'):
+        return None
+
+    def predicate(tag: Tag) -> bool:
+        if tag_name and tag.name != tag_name:
+            return False
+        if classes:
+            tag_classes = tag.attrs.get('class') or ()
+            if isinstance(tag_classes, str):
+                tag_classes = tag_classes.split()
+            if any(cls not in tag_classes for cls in classes):
+                return False
+        for name, op, value in attributes:
+            actual = _attr_text(tag, name)
+            if actual is None:
+                return False
+            if op == '=' and actual != value:
+                return False
+            if op == '*=' and (not value or value not in actual):
+                return False
+        return True
+
+    return predicate
+
+
+class SerpDomClassifier:
+    """
+    Classify SERP result containers from one traversal of the document.
+
+    The tree is walked once to record, for every element, which configured
+    result/ad selectors it matches and a bitmask of ad/special-result features.
+    A second pass over the same element list (in reverse document order)
+    folds each element's features into its parent, so "does any descendant
+    look like an ad label" becomes a bit test instead of a subtree search per
+    candidate. Results are identical to running the equivalent selectors.
+
+    Usage:
+        classifier = SerpDomClassifier.build(soup, result_selectors, ad_selectors)
+        if classifier:
+            elements = classifier.result_elements()
+            ...
+    """
+
+    def __init__(
+        self,
+        soup: BeautifulSoup,
+        result_matchers: Sequence[Callable[[Tag], bool]],
+        ad_matchers: Sequence[Callable[[Tag], bool]]
+    ):
+        self.visits = 0
+        self._result_matches: List[List[Tag]] = [[] for _ in result_matchers]
+        self._ad_matches: List[List[Tag]] = [[] for _ in ad_matchers]
+        self._subtree_features: Dict[int, int] = {}
+        self._first_link: Dict[int, Tag] = {}
+        self._walk(soup, result_matchers, ad_matchers)
+
+    @classmethod
+    def build(
+        cls,
+        soup: BeautifulSoup,
+        result_selectors: Sequence[str],
+        ad_selectors: Sequence[str]
+    ) -> Optional['SerpDomClassifier']:
+        """
+        Build a classifier if every selector can be matched without soupsieve
+
+        Args:
+            soup: Parsed SERP document
+            result_selectors: Result container selectors, in priority order
+            ad_selectors: Dedicated ad container selectors
+
+        Returns:
+            SerpDomClassifier or None if a selector is not a simple compound selector
+        """
+        result_matchers = [compile_simple_selector(selector) for selector in result_selectors]
+        ad_matchers = [compile_simple_selector(selector) for selector in ad_selectors]
+        if None in result_matchers or None in ad_matchers:
+            return None
+        return cls(soup, result_matchers, ad_matchers)
+
+    def _walk(
+        self,
+        soup: BeautifulSoup,
+        result_matchers: Sequence[Callable[[Tag], bool]],
+        ad_matchers: Sequence[Callable[[Tag], bool]]
+    ) -> None:
+        """Record selector matches and feature bits for every element"""
+        elements = soup.find_all(True)
+        own_features = {}
+
+        for element in elements:
+            self.visits += 1
+            for index, matcher in enumerate(result_matchers):
+                if matcher(element):
+                    self._result_matches[index].append(element)
+            for index, matcher in enumerate(ad_matchers):
+                if matcher(element):
+                    self._ad_matches[index].append(element)
+
+            features = self._element_features(element)
+            if features:
+                own_features[id(element)] = features
+
+        # Children come after their parent in document order, so walking
+        # backwards folds every subtree into its parent before the parent
+        # itself is folded upwards
+        for element in reversed(elements):
+            parent = element.parent
+            if parent is None:
+                continue
+            element_id = id(element)
+            parent_id = id(parent)
+
+            folded = own_features.get(element_id, 0) | self._subtree_features.get(element_id, 0)
+            if folded:
+                self._subtree_features[parent_id] = self._subtree_features.get(parent_id, 0) | folded
+
+            # Earlier siblings are visited last, so the final write wins in
+            # document order
+            if element.name == 'a' and 'href' in element.attrs:
+                self._first_link[parent_id] = element
+            elif element_id in self._first_link:
+                self._first_link[parent_id] = self._first_link[element_id]
+
+    @staticmethod
+    def _element_features(element: Tag) -> int:
+        """Feature bits of a single element (not including its descendants)"""
+        name = element.name
+        attrs = element.attrs
+        features = 0
+
+        if name == 'span':
+            text = _content_text(element)
+            if 'Ad' in text:
+                features |= SPAN_AD_TEXT
+            if 'Sponsored' in text:
+                features |= SPAN_SPONSORED_TEXT
+        elif name == 'div':
+            if 'data-hveid' in attrs and 'Ad' in (_attr_text(element, 'aria-label') or ''):
+                features |= AD_HVEID_DIV
+            if 'uEierd' in (attrs.get('class') or ()):
+                features |= SHOPPING_AD_DIV
+            if 'data-vid' in attrs:
+                features |= MEDIA_BLOCK
+        elif name == 'g-scrolling-carousel':
+            features |= MEDIA_BLOCK
+
+        if 'kc:/' in (_attr_text(element, 'data-attrid') or '') or _attr_text(element, 'data-tts') == 'answers':
+            features |= ANSWER_BLOCK
+
+        return features
+
+    def result_elements(self) -> List[Tag]:
+        """Elements of the first result selector (in priority order) that matched anything"""
+        for matches in self._result_matches:
+            if matches:
+                return matches
+        return []
+
+    def result_selector_index(self) -> Optional[int]:
+        """Index of the result selector used by result_elements()"""
+        for index, matches in enumerate(self._result_matches):
+            if matches:
+                return index
+        return None
+
+    def ad_elements(self) -> List[Tag]:
+        """Dedicated ad containers, grouped by ad selector in the configured order"""
+        elements = []
+        for matches in self._ad_matches:
+            elements.extend(matches)
+        return elements
+
+    def is_ad(self, element: Tag) -> bool:
+        """Same decision as GoogleSearchParser._is_ad, from cached features"""
+        if self._subtree_features.get(id(element), 0) & AD_INDICATORS:
+            return True
+        return any('ad' in cls.lower() for cls in element.get('class', []))
+
+    def is_special_result(self, element: Tag) -> bool:
+        """Same decision as GoogleSearchParser._is_special_result, from cached features"""
+        element_classes = element.get('class', [])
+        if any(cls in element_classes for cls in SPECIAL_RESULT_CLASSES):
+            return True
+
+        if self._subtree_features.get(id(element), 0) & SPECIAL_INDICATORS:
+            return True
+
+        link = self._first_link.get(id(element))
+        return not link or not link.get('href')
@@ -3,12 +3,24 @@ Tests for Scrape.do service
 """
 
 from django.test import TestCase, override_settings
+from unittest import skipUnless
 from unittest.mock import Mock, patch
 from django.core.cache import cache
+from pathlib import Path
+import os
 import requests
+import shutil
+import tempfile
 
+from .response_cache import DiskResponseCache, DjangoResponseCache
 from .scrape_do import ScrapeDoService, get_scraper
 
+try:
+    import fakeredis
+    FAKEREDIS_AVAILABLE = True
+except ImportError:
+    FAKEREDIS_AVAILABLE = False
+
 
 class ScrapeDoServiceTest(TestCase):
     """Test cases for ScrapeDoService"""
@@ -16,11 +28,19 @@ class ScrapeDoServiceTest(TestCase):
     def setUp(self):
         """Set up test data"""
         cache.clear()
+        self.cache_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            SCRAPE_DO_CACHE_ROOT=self.cache_dir, SCRAPE_DO_RATE_LIMIT_ENABLED=False, CIRCUIT_BREAKER_ENABLED=False
+        )
+        self.settings_override.enable()
         self.api_key = 'test_api_key_12345'
-        self.service = ScrapeDoService(api_key=self.api_key)
+        response_cache = DiskResponseCache(client=fakeredis.FakeRedis()) if FAKEREDIS_AVAILABLE else None
+        self.service = ScrapeDoService(api_key=self.api_key, response_cache=response_cache)
     
     def tearDown(self):
         """Clean up after tests"""
+        self.settings_override.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
         cache.clear()
     
     @patch('services.scrape_do.requests.Session')
@@ -185,6 +205,7 @@ class ScrapeDoServiceTest(TestCase):
         self.assertFalse(result['success'])
         self.assertIn('Connection failed', result['error'])
     
+    @skipUnless(FAKEREDIS_AVAILABLE, 'fakeredis not installed')
     @patch.object(requests.Session, 'get')
     def test_scrape_with_caching(self, mock_get):
         """Test caching functionality"""
@@ -429,6 +450,173 @@ class ScrapeDoServiceTest(TestCase):
         self.assertEqual(usage['requests_made'], 100)
         self.assertEqual(usage['requests_limit'], 1000)
 
+    @skipUnless(FAKEREDIS_AVAILABLE, 'fakeredis not installed')
+    @patch.object(requests.Session, 'get')
+    def test_clear_cache(self, mock_get):
+        """Test clearing one URL (with its parameters) and the whole cache"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.text = 'Content'
+        mock_response.headers = {}
+        mock_response.url = 'https://example.com'
+        mock_get.return_value = mock_response
+        
+        self.service.scrape('https://example.com', country_code='US', render=True)
+        self.service.scrape('https://example.org')
+        
+        self.service.clear_cache('https://example.com', country_code='US', render=True)
+        self.service.scrape('https://example.com', country_code='US', render=True)
+        self.service.scrape('https://example.org')
+        self.assertEqual(mock_get.call_count, 3)
+        
+        self.service.clear_cache()
+        self.service.scrape('https://example.org')
+        self.assertEqual(mock_get.call_count, 4)
+        
+        stats = self.service.cache_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 4))
+
+
+@skipUnless(FAKEREDIS_AVAILABLE, 'fakeredis not installed')
+class DiskResponseCacheTest(TestCase):
+    """Test cases for the disk tier of the response cache"""
+    
+    def setUp(self):
+        cache.clear()
+        self.cache_dir = tempfile.mkdtemp()
+        self.server = fakeredis.FakeServer()
+        self.redis = fakeredis.FakeRedis(server=self.server)
+        self.response_cache = DiskResponseCache(root=self.cache_dir, max_bytes=0, client=self.redis, host='worker-a')
+        self.result = {'html': '<html>' + 'serp ' * 2000 + '</html>', 'status_code': 200, 'success': True}
+    
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        cache.clear()
+    
+    def test_html_is_kept_on_disk_not_in_cache(self):
+        """Test Redis only holds a small index entry"""
+        self.response_cache.set('scrape_do_abcdef', self.result, 60)
+        
+        self.assertEqual(self.response_cache.get('scrape_do_abcdef'), self.result)
+        size = self.response_cache.path('scrape_do_abcdef').stat().st_size
+        self.assertEqual(self.redis.hgetall('scrape_do_cache:0:scrape_do_abcdef'), {b'worker-a': str(size).encode()})
+        self.assertLessEqual(self.redis.ttl('scrape_do_cache:0:scrape_do_abcdef'), 60)
+        self.assertEqual(self.response_cache.path('scrape_do_abcdef').parent.name, 'ab')
+        
+        stats = self.response_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['hit_rate']), (1, 0, 1.0))
+        self.assertLess(stats['bytes_written'], len(self.result['html']) / 10)
+        self.assertEqual(stats['bytes_read'], stats['bytes_written'])
+    
+    def test_missing_index_or_file_is_a_miss(self):
+        """Test an expired index entry or an evicted file is a miss"""
+        self.response_cache.set('scrape_do_aaaa', self.result, 60)
+        self.response_cache.set('scrape_do_bbbb', self.result, 60)
+        self.redis.delete('scrape_do_cache:0:scrape_do_aaaa')
+        self.response_cache.path('scrape_do_bbbb').unlink()
+        
+        self.assertIsNone(self.response_cache.get('scrape_do_aaaa'))
+        self.assertIsNone(self.response_cache.get('scrape_do_bbbb'))
+        self.assertIsNone(self.redis.hget('scrape_do_cache:0:scrape_do_bbbb', 'worker-a'))
+        self.assertEqual(self.response_cache.stats()['misses'], 2)
+    
+    def test_eviction_drops_least_recently_used(self):
+        """Test the size bound evicts the responses read longest ago"""
+        for n, key in enumerate(['scrape_do_aa01', 'scrape_do_bb02', 'scrape_do_cc03']):
+            self.response_cache.set(key, dict(self.result, html=self.result['html'] + str(n)), 60)
+            os.utime(self.response_cache.path(key), (1000 + n, 1000 + n))
+        os.utime(self.response_cache.path('scrape_do_aa01'), (2000, 2000))  # Read most recently
+        size = self.response_cache.path('scrape_do_aa01').stat().st_size
+        
+        self.response_cache.max_bytes = size * 2
+        self.assertEqual(self.response_cache.evict(target_ratio=0.9), 2)
+        
+        self.assertIsNotNone(self.response_cache.get('scrape_do_aa01'))
+        self.assertIsNone(self.response_cache.get('scrape_do_bb02'))
+        self.assertIsNone(self.response_cache.get('scrape_do_cc03'))
+        self.assertEqual(self.response_cache.stats()['bytes_stored'], size)
+        self.assertEqual(self.response_cache.stats()['evictions'], 2)
+    
+    def test_store_over_bound_evicts(self):
+        """Test a write that takes the directory over max_bytes triggers eviction"""
+        self.response_cache.max_bytes = 1
+        self.response_cache.set('scrape_do_aa01', self.result, 60)
+        
+        self.assertEqual(list(Path(self.cache_dir).glob('*/*.zz')), [])
+        self.assertEqual(self.response_cache.stats()['bytes_stored'], 0)
+    
+    def other_worker(self, **kwargs):
+        """A cache in another process: own Redis connection, no shared Django cache"""
+        options = dict(root=self.cache_dir, max_bytes=0, client=fakeredis.FakeRedis(server=self.server), host='worker-a')
+        options.update(kwargs)
+        return DiskResponseCache(**options)
+    
+    def test_clear_invalidates_every_worker(self):
+        """Test clear() drops index entries and files"""
+        self.response_cache.set('scrape_do_aa01', self.result, 60)
+        
+        self.other_worker().clear()
+        
+        self.assertIsNone(self.response_cache.get('scrape_do_aa01'))
+        self.assertEqual(list(Path(self.cache_dir).glob('*/*.zz')), [])
+    
+    def test_workers_on_a_host_share_files_and_counters(self):
+        """Test a response written by one process is a hit in another"""
+        self.response_cache.set('scrape_do_aa01', self.result, 60)
+        cache.clear()  # Nothing may depend on the per-process Django cache
+        
+        other = self.other_worker()
+        self.assertEqual(other.get('scrape_do_aa01'), self.result)
+        self.assertIsNone(other.get('scrape_do_bb02'))
+        
+        stats = self.response_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['bytes_stored'], self.response_cache.path('scrape_do_aa01').stat().st_size)
+    
+    def test_bytes_stored_and_files_are_per_host(self):
+        """Test another host misses without dropping this host's entry and counts its own bytes"""
+        other_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, other_dir, ignore_errors=True)
+        other_host = self.other_worker(root=other_dir, host='worker-b')
+        self.response_cache.set('scrape_do_aa01', self.result, 60)
+        
+        self.assertIsNone(other_host.get('scrape_do_aa01'))
+        self.assertEqual(other_host.stats()['bytes_stored'], 0)
+        self.assertEqual(self.response_cache.get('scrape_do_aa01'), self.result)
+        
+        other_host.set('scrape_do_aa01', self.result, 60)
+        self.assertEqual(other_host.get('scrape_do_aa01'), self.result)
+        self.assertEqual(self.response_cache.get('scrape_do_aa01'), self.result)
+        self.assertEqual(other_host.stats()['bytes_stored'], self.response_cache.stats()['bytes_stored'])
+        self.assertEqual(self.response_cache.stats()['bytes_written'], 2 * self.response_cache.stats()['bytes_stored'])
+    
+    def test_redis_outage_is_a_miss(self):
+        """Test lookups miss and writes are skipped while Redis is down"""
+        self.server.connected = False
+        
+        self.response_cache.set('scrape_do_aa01', self.result, 60)
+        self.assertIsNone(self.response_cache.get('scrape_do_aa01'))
+
+
+@skipUnless(FAKEREDIS_AVAILABLE, 'fakeredis not installed')
+class DjangoResponseCacheTest(TestCase):
+    """Test cases for the whole-response Django cache tier"""
+    
+    def setUp(self):
+        cache.clear()
+    
+    def tearDown(self):
+        cache.clear()
+    
+    def test_round_trip_and_clear(self):
+        """Test responses round-trip and a bulk clear invalidates them"""
+        response_cache = DjangoResponseCache(client=fakeredis.FakeRedis())
+        response_cache.set('scrape_do_aa01', {'html': 'x', 'success': True}, 60)
+        
+        self.assertEqual(response_cache.get('scrape_do_aa01'), {'html': 'x', 'success': True})
+        response_cache.clear()
+        self.assertIsNone(response_cache.get('scrape_do_aa01'))
+
 
 class GetScraperTest(TestCase):
     """Test the get_scraper utility function"""
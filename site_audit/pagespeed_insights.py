@@ -7,6 +7,8 @@ import logging
 from typing import Dict, Optional, Union
 from django.conf import settings
 
+from services.circuit_breaker import get_circuit_breaker, guard
+
 logger = logging.getLogger(__name__)
 
 
@@ -25,6 +27,9 @@ class PageSpeedInsightsClient:
         self.api_key = api_key or getattr(settings, 'GOOGLE_PSI_KEY', None)
         if not self.api_key:
             logger.warning("No Google PageSpeed Insights API key found. Some features may be limited.")
+        
+        # Shared with every worker - an outage fails calls fast instead of timing out
+        self.circuit_breaker = get_circuit_breaker('pagespeed')
     
     def analyze_url(self, url: str, strategy: str = 'mobile', locale: str = 'en', return_raw: bool = False) -> Optional[Dict]:
         """
@@ -52,7 +57,9 @@ class PageSpeedInsightsClient:
         try:
             logger.info(f"Analyzing {url} with strategy {strategy}")
             # Set timeout to 5 minutes (300 seconds) for PageSpeed API calls
-            response = requests.get(self.BASE_URL, params=params, timeout=300)
+            with guard(self.circuit_breaker) as call:
+                response = requests.get(self.BASE_URL, params=params, timeout=300)
+                call.status_code = response.status_code
             response.raise_for_status()
             
             data = response.json()
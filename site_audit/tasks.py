@@ -4,6 +4,7 @@ Celery tasks for site audits using Screaming Frog
 
 import logging
 import shutil
+import time
 from datetime import timedelta
 from pathlib import Path
 
@@ -12,6 +13,8 @@ from django.conf import settings
 from django.core.cache import cache
 from django.utils import timezone
 
+from services.circuit_breaker import get_circuit_breaker
+
 from .models import SiteAudit
 from .screaming_frog import ScreamingFrogCLI
 from .pagespeed_insights import collect_pagespeed_data
@@ -532,6 +535,15 @@ def collect_pagespeed_insights(self, site_audit_id: int) -> dict:
         project = site_audit.project
         url = f"https://{project.domain}"
         
+        # PageSpeed Insights is down - run again once its circuit lets calls through
+        breaker = get_circuit_breaker('pagespeed')
+        open_until = breaker.open_until() if breaker is not None else None
+        if open_until:
+            countdown = max(1, int(open_until - time.time()) + 1)
+            collect_pagespeed_insights.apply_async(args=[site_audit_id], countdown=countdown)
+            logger.warning(f"PageSpeed Insights circuit open, deferring {url} by {countdown}s")
+            return {"status": "deferred", "retry_in": countdown}
+        
         logger.info(f"Collecting PageSpeed Insights data for {url}")
         
         # Collect PageSpeed data for both mobile and desktop (with raw responses)
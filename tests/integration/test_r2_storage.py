@@ -237,6 +237,83 @@ class R2StorageIntegrationTest(TestCase):
             ExpiresIn=7200
         )
     
+    def test_upload_stream_small_file(self):
+        """Test a stream smaller than one part is sent with a single put_object"""
+        mock_s3_client = MagicMock()
+        self.service.client = mock_s3_client
+        
+        result = self.service.upload_stream(iter([b'a,b\r\n', b'1,2\r\n']), 'reports/small.csv', content_type='text/csv')
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['size'], 10)
+        mock_s3_client.create_multipart_upload.assert_not_called()
+        call_args = mock_s3_client.put_object.call_args
+        self.assertEqual(call_args[1]['Body'], b'a,b\r\n1,2\r\n')
+        self.assertEqual(call_args[1]['ContentType'], 'text/csv')
+    
+    def test_upload_stream_multipart(self):
+        """Test a large stream is uploaded in parts as they fill"""
+        mock_s3_client = MagicMock()
+        mock_s3_client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        mock_s3_client.upload_part.side_effect = lambda **kwargs: {'ETag': f"etag-{kwargs['PartNumber']}"}
+        self.service.client = mock_s3_client
+        
+        chunks = (b'x' * 4 for _ in range(5))  # 20 bytes in parts of 8
+        result = self.service.upload_stream(chunks, 'reports/large.csv', part_size=8)
+        
+        self.assertTrue(result['success'])
+        self.assertEqual(result['size'], 20)
+        self.assertEqual(result['parts'], 3)
+        bodies = [call[1]['Body'] for call in mock_s3_client.upload_part.call_args_list]
+        self.assertEqual(bodies, [b'x' * 8, b'x' * 8, b'x' * 4])
+        mock_s3_client.complete_multipart_upload.assert_called_once_with(
+            Bucket=self.service.bucket_name,
+            Key='reports/large.csv',
+            UploadId='upload-1',
+            MultipartUpload={'Parts': [
+                {'PartNumber': 1, 'ETag': 'etag-1'},
+                {'PartNumber': 2, 'ETag': 'etag-2'},
+                {'PartNumber': 3, 'ETag': 'etag-3'},
+            ]}
+        )
+    
+    def test_upload_stream_parts_have_equal_size(self):
+        """Test chunks that do not line up with part_size still give equal-sized parts"""
+        mock_s3_client = MagicMock()
+        mock_s3_client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        mock_s3_client.upload_part.side_effect = lambda **kwargs: {'ETag': f"etag-{kwargs['PartNumber']}"}
+        self.service.client = mock_s3_client
+        
+        chunks = iter([b'a' * 5, b'b' * 7, b'c' * 20, b'd' * 3])  # 35 bytes in parts of 8
+        result = self.service.upload_stream(chunks, 'reports/uneven.csv', part_size=8)
+        
+        bodies = [call[1]['Body'] for call in mock_s3_client.upload_part.call_args_list]
+        self.assertEqual([len(body) for body in bodies], [8, 8, 8, 8, 3])
+        self.assertEqual(b''.join(bodies), b'a' * 5 + b'b' * 7 + b'c' * 20 + b'd' * 3)
+        self.assertEqual(result['parts'], 5)
+        self.assertEqual(result['size'], 35)
+    
+    def test_upload_stream_aborts_on_error(self):
+        """Test a failing stream aborts the multipart upload"""
+        mock_s3_client = MagicMock()
+        mock_s3_client.create_multipart_upload.return_value = {'UploadId': 'upload-1'}
+        mock_s3_client.upload_part.return_value = {'ETag': 'etag'}
+        self.service.client = mock_s3_client
+        
+        def chunks():
+            yield b'x' * 8
+            raise RuntimeError('row generation failed')
+        
+        result = self.service.upload_stream(chunks(), 'reports/broken.csv', part_size=8)
+        
+        self.assertFalse(result['success'])
+        mock_s3_client.complete_multipart_upload.assert_not_called()
+        mock_s3_client.abort_multipart_upload.assert_called_once_with(
+            Bucket=self.service.bucket_name,
+            Key='reports/broken.csv',
+            UploadId='upload-1'
+        )
+    
     def test_singleton_pattern(self):
         """Test that get_r2_service returns singleton"""
         with patch.dict(os.environ, {
@@ -2,13 +2,15 @@
 Tests for batch processing and duplicate prevention
 """
 
+import shutil
+import tempfile
 from datetime import timedelta
-from unittest.mock import patch
-from django.test import TestCase
+from unittest.mock import Mock, patch
+from django.test import TestCase, override_settings
 from django.utils import timezone
 
 from keywords.models import Keyword
-from keywords.tasks import enqueue_keyword_scrapes_batch
+from keywords.tasks import SERP_BATCH_TIME_LIMIT, enqueue_keyword_scrapes_batch, fetch_keyword_serp_batch
 from project.models import Project
 from accounts.models import User
 
@@ -30,6 +32,13 @@ class BatchProcessingTestCase(TestCase):
             title='Batch Test Project',
             active=True
         )
+        
+        # Keep SERP files written by the result handlers out of the checkout
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        settings_override = override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir, SERP_ARCHIVE_ROOT=self.temp_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
     
     @patch('keywords.tasks.fetch_keyword_serp_html.apply_async')
     def test_batch_size_limit(self, mock_apply):
@@ -284,4 +293,116 @@ class BatchProcessingTestCase(TestCase):
         self.assertEqual(result['batch_size'], 500)
         self.assertEqual(result['total'], 2)
         self.assertEqual(result['high_priority'], 1)
-        self.assertEqual(result['default_priority'], 1)
\ No newline at end of file
+        self.assertEqual(result['default_priority'], 1)
+
+class BatchFetchModeTestCase(TestCase):
+    """Test cases for the concurrent batch fetch mode"""
+    
+    def setUp(self):
+        """Set up test data"""
+        self.user = User.objects.create_user(
+            username='batch_mode_user',
+            email='batchmode@test.com',
+            password='testpass123'
+        )
+        
+        self.project = Project.objects.create(
+            user=self.user,
+            domain='batchmode.com',
+            title='Batch Mode Project',
+            active=True
+        )
+        
+        # Keep SERP files written by the result handlers out of the checkout
+        self.temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.temp_dir, ignore_errors=True)
+        settings_override = override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir, SERP_ARCHIVE_ROOT=self.temp_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+    
+    @override_settings(SERP_BATCH_SIZE=2)
+    @patch('keywords.tasks.fetch_keyword_serp_html.apply_async')
+    @patch('keywords.tasks.fetch_keyword_serp_batch.apply_async')
+    def test_enqueue_in_batch_mode(self, mock_batch_apply, mock_single_apply):
+        """Test that batch mode enqueues one task per SERP_BATCH_SIZE keywords"""
+        old_time = timezone.now() - timedelta(hours=25)
+        for i in range(5):
+            Keyword.objects.create(
+                project=self.project,
+                keyword=f'batch keyword {i}',
+                country='US',
+                scraped_at=old_time,
+                processing=False
+            )
+        
+        result = enqueue_keyword_scrapes_batch(fetch_mode='batch')
+        
+        self.assertEqual(result['total'], 5)
+        self.assertEqual(result['fetch_mode'], 'batch')
+        self.assertEqual(mock_single_apply.call_count, 0)
+        self.assertEqual(mock_batch_apply.call_count, 3)
+        
+        queued_ids = []
+        for call in mock_batch_apply.call_args_list:
+            self.assertEqual(call[1]['queue'], 'serp_default')
+            queued_ids.extend(call[1]['args'][0])
+        self.assertEqual(len(queued_ids), 5)
+    
+    @patch('keywords.tasks._handle_successful_fetch')
+    @patch('keywords.tasks.ScrapeDoService')
+    def test_batch_task_hands_results_to_handlers(self, mock_scraper_class, mock_success):
+        """Test that the batch task fetches every keyword and resets processing flags"""
+        mock_scraper = Mock()
+        mock_scraper_class.return_value = mock_scraper
+        
+        def scrape_google_search(query, **kwargs):
+            if query == 'batch fail':
+                return {'status_code': 500, 'success': False}
+            return {'status_code': 200, 'html': f'<html>{query}</html>', 'success': True}
+        
+        mock_scraper.scrape_google_search.side_effect = scrape_google_search
+        
+        ok_keyword = Keyword.objects.create(
+            project=self.project,
+            keyword='batch ok',
+            country='US',
+            processing=True
+        )
+        failed_keyword = Keyword.objects.create(
+            project=self.project,
+            keyword='batch fail',
+            country='US',
+            processing=True
+        )
+        
+        stats = fetch_keyword_serp_batch([ok_keyword.id, failed_keyword.id])
+        
+        self.assertEqual(stats['fetched'], 2)
+        self.assertEqual(stats['succeeded'], 1)
+        self.assertEqual(stats['failed'], 1)
+        mock_success.assert_called_once()
+        self.assertEqual(mock_success.call_args[0][1], '<html>batch ok</html>')
+        
+        failed_keyword.refresh_from_db()
+        self.assertEqual(failed_keyword.failed_api_hit_count, 1)
+        self.assertEqual(failed_keyword.last_error_message, 'HTTP 500')
+        self.assertFalse(Keyword.objects.filter(processing=True).exists())
+    
+    @patch('keywords.tasks.ScrapeDoService')
+    def test_batch_locks_outlive_the_task(self, mock_scraper_class):
+        """Test that batch keyword locks last at least as long as the batch may run"""
+        from keywords.tasks import cache
+        
+        mock_scraper_class.return_value.scrape_google_search.return_value = {'status_code': 500, 'success': False}
+        keyword = Keyword.objects.create(
+            project=self.project,
+            keyword='long batch',
+            country='US',
+            processing=True
+        )
+        
+        with patch('keywords.tasks.cache.add', wraps=cache.add) as mock_add:
+            fetch_keyword_serp_batch([keyword.id])
+        
+        self.assertGreaterEqual(mock_add.call_args[1]['timeout'], SERP_BATCH_TIME_LIMIT)
+        self.assertGreaterEqual(SERP_BATCH_TIME_LIMIT, fetch_keyword_serp_batch.time_limit)
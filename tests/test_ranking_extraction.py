@@ -362,7 +362,7 @@ class RankingExtractorTestCase(TestCase):
             mock_r2.upload_json.return_value = {'success': True}
             
             # Execute with override settings
-            with override_settings(SCRAPE_DO_STORAGE_ROOT=temp_dir):
+            with override_settings(SCRAPE_DO_STORAGE_ROOT=temp_dir, SERP_ARCHIVE_ROOT=temp_dir):
                 relative_path = f"{self.project.id}/{self.keyword.id}/2024-01-15.html"
                 result = process_stored_html(self.keyword.id, relative_path)
             
@@ -375,6 +375,51 @@ class RankingExtractorTestCase(TestCase):
             rank = Rank.objects.get(keyword=self.keyword)
             self.assertEqual(rank.created_at.date(), datetime(2024, 1, 15).date())
     
+    @override_settings(SERP_ENRICHMENT_ENABLED=True)
+    @patch('keywords.tasks.enrich_rank_serp_features.apply_async')
+    @patch('keywords.ranking_extractor.GoogleSearchParser')
+    @patch('keywords.ranking_extractor.get_r2_service')
+    def test_rank_profile_defers_features(self, mock_r2_service, mock_parser_class, mock_enrich):
+        """Test that a rank-only parse queues the full parse for later"""
+        mock_parser = Mock()
+        mock_parser_class.return_value = mock_parser
+        mock_parser.parse.return_value = {
+            'organic_results': self.sample_parsed_results['organic_results'],
+            'sponsored_results': [],
+            'profile': 'rank'
+        }
+        
+        mock_r2 = Mock()
+        mock_r2_service.return_value = mock_r2
+        mock_r2.upload_json.return_value = {'success': True}
+        
+        self.keyword.scrape_do_file_path = f"{self.project.id}/{self.keyword.id}/2024-01-15.html"
+        
+        extractor = RankingExtractor()
+        result = extractor.process_serp_html(
+            self.keyword,
+            self.sample_html,
+            datetime.now(),
+            profile='rank'
+        )
+        
+        self.assertEqual(result['rank'], 2)
+        self.assertEqual(mock_parser.parse.call_args[1]['profile'], 'rank')
+        mock_enrich.assert_called_once()
+        self.assertEqual(mock_enrich.call_args[1]['args'], [result['rank_id'], self.keyword.scrape_do_file_path])
+        self.assertEqual(mock_enrich.call_args[1]['queue'], 'celery')
+        
+        # Full enrichment fills in the SERP features afterwards
+        mock_parser.parse.return_value = self.sample_parsed_results
+        rank = Rank.objects.get(id=result['rank_id'])
+        self.assertFalse(rank.has_map_result)
+        self.assertTrue(extractor.enrich_rank(rank, self.sample_html))
+        
+        rank.refresh_from_db()
+        self.assertTrue(rank.has_map_result)
+        self.assertTrue(rank.has_video_result)
+        self.assertEqual(mock_parser.parse.call_args[1]['profile'], 'full')
+    
     def test_keyword_update_rank_method(self):
         """Test the Keyword.update_rank method"""
         # Initial state
@@ -469,7 +514,7 @@ class IntegrationTestCase(TestCase):
         mock_r2.upload_json.return_value = {'success': True}
         
         with tempfile.TemporaryDirectory() as temp_dir:
-            with override_settings(SCRAPE_DO_STORAGE_ROOT=temp_dir):
+            with override_settings(SCRAPE_DO_STORAGE_ROOT=temp_dir, SERP_ARCHIVE_ROOT=temp_dir):
                 # Execute the fetch task
                 fetch_keyword_serp_html(self.keyword.id)
         
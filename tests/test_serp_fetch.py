@@ -13,8 +13,9 @@ from django.test import TestCase, override_settings
 from django.utils import timezone
 from django.core.cache import cache
 
-from keywords.models import Keyword
-from keywords.tasks import fetch_keyword_serp_html
+from keywords.models import Keyword, SerpArchiveEntry
+from keywords.serp_archive import read_serp, read_serp_key
+from keywords.tasks import fetch_keyword_serp_html, prune_serp_archive
 from project.models import Project
 from accounts.models import User
 
@@ -85,7 +86,7 @@ class SERPFetchTestCase(TestCase):
             'success': True
         }
         
-        with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir):
+        with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir, SERP_ARCHIVE_ROOT=self.temp_dir):
             # Execute task
             fetch_keyword_serp_html(self.keyword.id)
         
@@ -98,17 +99,14 @@ class SERPFetchTestCase(TestCase):
         self.assertEqual(self.keyword.failed_api_hit_count, 0)
         self.assertIsNone(self.keyword.last_error_message)
         
-        # Check file was created
+        # Check SERP was archived under today's key
         expected_path = f"{self.project.id}/{self.keyword.id}/{datetime.now().strftime('%Y-%m-%d')}.html"
         self.assertEqual(self.keyword.scrape_do_file_path, expected_path)
-        self.assertEqual(len(self.keyword.scrape_do_files), 1)
-        self.assertEqual(self.keyword.scrape_do_files[0], expected_path)
-        
-        # Check actual file exists
-        file_path = Path(self.temp_dir) / expected_path
-        self.assertTrue(file_path.exists())
-        content = file_path.read_text()
-        self.assertEqual(content, '<html>Test SERP HTML</html>')
+        
+        # Check the archived HTML reads back unchanged (and no raw file is written)
+        with override_settings(SERP_ARCHIVE_ROOT=self.temp_dir):
+            self.assertEqual(read_serp(self.keyword, datetime.now().date()), '<html>Test SERP HTML</html>')
+        self.assertFalse((Path(self.temp_dir) / expected_path).exists())
     
     @override_settings(SCRAPE_DO_STORAGE_ROOT='/tmp/test_storage')
     @patch('keywords.tasks.ScrapeDoService')
@@ -122,7 +120,7 @@ class SERPFetchTestCase(TestCase):
             'success': False
         }
         
-        with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir):
+        with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir, SERP_ARCHIVE_ROOT=self.temp_dir):
             # Execute task
             fetch_keyword_serp_html(self.keyword.id)
         
@@ -153,7 +151,7 @@ class SERPFetchTestCase(TestCase):
         mock_scraper_class.return_value = mock_scraper
         mock_scraper.scrape_google_search.side_effect = TimeoutError("Request timeout")
         
-        with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir):
+        with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir, SERP_ARCHIVE_ROOT=self.temp_dir):
             # Execute task
             fetch_keyword_serp_html(self.keyword.id)
         
@@ -167,56 +165,39 @@ class SERPFetchTestCase(TestCase):
         self.assertEqual(self.keyword.failed_api_hit_count, 1)
         self.assertEqual(self.keyword.last_error_message, 'Timeout')
     
-    @override_settings(
-        SCRAPE_DO_STORAGE_ROOT='/tmp/test_storage',
-        SERP_HISTORY_DAYS=7
-    )
+    @override_settings(SERP_HISTORY_DAYS=7)
     @patch('keywords.tasks.ScrapeDoService')
-    def test_file_rotation_keeps_last_7(self, mock_scraper_class):
-        """Test that file rotation keeps only last 7 files"""
-        # Setup mock
+    def test_retention_prunes_serps_past_history_window(self, mock_scraper_class):
+        """Test that archived SERPs are pruned by date, not on fetch"""
+        from keywords.serp_archive import store_serp
+        
         mock_scraper = Mock()
         mock_scraper_class.return_value = mock_scraper
+        mock_scraper.scrape_google_search.return_value = {
+            'status_code': 200,
+            'html': '<html>New content</html>',
+            'success': True
+        }
         
-        with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir):
-            # Pre-populate with 7 existing files
-            existing_files = []
-            base_dir = Path(self.temp_dir) / str(self.project.id) / str(self.keyword.id)
-            base_dir.mkdir(parents=True, exist_ok=True)
+        with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir, SERP_ARCHIVE_ROOT=self.temp_dir):
+            # Pre-populate 10 days of history
+            for i in range(10):
+                store_serp(self.keyword, f"Old content {i}", timezone.localdate() - timedelta(days=i + 1))
             
-            for i in range(7):
-                date_str = (datetime.now() - timedelta(days=i+1)).strftime('%Y-%m-%d')
-                file_path = base_dir / f"{date_str}.html"
-                file_path.write_text(f"Old content {i}")
-                relative_path = f"{self.project.id}/{self.keyword.id}/{date_str}.html"
-                existing_files.append(relative_path)
+            fetch_keyword_serp_html(self.keyword.id)
             
-            # Set existing files in keyword (reverse order - oldest last)
-            self.keyword.scrape_do_files = existing_files
-            self.keyword.save()
+            # Fetching never deletes history
+            self.assertEqual(SerpArchiveEntry.objects.filter(keyword=self.keyword).count(), 11)
             
-            # Now fetch new content
-            mock_scraper.scrape_google_search.return_value = {
-                'status_code': 200,
-                'html': '<html>New content</html>',
-                'success': True
-            }
+            result = prune_serp_archive()
             
-            fetch_keyword_serp_html(self.keyword.id)
-        
-        # Reload keyword
-        self.keyword.refresh_from_db()
-        
-        # Should have exactly 7 files
-        self.assertEqual(len(self.keyword.scrape_do_files), 7)
-        
-        # Latest file should be at index 0
-        today_path = f"{self.project.id}/{self.keyword.id}/{datetime.now().strftime('%Y-%m-%d')}.html"
-        self.assertEqual(self.keyword.scrape_do_files[0], today_path)
-        
-        # Oldest file should have been deleted
-        oldest_path = Path(self.temp_dir) / existing_files[-1]
-        self.assertFalse(oldest_path.exists())
+            # Today and the 7 previous days are kept, older days dropped whole
+            self.assertEqual(result['entries'], 3)
+            self.assertEqual(result['blobs'], 3)
+            self.assertEqual(result['segments'], 3)
+            self.assertEqual(SerpArchiveEntry.objects.filter(keyword=self.keyword).count(), 8)
+            self.assertIsNone(read_serp(self.keyword, timezone.localdate() - timedelta(days=8)))
+            self.assertEqual(read_serp(self.keyword, timezone.localdate() - timedelta(days=7)), 'Old content 6')
     
     @override_settings(
         FETCH_MIN_INTERVAL_HOURS=24
@@ -318,14 +299,13 @@ class SERPFetchTestCase(TestCase):
             'success': True
         }
         
-        with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir):
-            # Patch Path.write_text to simulate write error
-            with patch.object(Path, 'write_text', side_effect=IOError("Disk full")):
+        with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir, SERP_ARCHIVE_ROOT=self.temp_dir):
+            # Fail the segment append to simulate a write error
+            with patch('keywords.serp_archive._writer.append', side_effect=IOError("Disk full")):
                 fetch_keyword_serp_html(self.keyword.id)
         
-        # Check no .tmp files left
-        for path in Path(self.temp_dir).rglob('*.tmp'):
-            self.fail(f"Found temp file: {path}")
+        # Nothing was archived
+        self.assertFalse(SerpArchiveEntry.objects.filter(keyword=self.keyword).exists())
         
         # Keyword should show failure
         self.keyword.refresh_from_db()
@@ -343,7 +323,7 @@ class SERPFetchTestCase(TestCase):
             'success': True
         }
         
-        with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir):
+        with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir, SERP_ARCHIVE_ROOT=self.temp_dir):
             # First fetch
             fetch_keyword_serp_html(self.keyword.id)
             
@@ -363,10 +343,9 @@ class SERPFetchTestCase(TestCase):
             }
             fetch_keyword_serp_html(self.keyword.id)
         
-        # File should contain first content (not overwritten)
-        file_path = Path(self.temp_dir) / f"{self.project.id}/{self.keyword.id}/{datetime.now().strftime('%Y-%m-%d')}.html"
-        content = file_path.read_text()
-        self.assertEqual(content, '<html>First fetch</html>')
+        # Archive should hold the first content (not overwritten)
+        with override_settings(SERP_ARCHIVE_ROOT=self.temp_dir):
+            self.assertEqual(read_serp(self.keyword, datetime.now().date()), '<html>First fetch</html>')
         
         # Success count should be 2
         self.keyword.refresh_from_db()
@@ -409,4 +388,278 @@ class CeleryIntegrationTest(TestCase):
         from limeclicks.celery import app
         
         routes = app.conf.task_routes
-        self.assertIn('keywords.tasks.fetch_keyword_serp_html', routes)
\ No newline at end of file
+        self.assertIn('keywords.tasks.fetch_keyword_serp_html', routes)
+
+class SerpSnapshotReuseTestCase(TestCase):
+    """Test same-day SERP reuse across keywords with identical queries"""
+    
+    def setUp(self):
+        """Set up two projects tracking the same query"""
+        cache.clear()
+        
+        self.user = User.objects.create_user(
+            username='snapshotuser',
+            email='snapshot@example.com',
+            password='testpass123'
+        )
+        self.project_a = Project.objects.create(user=self.user, domain='example.com', title='A', active=True)
+        self.project_b = Project.objects.create(user=self.user, domain='other.com', title='B', active=True)
+        
+        self.source_keyword = Keyword.objects.create(
+            project=self.project_a, keyword='Running Shoes', country='US', country_code='US'
+        )
+        self.keyword = Keyword.objects.create(
+            project=self.project_b, keyword='running  shoes', country='US', country_code='us'
+        )
+    
+    def tearDown(self):
+        cache.clear()
+    
+    @override_settings(SERP_SNAPSHOT_REUSE=True)
+    @patch('keywords.ranking_extractor.RankingExtractor.process_parsed_results')
+    @patch('keywords.ranking_extractor.get_r2_service')
+    @patch('keywords.tasks.ScrapeDoService')
+    def test_second_keyword_reuses_snapshot(self, mock_scraper_class, mock_get_r2, mock_process):
+        """A keyword whose query was already crawled today skips Scrape.do"""
+        from keywords.models import SerpSnapshot
+        
+        snapshot = SerpSnapshot.record(
+            self.source_keyword,
+            datetime.now().date(),
+            'example.com/running-shoes/2025-01-01.json'
+        )
+        mock_r2 = Mock()
+        mock_get_r2.return_value = mock_r2
+        mock_r2.download_json.return_value = {
+            'results': {
+                'organic_results': [
+                    {'position': 1, 'url': 'https://www.nike.com/running'},
+                    {'position': 2, 'url': 'https://other.com/shoes'},
+                ]
+            }
+        }
+        mock_process.return_value = {'success': True}
+        
+        fetch_keyword_serp_html(self.keyword.id)
+        
+        mock_scraper_class.assert_not_called()
+        mock_r2.download_json.assert_called_once_with(snapshot.results_file)
+        self.assertEqual(mock_process.call_args[0][3], snapshot.results_file)
+        
+        self.keyword.refresh_from_db()
+        self.assertIsNotNone(self.keyword.scraped_at)
+        self.assertFalse(self.keyword.processing)
+        self.assertEqual(self.keyword.top_competitors, [
+            {'position': 1, 'domain': 'nike.com', 'url': 'https://www.nike.com/running'}
+        ])
+        
+        snapshot.refresh_from_db()
+        self.assertEqual(snapshot.reuse_count, 1)
+    
+    @override_settings(SERP_SNAPSHOT_REUSE=True, SERP_BATCH_CONCURRENCY=2)
+    @patch('keywords.tasks._scrape_circuit_open_until', return_value=timezone.now() + timedelta(minutes=5))
+    @patch('keywords.ranking_extractor.RankingExtractor.process_parsed_results')
+    @patch('keywords.ranking_extractor.get_r2_service')
+    @patch('keywords.tasks.ScrapeDoService')
+    def test_batch_loads_snapshots_in_fetch_stage(self, mock_scraper_class, mock_get_r2, mock_process, mock_open):
+        """Batch snapshot downloads run on the fetch threads, even while Scrape.do is down"""
+        import threading
+        from keywords.models import SerpSnapshot
+        from keywords.tasks import fetch_keyword_serp_batch
+        
+        SerpSnapshot.record(self.source_keyword, datetime.now().date(), 'example.com/running-shoes/x.json')
+        other = Keyword.objects.create(project=self.project_b, keyword='trail shoes', country='US', country_code='us')
+        
+        download_threads = []
+        
+        def download_json(path):
+            download_threads.append(threading.current_thread().name)
+            return {'results': {'organic_results': [{'position': 1, 'url': 'https://www.nike.com/running'}]}}
+        
+        mock_r2 = Mock()
+        mock_get_r2.return_value = mock_r2
+        mock_r2.download_json.side_effect = download_json
+        mock_process.return_value = {'success': True}
+        
+        stats = fetch_keyword_serp_batch([self.keyword.id, other.id])
+        
+        self.assertEqual(stats['reused'], 1)
+        self.assertEqual(stats['deferred'], 1)
+        self.assertEqual(len(download_threads), 1)
+        self.assertTrue(download_threads[0].startswith('serp-fetch'))
+        mock_scraper_class.return_value.scrape_google_search.assert_not_called()
+        
+        self.keyword.refresh_from_db()
+        other.refresh_from_db()
+        self.assertIsNotNone(self.keyword.scraped_at)
+        self.assertIsNone(other.scraped_at)
+        self.assertIsNotNone(other.next_crawl_at)
+    
+    @override_settings(SERP_SNAPSHOT_REUSE=True)
+    @patch('keywords.tasks.ScrapeDoService')
+    def test_force_crawl_bypasses_snapshot(self, mock_scraper_class):
+        """Force crawls always fetch a fresh SERP"""
+        from keywords.models import SerpSnapshot
+        
+        SerpSnapshot.record(self.source_keyword, datetime.now().date(), 'example.com/running-shoes/x.json')
+        self.keyword.crawl_priority = 'critical'
+        self.keyword.save()
+        
+        mock_scraper = Mock()
+        mock_scraper_class.return_value = mock_scraper
+        mock_scraper.scrape_google_search.return_value = {'status_code': 500, 'success': False}
+        
+        fetch_keyword_serp_html(self.keyword.id)
+        
+        mock_scraper.scrape_google_search.assert_called()
+
+
+class ParseOnceTestCase(TestCase):
+    """Test that a crawl parses the SERP HTML a single time"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='parseonce',
+            email='parseonce@example.com',
+            password='testpass123'
+        )
+        self.project = Project.objects.create(user=self.user, domain='example.com', title='P', active=True)
+        self.keyword = Keyword.objects.create(
+            project=self.project, keyword='parse once', country='US', country_code='US'
+        )
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        cache.clear()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    @patch('keywords.ranking_extractor.get_r2_service')
+    @patch('keywords.tasks.ScrapeDoService')
+    def test_parser_runs_once_per_crawl(self, mock_scraper_class, mock_get_r2):
+        """Top pages, competitors, rank and R2 upload share one parse"""
+        from keywords.models import Rank
+        from services.google_search_parser import GoogleSearchParser
+        
+        mock_scraper = Mock()
+        mock_scraper_class.return_value = mock_scraper
+        mock_scraper.scrape_google_search.return_value = {
+            'status_code': 200,
+            'html': '<html>SERP</html>',
+            'success': True
+        }
+        mock_r2 = Mock()
+        mock_get_r2.return_value = mock_r2
+        mock_r2.upload_json.return_value = {'success': True}
+        
+        parsed = {
+            'organic_results': [
+                {'position': 1, 'url': 'https://competitor.com/page', 'title': 'Competitor'},
+                {'position': 2, 'url': 'https://example.com/page', 'title': 'Ours'},
+            ],
+            'sponsored_results': []
+        }
+        
+        with patch.object(GoogleSearchParser, 'parse', return_value=parsed) as mock_parse:
+            with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir, SERP_ARCHIVE_ROOT=self.temp_dir):
+                fetch_keyword_serp_html(self.keyword.id)
+        
+        self.assertEqual(mock_parse.call_count, 1)
+        mock_r2.upload_json.assert_called_once()
+        
+        self.keyword.refresh_from_db()
+        self.assertEqual(len(self.keyword.ranking_pages), 2)
+        self.assertEqual(self.keyword.top_competitors[0]['domain'], 'competitor.com')
+        
+        rank = Rank.objects.get(keyword=self.keyword)
+        self.assertEqual(rank.rank, 2)
+
+
+class TwoStagePipelineTestCase(TestCase):
+    """Test the fetch -> serp_parse handoff"""
+    
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='twostage',
+            email='twostage@example.com',
+            password='testpass123'
+        )
+        self.project = Project.objects.create(user=self.user, domain='example.com', title='P', active=True)
+        self.keyword = Keyword.objects.create(
+            project=self.project, keyword='two stage', country='US', country_code='US'
+        )
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        cache.clear()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    @patch('keywords.tasks.parse_keyword_serp.apply_async')
+    @patch('keywords.tasks.ScrapeDoService')
+    def test_fetch_stage_hands_off_file_path(self, mock_scraper_class, mock_apply_async):
+        """Fetch stage archives the HTML and enqueues only its key, without parsing"""
+        from services.google_search_parser import GoogleSearchParser
+        
+        mock_scraper = Mock()
+        mock_scraper_class.return_value = mock_scraper
+        mock_scraper.scrape_google_search.return_value = {
+            'status_code': 200,
+            'html': '<html>SERP</html>',
+            'success': True
+        }
+        
+        with patch.object(GoogleSearchParser, 'parse') as mock_parse:
+            with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir, SERP_ARCHIVE_ROOT=self.temp_dir, SERP_PARSE_QUEUE_ENABLED=True):
+                fetch_keyword_serp_html(self.keyword.id)
+        
+        mock_parse.assert_not_called()
+        
+        self.keyword.refresh_from_db()
+        self.assertEqual(self.keyword.success_api_hit_count, 1)
+        self.assertFalse(self.keyword.processing)
+        with override_settings(SERP_ARCHIVE_ROOT=self.temp_dir):
+            self.assertEqual(read_serp_key(self.keyword.scrape_do_file_path), '<html>SERP</html>')
+        
+        mock_apply_async.assert_called_once_with(args=[self.keyword.scrape_do_file_path], queue='serp_parse')
+    
+    @patch('keywords.ranking_extractor.get_r2_service')
+    def test_parse_stage_extracts_rank_from_file(self, mock_get_r2):
+        """Parse stage reads a legacy raw file, updates top pages and creates the rank"""
+        from keywords.models import Rank
+        from keywords.tasks import parse_keyword_serp
+        from services.google_search_parser import GoogleSearchParser
+        
+        mock_r2 = Mock()
+        mock_get_r2.return_value = mock_r2
+        mock_r2.upload_json.return_value = {'success': True}
+        
+        date_str = datetime.now().strftime('%Y-%m-%d')
+        relative_path = f"{self.project.id}/{self.keyword.id}/{date_str}.html"
+        html_file = Path(self.temp_dir) / relative_path
+        html_file.parent.mkdir(parents=True)
+        html_file.write_text('<html>SERP</html>', encoding='utf-8')
+        
+        parsed = {
+            'organic_results': [
+                {'position': 1, 'url': 'https://competitor.com/page', 'title': 'Competitor'},
+                {'position': 2, 'url': 'https://example.com/page', 'title': 'Ours'},
+            ],
+            'sponsored_results': []
+        }
+        
+        with patch.object(GoogleSearchParser, 'parse', return_value=parsed) as mock_parse:
+            with override_settings(SCRAPE_DO_STORAGE_ROOT=self.temp_dir, SERP_ARCHIVE_ROOT=self.temp_dir):
+                self.assertTrue(parse_keyword_serp(relative_path))
+        
+        self.assertEqual(mock_parse.call_count, 1)
+        
+        self.keyword.refresh_from_db()
+        self.assertEqual(self.keyword.top_competitors[0]['domain'], 'competitor.com')
+        self.assertEqual(Rank.objects.get(keyword=self.keyword).rank, 2)
+    
+    def test_parse_stage_rejects_invalid_path(self):
+        """Parse stage ignores handoff messages that are not stored SERP paths"""
+        from keywords.tasks import parse_keyword_serp
+        
+        self.assertFalse(parse_keyword_serp('not/a/serp.html'))
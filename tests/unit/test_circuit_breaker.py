@@ -0,0 +1,314 @@
+"""
+Unit tests for the outbound provider circuit breakers
+"""
+
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import MagicMock, Mock, patch
+
+import requests
+from botocore.exceptions import ClientError, EndpointConnectionError
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from keywords.models import Keyword
+from keywords.tasks import enqueue_keyword_scrapes_batch, fetch_keyword_serp_batch, fetch_keyword_serp_html
+from project.models import Project
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, get_circuit_breaker
+from services.r2_storage import CircuitBreakerClient
+from services.scrape_do import ScrapeDoService
+
+try:
+    import fakeredis
+    FAKEREDIS_AVAILABLE = True
+except ImportError:
+    FAKEREDIS_AVAILABLE = False
+
+
+def response(status_code, text='<html>serp</html>'):
+    mock_response = Mock()
+    mock_response.status_code = status_code
+    mock_response.text = text
+    mock_response.headers = {}
+    mock_response.url = 'https://example.com'
+    return mock_response
+
+
+@skipUnless(FAKEREDIS_AVAILABLE, 'fakeredis not installed')
+class CircuitBreakerTest(SimpleTestCase):
+    """Test cases for the closed / open / half-open state machine"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+        self.breaker = CircuitBreaker('test', client=self.redis, failure_threshold=3, recovery_timeout=0.1,
+                                      max_recovery_timeout=0.3)
+
+    def fail(self, times=1):
+        for _ in range(times):
+            with self.assertRaises(requests.Timeout):
+                with self.breaker.guard():
+                    raise requests.Timeout()
+
+    def test_consecutive_failures_open_the_circuit(self):
+        """Test the threshold of consecutive failures opens it and a success resets the count"""
+        self.fail(2)
+        with self.breaker.guard() as call:
+            call.status_code = 200
+        self.fail(2)
+        self.assertEqual(self.breaker.status()['state'], 'closed')
+
+        self.fail()
+        status = self.breaker.status()
+        self.assertEqual(status['state'], 'open')
+        self.assertIsNotNone(self.breaker.open_until())
+        with self.assertRaises(CircuitOpenError) as raised:
+            self.breaker.guard()
+        self.assertGreater(raised.exception.retry_in, 0)
+
+    def test_5xx_fails_4xx_and_our_bugs_do_not(self):
+        """Test only provider-side errors count as failures"""
+        for _ in range(3):
+            with self.breaker.guard() as call:
+                call.status_code = 404
+            with self.assertRaises(KeyError):
+                with self.breaker.guard():
+                    raise KeyError('parsing bug')
+        self.assertEqual(self.breaker.status()['state'], 'closed')
+
+        for _ in range(3):
+            with self.breaker.guard() as call:
+                call.status_code = 503
+        self.assertEqual(self.breaker.status()['state'], 'open')
+
+    def test_half_open_probe_closes_or_reopens(self):
+        """Test one probe goes through after the recovery timeout and decides the state"""
+        self.fail(3)
+        time.sleep(0.15)
+
+        probe = self.breaker.guard()
+        self.assertEqual(self.breaker.status()['state'], 'half_open')
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.guard()  # Only one probe at a time
+        with self.assertRaises(requests.ConnectionError):
+            with probe:
+                raise requests.ConnectionError()
+
+        status = self.breaker.status()
+        self.assertEqual((status['state'], status['trips']), ('open', 2))
+        self.assertGreater(status['open_until'] - time.time(), 0.15)  # Recovery timeout doubled
+
+        time.sleep(0.25)
+        with self.breaker.guard() as call:
+            call.status_code = 200
+        self.assertEqual(self.breaker.status()['state'], 'closed')
+        self.assertEqual(
+            [(t['from'], t['to']) for t in self.breaker.transitions()],
+            [('half_open', 'closed'), ('open', 'half_open'), ('half_open', 'open'),
+             ('open', 'half_open'), ('closed', 'open')]
+        )
+
+    def test_lost_probe_is_given_up(self):
+        """Test a probe that never reports back does not keep the circuit half-open forever"""
+        self.breaker.probe_timeout = 0.05
+        self.fail(3)
+        time.sleep(0.15)
+        self.breaker.guard()  # Worker dies mid-call
+
+        time.sleep(0.1)
+        with self.breaker.guard() as call:
+            call.status_code = 200
+        self.assertEqual(self.breaker.status()['state'], 'closed')
+
+    def test_open_until_does_not_use_the_probe(self):
+        """Test reading the state never turns an expired open circuit half-open"""
+        self.fail(3)
+        time.sleep(0.15)
+
+        self.assertIsNone(self.breaker.open_until())
+        self.assertEqual(self.breaker.status()['state'], 'open')
+
+    def test_redis_outage_lets_calls_through(self):
+        """Test the breaker stays out of the way when Redis is down"""
+        server = fakeredis.FakeServer()
+        server.connected = False
+        breaker = CircuitBreaker('test', client=fakeredis.FakeRedis(server=server))
+
+        with breaker.guard() as call:
+            call.status_code = 500
+        self.assertIsNone(breaker.open_until())
+
+    @override_settings(CIRCUIT_BREAKER_ENABLED=True)
+    def test_one_breaker_per_provider(self):
+        """Test callers share a breaker per provider until the settings change"""
+        breaker = get_circuit_breaker('dataforseo')
+
+        self.assertIs(get_circuit_breaker('dataforseo'), breaker)
+        self.assertIsNot(get_circuit_breaker('r2'), breaker)
+        self.assertIs(get_circuit_breaker('r2').client, breaker.client)
+        with override_settings(CIRCUIT_BREAKER_FAILURE_THRESHOLD=1):
+            self.assertEqual(get_circuit_breaker('dataforseo').failure_threshold, 1)
+
+
+@skipUnless(FAKEREDIS_AVAILABLE, 'fakeredis not installed')
+@override_settings(SCRAPE_DO_CACHE_BACKEND='django', SCRAPE_DO_RATE_LIMIT_ENABLED=False)
+class ProviderCircuitTest(SimpleTestCase):
+    """Test cases for the breaker around each provider client"""
+
+    def setUp(self):
+        self.breaker = CircuitBreaker('provider', client=fakeredis.FakeRedis(), failure_threshold=2)
+
+    @patch.object(requests.Session, 'get')
+    def test_scrape_do_fails_fast_while_open(self, mock_get):
+        """Test Scrape.do is not called once 5xx responses opened the circuit"""
+        mock_get.return_value = response(502)
+        service = ScrapeDoService(api_key='test', circuit_breaker=self.breaker)
+
+        for n in range(2):
+            self.assertFalse(service.scrape(f'https://example.com/{n}', use_cache=False)['success'])
+        result = service.scrape('https://example.com/2', use_cache=False)
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertTrue(result['circuit_open'])
+        self.assertGreater(result['retry_at'], time.time())
+
+    @patch('services.dataforseo_client.requests.post')
+    def test_dataforseo_raises_request_exception_while_open(self, mock_post):
+        """Test DataForSEO calls raise CircuitOpenError (a RequestException) without a request"""
+        from services.dataforseo_client import DataForSEOClient
+
+        mock_post.side_effect = requests.Timeout()
+        with patch.dict('os.environ', {'DATA_FOR_SEO_USERNAME': 'user', 'DATA_FOR_SEO_PASSWORD': 'pass'}):
+            client = DataForSEOClient()
+        client.circuit_breaker = self.breaker
+
+        for _ in range(2):
+            with self.assertRaises(requests.Timeout):
+                client._make_request('POST', '/backlinks/summary/live', [{}])
+        with self.assertRaises(requests.RequestException) as raised:
+            client._make_request('POST', '/backlinks/summary/live', [{}])
+
+        self.assertIsInstance(raised.exception, CircuitOpenError)
+        self.assertEqual(mock_post.call_count, 2)
+
+    @patch('site_audit.pagespeed_insights.requests.get')
+    def test_pagespeed_returns_none_while_open(self, mock_get):
+        """Test PageSpeed Insights analysis fails fast while the circuit is open"""
+        from site_audit.pagespeed_insights import PageSpeedInsightsClient
+
+        mock_get.return_value = response(500)
+        mock_get.return_value.raise_for_status.side_effect = requests.HTTPError('500')
+        client = PageSpeedInsightsClient(api_key='key')
+        client.circuit_breaker = self.breaker
+
+        for _ in range(3):
+            self.assertIsNone(client.analyze_url('https://example.com'))
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_r2_calls_raise_client_error_while_open(self):
+        """Test R2 calls keep raising ClientError, instantly, while the circuit is open"""
+        s3 = MagicMock()
+        s3.head_object.side_effect = EndpointConnectionError(endpoint_url='https://r2')
+        s3.generate_presigned_url.return_value = 'https://signed'
+        client = CircuitBreakerClient(s3, self.breaker)
+
+        for _ in range(2):
+            with self.assertRaises(EndpointConnectionError):
+                client.head_object(Bucket='b', Key='k')
+        with self.assertRaises(ClientError) as raised:
+            client.head_object(Bucket='b', Key='k')
+
+        self.assertEqual(raised.exception.response['Error']['Code'], 'CircuitOpen')
+        self.assertEqual(s3.head_object.call_count, 2)
+        self.assertEqual(client.generate_presigned_url('get_object'), 'https://signed')
+
+    def test_r2_missing_object_is_not_a_failure(self):
+        """Test a 404 from R2 means R2 is up"""
+        s3 = MagicMock()
+        s3.head_object.side_effect = ClientError(
+            {'Error': {'Code': '404'}, 'ResponseMetadata': {'HTTPStatusCode': 404}}, 'HeadObject'
+        )
+        client = CircuitBreakerClient(s3, self.breaker)
+
+        for _ in range(3):
+            with self.assertRaises(ClientError):
+                client.head_object(Bucket='b', Key='k')
+        self.assertEqual(self.breaker.status()['state'], 'closed')
+
+
+@skipUnless(FAKEREDIS_AVAILABLE, 'fakeredis not installed')
+class SerpFetchDeferralTest(TestCase):
+    """Test cases for deferring SERP fetches while the Scrape.do circuit is open"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='circuituser', email='circuit@example.com', password='testpass123')
+        self.project = Project.objects.create(user=self.user, domain='example.com', title='Test', active=True)
+        self.keyword = Keyword.objects.create(project=self.project, keyword='running shoes', country='US')
+        Keyword.objects.filter(id=self.keyword.id).update(processing=True)
+
+        self.breaker = CircuitBreaker('scrape_do', client=fakeredis.FakeRedis(), failure_threshold=1,
+                                      recovery_timeout=600)
+        with self.assertRaises(requests.Timeout):
+            with self.breaker.guard():
+                raise requests.Timeout()
+        patcher = patch('keywords.tasks.get_circuit_breaker', return_value=self.breaker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch('keywords.tasks.ScrapeDoService')
+    def test_single_fetch_is_rescheduled(self, mock_scraper_class):
+        """Test the keyword moves to the circuit's retry time without a failure or a request"""
+        fetch_keyword_serp_html(self.keyword.id)
+
+        self.keyword.refresh_from_db()
+        mock_scraper_class.assert_not_called()
+        self.assertEqual(self.keyword.failed_api_hit_count, 0)
+        self.assertFalse(self.keyword.processing)
+        self.assertAlmostEqual(self.keyword.next_crawl_at.timestamp(), self.breaker.open_until(), places=3)
+
+    @patch('keywords.tasks.ScrapeDoService')
+    def test_batch_is_rescheduled_in_one_update(self, mock_scraper_class):
+        """Test a batch task defers every ready keyword"""
+        stats = fetch_keyword_serp_batch([self.keyword.id])
+
+        self.keyword.refresh_from_db()
+        mock_scraper_class.assert_not_called()
+        self.assertEqual(stats['deferred'], 1)
+        self.assertGreater(self.keyword.next_crawl_at, timezone.now() + timedelta(minutes=5))
+        self.assertFalse(self.keyword.processing)
+
+    @patch('keywords.tasks.ScrapeDoService')
+    def test_circuit_opening_mid_fetch_defers(self, mock_scraper_class):
+        """Test a scrape refused by the breaker defers the keyword instead of failing it"""
+        self.breaker.reset()
+        mock_scraper_class.return_value.scrape_google_search.return_value = {
+            'error': 'Circuit open', 'success': False, 'circuit_open': True, 'retry_at': time.time() + 60
+        }
+
+        fetch_keyword_serp_html(self.keyword.id)
+
+        self.keyword.refresh_from_db()
+        self.assertEqual(self.keyword.failed_api_hit_count, 0)
+        self.assertGreater(self.keyword.next_crawl_at, timezone.now())
+
+    def test_enqueue_waits_for_the_circuit(self):
+        """Test no fetch tasks are queued while the circuit is open"""
+        Keyword.objects.filter(id=self.keyword.id).update(processing=False)
+
+        with patch('keywords.tasks.fetch_keyword_serp_html.apply_async') as mock_apply:
+            result = enqueue_keyword_scrapes_batch(fetch_mode='single')
+
+        self.assertTrue(result['circuit_open'])
+        mock_apply.assert_not_called()
+
+    def test_status_command(self):
+        """Test the circuit_breakers command shows states and transitions"""
+        out = StringIO()
+        with patch('services.circuit_breaker.get_circuit_breaker', return_value=self.breaker):
+            call_command('circuit_breakers', stdout=out)
+
+        self.assertIn('scrape_do  open', out.getvalue())
+        self.assertIn('closed -> open', out.getvalue())
@@ -0,0 +1,111 @@
+"""
+Unit tests for the CompetitorStats rollup of competitor targets
+"""
+
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from competitors.models import CompetitorStats, Target, TargetKeywordRank
+from keywords.models import Keyword
+from keywords.models_reports import KeywordReport
+from keywords.rank_sink import RankResultSink
+from keywords.ranking_extractor import RankingExtractor
+from project.models import Project
+
+try:
+    from keywords.report_generator import KeywordReportGenerator
+    REPORT_GENERATOR_AVAILABLE = True
+except ImportError:
+    REPORT_GENERATOR_AVAILABLE = False
+
+
+class CompetitorStatsTest(TestCase):
+    """Test cases for CompetitorStats"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='compuser', email='comp@example.com', password='testpass123')
+        self.project = Project.objects.create(user=self.user, domain='example.com', title='Competitors', active=True)
+        self.target = Target.objects.create(project=self.project, domain='competitor.com', is_manual=True)
+        self.keywords = [
+            Keyword.objects.create(project=self.project, keyword=f'competitor keyword {i}', country='US')
+            for i in range(4)
+        ]
+
+    def assert_matches_rebuild(self):
+        stats = CompetitorStats.objects.get(target=self.target)
+        expected = CompetitorStats.aggregate([self.target.id])[self.target.id]
+        for field in CompetitorStats.COUNTER_FIELDS:
+            self.assertEqual(getattr(stats, field), expected[field] or 0, field)
+        return stats
+
+    def test_aggregate_counts_only_top_100(self):
+        """Test not-ranking rows count as tracked keywords only"""
+        for keyword, rank in zip(self.keywords, [2, 8, 25, 0]):
+            TargetKeywordRank.objects.create(target=self.target, keyword=keyword, rank=rank)
+
+        stats = CompetitorStats.rebuild([self.target.id])[0]
+
+        self.assertEqual((stats.keywords_total, stats.ranked_count), (4, 3))
+        self.assertEqual((stats.top3_count, stats.top10_count, stats.top30_count), (1, 2, 3))
+        self.assertEqual(stats.avg_rank, 11.7)
+        self.assertEqual(stats.visibility_score, 1 * 3 + 2 * 2 + 3)
+
+    def test_tracking_applies_deltas(self):
+        """Test direct target tracking keeps the rollup equal to a rebuild"""
+        extractor = RankingExtractor()
+        serp = {'organic_results': [{'url': 'https://other.com/'}, {'url': 'https://competitor.com/page'}]}
+        no_serp = {'organic_results': []}
+
+        extractor._track_manual_targets(self.keywords[0], serp)
+        extractor._track_manual_targets(self.keywords[1], no_serp)
+        self.assertEqual(self.assert_matches_rebuild().top3_count, 1)
+
+        extractor._track_manual_targets(self.keywords[0], no_serp)
+        stats = self.assert_matches_rebuild()
+        self.assertEqual((stats.keywords_total, stats.ranked_count), (2, 0))
+
+    def test_sink_flush_applies_deltas(self):
+        """Test the sink's bulk target rank upsert updates the rollup"""
+        TargetKeywordRank.objects.create(target=self.target, keyword=self.keywords[0], rank=40)
+        CompetitorStats.rebuild([self.target.id])
+
+        sink = RankResultSink()
+        for keyword, rank in zip(self.keywords[:2], [1, 0]):
+            sink.add_target_ranks(keyword, [
+                TargetKeywordRank(target=self.target, keyword=keyword, rank=rank, scraped_at=timezone.now())
+            ])
+        sink.flush()
+
+        stats = self.assert_matches_rebuild()
+        self.assertEqual((stats.keywords_total, stats.ranked_count, stats.rank_sum), (2, 1, 1))
+
+    def test_for_project_builds_missing_rows(self):
+        """Test targets without a row are rebuilt in one pass"""
+        TargetKeywordRank.objects.create(target=self.target, keyword=self.keywords[0], rank=3)
+        CompetitorStats.objects.all().delete()
+
+        stats = CompetitorStats.for_project(self.project.id)
+
+        self.assertEqual(stats[self.target.id].top3_count, 1)
+
+    @skipUnless(REPORT_GENERATOR_AVAILABLE, 'report dependencies are not installed')
+    def test_report_reads_rollup(self):
+        """Test the top competitors report doesn't aggregate target ranks itself"""
+        other = Target.objects.create(project=self.project, domain='other.com', is_manual=True)
+        TargetKeywordRank.objects.create(target=other, keyword=self.keywords[0], rank=1)
+        CompetitorStats.rebuild([self.target.id, other.id])
+        report = KeywordReport.objects.create(
+            project=self.project, name='Competitors', report_type='top_competitors', report_format='csv', created_by=self.user
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            results = KeywordReportGenerator(report).generate_reports()
+
+        self.assertTrue(results['success'])
+        self.assertFalse(any('competitors_targetkeywordrank' in query['sql'] for query in queries))
+        self.assertEqual(results['summary'], {'total_competitors': 2, 'top_competitor': 'other.com'})
@@ -0,0 +1,37 @@
+"""
+Unit tests for streaming CSV helpers
+"""
+
+import csv
+import io
+
+from django.test import SimpleTestCase
+
+from services.csv_stream import CSVLineWriter, iter_encoded_chunks
+
+
+class CSVStreamTest(SimpleTestCase):
+    """Test cases for CSVLineWriter and iter_encoded_chunks"""
+
+    def test_lines_match_csv_writer(self):
+        """Test formatted lines are identical to csv.writer output"""
+        rows = [['GOOGLE, United States', 'seo "tools"', 3], ['plain', '', None]]
+        expected = io.StringIO()
+        csv.writer(expected).writerows(rows)
+
+        writer = CSVLineWriter()
+        self.assertEqual(''.join(writer.line(row) for row in rows), expected.getvalue())
+
+    def test_chunks_are_encoded_and_bounded(self):
+        """Test lines are encoded into chunks of at least chunk_size, the last one smaller"""
+        lines = (f'café {i}\n' for i in range(1000))
+
+        chunks = list(iter_encoded_chunks(lines, chunk_size=1024))
+
+        self.assertEqual(b''.join(chunks).decode('utf-8'), ''.join(f'café {i}\n' for i in range(1000)))
+        self.assertTrue(all(len(chunk) >= 1024 for chunk in chunks[:-1]))
+        self.assertTrue(all(len(chunk) < 1024 + 32 for chunk in chunks))
+
+    def test_empty_stream(self):
+        """Test an empty generator yields no chunks"""
+        self.assertEqual(list(iter_encoded_chunks(iter([]))), [])
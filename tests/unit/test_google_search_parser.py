@@ -0,0 +1,149 @@
+"""
+Tests for GoogleSearchParser against the golden SERP corpus
+"""
+
+import random
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+from django.test import SimpleTestCase
+
+from services.google_search_parser import GoogleSearchParser, RANK_PROFILE_MAX_ORGANIC
+from services.serp_classifier import SerpDomClassifier, compile_simple_selector
+
+
+SERP_CORPUS_DIR = Path(__file__).resolve().parent.parent / 'fixtures' / 'serp'
+
+
+def _positions(results):
+    """Reduce parsed results to (position, url) pairs"""
+    return [(result.get('position'), result.get('url')) for result in results]
+
+
+class GoogleSearchParserCorpusTest(SimpleTestCase):
+    """Test cases for parsing the golden SERP corpus"""
+
+    def test_corpus_present(self):
+        """Test that the golden corpus exists and yields organic results"""
+        corpus = sorted(SERP_CORPUS_DIR.glob('*.html'))
+        self.assertGreater(len(corpus), 0)
+        for path in corpus:
+            with self.subTest(serp=path.name):
+                results = GoogleSearchParser().parse(path.read_bytes())
+                self.assertTrue(results['organic_results'])
+
+
+class GoogleSearchParserRankProfileTest(SimpleTestCase):
+    """Test cases for the rank-only parse profile"""
+
+    def setUp(self):
+        self.parser = GoogleSearchParser()
+
+    def test_rank_profile_matches_full_results(self):
+        """Test that the rank profile finds the same organic and sponsored results"""
+        for path in sorted(SERP_CORPUS_DIR.glob('*.html')):
+            html = path.read_bytes()
+            full = self.parser.parse(html)
+            rank_only = self.parser.parse(html, profile='rank')
+
+            with self.subTest(serp=path.name):
+                self.assertEqual(rank_only['profile'], 'rank')
+                self.assertEqual(_positions(rank_only['organic_results']), _positions(full['organic_results']))
+                self.assertEqual(_positions(rank_only['sponsored_results']), _positions(full['sponsored_results']))
+                self.assertNotIn('people_also_ask', rank_only)
+                self.assertNotIn('local_pack', rank_only)
+
+    def test_rank_profile_stops_after_max_organic(self):
+        """Test that the rank profile stops walking after RANK_PROFILE_MAX_ORGANIC results"""
+        results = ''.join(
+            f'<div class="g"><a href="https://site{i}.com/" data-ved="x"><h3>Result {i}</h3></a></div>'
+            for i in range(RANK_PROFILE_MAX_ORGANIC + 20)
+        )
+        html = f'<html><body>{results}</body></html>'
+
+        self.assertEqual(len(self.parser.parse(html)['organic_results']), RANK_PROFILE_MAX_ORGANIC + 20)
+        rank_only = self.parser.parse(html, profile='rank')
+        self.assertEqual(len(rank_only['organic_results']), RANK_PROFILE_MAX_ORGANIC)
+        self.assertEqual(rank_only['organic_results'][-1]['url'], f'https://site{RANK_PROFILE_MAX_ORGANIC - 1}.com/')
+
+
+class SerpDomClassifierTest(SimpleTestCase):
+    """Compare the single-pass classifier with the selector-based checks"""
+
+    # Building blocks that trigger every ad/special-result rule
+    FRAGMENTS = [
+        '<span>Ad</span>',
+        '<span>Sponsored <b>result</b></span>',
+        '<span><!-- Ad --></span>',
+        '<div data-hveid="x" aria-label="Ads">ad</div>',
+        '<div class="uEierd">shopping</div>',
+        '<div data-vid="v">video</div>',
+        '<g-scrolling-carousel>carousel</g-scrolling-carousel>',
+        '<div data-attrid="kc:/people/person">kp</div>',
+        '<div data-tts="answers">answer</div>',
+        '<a href="">empty</a>',
+        '<a>no href</a>',
+        '<a href="https://example.com/">link</a>',
+        '<cite>example.com</cite>',
+        '<h3>Title</h3>',
+    ]
+    CONTAINERS = [
+        '<div class="g">{}</div>',
+        '<div class="g tF2Cxc">{}</div>',
+        '<div class="kp-blk g">{}</div>',
+        '<div class="adsbox">{}</div>',
+        '<div data-hveid="CA">{}</div>',
+        '<div data-text-ad="1">{}</div>',
+        '<div aria-label="Ad">{}</div>',
+        '<li class="ads-ad">{}</li>',
+        '<div jscontroller="a" jsdata="b" jsmodel="c">{}</div>',
+        '<span>{}</span>',
+    ]
+
+    def _random_fragment(self, rng, depth):
+        if depth == 0 or rng.random() < 0.3:
+            return rng.choice(self.FRAGMENTS)
+        children = ''.join(self._random_fragment(rng, depth - 1) for _ in range(rng.randint(1, 3)))
+        return rng.choice(self.CONTAINERS).format(children)
+
+    def test_matches_selector_based_classification(self):
+        """Test that every element gets the same ad/special decision"""
+        parser = GoogleSearchParser(single_pass=False)
+        result_selectors = [config['selector'] for config in parser.result_selectors]
+        rng = random.Random(20260101)
+
+        for document in range(40):
+            body = ''.join(self._random_fragment(rng, 4) for _ in range(6))
+            soup = BeautifulSoup(f'<html><body>{body}</body></html>', 'html.parser')
+            classifier = SerpDomClassifier.build(soup, result_selectors, parser.ad_selectors)
+
+            expected_results = []
+            for selector in result_selectors:
+                expected_results = soup.select(selector)
+                if expected_results:
+                    break
+            expected_ads = [el for selector in parser.ad_selectors for el in soup.select(selector)]
+
+            with self.subTest(document=document):
+                self.assertEqual(classifier.result_elements(), expected_results)
+                self.assertEqual(classifier.ad_elements(), expected_ads)
+                for element in soup.find_all(True):
+                    self.assertEqual(classifier.is_ad(element), parser._is_ad(element))
+                    self.assertEqual(classifier.is_special_result(element), parser._is_special_result(element))
+
+    def test_parse_output_unchanged_on_corpus(self):
+        """Test that single-pass parsing returns exactly the legacy output"""
+        for path in sorted(SERP_CORPUS_DIR.glob('*.html')):
+            html = path.read_bytes()
+            with self.subTest(serp=path.name):
+                self.assertEqual(
+                    GoogleSearchParser(single_pass=True).parse(html),
+                    GoogleSearchParser(single_pass=False).parse(html)
+                )
+
+    def test_complex_selectors_are_not_compiled(self):
+        """Test that selectors needing the CSS engine fall back to soupsieve"""
+        self.assertIsNotNone(compile_simple_selector('div[aria-label*="Ad"]'))
+        self.assertIsNone(compile_simple_selector('div.g > a'))
+        self.assertIsNone(compile_simple_selector('span:-soup-contains("Ad")'))
+        self.assertIsNone(compile_simple_selector('div[class^="g"]'))
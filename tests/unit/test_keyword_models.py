@@ -2,7 +2,12 @@
 Unit tests for Keyword and Rank models
 """
 
+from datetime import timedelta
+
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from keywords.models import Keyword, Rank
 from project.models import Project
 from accounts.models import User
@@ -241,12 +246,13 @@ class RankModelTest(TestCase):
     
     def test_rank_history(self):
         """Test that we can track rank history"""
-        # Create multiple rank entries over time
+        # Create multiple rank entries over time (one per day)
         ranks = []
         for i in range(5):
             rank = Rank.objects.create(
                 keyword=self.keyword,
-                rank=10 - i  # Improving rank over time
+                rank=10 - i,  # Improving rank over time
+                created_at=timezone.now() - timedelta(days=4 - i)
             )
             ranks.append(rank)
         
@@ -261,6 +267,77 @@ class RankModelTest(TestCase):
                 rank_list[i + 1].created_at
             )
     
+    def test_one_rank_per_keyword_per_day(self):
+        """Test scraped_date is derived from created_at and unique per keyword"""
+        rank = Rank.objects.create(keyword=self.keyword, rank=5)
+        self.assertEqual(rank.scraped_date, timezone.localdate())
+        
+        with self.assertRaises(IntegrityError):
+            Rank.objects.create(keyword=self.keyword, rank=6)
+    
+    def test_upsert_replaces_same_day_rank(self):
+        """Test Rank.upsert replaces the keyword's rank for the same day in place"""
+        existing = Rank.objects.create(keyword=self.keyword, rank=5)
+        
+        replacement = Rank(keyword=self.keyword, rank=2, search_results_file='serp/new.json')
+        Rank.upsert([replacement])
+        
+        self.assertEqual(self.keyword.ranks.count(), 1)
+        existing.refresh_from_db()
+        self.assertEqual(existing.rank, 2)
+        self.assertEqual(existing.search_results_file, 'serp/new.json')
+    
+    def test_rank_state_follows_rank_writes(self):
+        """Test last/previous rank state is advanced by every rank write"""
+        today = timezone.now()
+        Rank.objects.create(keyword=self.keyword, rank=20, created_at=today - timedelta(days=2))
+        Rank.objects.create(keyword=self.keyword, rank=0, is_organic=False, created_at=today - timedelta(days=1))
+        Rank.objects.create(keyword=self.keyword, rank=9, created_at=today)
+        
+        self.keyword.refresh_from_db()
+        self.assertEqual(self.keyword.last_rank, 9)
+        self.assertEqual(self.keyword.last_rank_date, timezone.localdate())
+        self.assertEqual(self.keyword.previous_rank, 0)
+        self.assertEqual(self.keyword.previous_rank_date, timezone.localdate() - timedelta(days=1))
+    
+    def test_update_rank_uses_state_without_history_queries(self):
+        """Test update_rank doesn't read rank history when the state covers the day"""
+        Rank.objects.create(keyword=self.keyword, rank=12, created_at=timezone.now() - timedelta(days=1))
+        self.keyword.refresh_from_db()
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.keyword.update_rank(7)
+        
+        self.assertFalse([query for query in queries if '"keywords_rank"' in query['sql']])
+        self.assertEqual(self.keyword.rank_status, 'up')
+        self.assertEqual(self.keyword.rank_diff_from_last_time, 5)
+    
+    def test_rebuild_rank_state_command(self):
+        """Test rebuild_rank_state restores state and highest rank from history"""
+        from io import StringIO
+        from django.core.management import call_command
+        
+        today = timezone.now()
+        for days_ago, value in ((3, 40), (2, 0), (1, 6)):
+            Rank.objects.create(keyword=self.keyword, rank=value, created_at=today - timedelta(days=days_ago))
+        other = Keyword.objects.create(project=self.project, keyword='no history', country='US')
+        
+        Keyword.objects.update(last_rank=0, last_rank_date=None, previous_rank=99,
+                               previous_rank_date=timezone.localdate(), highest_rank=0)
+        call_command('rebuild_rank_state', '--highest-rank', '--chunk-size', '1', stdout=StringIO())
+        
+        self.keyword.refresh_from_db()
+        self.assertEqual(self.keyword.last_rank, 6)
+        self.assertEqual(self.keyword.last_rank_date, timezone.localdate() - timedelta(days=1))
+        self.assertEqual(self.keyword.previous_rank, 0)
+        self.assertEqual(self.keyword.previous_rank_date, timezone.localdate() - timedelta(days=2))
+        self.assertEqual(self.keyword.highest_rank, 6)
+        
+        other.refresh_from_db()
+        self.assertIsNone(other.last_rank_date)
+        self.assertIsNone(other.previous_rank_date)
+        self.assertEqual(other.previous_rank, 0)
+    
     def test_number_of_results(self):
         """Test storing search results file reference"""
         # Note: number_of_results field has been removed from the model
@@ -319,7 +396,8 @@ class KeywordRankIntegrationTest(TestCase):
         rank1 = Rank.objects.create(
             keyword=keyword,
             rank=15,
-            is_organic=True
+            is_organic=True,
+            created_at=timezone.now() - timedelta(days=2)
         )
         
         keyword.refresh_from_db()
@@ -332,7 +410,8 @@ class KeywordRankIntegrationTest(TestCase):
         rank2 = Rank.objects.create(
             keyword=keyword,
             rank=8,
-            is_organic=True
+            is_organic=True,
+            created_at=timezone.now() - timedelta(days=1)
         )
         
         keyword.refresh_from_db()
@@ -345,7 +424,8 @@ class KeywordRankIntegrationTest(TestCase):
         rank3 = Rank.objects.create(
             keyword=keyword,
             rank=12,
-            is_organic=True
+            is_organic=True,
+            created_at=timezone.now() - timedelta(days=0)
         )
         
         keyword.refresh_from_db()
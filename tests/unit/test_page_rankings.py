@@ -0,0 +1,128 @@
+"""
+Unit tests for database-side page rankings aggregation
+"""
+
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.test import RequestFactory, TestCase
+
+from accounts.models import User
+from keywords.models import Keyword
+from keywords.models_reports import KeywordReport
+from keywords.page_rankings import page_groups, top_keywords_by_page
+from keywords.views_page_rankings import page_keywords_detail, page_rankings_data
+from project.models import Project
+
+try:
+    from keywords.report_generator import KeywordReportGenerator
+    REPORT_GENERATOR_AVAILABLE = True
+except ImportError:
+    REPORT_GENERATOR_AVAILABLE = False
+
+
+class PageRankingsTestBase(TestCase):
+    """Keywords ranking with two pages of one project"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='pageuser', email='page@example.com', password='testpass123')
+        self.project = Project.objects.create(user=self.user, domain='example.com', title='Pages', active=True)
+        self.create_keyword('alpha', 2, 'https://example.com/guide?utm_source=x')
+        self.create_keyword('beta', 8, 'https://example.com/guide#intro')
+        self.create_keyword('gamma', 25, 'https://example.com/guide')
+        self.create_keyword('delta', 4, 'https://example.com/pricing')
+        self.create_keyword('archived', 1, 'https://example.com/pricing', archive=True)
+        self.create_keyword('not ranking', 101, 'https://example.com/pricing')
+
+    def create_keyword(self, name, rank, url, archive=False):
+        return Keyword.objects.create(
+            project=self.project, keyword=name, country='US', rank=rank, rank_url=url, archive=archive
+        )
+
+
+class RankUrlPathTest(PageRankingsTestBase):
+    """Test cases for keeping Keyword.rank_url_path in step with rank_url"""
+
+    def test_path_drops_query_and_fragment(self):
+        """Test the page path is set on save without query string or fragment"""
+        paths = set(Keyword.objects.filter(keyword__in=['alpha', 'beta', 'gamma']).values_list('rank_url_path', flat=True))
+        self.assertEqual(paths, {'https://example.com/guide'})
+
+    def test_update_fields_include_path(self):
+        """Test saving only rank_url also writes the page path"""
+        keyword = Keyword.objects.get(keyword='delta')
+        keyword.rank_url = 'https://example.com/blog/post?page=2'
+        keyword.save(update_fields=['rank_url'])
+
+        keyword.refresh_from_db()
+        self.assertEqual(keyword.rank_url_path, 'https://example.com/blog/post')
+
+
+class PageGroupsTest(PageRankingsTestBase):
+    """Test cases for page_groups and top_keywords_by_page"""
+
+    def test_groups_ranked_keywords_by_page(self):
+        """Test counts and positions per page, most keywords first"""
+        groups = list(page_groups(Keyword.objects.filter(project=self.project)))
+
+        self.assertEqual([group['rank_url_path'] for group in groups], ['https://example.com/guide', 'https://example.com/pricing'])
+        guide = groups[0]
+        self.assertEqual(guide['total_keywords'], 3)
+        self.assertAlmostEqual(guide['avg_position'], 11.7)
+        self.assertEqual(guide['best_position'], 2)
+        self.assertEqual((guide['top_3'], guide['top_10'], guide['top_30']), (1, 2, 3))
+        self.assertEqual(groups[1]['total_keywords'], 1)
+
+    def test_top_keywords_per_page(self):
+        """Test only the best ranked keywords of each page are returned"""
+        pages = top_keywords_by_page(Keyword.objects.filter(project=self.project), limit=2)
+
+        guide = pages[(self.project.id, 'https://example.com/guide')]
+        self.assertEqual([keyword['keyword'] for keyword in guide], ['alpha', 'beta'])
+        self.assertEqual(len(pages[(self.project.id, 'https://example.com/pricing')]), 1)
+
+
+@patch('keywords.views_page_rankings.render')
+class PageRankingsViewTest(PageRankingsTestBase):
+    """Test cases for the page rankings HTMX endpoints"""
+
+    def get(self, view, params):
+        request = RequestFactory().get('/', params)
+        request.user = self.user
+        view(request)
+
+    def test_list_is_paginated_from_groups(self, mock_render):
+        """Test the list shows one row per page with its best keyword"""
+        self.get(page_rankings_data, {'project': self.project.id, 'per_page': 25})
+
+        context = mock_render.call_args[0][2]
+        pages = context['pages']
+        self.assertEqual([page['url'] for page in pages], ['https://example.com/guide', 'https://example.com/pricing'])
+        self.assertEqual(pages[0]['best_keyword'], 'alpha')
+        self.assertEqual(context['pagination']['total_items'], 2)
+
+    def test_detail_loads_page_keywords(self, mock_render):
+        """Test the drill-down lists the keywords of the normalized page"""
+        self.get(page_keywords_detail, {'url': 'https://example.com/guide', 'project_id': self.project.id})
+
+        context = mock_render.call_args[0][2]
+        self.assertEqual([keyword['keyword'] for keyword in context['keywords']], ['alpha', 'beta', 'gamma'])
+
+
+@skipUnless(REPORT_GENERATOR_AVAILABLE, 'report dependencies are not installed')
+class PageRankingsReportTest(PageRankingsTestBase):
+    """Test cases for the page rankings report"""
+
+    def test_csv_rows_per_page(self):
+        """Test the report CSV has one row per page with its top keywords"""
+        report = KeywordReport.objects.create(
+            project=self.project, name='Pages', report_type='page_rankings', report_format='csv', created_by=self.user
+        )
+
+        results = KeywordReportGenerator(report).generate_reports()
+
+        self.assertTrue(results['success'])
+        lines = b''.join(results['csv_stream']).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[1], 'https://example.com/guide,3,11.7,1,2,3,alpha - US (#2); beta - US (#8); gamma - US (#25)')
+        self.assertEqual(results['summary'], {'total_pages': 2, 'total_keywords': 4, 'top_page': 'https://example.com/guide'})
@@ -0,0 +1,118 @@
+"""
+Unit tests for incrementally maintained ProjectDailyStats
+"""
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from keywords.models import Keyword, ProjectDailyStats, Rank
+from keywords.rank_sink import RankResultSink
+from keywords.tasks import reconcile_project_daily_stats
+from project.models import Project
+
+
+class ProjectDailyStatsTest(TestCase):
+    """Test cases for ProjectDailyStats"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='statsuser',
+            email='stats@example.com',
+            password='testpass123'
+        )
+        self.project = Project.objects.create(user=self.user, domain='example.com', title='Stats', active=True)
+
+    def _today(self):
+        return ProjectDailyStats.objects.get(project=self.project, date=timezone.localdate())
+
+    def assertMatchesRebuild(self):
+        """Today's incrementally maintained row equals a full recomputation"""
+        stored = self._today()
+        rebuilt = ProjectDailyStats.rebuild([self.project.id])[0]
+        for field in ProjectDailyStats.COUNTER_FIELDS:
+            with self.subTest(field=field):
+                self.assertAlmostEqual(getattr(stored, field), getattr(rebuilt, field))
+
+    def test_rank_writes_update_counters(self):
+        """Test rank writes keep today's row equal to a full recomputation"""
+        keywords = [Keyword.objects.create(project=self.project, keyword=f'kw {i}') for i in range(4)]
+        self.assertEqual(self._today().keywords_total, 4)
+        self.assertEqual(self._today().not_ranking_count, 4)
+
+        for keyword, rank in zip(keywords, (1, 8, 25, 0)):
+            Rank.objects.create(keyword=keyword, rank=rank)
+
+        stats = self._today()
+        self.assertEqual(stats.top3_count, 1)
+        self.assertEqual(stats.top10_count, 2)
+        self.assertEqual(stats.top30_count, 3)
+        self.assertEqual(stats.ranked_count, 4)  # Not found is stored as 101
+        self.assertEqual(stats.not_ranking_count, 1)
+        self.assertEqual(stats.avg_rank, (1 + 8 + 25 + 101) / 4)
+        self.assertAlmostEqual(stats.visibility_points, 0.317 + 0.031)
+        self.assertMatchesRebuild()
+
+    def test_archive_and_delete(self):
+        """Test archiving, restoring and deleting keywords"""
+        keyword = Keyword.objects.create(project=self.project, keyword='archived', rank=3)
+        other = Keyword.objects.create(project=self.project, keyword='deleted', rank=50)
+        self.assertEqual(self._today().top3_count, 1)
+
+        keyword.archive = True
+        keyword.save()
+        self.assertEqual(self._today().keywords_total, 1)
+        self.assertEqual(self._today().top3_count, 0)
+
+        other.delete()
+        self.assertEqual(self._today().keywords_total, 0)
+        self.assertMatchesRebuild()
+
+    def test_unrelated_saves_skip_stats(self):
+        """Test saves that don't touch rank, status or archive don't write stats"""
+        keyword = Keyword.objects.create(project=self.project, keyword='quiet')
+        keyword.processing = True
+
+        with self.assertNumQueries(1):
+            keyword.save(update_fields=['processing'])
+        with self.assertNumQueries(1):
+            keyword.save()
+
+    def test_sink_flush_applies_one_update_per_project(self):
+        """Test bulk rank writes apply the summed deltas of the batch"""
+        keywords = [Keyword.objects.create(project=self.project, keyword=f'sink {i}') for i in range(3)]
+        keywords = list(Keyword.objects.filter(id__in=[keyword.id for keyword in keywords]))
+
+        sink = RankResultSink()
+        for keyword in keywords:
+            sink.add_rank(Rank(keyword=keyword, rank=2, is_organic=True))
+        sink.flush()
+
+        self.assertEqual(self._today().top3_count, 3)
+        self.assertEqual(self._today().improved_count, 0)
+        self.assertMatchesRebuild()
+
+    def test_reconcile_fixes_drift(self):
+        """Test the nightly reconciliation corrects bulk updates that bypass save()"""
+        Keyword.objects.create(project=self.project, keyword='drift')
+        Keyword.objects.filter(project=self.project).update(rank=5, rank_status='up')
+        self.assertEqual(self._today().top10_count, 0)
+
+        result = reconcile_project_daily_stats()
+
+        self.assertEqual(result['rebuilt'], 1)
+        self.assertEqual(self._today().top10_count, 1)
+        self.assertEqual(self._today().improved_count, 1)
+
+    def test_current_for_builds_missing_rows(self):
+        """Test projects without a row for today get one built on read"""
+        other = Project.objects.create(user=self.user, domain='empty.com', title='Empty', active=True)
+        Keyword.objects.create(project=self.project, keyword='counted', rank=9)
+        ProjectDailyStats.objects.all().delete()
+
+        stats = ProjectDailyStats.current_for([self.project.id, other.id])
+
+        self.assertEqual(stats[self.project.id].top10_count, 1)
+        self.assertEqual(stats[other.id].keywords_total, 0)
+        self.assertIsNone(stats[other.id].avg_rank)
+        self.assertEqual(ProjectDailyStats.objects.count(), 2)
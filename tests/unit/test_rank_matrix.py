@@ -0,0 +1,85 @@
+"""
+Unit tests for the keyword x date rank matrix used by keyword ranking reports
+"""
+
+from datetime import date, timedelta
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+
+try:
+    from keywords.rank_matrix import NO_DATA, NOT_RANKING, RankMatrix
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+
+START = date(2025, 9, 1)
+
+
+def _day(offset):
+    return START + timedelta(days=offset)
+
+
+@skipUnless(NUMPY_AVAILABLE, 'numpy is not installed')
+class RankMatrixTest(SimpleTestCase):
+    """Test cases for RankMatrix"""
+
+    def setUp(self):
+        # Keyword 30: 12 -> 5 (improved), 20: 4 -> NR (declined), 10: one day only, 40: no data
+        self.matrix = RankMatrix.from_rows([30, 20, 10, 40], START, 5, [
+            (30, _day(0), 15),
+            (30, _day(0), 12),  # Best of the day wins
+            (30, _day(3), 5),
+            (20, _day(1), 4),
+            (20, _day(4), 0),
+            (10, _day(2), 7),
+            (99, _day(2), 1),   # Unknown keyword
+            (30, _day(9), 1),   # Outside the period
+        ], chunk_size=3)
+
+    def test_best_of_day_and_sentinels(self):
+        """Test cells hold the best daily rank, NOT_RANKING or NO_DATA"""
+        self.assertEqual(self.matrix.values[0].tolist(), [12, NO_DATA, NO_DATA, 5, NO_DATA])
+        self.assertEqual(self.matrix.values[1].tolist(), [NO_DATA, 4, NO_DATA, NO_DATA, NOT_RANKING])
+        self.assertEqual(self.matrix.data_points().tolist(), [2, 2, 1, 0])
+
+    def test_first_last_and_change_counts(self):
+        """Test first/last ranks and changes only count keywords with two days of data"""
+        first, last = self.matrix.first_last()
+        self.assertEqual(first[:3].tolist(), [12, 4, 7])
+        self.assertEqual(last[:3].tolist(), [5, NOT_RANKING, 7])
+        self.assertEqual(self.matrix.changes().tolist(), [1, -1, 0, 0])
+        self.assertEqual(self.matrix.change_counts(), {'improvements': 1, 'declines': 1, 'no_change': 0})
+        self.assertEqual(self.matrix.impacts().tolist(), ['up', 'down', 'no_change', 'no_change'])
+
+    def test_cell_labels(self):
+        """Test CSV cells show NR for not ranking and missing days"""
+        cells = self.matrix.cell_labels()
+        self.assertEqual(cells[0].tolist(), ['12', 'NR', 'NR', '5', 'NR'])
+        self.assertEqual(cells[1].tolist(), ['NR', '4', 'NR', 'NR', 'NR'])
+        self.assertEqual(cells[3].tolist(), ['NR'] * 5)
+
+    def test_chart_series(self):
+        """Test chart series are inverted ranks, 1 when not ranking and 0 when missing"""
+        rows = self.matrix.top_rows_by_data(candidates=20, limit=5)
+        self.assertEqual(rows, [0, 1, 2])
+
+        series = self.matrix.chart_series(rows, step=2)
+        self.assertEqual(series.tolist(), [[89, 0, 0], [0, 0, 1], [0, 94, 0]])
+
+    def test_take_rows(self):
+        """Test a row subset keeps its keywords' ranks and can be updated independently"""
+        subset = self.matrix.take_rows([1, 0])
+        self.assertEqual(subset.keyword_ids.tolist(), [20, 30])
+        self.assertEqual(subset.change_counts(), {'improvements': 1, 'declines': 1, 'no_change': 0})
+
+        subset.add_ordinals([30], [_day(1).toordinal()], [2])
+        self.assertEqual(subset.values[1, 1], 2)
+        self.assertEqual(self.matrix.values[0, 1], NO_DATA)
+
+    def test_empty_period(self):
+        """Test a matrix without keywords or days has no data"""
+        matrix = RankMatrix.from_rows([], START, 0, [(1, START, 3)])
+        self.assertEqual(matrix.change_counts(), {'improvements': 0, 'declines': 0, 'no_change': 0})
+        self.assertFalse(matrix.has_data.any())
@@ -0,0 +1,178 @@
+"""
+Unit tests for monthly Rank partition management
+"""
+
+import io
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import skipUnless
+from unittest.mock import MagicMock, call, patch
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from accounts.models import User
+from keywords import partitions
+from keywords.models import Keyword, Rank
+from keywords.tasks import maintain_rank_partitions
+from project.models import Project
+
+
+class PartitionHelpersTest(SimpleTestCase):
+    """Test cases for partition naming and month arithmetic"""
+
+    def test_month_arithmetic(self):
+        """Test month start and month offsets across year boundaries"""
+        self.assertEqual(partitions.month_start(date(2025, 9, 17)), date(2025, 9, 1))
+        self.assertEqual(partitions.add_months(date(2025, 11, 30), 2), date(2026, 1, 1))
+        self.assertEqual(partitions.add_months(date(2025, 1, 15), -1), date(2024, 12, 1))
+
+    def test_partition_names(self):
+        """Test partition names round-trip to their month"""
+        name = partitions.partition_name(date(2025, 9, 1))
+        self.assertEqual(name, 'keywords_rank_p2025_09')
+        self.assertEqual(partitions.partition_month(name), date(2025, 9, 1))
+        self.assertIsNone(partitions.partition_month(partitions.DEFAULT_PARTITION))
+
+    def test_create_partition_sql_bounds(self):
+        """Test a partition covers exactly one month"""
+        sql = partitions.create_partition_sql(date(2025, 12, 1))
+        self.assertIn('"keywords_rank_p2025_12" PARTITION OF "keywords_rank"', sql)
+        self.assertIn("FROM ('2025-12-01') TO ('2026-01-01')", sql)
+
+    @patch('keywords.partitions.list_partitions')
+    def test_expired_partitions(self, mock_list):
+        """Test only months entirely before the retention window expire"""
+        mock_list.return_value = [
+            (partitions.partition_name(date(2025, month, 1)), date(2025, month, 1)) for month in range(1, 10)
+        ]
+        expired = partitions.expired_partitions(3, today=date(2025, 9, 20))
+        self.assertEqual(expired, ['keywords_rank_p2025_01', 'keywords_rank_p2025_02', 'keywords_rank_p2025_03',
+                                   'keywords_rank_p2025_04', 'keywords_rank_p2025_05', 'keywords_rank_p2025_06'])
+
+
+class EnsurePartitionsTest(TestCase):
+    """Test cases for creating partitions ahead of time"""
+
+    def test_noop_without_partitioned_table(self):
+        """Test nothing happens on a plain (non-PostgreSQL) Rank table"""
+        self.assertFalse(partitions.is_partitioned())
+        self.assertEqual(partitions.ensure_partitions(3), [])
+
+    @patch('keywords.partitions.list_partitions')
+    @patch('keywords.partitions.is_partitioned', return_value=True)
+    def test_creates_missing_months(self, mock_is_partitioned, mock_list):
+        """Test only missing partitions of the current and upcoming months are created"""
+        mock_list.return_value = [('keywords_rank_p2025_09', date(2025, 9, 1))]
+        cursor = MagicMock()
+
+        with patch.object(partitions, 'connection') as mock_connection:
+            mock_connection.cursor.return_value.__enter__.return_value = cursor
+            created = partitions.ensure_partitions(2, today=date(2025, 9, 20))
+
+        self.assertEqual(created, ['keywords_rank_p2025_10', 'keywords_rank_p2025_11'])
+        cursor.execute.assert_has_calls([
+            call(partitions.create_partition_sql(date(2025, 10, 1))),
+            call(partitions.create_partition_sql(date(2025, 11, 1))),
+        ])
+
+
+@skipUnless(partitions.PYARROW_AVAILABLE, 'pyarrow not installed')
+class ArchivePartitionTest(TestCase):
+    """Test cases for exporting a partition to Parquet"""
+
+    def setUp(self):
+        user = User.objects.create_user(username='archiveuser', email='archive@example.com', password='testpass123')
+        project = Project.objects.create(user=user, domain='example.com', title='Test', active=True)
+        self.keyword = Keyword.objects.create(project=project, keyword='archived keyword', country='US')
+        self.created_at = datetime(2023, 1, 5, 6, 30, tzinfo=dt_timezone.utc)
+        for day in range(1, 6):
+            Rank.objects.create(keyword=self.keyword, rank=day, is_organic=day != 3, has_map_result=day == 2,
+                                search_results_file=f'serp/{day}.json', created_at=self.created_at,
+                                scraped_date=date(2023, 1, day))
+
+        self.uploads = {}
+
+        def upload_file(file_obj, key, metadata=None, content_type=None):
+            self.uploads[key] = {'data': file_obj.read(), 'metadata': metadata, 'content_type': content_type}
+            return {'success': True, 'key': key}
+
+        self.r2 = MagicMock()
+        self.r2.upload_file.side_effect = upload_file
+
+    def test_rows_round_trip_through_parquet(self):
+        """Test every row is streamed in row groups and uploaded as readable Parquet"""
+        import pyarrow.parquet
+
+        # The plain SQLite table stands in for a detached monthly partition
+        key = partitions.archive_partition(partitions.RANK_TABLE, self.r2, batch_size=2)
+
+        self.assertEqual(key, f'rank-archive/{partitions.RANK_TABLE}.parquet')
+        upload = self.uploads[key]
+        self.assertEqual(upload['metadata'], {'table': partitions.RANK_TABLE, 'rows': '5'})
+        self.assertEqual(upload['content_type'], 'application/vnd.apache.parquet')
+
+        parquet = pyarrow.parquet.ParquetFile(io.BytesIO(upload['data']))
+        self.assertEqual(parquet.metadata.num_row_groups, 3)
+        rows = parquet.read().to_pylist()
+        self.assertEqual([row['rank'] for row in rows], [1, 2, 3, 4, 5])
+        self.assertEqual([row['scraped_date'] for row in rows], [date(2023, 1, day) for day in range(1, 6)])
+        self.assertEqual(rows[1]['has_map_result'], True)
+        self.assertEqual(rows[2]['is_organic'], False)
+        self.assertEqual(rows[0]['keyword_id'], self.keyword.id)
+        self.assertEqual(rows[0]['search_results_file'], 'serp/1.json')
+        self.assertEqual(rows[0]['created_at'], self.created_at)
+
+    def test_failed_upload_returns_none(self):
+        """Test a failed upload is reported so the partition stays attached"""
+        self.r2.upload_file.side_effect = None
+        self.r2.upload_file.return_value = {'success': False, 'error': 'boom'}
+
+        self.assertIsNone(partitions.archive_partition(partitions.RANK_TABLE, self.r2))
+
+
+@override_settings(RANK_PARTITION_MONTHS_AHEAD=3, RANK_PARTITION_RETENTION_MONTHS=24, RANK_PARTITION_ARCHIVE=True)
+class MaintainRankPartitionsTaskTest(SimpleTestCase):
+    """Test cases for the maintain_rank_partitions task"""
+
+    @patch('services.r2_storage.get_r2_service')
+    @patch('keywords.partitions.drop_partition_table')
+    @patch('keywords.partitions.detach_partition')
+    @patch('keywords.partitions.archive_partition')
+    @patch('keywords.partitions.expired_partitions', return_value=['keywords_rank_p2023_01'])
+    @patch('keywords.partitions.ensure_partitions', return_value=['keywords_rank_p2026_01'])
+    def test_archives_then_detaches_and_drops(self, mock_ensure, mock_expired, mock_archive,
+                                              mock_detach, mock_drop, mock_r2):
+        """Test expired partitions are archived before they are detached and dropped"""
+        mock_archive.return_value = 'rank-archive/keywords_rank_p2023_01.parquet'
+
+        stats = maintain_rank_partitions()
+
+        mock_ensure.assert_called_once_with(3)
+        mock_expired.assert_called_once_with(24)
+        mock_detach.assert_called_once_with('keywords_rank_p2023_01')
+        mock_drop.assert_called_once_with('keywords_rank_p2023_01')
+        self.assertEqual(stats['created'], ['keywords_rank_p2026_01'])
+        self.assertEqual(stats['archived'], ['rank-archive/keywords_rank_p2023_01.parquet'])
+        self.assertEqual(stats['errors'], [])
+
+    @patch('services.r2_storage.get_r2_service')
+    @patch('keywords.partitions.drop_partition_table')
+    @patch('keywords.partitions.detach_partition')
+    @patch('keywords.partitions.archive_partition', return_value=None)
+    @patch('keywords.partitions.expired_partitions', return_value=['keywords_rank_p2023_01'])
+    @patch('keywords.partitions.ensure_partitions', return_value=[])
+    def test_failed_archive_keeps_partition_attached(self, mock_ensure, mock_expired, mock_archive,
+                                                     mock_detach, mock_drop, mock_r2):
+        """Test a partition whose archive failed is neither detached nor dropped"""
+        stats = maintain_rank_partitions()
+
+        mock_detach.assert_not_called()
+        mock_drop.assert_not_called()
+        self.assertEqual(len(stats['errors']), 1)
+
+    @override_settings(RANK_PARTITION_RETENTION_MONTHS=0)
+    @patch('keywords.partitions.expired_partitions')
+    @patch('keywords.partitions.ensure_partitions', return_value=[])
+    def test_keeps_all_history_by_default(self, mock_ensure, mock_expired):
+        """Test nothing is retired without a retention window"""
+        maintain_rank_partitions()
+        mock_expired.assert_not_called()
@@ -0,0 +1,171 @@
+"""
+Unit tests for the write-behind rank result sink
+"""
+
+from datetime import timedelta
+from unittest.mock import Mock, patch
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from competitors.models import Target, TargetKeywordRank
+from keywords.models import Keyword, Rank
+from keywords.rank_sink import RankResultSink
+from keywords.tasks import fetch_keyword_serp_batch
+from project.models import Project
+
+
+class RankResultSinkTest(TestCase):
+    """Test cases for RankResultSink"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='sinkuser',
+            email='sink@example.com',
+            password='testpass123'
+        )
+        self.project = Project.objects.create(user=self.user, domain='example.com', title='Sink', active=True)
+        self.target = Target.objects.create(project=self.project, domain='competitor.com', is_manual=True)
+
+    def _keywords(self, count, previous_rank=None):
+        keywords = []
+        for i in range(count):
+            keyword = Keyword.objects.create(project=self.project, keyword=f'sink keyword {i}', processing=True)
+            if previous_rank is not None:
+                Rank.objects.create(
+                    keyword=keyword,
+                    rank=previous_rank,
+                    created_at=timezone.now() - timedelta(days=1)
+                )
+            keywords.append(Keyword.objects.get(id=keyword.id))
+        return keywords
+
+    def _stage(self, sink, keyword, rank):
+        keyword.success_api_hit_count += 1
+        keyword.scraped_at = timezone.now()
+        sink.update_keyword(keyword, ['success_api_hit_count', 'scraped_at'])
+        sink.add_rank(Rank(keyword=keyword, rank=rank, is_organic=True), url='https://example.com/page')
+        sink.add_target_ranks(keyword, [
+            TargetKeywordRank(target=self.target, keyword=keyword, rank=1, rank_url='https://competitor.com/', scraped_at=timezone.now())
+        ])
+
+    def test_flush_applies_rank_changes(self):
+        """Test ranks, keyword rank fields and target ranks are written on flush"""
+        keyword = self._keywords(1, previous_rank=5)[0]
+        TargetKeywordRank.objects.create(target=self.target, keyword=keyword, rank=9)
+
+        sink = RankResultSink()
+        self._stage(sink, keyword, 3)
+        self.assertEqual(Rank.objects.filter(keyword=keyword).count(), 1)
+
+        self.assertEqual(sink.flush(), 1)
+
+        keyword.refresh_from_db()
+        self.assertEqual(keyword.rank, 3)
+        self.assertEqual(keyword.rank_status, 'up')
+        self.assertEqual(keyword.rank_diff_from_last_time, 2)
+        self.assertEqual(keyword.rank_url, 'https://example.com/page')
+        self.assertEqual(keyword.success_api_hit_count, 1)
+        self.assertFalse(keyword.processing)
+        self.assertEqual(Rank.objects.filter(keyword=keyword).count(), 2)
+
+        target_rank = TargetKeywordRank.objects.get(target=self.target, keyword=keyword)
+        self.assertEqual(target_rank.rank, 1)
+
+    def test_query_count_independent_of_batch_size(self):
+        """Test a flush costs the same number of queries for 2 or 10 keywords"""
+        counts = []
+        for size in (2, 10):
+            sink = RankResultSink(max_batch=100)
+            for keyword in self._keywords(size, previous_rank=7):
+                self._stage(sink, keyword, 4)
+
+            with CaptureQueriesContext(connection) as queries:
+                sink.flush()
+            counts.append(len(queries))
+            Keyword.objects.all().delete()
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(Rank.objects.count(), 0)
+
+    def test_maybe_flush_thresholds(self):
+        """Test flushing by batch size and by age of the oldest pending result"""
+        keywords = self._keywords(3)
+
+        sink = RankResultSink(max_batch=2, max_wait=60)
+        self._stage(sink, keywords[0], 1)
+        self.assertEqual(sink.maybe_flush(), 0)
+        self._stage(sink, keywords[1], 1)
+        self.assertEqual(sink.maybe_flush(), 2)
+        self.assertEqual(len(sink), 0)
+
+        sink = RankResultSink(max_batch=100, max_wait=0)
+        self._stage(sink, keywords[2], 1)
+        self.assertEqual(sink.maybe_flush(), 1)
+
+    def test_failed_bulk_write_retries_per_keyword(self):
+        """Test one failing row does not lose the rest of the batch"""
+        good, bad = self._keywords(2)
+        sink = RankResultSink()
+        self._stage(sink, good, 2)
+        self._stage(sink, bad, 6)
+
+        original_bulk_create = Rank.objects.bulk_create
+
+        def bulk_create(objs, *args, **kwargs):
+            if any(rank.keyword_id == bad.id for rank in objs):
+                raise ValueError('bad row')
+            return original_bulk_create(objs, *args, **kwargs)
+
+        callback = Mock()
+        sink.on_rank_created(good, callback)
+
+        with patch.object(Rank.objects, 'bulk_create', side_effect=bulk_create):
+            self.assertEqual(sink.flush(), 1)
+
+        self.assertTrue(Rank.objects.filter(keyword=good).exists())
+        self.assertFalse(Rank.objects.filter(keyword=bad).exists())
+        callback.assert_called_once()
+        self.assertIsNotNone(callback.call_args[0][0].id)
+
+    @override_settings(SERP_RESULT_SINK_ENABLED=True, SERP_SNAPSHOT_REUSE=False)
+    @patch('keywords.ranking_extractor.get_r2_service')
+    @patch('keywords.tasks.ScrapeDoService')
+    def test_batch_task_writes_through_sink(self, mock_scraper_class, mock_get_r2):
+        """Test the batch task stores every keyword's rank with the sink enabled"""
+        import tempfile
+        from services.google_search_parser import GoogleSearchParser
+
+        mock_scraper = Mock()
+        mock_scraper_class.return_value = mock_scraper
+        mock_scraper.scrape_google_search.return_value = {
+            'status_code': 200, 'html': '<html>SERP</html>', 'success': True
+        }
+        mock_get_r2.return_value.upload_json.return_value = {'success': True}
+
+        parsed = {
+            'organic_results': [
+                {'position': 1, 'url': 'https://competitor.com/a', 'title': 'A'},
+                {'position': 2, 'url': 'https://example.com/b', 'title': 'B'},
+            ],
+            'sponsored_results': []
+        }
+        keywords = self._keywords(3)
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with override_settings(SCRAPE_DO_STORAGE_ROOT=temp_dir, SERP_ARCHIVE_ROOT=temp_dir):
+                with patch.object(GoogleSearchParser, 'parse', return_value=parsed):
+                    stats = fetch_keyword_serp_batch([keyword.id for keyword in keywords])
+
+        self.assertEqual(stats['succeeded'], 3)
+        for keyword in keywords:
+            keyword.refresh_from_db()
+            self.assertEqual(keyword.rank, 2)
+            self.assertEqual(keyword.success_api_hit_count, 1)
+            self.assertEqual(keyword.top_competitors[0]['domain'], 'competitor.com')
+            self.assertFalse(keyword.processing)
+        self.assertEqual(Rank.objects.count(), 3)
+        self.assertEqual(TargetKeywordRank.objects.filter(rank=1).count(), 3)
@@ -0,0 +1,290 @@
+"""
+Unit tests for the shared Scrape.do rate limiter
+"""
+
+import threading
+import time
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from keywords.models import Keyword
+from keywords.tasks import fetch_keyword_serp_batch, fetch_keyword_serp_html
+from project.models import Project
+from services.rate_limiter import AdaptiveRateLimiter, RateLimitExceeded, get_rate_limiter, get_redis_client
+from services.scrape_do import ScrapeDoService
+
+try:
+    import fakeredis
+    FAKEREDIS_AVAILABLE = True
+except ImportError:
+    FAKEREDIS_AVAILABLE = False
+
+
+class FakeScrapeDoHandler(BaseHTTPRequestHandler):
+    """Scrape.do stand-in: answers 429 while server.throttle > 0, then 200"""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            server.in_flight += 1
+            server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+            throttled = server.throttle > 0
+            if throttled:
+                server.throttle -= 1
+        time.sleep(server.latency)
+        with server.lock:
+            server.in_flight -= 1
+
+        body = b'Too many requests' if throttled else b'<html>serp</html>'
+        self.send_response(429 if throttled else 200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@skipUnless(FAKEREDIS_AVAILABLE, 'fakeredis not installed')
+class AdaptiveRateLimiterTest(SimpleTestCase):
+    """Test cases for the token bucket and AIMD window"""
+
+    def setUp(self):
+        self.redis = fakeredis.FakeRedis()
+
+    def limiter(self, **kwargs):
+        options = dict(client=self.redis, rate=1000, burst=1000, initial_window=4, min_window=1,
+                       max_window=8, latency_target=1.0, cooldown=0, max_wait=1)
+        options.update(kwargs)
+        return AdaptiveRateLimiter('test', **options)
+
+    def test_window_grows_on_success_and_halves_on_429(self):
+        """Test additive increase per window of successes and multiplicative decrease"""
+        limiter = self.limiter()
+        for _ in range(4):
+            with limiter.limit() as permit:
+                permit.status_code = 200
+        self.assertAlmostEqual(limiter.metrics()['window'], 4.9, places=1)
+
+        with limiter.limit() as permit:
+            permit.status_code = 429
+        metrics = limiter.metrics()
+        self.assertAlmostEqual(metrics['window'], 2.45, places=1)
+        self.assertGreater(metrics['error_rate'], 0)
+
+    def test_exception_and_slow_response_shrink_the_window(self):
+        """Test timeouts and responses over the latency target are congestion"""
+        limiter = self.limiter(latency_target=0.01)
+        with self.assertRaises(TimeoutError):
+            with limiter.limit():
+                raise TimeoutError()
+        self.assertEqual(limiter.metrics()['window'], 2)
+
+        with limiter.limit() as permit:
+            time.sleep(0.02)
+            permit.status_code = 200
+        self.assertEqual(limiter.metrics()['window'], 1)
+
+    def test_cooldown_counts_a_burst_of_failures_once(self):
+        """Test failures within the cooldown only decrease the window once"""
+        limiter = self.limiter(cooldown=60)
+        for _ in range(3):
+            with limiter.limit() as permit:
+                permit.status_code = 503
+        self.assertEqual(limiter.metrics()['window'], 2)
+
+    def test_full_window_waits_then_gives_up(self):
+        """Test a request waits for a slot held by another worker and fails after max_wait"""
+        limiter = self.limiter(initial_window=1, max_wait=0.2)
+        held = limiter.acquire()
+
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire()
+        self.assertEqual(limiter.metrics()['in_flight'], 1)
+        self.assertEqual(limiter.metrics()['throttled'], 1)
+
+        limiter.release(held, True, 0.1)
+        with limiter.limit():
+            pass
+        self.assertEqual(limiter.metrics()['in_flight'], 0)
+
+    def test_expired_lease_is_reclaimed(self):
+        """Test the slot of a worker that died mid-request is freed after lease_ttl"""
+        limiter = self.limiter(initial_window=1, lease_ttl=0.05, max_wait=1)
+        limiter.acquire()  # Never released
+
+        time.sleep(0.1)
+        with limiter.limit():
+            pass
+
+    def test_token_bucket_paces_requests(self):
+        """Test requests beyond the burst wait for tokens"""
+        limiter = self.limiter(rate=20, burst=2)
+        started = time.monotonic()
+        for _ in range(4):
+            with limiter.limit():
+                pass
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+        metrics = limiter.metrics()
+        self.assertGreater(metrics['throttled_seconds'], 0)
+        self.assertLess(metrics['tokens'], 1)
+
+    def test_redis_outage_fails_open(self):
+        """Test requests go through unthrottled when Redis is down"""
+        server = fakeredis.FakeServer()
+        server.connected = False
+        limiter = self.limiter(client=fakeredis.FakeRedis(server=server))
+
+        with limiter.limit() as permit:
+            permit.status_code = 200
+        self.assertIsNone(permit.lease)
+
+
+@override_settings(SCRAPE_DO_RATE_LIMIT_ENABLED=True)
+class SharedLimiterTest(SimpleTestCase):
+    """Test clients and limiters are built once per process"""
+
+    def test_one_client_per_url(self):
+        """Test the same URL returns the same client and connection pool"""
+        client = get_redis_client('redis://localhost:6379/5')
+
+        self.assertIs(get_redis_client('redis://localhost:6379/5'), client)
+        self.assertIsNot(get_redis_client('redis://localhost:6379/6'), client)
+
+    def test_services_share_one_limiter(self):
+        """Test every ScrapeDoService gets the same limiter until the settings change"""
+        limiter = ScrapeDoService(api_key='test').rate_limiter
+
+        self.assertIs(ScrapeDoService(api_key='test').rate_limiter, limiter)
+        self.assertIs(limiter.client, get_redis_client())
+        with override_settings(SCRAPE_DO_RATE_PER_SECOND=1):
+            self.assertIsNot(get_rate_limiter('scrape_do'), limiter)
+
+
+@skipUnless(FAKEREDIS_AVAILABLE, 'fakeredis not installed')
+class ScrapeDoRateLimitTest(SimpleTestCase):
+    """ScrapeDoService against a local fake Scrape.do with a shared limiter"""
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FakeScrapeDoHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = 0
+        self.server.in_flight = 0
+        self.server.peak_in_flight = 0
+        self.server.throttle = 0
+        self.server.latency = 0.02
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.redis = fakeredis.FakeRedis()
+        self.settings_override = override_settings(SCRAPE_DO_CACHE_BACKEND='django', CIRCUIT_BREAKER_ENABLED=False)
+        self.settings_override.enable()
+        cache.clear()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.settings_override.disable()
+        cache.clear()
+
+    def service(self, **kwargs):
+        options = dict(client=self.redis, rate=1000, burst=1000, initial_window=4, min_window=1,
+                       max_window=8, latency_target=5, cooldown=0, max_wait=5)
+        options.update(kwargs)
+        service = ScrapeDoService(api_key='test', rate_limiter=AdaptiveRateLimiter('scrape_do', **options))
+        service.BASE_URL = f'http://127.0.0.1:{self.server.server_port}'
+        return service
+
+    def scrape_concurrently(self, services, per_worker):
+        def worker(service):
+            for n in range(per_worker):
+                service.scrape(f'https://example.com/{id(service)}/{n}', use_cache=False)
+
+        threads = [threading.Thread(target=worker, args=(service,)) for service in services]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_workers_share_one_concurrency_window(self):
+        """Test separate service instances never exceed the shared window together"""
+        workers = [self.service(initial_window=3, max_window=3) for _ in range(6)]
+
+        self.scrape_concurrently(workers, per_worker=3)
+
+        self.assertEqual(self.server.requests, 18)
+        self.assertLessEqual(self.server.peak_in_flight, 3)
+        self.assertEqual(workers[0].rate_limiter.metrics()['in_flight'], 0)
+
+    def test_429s_shrink_the_window_for_every_worker(self):
+        """Test throttling responses cut the window all workers draw from"""
+        self.server.throttle = 3
+        service = self.service(initial_window=8)
+
+        results = [service.scrape(f'https://example.com/{n}', use_cache=False) for n in range(3)]
+
+        self.assertEqual([result['status_code'] for result in results], [429, 429, 429])
+        self.assertEqual(self.service().rate_limiter.metrics()['window'], 1)
+
+        result = service.scrape('https://example.com/ok', use_cache=False)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['html'], '<html>serp</html>')
+        self.assertEqual(service.rate_limiter.metrics()['window'], 2)
+
+    def test_rate_limited_scrape_fails_cleanly(self):
+        """Test a scrape that gets no slot returns a failure instead of raising"""
+        service = self.service(initial_window=1, max_window=1, max_wait=0.1)
+        held = service.rate_limiter.acquire()
+
+        result = service.scrape('https://example.com/', use_cache=False)
+
+        self.assertFalse(result['success'])
+        self.assertTrue(result['rate_limited'])
+        self.assertEqual(self.server.requests, 0)
+        service.rate_limiter.release(held, True, 0)
+
+
+@override_settings(CIRCUIT_BREAKER_ENABLED=False, SCRAPE_DO_LIMITER_MAX_WAIT=120)
+class RateLimitedFetchTest(TestCase):
+    """Test cases for SERP fetches that got no slot from the shared limiter"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='limituser', email='limit@example.com', password='testpass123')
+        self.project = Project.objects.create(user=self.user, domain='example.com', title='Test', active=True)
+        self.keyword = Keyword.objects.create(project=self.project, keyword='trail shoes', country='US')
+        Keyword.objects.filter(id=self.keyword.id).update(processing=True)
+        cache.clear()
+
+        patcher = patch('keywords.tasks.ScrapeDoService')
+        self.scraper = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+        self.scraper.scrape_google_search.return_value = {
+            'error': 'No slot within 120s', 'success': False, 'rate_limited': True
+        }
+
+    def test_single_fetch_is_deferred_not_failed(self):
+        """Test a rate limited scrape reschedules the keyword without counting a failure"""
+        fetch_keyword_serp_html(self.keyword.id)
+
+        self.keyword.refresh_from_db()
+        self.assertEqual(self.keyword.failed_api_hit_count, 0)
+        self.assertFalse(self.keyword.processing)
+        self.assertGreater(self.keyword.next_crawl_at, timezone.now() + timedelta(seconds=60))
+
+    def test_batch_defers_rate_limited_keywords(self):
+        """Test the batch counts rate limited keywords as deferred"""
+        stats = fetch_keyword_serp_batch([self.keyword.id])
+
+        self.keyword.refresh_from_db()
+        self.assertEqual(stats['deferred'], 1)
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(self.keyword.failed_api_hit_count, 0)
+        self.assertGreater(self.keyword.next_crawl_at, timezone.now() + timedelta(seconds=60))
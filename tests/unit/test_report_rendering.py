@@ -0,0 +1,254 @@
+"""
+Unit tests for queued keyword report PDF rendering
+"""
+
+import io
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
+
+from django.test import TestCase, override_settings
+
+from accounts.models import User
+from keywords.models_reports import KeywordReport
+from keywords.tasks_reports import generate_keyword_report, render_keyword_report_pdf
+from project.models import Project
+
+try:
+    from keywords import report_pdf
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+try:
+    from keywords import report_generator  # noqa: F401
+    REPORT_GENERATOR_AVAILABLE = True
+except ImportError:
+    REPORT_GENERATOR_AVAILABLE = False
+
+
+PDF_DATA = {
+    'domain': 'example.com',
+    'start_date': '2025-09-01',
+    'end_date': '2025-09-30',
+    'summary': {'total_keywords': 1, 'days_covered': 30, 'improvements': 1, 'declines': 0, 'no_change': 0},
+    'chart': {'labels': ['seo tools'], 'categories': ['09/01', '09/04'], 'series': [[90, 95]]},
+    'detail_rows': [['seo tools', '11', '6', '↑5', 'Improved']],
+}
+
+
+class ReportRenderingTestBase(TestCase):
+    """Shared report fixtures"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='reportuser', email='report@example.com', password='testpass123')
+        self.project = Project.objects.create(user=self.user, domain='example.com', title='Reports', active=True)
+        self.report = KeywordReport.objects.create(
+            project=self.project,
+            name='September',
+            start_date=date(2025, 9, 1),
+            end_date=date(2025, 9, 30),
+            created_by=self.user,
+            send_email_notification=False
+        )
+        self.report.mark_as_processing()
+
+
+class FinishPartTest(ReportRenderingTestBase):
+    """Test cases for KeywordReport.finish_part"""
+
+    def test_last_part_returns_report(self):
+        """Test only the last finished part gets the report back"""
+        KeywordReport.objects.filter(id=self.report.id).update(pending_parts=2)
+
+        self.assertIsNone(KeywordReport.finish_part(self.report.id, csv_file_path='a.csv', csv_file_size=10))
+        report = KeywordReport.finish_part(self.report.id, pdf_file_path='a.pdf', pdf_file_size=20)
+
+        self.assertIsNotNone(report)
+        report.refresh_from_db()
+        self.assertEqual(report.pending_parts, 0)
+        self.assertEqual((report.csv_file_path, report.pdf_file_path), ('a.csv', 'a.pdf'))
+
+
+@skipUnless(REPORTLAB_AVAILABLE, 'reportlab is not installed')
+class RenderKeywordReportPdfTaskTest(ReportRenderingTestBase):
+    """Test cases for the render_keyword_report_pdf task"""
+
+    def stage(self, pending_parts, task_id='pdf-task'):
+        KeywordReport.objects.filter(id=self.report.id).update(
+            pending_parts=pending_parts,
+            pdf_data={'task_id': task_id, 'data': PDF_DATA}
+        )
+
+    def render(self, task_id='pdf-task'):
+        return render_keyword_report_pdf.apply(args=[self.report.id, 'reports/a.pdf', {}], task_id=task_id).get()
+
+    @patch('keywords.tasks_reports.get_r2_service')
+    @patch('keywords.report_pdf.render_keyword_rankings_pdf', return_value=b'%PDF-1.4')
+    def test_last_part_completes_report(self, mock_render, mock_r2):
+        """Test the PDF task completes the report when the CSV already finished"""
+        mock_r2.return_value.upload_file.return_value = {'success': True}
+        self.stage(pending_parts=1)
+
+        result = self.render()
+
+        self.assertTrue(result['success'])
+        self.assertEqual(mock_render.call_args[0][0], PDF_DATA)
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, 'completed')
+        self.assertEqual(self.report.pdf_file_path, 'reports/a.pdf')
+        self.assertEqual(self.report.pdf_file_size, 8)
+        self.assertIsNone(self.report.pdf_data)
+
+    @patch('keywords.tasks_reports.get_r2_service')
+    @patch('keywords.report_pdf.render_keyword_rankings_pdf', side_effect=RuntimeError('render failed'))
+    def test_failed_render_waits_for_csv(self, mock_render, mock_r2):
+        """Test a failed render still counts as finished but leaves the CSV part pending"""
+        self.stage(pending_parts=2)
+
+        result = self.render()
+
+        self.assertFalse(result['success'])
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, 'processing')
+        self.assertEqual(self.report.pending_parts, 1)
+
+    @patch('keywords.tasks_reports.get_r2_service')
+    @patch('keywords.report_pdf.render_keyword_rankings_pdf')
+    def test_cancelled_task_leaves_retry_alone(self, mock_render, mock_r2):
+        """Test the PDF task of a cancelled attempt neither renders nor finishes a part"""
+        self.stage(pending_parts=2)
+        KeywordReport.cancel_parts(self.report.id)
+        self.stage(pending_parts=2, task_id='retry-pdf-task')  # The retry queued its own PDF
+
+        result = self.render()
+
+        self.assertEqual(result['error'], 'Cancelled')
+        mock_render.assert_not_called()
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.pending_parts, 2)
+        self.assertEqual(self.report.pdf_data['task_id'], 'retry-pdf-task')
+
+    def test_cancelled_part_is_not_counted(self):
+        """Test a PDF task whose attempt was cancelled mid-render doesn't finish a part"""
+        self.stage(pending_parts=1, task_id='retry-pdf-task')
+
+        self.assertIsNone(KeywordReport.finish_part(self.report.id, pdf_task_id='pdf-task', pdf_file_path='a.pdf'))
+
+        self.report.refresh_from_db()
+        self.assertEqual((self.report.pending_parts, self.report.pdf_file_path), (1, None))
+
+
+@skipUnless(REPORTLAB_AVAILABLE, 'reportlab is not installed')
+class ChartCacheTest(TestCase):
+    """Test cases for chart caching by content hash"""
+
+    def test_same_series_reuses_drawing(self):
+        """Test charts with identical content are built once"""
+        other = dict(PDF_DATA['chart'], series=[[90, 96]])
+        self.assertNotEqual(report_pdf.chart_cache_key(PDF_DATA['chart']), report_pdf.chart_cache_key(other))
+
+        report_pdf._chart_cache.clear()
+        with patch('keywords.report_pdf.build_ranking_chart', wraps=report_pdf.build_ranking_chart) as mock_build:
+            drawing = report_pdf.get_ranking_chart(PDF_DATA['chart'])
+            self.assertIs(report_pdf.get_ranking_chart(dict(PDF_DATA['chart'])), drawing)
+
+        mock_build.assert_called_once()
+
+    @override_settings(REPORT_CHART_CACHE_SIZE=1)
+    def test_cache_is_bounded(self):
+        """Test the least recently used chart is evicted"""
+        report_pdf._chart_cache.clear()
+        with patch('keywords.report_pdf.build_ranking_chart', return_value=object()):
+            report_pdf.get_ranking_chart(PDF_DATA['chart'])
+            report_pdf.get_ranking_chart(dict(PDF_DATA['chart'], series=[[90, 96]]))
+
+        self.assertEqual(list(report_pdf._chart_cache), [report_pdf.chart_cache_key(dict(PDF_DATA['chart'], series=[[90, 96]]))])
+
+    def test_renders_without_pool(self):
+        """Test the report renders as one document without a process pool"""
+        pdf = report_pdf.render_keyword_rankings_pdf(dict(PDF_DATA, detail_rows=PDF_DATA['detail_rows'] * 100))
+        self.assertTrue(pdf.startswith(b'%PDF'))
+
+
+@skipUnless(REPORTLAB_AVAILABLE, 'reportlab is not installed')
+class ParallelRenderTest(TestCase):
+    """Test cases for rendering detail chunks in a pool and merging them"""
+
+    def setUp(self):
+        # Any executor works for the merge path; threads keep the test fast
+        self.pool = ThreadPoolExecutor(max_workers=2)
+        self.addCleanup(self.pool.shutdown)
+        self.data = dict(PDF_DATA, detail_rows=PDF_DATA['detail_rows'] * (report_pdf.DETAIL_ROWS_PER_CHUNK * 3))
+
+    @skipUnless(getattr(report_pdf, 'PYPDF_AVAILABLE', False), 'pypdf is not installed')
+    def test_chunks_are_merged_in_order(self):
+        """Test pooled chunks are merged after the summary pages"""
+        import pypdf
+
+        with patch('keywords.report_pdf.render_detail_chunk', wraps=report_pdf.render_detail_chunk) as mock_chunk:
+            pdf = report_pdf.render_keyword_rankings_pdf(self.data, pool=self.pool)
+
+        self.assertEqual(mock_chunk.call_count, 2)
+        pages = pypdf.PdfReader(io.BytesIO(pdf)).pages
+        serial_pages = pypdf.PdfReader(io.BytesIO(report_pdf.render_keyword_rankings_pdf(self.data))).pages
+        self.assertGreaterEqual(len(pages), len(serial_pages))
+        self.assertIn('Keyword Ranking Report', pages[0].extract_text())
+        self.assertIn('seo tools', pages[-1].extract_text())
+
+    def test_missing_pypdf_falls_back_with_warning(self):
+        """Test rendering still works, serially and with a warning, without pypdf"""
+        with patch('keywords.report_pdf.PYPDF_AVAILABLE', False), \
+                patch('keywords.report_pdf.render_detail_chunk') as mock_chunk, \
+                self.assertLogs('keywords.report_pdf', level='WARNING') as logs:
+            pdf = report_pdf.render_keyword_rankings_pdf(self.data, pool=self.pool)
+
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        mock_chunk.assert_not_called()
+        self.assertIn('pypdf is not installed', logs.output[0])
+
+
+@skipUnless(REPORT_GENERATOR_AVAILABLE, 'report dependencies are not installed')
+@override_settings(REPORT_PDF_QUEUE_ENABLED=True)
+class GenerateKeywordReportQueueTest(ReportRenderingTestBase):
+    """Test cases for handing the PDF to the reports_pdf queue"""
+
+    @patch('keywords.tasks_reports.render_keyword_report_pdf.apply_async')
+    @patch('keywords.tasks_reports.get_r2_service')
+    @patch('keywords.report_generator.KeywordReportGenerator.generate_reports')
+    def test_pdf_is_queued_while_csv_streams(self, mock_generate, mock_r2, mock_apply_async):
+        """Test the PDF is queued and the report waits for it after the CSV upload"""
+        mock_generate.return_value = {'success': True, 'csv_stream': iter([b'a,b\r\n']), 'pdf_data': PDF_DATA}
+        mock_r2.return_value.upload_stream.return_value = {'success': True, 'size': 5}
+
+        result = generate_keyword_report(self.report.id)
+
+        self.assertTrue(result['pdf_queued'])
+        self.assertEqual(mock_apply_async.call_args[1]['queue'], 'reports_pdf')
+        self.assertEqual(mock_apply_async.call_args[1]['args'][0], self.report.id)
+        self.assertNotIn(PDF_DATA, mock_apply_async.call_args[1]['args'])
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, 'processing')
+        self.assertEqual(self.report.pending_parts, 1)
+        self.assertEqual(self.report.csv_file_size, 5)
+        self.assertEqual(self.report.pdf_data['data'], PDF_DATA)
+        self.assertEqual(self.report.pdf_data['task_id'], mock_apply_async.call_args[1]['task_id'])
+
+    @patch('keywords.tasks_reports.render_keyword_report_pdf.apply_async')
+    @patch('keywords.tasks_reports.get_r2_service')
+    @patch('keywords.report_generator.KeywordReportGenerator.generate_reports')
+    def test_failed_csv_cancels_queued_pdf(self, mock_generate, mock_r2, mock_apply_async):
+        """Test a failure after the PDF was queued cancels it before the retry"""
+        mock_generate.return_value = {'success': True, 'csv_stream': iter([b'a,b\r\n']), 'pdf_data': PDF_DATA}
+        mock_r2.return_value.upload_stream.side_effect = RuntimeError('R2 down')
+
+        with patch.object(generate_keyword_report, 'retry', side_effect=RuntimeError('retrying')):
+            with self.assertRaises(RuntimeError):
+                generate_keyword_report(self.report.id)
+
+        mock_apply_async.assert_called_once()
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.status, 'failed')
+        self.assertEqual(self.report.pending_parts, 0)
+        self.assertIsNone(self.report.pdf_data)
@@ -0,0 +1,164 @@
+"""
+Unit tests for batched generation of scheduled keyword reports
+"""
+
+from datetime import date, timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from keywords.models import Keyword, Rank
+from keywords.models_reports import KeywordReport, ReportSchedule
+from keywords.tasks_reports import generate_scheduled_report_batch, process_scheduled_reports
+from project.models import Project
+
+try:
+    from keywords.report_generator import KeywordReportGenerator, ReportDataset
+    REPORT_GENERATOR_AVAILABLE = True
+except ImportError:
+    REPORT_GENERATOR_AVAILABLE = False
+
+
+class ScheduledReportTestBase(TestCase):
+    """Shared project and keyword fixtures"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='scheduser', email='sched@example.com', password='testpass123')
+        self.project = Project.objects.create(user=self.user, domain='example.com', title='Schedules', active=True)
+        self.keywords = [
+            Keyword.objects.create(project=self.project, keyword=name, country='US')
+            for name in ('alpha', 'beta', 'gamma')
+        ]
+
+    def create_schedule(self, **kwargs):
+        fields = {
+            'project': self.project,
+            'name': 'Weekly',
+            'frequency': 'daily',
+            'report_period_days': 7,
+            'created_by': self.user,
+            'next_run_at': timezone.now() - timedelta(minutes=5),
+        }
+        fields.update(kwargs)
+        return ReportSchedule.objects.create(**fields)
+
+
+@patch('keywords.tasks_reports.send_scheduled_report_emails.delay')
+@patch('keywords.tasks_reports.generate_scheduled_report_batch.delay')
+@patch('keywords.tasks_reports.generate_keyword_report.delay')
+class ProcessScheduledReportsTest(ScheduledReportTestBase):
+    """Test cases for grouping due schedules into report batches"""
+
+    def test_same_project_and_period_share_a_batch(self, mock_single, mock_batch, mock_emails):
+        """Test due schedules covering the same period are generated in one batch"""
+        self.create_schedule(name='CSV', report_format='csv')
+        selected = self.create_schedule(name='PDF', report_format='pdf')
+        selected.keywords.set(self.keywords[:1])
+        self.create_schedule(name='Monthly', report_period_days=30)
+        self.create_schedule(name='Later', next_run_at=timezone.now() + timedelta(hours=1))
+
+        result = process_scheduled_reports()
+
+        self.assertEqual(result['processed'], 3)
+        self.assertEqual(len(mock_batch.call_args[0][0]), 2)
+        batch_reports = KeywordReport.objects.filter(id__in=mock_batch.call_args[0][0])
+        self.assertEqual({report.report_format for report in batch_reports}, {'csv', 'pdf'})
+        self.assertEqual(KeywordReport.objects.get(name__startswith='PDF').keywords.count(), 1)
+
+        mock_single.assert_called_once()
+        self.assertEqual(KeywordReport.objects.get(id=mock_single.call_args[0][0]).name.split(' - ')[0], 'Monthly')
+
+
+@skipUnless(REPORT_GENERATOR_AVAILABLE, 'report dependencies are not installed')
+class ReportDatasetTest(ScheduledReportTestBase):
+    """Test cases for generating reports from a shared ReportDataset"""
+
+    def setUp(self):
+        super().setUp()
+        self.end_date = date(2025, 9, 7)
+        self.start_date = self.end_date - timedelta(days=6)
+        for offset, keyword in enumerate(self.keywords):
+            Rank.objects.create(keyword=keyword, rank=10 + offset, scraped_date=self.start_date)
+            Rank.objects.create(keyword=keyword, rank=5 + offset, scraped_date=self.end_date)
+
+    def create_report(self, keywords=None):
+        report = KeywordReport.objects.create(
+            project=self.project,
+            name='Scheduled',
+            start_date=self.start_date,
+            end_date=self.end_date,
+            report_format='csv',
+            created_by=self.user
+        )
+        if keywords:
+            report.keywords.set(keywords)
+        return report
+
+    def csv_text(self, report, dataset=None):
+        results = KeywordReportGenerator(report, dataset=dataset).generate_reports()
+        self.assertTrue(results['success'])
+        return b''.join(results['csv_stream']).decode('utf-8'), results['summary']
+
+    def test_shared_data_matches_direct_load(self):
+        """Test reports built from the dataset match reports that load their own data"""
+        dataset = ReportDataset.load(self.project, self.start_date, self.end_date)
+
+        for keywords in (None, self.keywords[1:]):
+            report = self.create_report(keywords)
+            shared_csv, shared_summary = self.csv_text(report, dataset)
+            direct_csv, direct_summary = self.csv_text(report)
+
+            self.assertEqual(shared_csv, direct_csv)
+            self.assertEqual(shared_summary['improvements'], direct_summary['improvements'])
+            self.assertEqual(shared_summary['total_keywords'], 3 if keywords is None else 2)
+
+    def test_rank_queries_run_once(self):
+        """Test reports using the dataset don't query ranks again"""
+        dataset = ReportDataset.load(self.project, self.start_date, self.end_date)
+        report = self.create_report(self.keywords[:2])
+
+        with patch('keywords.report_generator.load_rank_matrix') as mock_load:
+            self.csv_text(report, dataset)
+
+        mock_load.assert_not_called()
+
+    @patch('keywords.tasks_reports.generate_keyword_report.delay')
+    @patch('keywords.tasks_reports._generate_and_store')
+    def test_batch_hands_failed_reports_back(self, mock_generate, mock_single):
+        """Test the batch loads data once and retries failed reports on their own"""
+        reports = [self.create_report(), self.create_report()]
+        mock_generate.side_effect = [{'success': True}, RuntimeError('upload failed')]
+
+        with patch.object(ReportDataset, 'load', wraps=ReportDataset.load) as mock_load:
+            result = generate_scheduled_report_batch([report.id for report in reports])
+
+        mock_load.assert_called_once()
+        self.assertIsInstance(mock_generate.call_args[1]['dataset'], ReportDataset)
+        self.assertEqual((result['generated'], result['failed']), ([reports[0].id], [reports[1].id]))
+        mock_single.assert_called_once_with(reports[1].id)
+
+    @patch('keywords.tasks_reports.generate_keyword_report.delay')
+    @patch('keywords.tasks_reports._generate_and_store')
+    def test_batch_cancels_queued_parts_before_handing_back(self, mock_generate, mock_single):
+        """Test a report that failed after queueing its PDF is reset before it is retried"""
+        report = self.create_report()
+
+        def fail_after_queueing_pdf(report, dataset=None):
+            report.pending_parts = 2
+            report.pdf_data = {'task_id': 'pdf-task', 'data': {}}
+            report.save(update_fields=['pending_parts', 'pdf_data'])
+            raise RuntimeError('upload failed')
+
+        mock_generate.side_effect = fail_after_queueing_pdf
+
+        def check_reset(report_id):
+            state = KeywordReport.objects.filter(id=report_id).values_list('pending_parts', 'pdf_data').get()
+            self.assertEqual(state, (0, None))
+
+        mock_single.side_effect = check_reset
+        generate_scheduled_report_batch([report.id])
+
+        mock_single.assert_called_once_with(report.id)
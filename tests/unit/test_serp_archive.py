@@ -0,0 +1,234 @@
+"""
+Unit tests for the compressed SERP HTML archive
+"""
+
+import shutil
+import tempfile
+from datetime import date, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from keywords import serp_archive
+from keywords.models import Keyword, SerpArchiveEntry, SerpBlob
+from project.models import Project
+
+
+def serp_html(i):
+    results = ''.join(f'<div class="g"><a href="https://site{i}-{n}.com/">Result {n}</a></div>' for n in range(50))
+    return f'<html><body><div id="search">{results}</div></body></html>'
+
+
+class SerpArchiveTestBase(TestCase):
+    """Two projects tracking the same query, archive in a temp dir"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(SERP_ARCHIVE_ROOT=self.temp_dir, SCRAPE_DO_STORAGE_ROOT=self.temp_dir)
+        self.settings_override.enable()
+        serp_archive._dictionaries.clear()
+
+        self.user = User.objects.create_user(username='archiveuser', email='archive@example.com', password='testpass123')
+        self.project_a = Project.objects.create(user=self.user, domain='example.com', title='A', active=True)
+        self.project_b = Project.objects.create(user=self.user, domain='other.com', title='B', active=True)
+        self.keyword_a = Keyword.objects.create(project=self.project_a, keyword='running shoes', country='US')
+        self.keyword_b = Keyword.objects.create(project=self.project_b, keyword='running shoes', country='US')
+        self.day = date(2025, 9, 1)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        serp_archive._dictionaries.clear()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+
+class StoreAndReadTest(SerpArchiveTestBase):
+    """Test cases for writing and reading archived SERPs"""
+
+    def test_round_trip_is_compressed(self):
+        """Test a stored SERP reads back unchanged and smaller on disk"""
+        key, stored = serp_archive.store_serp(self.keyword_a, serp_html(1), self.day)
+
+        self.assertTrue(stored)
+        self.assertEqual(key, f'{self.project_a.id}/{self.keyword_a.id}/2025-09-01.html')
+        self.assertEqual(serp_archive.read_serp(self.keyword_a, self.day), serp_html(1))
+        self.assertEqual(serp_archive.read_serp_key(key), serp_html(1))
+        blob = SerpBlob.objects.get()
+        self.assertLess(blob.stored_size, blob.size / 5)
+
+    def test_identical_serps_share_one_blob(self):
+        """Test the same HTML archived for two keywords is stored once"""
+        serp_archive.store_serp(self.keyword_a, serp_html(1), self.day)
+        serp_archive.store_serp(self.keyword_b, serp_html(1), self.day)
+
+        self.assertEqual(SerpArchiveEntry.objects.count(), 2)
+        self.assertEqual(SerpBlob.objects.count(), 1)
+        self.assertEqual(len(list(serp_archive.iter_segment(SerpBlob.objects.get().segment))), 1)
+
+    def test_same_day_is_kept_unless_overwritten(self):
+        """Test a second SERP of the day only replaces the first with overwrite"""
+        serp_archive.store_serp(self.keyword_a, serp_html(1), self.day)
+
+        self.assertFalse(serp_archive.store_serp(self.keyword_a, serp_html(2), self.day)[1])
+        self.assertEqual(serp_archive.read_serp(self.keyword_a, self.day), serp_html(1))
+
+        self.assertTrue(serp_archive.store_serp(self.keyword_a, serp_html(2), self.day, overwrite=True)[1])
+        self.assertEqual(serp_archive.read_serp(self.keyword_a, '2025-09-01'), serp_html(2))
+
+    def test_link_serp_reuses_source_blob(self):
+        """Test a snapshot-served keyword points at the source keyword's blob"""
+        source_key, _ = serp_archive.store_serp(self.keyword_a, serp_html(1), self.day)
+
+        key = serp_archive.link_serp(self.keyword_b, self.day, source_key)
+
+        self.assertEqual(key, f'{self.project_b.id}/{self.keyword_b.id}/2025-09-01.html')
+        self.assertEqual(serp_archive.read_serp(self.keyword_b.id, self.day), serp_html(1))
+        self.assertEqual(SerpBlob.objects.count(), 1)
+        self.assertIsNone(serp_archive.link_serp(self.keyword_b, self.day, 'not/a/key.html'))
+
+    def test_legacy_raw_file_fallback(self):
+        """Test keys without an archive entry read the raw file written before the archive"""
+        key = serp_archive.serp_key(self.project_a.id, self.keyword_a.id, self.day)
+        raw_file = Path(self.temp_dir) / key
+        raw_file.parent.mkdir(parents=True)
+        raw_file.write_text('<html>legacy</html>', encoding='utf-8')
+
+        self.assertEqual(serp_archive.read_serp_key(key), '<html>legacy</html>')
+        self.assertIsNone(serp_archive.read_serp(self.keyword_a, self.day + timedelta(days=1)))
+
+    @skipUnless(serp_archive.ZSTD_AVAILABLE, 'zstandard not installed')
+    def test_trained_dictionary_keeps_old_blobs_readable(self):
+        """Test blobs record their dictionary and stay readable after retraining"""
+        serp_archive.store_serp(self.keyword_a, serp_html(0), self.day)
+        dict_id = serp_archive.train_dictionary([serp_html(i).encode() for i in range(200)], dict_size=16384)
+        serp_archive.store_serp(self.keyword_a, serp_html(1), self.day + timedelta(days=1))
+
+        self.assertEqual(
+            sorted(SerpBlob.objects.values_list('codec', flat=True)),
+            ['zstd', f'zstd:{dict_id}']
+        )
+        serp_archive._dictionaries.clear()
+        self.assertEqual(serp_archive.read_serp(self.keyword_a, self.day), serp_html(0))
+        self.assertEqual(serp_archive.read_serp(self.keyword_a, self.day + timedelta(days=1)), serp_html(1))
+
+
+class SegmentTest(SerpArchiveTestBase):
+    """Test cases for the daily segment files"""
+
+    def test_serps_of_a_day_share_one_segment(self):
+        """Test SERPs are appended to one segment and indexed by offset"""
+        for i, keyword in enumerate([self.keyword_a, self.keyword_b]):
+            serp_archive.store_serp(keyword, serp_html(i), self.day)
+
+        blobs = list(SerpBlob.objects.order_by('offset'))
+        self.assertEqual({blob.segment for blob in blobs}, {blobs[0].segment})
+        self.assertTrue(blobs[0].segment.startswith('segments/2025-09-01/'))
+        self.assertEqual(
+            list(serp_archive.iter_segment(blobs[0].segment)),
+            [(blob.content_hash, blob.offset, blob.stored_size) for blob in blobs]
+        )
+        self.assertEqual(serp_archive.read_serp(self.keyword_b, self.day), serp_html(1))
+
+    def test_dedupe_is_per_day(self):
+        """Test identical HTML is stored once per day, not shared across days"""
+        serp_archive.store_serp(self.keyword_a, serp_html(1), self.day)
+        serp_archive.store_serp(self.keyword_b, serp_html(1), self.day)
+        serp_archive.store_serp(self.keyword_a, serp_html(1), self.day + timedelta(days=1))
+
+        self.assertEqual(SerpArchiveEntry.objects.count(), 3)
+        self.assertEqual(
+            sorted(SerpBlob.objects.values_list('segment_date', flat=True)),
+            [self.day, self.day + timedelta(days=1)]
+        )
+
+    def test_link_serp_stays_within_the_day(self):
+        """Test a SERP of another day is not linked (its day may be dropped first)"""
+        source_key, _ = serp_archive.store_serp(self.keyword_a, serp_html(1), self.day)
+
+        self.assertIsNone(serp_archive.link_serp(self.keyword_b, self.day + timedelta(days=1), source_key))
+
+    def test_loose_blob_stays_readable(self):
+        """Test blobs written before segments are read from their loose file"""
+        codec, data = serp_archive.compress(serp_html(1).encode())
+        blob = SerpBlob.objects.create(content_hash='ab' * 32, codec=codec, size=1, stored_size=len(data))
+        path = serp_archive.blob_path(blob.content_hash, codec)
+        path.parent.mkdir(parents=True)
+        path.write_bytes(data)
+        SerpArchiveEntry.objects.create(keyword=self.keyword_a, scraped_date=self.day, blob=blob)
+
+        self.assertEqual(serp_archive.read_serp(self.keyword_a, self.day), serp_html(1))
+
+
+class PruneTest(SerpArchiveTestBase):
+    """Test cases for date-based retention"""
+
+    @override_settings(SERP_HISTORY_DAYS=7)
+    def test_expired_day_is_dropped_whole(self):
+        """Test an expired day loses its entries, blobs and segment directory"""
+        today = timezone.localdate()
+        serp_archive.store_serp(self.keyword_a, serp_html(1), today - timedelta(days=10))
+        serp_archive.store_serp(self.keyword_b, serp_html(2), today - timedelta(days=10))
+        serp_archive.store_serp(self.keyword_b, serp_html(1), today)
+
+        result = serp_archive.prune()
+
+        self.assertEqual((result['entries'], result['blobs'], result['segments']), (2, 2, 1))
+        self.assertGreater(result['freed_bytes'], 0)
+        self.assertFalse(serp_archive.segment_dir(today - timedelta(days=10)).exists())
+        self.assertEqual(serp_archive.read_serp(self.keyword_b, today), serp_html(1))
+
+    def test_orphan_loose_blob_is_deleted(self):
+        """Test a loose blob no entry references is deleted with its file"""
+        blob = SerpBlob.objects.create(content_hash='cd' * 32, codec='zlib', size=1, stored_size=4)
+        path = serp_archive.blob_path(blob.content_hash, blob.codec)
+        path.parent.mkdir(parents=True)
+        path.write_bytes(b'data')
+        SerpBlob.objects.update(created_at=timezone.now() - timedelta(days=1))
+
+        result = serp_archive.prune()
+
+        self.assertEqual((result['blobs'], result['freed_bytes']), (1, 4))
+        self.assertFalse(path.exists())
+
+    def test_store_rewrites_blob_pruned_meanwhile(self):
+        """Test an entry is never attached to a blob that prune removed after store_blob returned it"""
+        serp_archive.store_serp(self.keyword_a, serp_html(1), self.day)
+        stale = SerpBlob.objects.get()
+        SerpArchiveEntry.objects.all().delete()
+        SerpBlob.objects.all().delete()
+
+        with patch('keywords.serp_archive.store_blob', side_effect=[stale, serp_archive.store_blob(serp_html(1).encode(), self.day)]):
+            key, stored = serp_archive.store_serp(self.keyword_b, serp_html(1), self.day)
+
+        self.assertTrue(stored)
+        self.assertNotEqual(SerpArchiveEntry.objects.get().blob_id, stale.id)
+        self.assertEqual(serp_archive.read_serp_key(key), serp_html(1))
+
+
+class MigrateCommandTest(SerpArchiveTestBase):
+    """Test cases for the migrate_serp_archive command"""
+
+    def test_archives_raw_files(self):
+        """Test raw files are archived and deleted, files of deleted keywords only deleted"""
+        today = timezone.localdate()
+        files = {
+            serp_archive.serp_key(self.project_a.id, self.keyword_a.id, today): serp_html(1),
+            serp_archive.serp_key(self.project_b.id, self.keyword_b.id, today): serp_html(1),
+            serp_archive.serp_key(self.project_b.id, 999999, today): serp_html(2),
+        }
+        for key, html in files.items():
+            raw_file = Path(self.temp_dir) / key
+            raw_file.parent.mkdir(parents=True, exist_ok=True)
+            raw_file.write_text(html, encoding='utf-8')
+
+        call_command('migrate_serp_archive', '--delete-source', stdout=StringIO())
+
+        self.assertEqual(serp_archive.read_serp(self.keyword_a, today), serp_html(1))
+        self.assertEqual(serp_archive.read_serp(self.keyword_b, today), serp_html(1))
+        self.assertEqual(SerpBlob.objects.count(), 1)
+        self.assertEqual(list(Path(self.temp_dir).glob('*/*/*.html')), [])
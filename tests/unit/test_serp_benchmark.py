@@ -0,0 +1,90 @@
+"""
+Unit tests for the SERP parser benchmark harness
+"""
+
+import copy
+import tempfile
+from pathlib import Path
+
+from django.test import SimpleTestCase
+
+from keywords.ranking_extractor import RankingExtractor
+from services.serp_benchmark import (
+    SerpBenchmark,
+    collect_serp_files,
+    compare_with_baseline,
+    load_baseline,
+    save_baseline,
+)
+
+
+SERP_CORPUS_DIR = Path(__file__).resolve().parent.parent / 'fixtures' / 'serp'
+
+
+class SerpBenchmarkTest(SimpleTestCase):
+    """Test cases for SerpBenchmark and baseline comparison"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.files = collect_serp_files([str(SERP_CORPUS_DIR)])
+        cls.report = SerpBenchmark(
+            repeat=1,
+            ranking_extractor=RankingExtractor(),
+            domain='example.com'
+        ).run(cls.files)
+
+    def test_report_covers_every_document(self):
+        """Test per-document timings, stages, memory and features"""
+        self.assertEqual(self.report['summary']['documents'], len(self.files))
+        self.assertGreater(self.report['summary']['docs_per_second'], 0)
+
+        for doc in self.report['documents']:
+            with self.subTest(document=doc['document']):
+                self.assertGreater(doc['parse_ms'], 0)
+                self.assertGreater(doc['peak_memory_bytes'], 0)
+                self.assertIn('tree_build', doc['stages_ms'])
+                self.assertIn('all_results', doc['stages_ms'])
+                self.assertIn('rank_ms', doc)
+
+    def test_feature_counts(self):
+        """Test SERP feature counts are aggregated across the corpus"""
+        features = self.report['summary']['features']
+        self.assertEqual(features['organic_results']['serps'], len(self.files))
+        self.assertIn('people_also_ask', features)
+        self.assertNotIn('results', features)
+
+    def test_rank_stage(self):
+        """Test that the rank stage finds the project domain"""
+        ranks = {doc['document']: doc['rank'] for doc in self.report['documents']}
+        self.assertEqual(ranks['organic_with_top_ads.html'], 3)
+
+    def test_baseline_round_trip(self):
+        """Test baseline save/load and a clean comparison"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / 'baseline.json'
+            save_baseline(self.report, str(path))
+            baseline = load_baseline(str(path))
+
+        self.assertEqual(compare_with_baseline(self.report, baseline), [])
+
+    def test_throughput_regression_detected(self):
+        """Test that a throughput drop beyond the threshold is reported"""
+        baseline = copy.deepcopy(self.report)
+        baseline['summary']['docs_per_second'] = self.report['summary']['docs_per_second'] * 2
+
+        regressions = compare_with_baseline(self.report, baseline, threshold=0.10)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('corpus throughput', regressions[0])
+
+        # Within threshold
+        self.assertEqual(compare_with_baseline(self.report, baseline, threshold=0.60), [])
+
+    def test_result_count_change_detected(self):
+        """Test that a change in organic result counts is always reported"""
+        baseline = copy.deepcopy(self.report)
+        baseline['documents'][0]['features']['organic_results'] += 1
+
+        regressions = compare_with_baseline(self.report, baseline, threshold=0.99)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('organic_results count', regressions[0])
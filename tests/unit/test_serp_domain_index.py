@@ -0,0 +1,144 @@
+"""
+Unit tests for the project-wide SERP domain index
+"""
+
+from datetime import date, datetime
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from competitors.models import SerpDomain, SerpDomainRank
+from competitors.serp_index import domain_movers, keyword_overlap, share_of_voice
+from keywords.models import Keyword
+from keywords.rank_sink import RankResultSink
+from keywords.ranking_extractor import RankingExtractor
+from keywords.tasks import prune_serp_domain_index
+from project.models import Project
+
+
+def serp(*urls):
+    return {'organic_results': [{'url': url} for url in urls]}
+
+
+class SerpDomainIndexTestBase(TestCase):
+    """Project with a few keywords"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='serpuser', email='serp@example.com', password='testpass123')
+        self.project = Project.objects.create(user=self.user, domain='example.com', title='SERP index', active=True)
+        self.keywords = [
+            Keyword.objects.create(project=self.project, keyword=f'serp keyword {i}', country='US')
+            for i in range(3)
+        ]
+
+    def index(self, keyword, scraped_date, *domains):
+        SerpDomainRank.replace([
+            (self.project.id, keyword.id, scraped_date, SerpDomainRank.domain_positions(list(domains)))
+        ])
+
+
+@override_settings(SERP_DOMAIN_INDEX_ENABLED=True)
+class IndexingTest(SerpDomainIndexTestBase):
+    """Test cases for writing the index during rank extraction"""
+
+    def test_new_domains_are_inserted_in_name_order(self):
+        """Test concurrent flushes insert overlapping domains in the same order"""
+        with patch.object(SerpDomain.objects, 'bulk_create', wraps=SerpDomain.objects.bulk_create) as mock_create:
+            ids = SerpDomain.ids_for(['zeta.com', 'alpha.com', 'mid.org', 'beta.net'])
+
+        names = [domain.name for domain in mock_create.call_args.args[0]]
+        self.assertEqual(names, ['alpha.com', 'beta.net', 'mid.org', 'zeta.com'])
+        self.assertEqual(set(ids), set(names))
+
+    def test_extraction_indexes_best_position_per_domain(self):
+        """Test every domain of the top 100 is stored once with its first position"""
+        extractor = RankingExtractor()
+        scraped = timezone.make_aware(datetime(2025, 9, 1, 10))
+        parsed = serp('https://www.example.com/a', 'https://rival.com/x', 'https://example.com/b', 'https://other.org/')
+
+        extractor._index_serp_domains(self.keywords[0], parsed, scraped)
+
+        rows = dict(SerpDomainRank.objects.values_list('domain__name', 'position'))
+        self.assertEqual(rows, {'example.com': 1, 'rival.com': 2, 'other.org': 4})
+        self.assertEqual(set(SerpDomainRank.objects.values_list('scraped_date', flat=True)), {date(2025, 9, 1)})
+
+    def test_recrawl_replaces_the_day(self):
+        """Test a second crawl on the same day drops domains no longer ranking"""
+        self.index(self.keywords[0], date(2025, 9, 1), 'rival.com', 'gone.com')
+        self.index(self.keywords[0], date(2025, 9, 1), 'example.com', 'rival.com')
+
+        rows = dict(SerpDomainRank.objects.values_list('domain__name', 'position'))
+        self.assertEqual(rows, {'example.com': 1, 'rival.com': 2})
+        self.assertEqual(SerpDomain.objects.filter(name='gone.com').count(), 1)
+
+    def test_sink_writes_index_on_flush(self):
+        """Test staged index rows of several keywords are written with the batch"""
+        sink = RankResultSink()
+        scraped = timezone.make_aware(datetime(2025, 9, 1, 10))
+        for keyword in self.keywords[:2]:
+            sink.extractor._index_serp_domains(keyword, serp('https://rival.com/', 'https://example.com/'), scraped)
+        self.assertFalse(SerpDomainRank.objects.exists())
+
+        sink.flush()
+
+        self.assertEqual(SerpDomainRank.objects.count(), 4)
+        self.assertEqual(SerpDomain.objects.count(), 2)
+
+    @override_settings(SERP_DOMAIN_INDEX_ENABLED=False)
+    def test_disabled(self):
+        """Test nothing is indexed when the index is turned off"""
+        RankingExtractor()._index_serp_domains(self.keywords[0], serp('https://rival.com/'), timezone.now())
+
+        self.assertFalse(SerpDomainRank.objects.exists())
+
+
+class IndexQueriesTest(SerpDomainIndexTestBase):
+    """Test cases for share of voice, overlap and movers"""
+
+    def setUp(self):
+        super().setUp()
+        self.start, self.end = date(2025, 9, 1), date(2025, 9, 8)
+        self.index(self.keywords[0], self.start, 'rival.com', 'example.com', 'other.org')
+        self.index(self.keywords[1], self.start, 'example.com', 'other.org')
+        self.index(self.keywords[0], self.end, 'rival.com', 'example.com')
+        self.index(self.keywords[1], self.end, 'rival.com', 'other.org', 'example.com')
+        self.index(self.keywords[2], self.end, 'other.org')
+
+    def test_share_of_voice(self):
+        """Test domains are ranked by click-weighted visibility"""
+        rows = share_of_voice(self.project.id, self.end)
+
+        self.assertEqual([row['domain'] for row in rows], ['rival.com', 'other.org', 'example.com'])
+        rival = rows[0]
+        self.assertEqual((rival['keywords'], rival['avg_position'], rival['top_3']), (2, 1.0, 2))
+        self.assertEqual(rival['visibility'], 63.4)
+        self.assertAlmostEqual(sum(row['share'] for row in rows), 100, places=1)
+
+    def test_keyword_overlap(self):
+        """Test shared keywords and outranking are counted against the project domain"""
+        rows = {row['domain']: row for row in keyword_overlap(self.project.id, self.end, 'example.com')}
+
+        self.assertEqual(set(rows), {'rival.com', 'other.org'})
+        self.assertEqual((rows['rival.com']['shared_keywords'], rows['rival.com']['outranking']), (2, 2))
+        self.assertEqual((rows['other.org']['shared_keywords'], rows['other.org']['outranking']), (1, 1))
+        self.assertEqual(keyword_overlap(self.project.id, self.end, 'unknown.com'), [])
+
+    def test_domain_movers(self):
+        """Test gainers and losers are ordered by visibility change"""
+        gainers = domain_movers(self.project.id, self.start, self.end)
+        losers = domain_movers(self.project.id, self.start, self.end, gaining=False, limit=1)
+
+        self.assertEqual(gainers[0]['domain'], 'rival.com')
+        self.assertEqual((gainers[0]['start_keywords'], gainers[0]['end_keywords']), (1, 2))
+        self.assertEqual(gainers[0]['change'], 31.7 * 2 - 31.7)
+        self.assertEqual(losers[0]['domain'], 'example.com')
+
+    @patch('keywords.tasks.timezone.localdate', return_value=date(2025, 12, 1))
+    def test_prune(self, mock_localdate):
+        """Test rows past the retention are deleted"""
+        result = prune_serp_domain_index(batch_size=2)
+
+        self.assertEqual(result['deleted'], 5)
+        self.assertEqual(SerpDomainRank.objects.filter(scraped_date=self.end).count(), 6)